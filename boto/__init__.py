@@ -27,12 +27,9 @@ from boto.pyami.config import Config, BotoConfigLocations
 from boto.storage_uri import BucketStorageUri, FileStorageUri
 import boto.plugin
 import os
-import platform
 import re
 import sys
 import logging
-import logging.config
-import urlparse
 from boto.exception import InvalidUriError
 
 __version__ = '2.7.0-dev'
@@ -44,8 +41,14 @@ config = Config()
 
 def init_logging():
     for file in BotoConfigLocations:
+        path = os.path.expanduser(file)
+        if not os.path.isfile(path):
+            continue
+        # logging.config pulls in sockets, SSL and more; only import it
+        # when there is a config file to read.
+        import logging.config
         try:
-            logging.config.fileConfig(os.path.expanduser(file))
+            logging.config.fileConfig(path)
         except:
             pass
 
@@ -449,6 +452,7 @@ def connect_ec2_endpoint(url, aws_access_key_id=None,
     """
     from boto.ec2.regioninfo import RegionInfo
 
+    import urlparse
     purl = urlparse.urlparse(url)
     kwargs['port'] = purl.port
     kwargs['host'] = purl.hostname
@@ -684,6 +688,7 @@ def storage_uri(uri_str, default_scheme='file', debug=0, validate=True,
         colon_pos = uri_str.find(':')
         if colon_pos != -1:
             # Allow Windows path names including drive letter (C: etc.)
+            import platform
             drive_char = uri_str[0].lower()
             if not (platform.system().lower().startswith('windows')
                     and colon_pos == 1
@@ -738,5 +743,3 @@ def storage_uri_for_key(key):
     prov_name = key.bucket.connection.provider.get_provider_name()
     uri_str = '%s://%s/%s' % (prov_name, key.bucket.name, key.name)
     return storage_uri(uri_str)
-
-boto.plugin.load_plugins(config)
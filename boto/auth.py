@@ -26,6 +26,7 @@
 Handles authentication required to AWS and GS
 """
 
+from __future__ import with_statement
 import base64
 import boto
 import boto.auth_handler
@@ -38,6 +39,7 @@ import urllib
 import time
 import datetime
 import copy
+import threading
 from email.utils import formatdate
 
 from boto.auth_handler import AuthHandler
@@ -83,10 +85,12 @@ class HmacKeys(object):
 
     def update_provider(self, provider):
         self._provider = provider
-        self._hmac = hmac.new(self._provider.secret_key, digestmod=sha)
+        # The HMAC objects are keyed once per set of credentials and
+        # copied for each signature, which skips the key schedule.
+        self._hmac_key = self._provider.secret_key
+        self._hmac = hmac.new(self._hmac_key, digestmod=sha)
         if sha256:
-            self._hmac_256 = hmac.new(self._provider.secret_key,
-                                      digestmod=sha256)
+            self._hmac_256 = hmac.new(self._hmac_key, digestmod=sha256)
         else:
             self._hmac_256 = None
 
@@ -97,12 +101,14 @@ class HmacKeys(object):
             return 'HmacSHA1'
 
     def _get_hmac(self):
+        if self._provider.secret_key != self._hmac_key:
+            # The provider refreshed its credentials (e.g. from the
+            # instance metadata service); key new HMAC objects.
+            self.update_provider(self._provider)
         if self._hmac_256:
-            digestmod = sha256
+            return self._hmac_256.copy()
         else:
-            digestmod = sha
-        return hmac.new(self._provider.secret_key,
-                        digestmod=digestmod)
+            return self._hmac.copy()
 
     def sign_string(self, string_to_sign):
         new_hmac = self._get_hmac()
@@ -306,12 +312,35 @@ class HmacAuthV4Handler(AuthHandler, HmacKeys):
     def __init__(self, host, config, provider,
                  service_name=None, region_name=None):
         AuthHandler.__init__(self, host, config, provider)
+        self._signing_keys_lock = threading.Lock()
         HmacKeys.__init__(self, host, config, provider)
         # You can set the service_name and region_name to override the
         # values which would otherwise come from the endpoint, e.g.
         # <service>.<region>.amazonaws.com.
         self.service_name = service_name
         self.region_name = region_name
+        # Mapping from host to the (region_name, service_name) parsed
+        # from it, so that the endpoint is only split once.
+        self._host_scopes = {}
+
+    def update_provider(self, provider):
+        super(HmacAuthV4Handler, self).update_provider(provider)
+        # Mapping from (secret_key, date, region_name, service_name) to
+        # the derived signing key.  Keys only change when the date or
+        # the credentials do, so they are cached rather than re-derived
+        # for every request.  Replacing the dict drops every key derived
+        # from the old credentials.
+        self._signing_keys = {}
+
+    def __getstate__(self):
+        pickled_dict = super(HmacAuthV4Handler, self).__getstate__()
+        del pickled_dict['_signing_keys_lock']
+        return pickled_dict
+
+    def __setstate__(self, dct):
+        self._signing_keys_lock = threading.Lock()
+        super(HmacAuthV4Handler, self).__setstate__(dct)
+        self._signing_keys_lock = threading.Lock()
 
     def _sign(self, key, msg, hex=False):
         if hex:
@@ -408,18 +437,16 @@ class HmacAuthV4Handler(AuthHandler, HmacKeys):
         # The service_name and region_name either come from:
         # * The service_name/region_name attrs or (if these values are None)
         # * parsed from the endpoint <service>.<region>.amazonaws.com.
-        parts = http_request.host.split('.')
+        host_region_name, host_service_name = self._host_scope(
+            http_request.host)
         if self.region_name is not None:
             region_name = self.region_name
         else:
-            if len(parts) == 3:
-                region_name = 'us-east-1'
-            else:
-                region_name = parts[1]
+            region_name = host_region_name
         if self.service_name is not None:
             service_name = self.service_name
         else:
-            service_name = parts[0]
+            service_name = host_service_name
 
         http_request.service_name = service_name
         http_request.region_name = region_name
@@ -441,13 +468,45 @@ class HmacAuthV4Handler(AuthHandler, HmacKeys):
         sts.append(sha256(canonical_request).hexdigest())
         return '\n'.join(sts)
 
-    def signature(self, http_request, string_to_sign):
+    def _host_scope(self, host):
+        scope = self._host_scopes.get(host)
+        if scope is None:
+            parts = host.split('.')
+            if len(parts) == 3:
+                region_name = 'us-east-1'
+            else:
+                region_name = parts[1]
+            scope = (region_name, parts[0])
+            self._host_scopes[host] = scope
+        return scope
+
+    def signing_key(self, timestamp, region_name, service_name):
+        """
+        Return the key derived from the secret key for the given date
+        (YYYYMMDD), region and service, from the cache if possible.
+        """
         key = self._provider.secret_key
-        k_date = self._sign(('AWS4' + key).encode('utf-8'),
-                              http_request.timestamp)
-        k_region = self._sign(k_date, http_request.region_name)
-        k_service = self._sign(k_region, http_request.service_name)
-        k_signing = self._sign(k_service, 'aws4_request')
+        cache_key = (key, timestamp, region_name, service_name)
+        k_signing = self._signing_keys.get(cache_key)
+        if k_signing is None:
+            k_date = self._sign(('AWS4' + key).encode('utf-8'), timestamp)
+            k_region = self._sign(k_date, region_name)
+            k_service = self._sign(k_region, service_name)
+            k_signing = self._sign(k_service, 'aws4_request')
+            with self._signing_keys_lock:
+                signing_keys = self._signing_keys
+                # Once the UTC date rolls over, keys for earlier dates
+                # will not be used again.
+                for old_key in signing_keys.keys():
+                    if old_key[1] != timestamp:
+                        del signing_keys[old_key]
+                signing_keys[cache_key] = k_signing
+        return k_signing
+
+    def signature(self, http_request, string_to_sign):
+        k_signing = self.signing_key(http_request.timestamp,
+                                     http_request.region_name,
+                                     http_request.service_name)
         return self._sign(k_signing, string_to_sign, hex=True)
 
     def add_auth(self, req, **kwargs):
@@ -490,6 +549,82 @@ class HmacAuthV4Handler(AuthHandler, HmacKeys):
         req.headers['Authorization'] = ','.join(l)
 
 
+# Percent-encoding tables for the V2 query string.  Parameter names are
+# quoted like urllib.quote(name, safe='') and values like
+# urllib.quote(value, safe='-_~').
+_NAME_SAFE = ('ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+              'abcdefghijklmnopqrstuvwxyz'
+              '0123456789' '_.-')
+_VALUE_SAFE = _NAME_SAFE + '~'
+
+
+def _make_quote_table(safe):
+    table = {}
+    for i in range(256):
+        c = chr(i)
+        if c in safe:
+            table[c] = c
+        else:
+            table[c] = '%%%02X' % i
+    return table.__getitem__
+
+_quote_name_char = _make_quote_table(_NAME_SAFE)
+_quote_value_char = _make_quote_table(_VALUE_SAFE)
+
+# Parameter names and most parameter values repeat from request to
+# request (Action, Version, Attribute.1.Name, filter values...), so
+# their quoted forms are memoized.  Long values, such as message bodies,
+# are not.
+_QUOTE_MEMO_LIMIT = 4096
+_QUOTE_MEMO_MAX_VALUE = 128
+_quoted_names = {}
+_quoted_values = {}
+
+
+def _quote_param_name(name):
+    quoted = _quoted_names.get(name)
+    if quoted is None:
+        utf8_name = boto.utils.get_utf8_value(name)
+        if utf8_name.rstrip(_NAME_SAFE):
+            quoted = ''.join(map(_quote_name_char, utf8_name))
+        else:
+            quoted = utf8_name
+        if len(_quoted_names) >= _QUOTE_MEMO_LIMIT:
+            _quoted_names.clear()
+        _quoted_names[name] = quoted
+    return quoted
+
+
+def _quote_param_value(value):
+    quoted = _quoted_values.get(value)
+    if quoted is None:
+        if value.rstrip(_VALUE_SAFE):
+            quoted = ''.join(map(_quote_value_char, value))
+        else:
+            quoted = value
+        if len(value) <= _QUOTE_MEMO_MAX_VALUE:
+            if len(_quoted_values) >= _QUOTE_MEMO_LIMIT:
+                _quoted_values.clear()
+            _quoted_values[value] = quoted
+    return quoted
+
+
+def _v2_query_string(params):
+    """
+    Build the sorted, percent-encoded query string that Query signature
+    V2 signs, in a single pass over the parameters.
+    """
+    get_utf8_value = boto.utils.get_utf8_value
+    pairs = []
+    append = pairs.append
+    for key in sorted(params):
+        value = params[key]
+        if not isinstance(value, str):
+            value = get_utf8_value(value)
+        append(_quote_param_name(key) + '=' + _quote_param_value(value))
+    return '&'.join(pairs)
+
+
 class QuerySignatureHelper(HmacKeys):
     """
     Helper for Query signature based Auth handler.
@@ -554,6 +689,10 @@ class QuerySignatureV1AuthHandler(QuerySignatureHelper, AuthHandler):
         AuthHandler.__init__(self, *args, **kw)
         self._hmac_256 = None
 
+    def update_provider(self, provider):
+        super(QuerySignatureV1AuthHandler, self).update_provider(provider)
+        self._hmac_256 = None
+
     def _calc_signature(self, params, *args):
         boto.log.debug('using _calc_signature_1')
         hmac = self._get_hmac()
@@ -583,13 +722,7 @@ class QuerySignatureV2AuthHandler(QuerySignatureHelper, AuthHandler):
         params['SignatureMethod'] = self.algorithm()
         if self._provider.security_token:
             params['SecurityToken'] = self._provider.security_token
-        keys = sorted(params.keys())
-        pairs = []
-        for key in keys:
-            val = boto.utils.get_utf8_value(params[key])
-            pairs.append(urllib.quote(key, safe='') + '=' +
-                         urllib.quote(val, safe='-_~'))
-        qs = '&'.join(pairs)
+        qs = _v2_query_string(params)
         boto.log.debug('query string: %s' % qs)
         string_to_sign += qs
         boto.log.debug('string_to_sign: %s' % string_to_sign)
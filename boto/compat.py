@@ -26,3 +26,10 @@ try:
     import simplejson as json
 except ImportError:
     import json
+
+# memoryview is new in Python 2.7.  Code that reads into reusable buffers
+# checks for None and falls back to reading strings on Python 2.6.
+try:
+    memoryview = memoryview
+except NameError:
+    memoryview = None
@@ -45,11 +45,11 @@ Handles basic connections to AWS
 
 from __future__ import with_statement
 import base64
+import collections
 import errno
 import httplib
 import os
 import Queue
-import random
 import re
 import socket
 import sys
@@ -58,19 +58,21 @@ import urllib
 import urlparse
 import xml.sax
 import copy
+import weakref
 
 import auth
 import auth_handler
 import boto
 import boto.utils
 import boto.handler
-import boto.cacerts
+import boto.instrumentation
 
 from boto import config, UserAgent
 from boto.exception import AWSConnectionError, BotoClientError
-from boto.exception import BotoServerError
+from boto.exception import BotoServerError, CircuitBreakerOpenError
 from boto.provider import Provider
 from boto.resultset import ResultSet
+from boto.retry import RetryPolicy
 
 HAVE_HTTPS_CONNECTION = False
 try:
@@ -93,7 +95,10 @@ ON_APP_ENGINE = all(key in os.environ for key in (
 PORTS_BY_SECURITY = {True: 443,
                      False: 80}
 
-DEFAULT_CA_CERTS_FILE = os.path.join(os.path.dirname(os.path.abspath(boto.cacerts.__file__ )), "cacerts.txt")
+# The bundle ships in the boto.cacerts package, which does not need to be
+# imported to find it.
+DEFAULT_CA_CERTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     "cacerts", "cacerts.txt")
 
 
 class HostConnectionPool(object):
@@ -101,29 +106,46 @@ class HostConnectionPool(object):
     """
     A pool of connections for one remote (host,is_secure).
 
-    When connections are added to the pool, they are put into a
-    pending queue.  The _mexe method returns connections to the pool
-    before the response body has been read, so they connections aren't
-    ready to send another request yet.  They stay in the pending queue
-    until they are ready for another request, at which point they are
-    returned to the pool of ready connections.
-
-    The pool of ready connections is an ordered list of
-    (connection,time) pairs, where the time is the time the connection
-    was returned from _mexe.  After a certain period of time,
-    connections are considered stale, and discarded rather than being
-    reused.  This saves having to wait for the connection to time out
-    if AWS has decided to close it on the other end because of
-    inactivity.
+    When connections are added to the pool, they are pushed onto a
+    stack.  The _mexe method returns connections to the pool before
+    the response body has been read, so the connections aren't
+    necessarily ready to send another request yet.  A connection that
+    is found to be busy when it is checked out is moved to the bottom
+    of the stack, on the assumption that somebody is actively reading
+    the response, and the next one is tried.
+
+    The stack holds (connection,time) pairs, where the time is the time
+    the connection was returned from _mexe.  Connections are reused
+    last-in first-out so that the most recently used (and therefore
+    warmest) connection is handed out first.  After a certain period
+    of time, connections are considered stale, and discarded rather
+    than being reused.  This saves having to wait for the connection
+    to time out if AWS has decided to close it on the other end because
+    of inactivity.
+
+    The pool holds at most ``max_size`` idle connections; when it is
+    full, the oldest idle connection is evicted to make room.
+
+    The pool keeps counters of hits, misses and evictions, and tracks
+    the connections that are currently checked out, so that pool sizes
+    can be tuned from real numbers.
 
     Thread Safety:
 
-        This class is used only fram ConnectionPool while it's mutex
-        is held.
+        Each host pool has its own lock, so the ConnectionPool mutex
+        only needs to be held while looking up the host pool.
     """
 
-    def __init__(self):
-        self.queue = []
+    def __init__(self, max_size=None):
+        self.queue = collections.deque()
+        if max_size is None:
+            max_size = ConnectionPool.MAX_POOL_SIZE
+        self.max_size = max_size
+        self.mutex = threading.Lock()
+        self.in_use = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
     def size(self):
         """
@@ -136,29 +158,61 @@ class HostConnectionPool(object):
     def put(self, conn):
         """
         Adds a connection to the pool, along with the time it was
-        added.
+        added.  If the pool is full, the oldest connection is evicted;
+        if ``max_size`` is zero or less, the connection itself is.
         """
-        self.queue.append((conn, time.time()))
+        with self.mutex:
+            self.in_use.pop(conn, None)
+            if self.max_size <= 0:
+                self.evictions += 1
+                return
+            if len(self.queue) >= self.max_size:
+                # Note that we do not close the evicted connection --
+                # somebody may still be reading from it.
+                self.queue.popleft()
+                self.evictions += 1
+            self.queue.append((conn, time.time()))
 
     def get(self):
         """
-        Returns the next connection in this pool that is ready to be
-        reused.  Returns None of there aren't any.
+        Returns the most recently returned connection in this pool
+        that is ready to be reused.  Returns None if there aren't any.
         """
-        # Discard ready connections that are too old.
-        self.clean()
-
-        # Return the first connection that is ready, and remove it
-        # from the queue.  Connections that aren't ready are returned
-        # to the end of the queue with an updated time, on the
-        # assumption that somebody is actively reading the response.
-        for _ in range(len(self.queue)):
-            (conn, _) = self.queue.pop(0)
-            if self._conn_ready(conn):
-                return conn
-            else:
-                self.put(conn)
-        return None
+        now = time.time()
+        with self.mutex:
+            # Connections that aren't ready are moved to the bottom of
+            # the stack with an updated time, so they are not looked at
+            # again until everything above them has been handed out.
+            for _ in xrange(len(self.queue)):
+                (conn, return_time) = self.queue.pop()
+                if self._time_stale(return_time, now):
+                    self.evictions += 1
+                elif self._conn_ready(conn):
+                    self.hits += 1
+                    self.in_use[conn] = True
+                    return conn
+                else:
+                    self.queue.appendleft((conn, now))
+            self.misses += 1
+            return None
+
+    def mark_in_use(self, conn):
+        """
+        Records a newly created connection as checked out from this
+        pool.
+        """
+        with self.mutex:
+            self.in_use[conn] = True
+
+    def get_stats(self):
+        """
+        Returns a dict with the hits, misses, evictions, idle and
+        in_use counts of this pool.
+        """
+        with self.mutex:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'idle': len(self.queue),
+                    'in_use': len(self.in_use)}
 
     def _conn_ready(self, conn):
         """
@@ -189,8 +243,12 @@ class HostConnectionPool(object):
         """
         # Note that we do not close the connection here -- somebody
         # may still be reading from it.
-        while len(self.queue) > 0 and self._pair_stale(self.queue[0]):
-            self.queue.pop(0)
+        now = time.time()
+        with self.mutex:
+            fresh = [pair for pair in self.queue
+                     if not self._time_stale(pair[1], now)]
+            self.evictions += len(self.queue) - len(fresh)
+            self.queue = collections.deque(fresh)
 
     def _pair_stale(self, pair):
         """
@@ -198,10 +256,55 @@ class HostConnectionPool(object):
         used.
         """
         (_conn, return_time) = pair
-        now = time.time()
+        return self._time_stale(return_time, time.time())
+
+    def _time_stale(self, return_time, now):
         return return_time + ConnectionPool.STALE_DURATION < now
 
 
+class _PoolReaper(threading.Thread):
+
+    """
+    A daemon thread that periodically cleans every live ConnectionPool,
+    so that stale connections are evicted without the request path
+    having to walk the pools.  One reaper is shared by all the pools
+    in the process.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        threading.Thread.__init__(self, name='boto-pool-reaper')
+        self.daemon = True
+        self.pools = weakref.WeakKeyDictionary()
+        self.pools_lock = threading.Lock()
+
+    @classmethod
+    def register(cls, pool):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                cls._instance.start()
+            reaper = cls._instance
+        with reaper.pools_lock:
+            reaper.pools[pool] = True
+
+    def run(self):
+        while True:
+            time.sleep(ConnectionPool.CLEAN_INTERVAL)
+            with self.pools_lock:
+                pools = list(self.pools)
+            for pool in pools:
+                try:
+                    pool.clean()
+                except Exception:
+                    boto.log.debug('error cleaning connection pool',
+                                   exc_info=True)
+            # Don't keep the last pool alive until the next wakeup.
+            pools = pool = None
+
+
 class ConnectionPool(object):
 
     """
@@ -209,6 +312,10 @@ class ConnectionPool(object):
     time.  This saves time spent waiting for a connection that AWS has
     timed out on the other end.
 
+    Stale connections are evicted by a shared background thread rather
+    than on the request path (except on App Engine, where threads are
+    not available and pools are cleaned as connections are fetched).
+
     This class is thread-safe.
     """
 
@@ -231,16 +338,30 @@ class ConnectionPool(object):
 
     STALE_DURATION = 60.0
 
+    #
+    # The maximum number of idle connections kept for each host.  This
+    # can be overridden with the connection_pool_size config option.
+    #
+
+    MAX_POOL_SIZE = 20
+
     def __init__(self):
         # Mapping from (host,is_secure) to HostConnectionPool.
         # If a pool becomes empty, it is removed.
         self.host_to_pool = {}
+        # Counters of pools that have been removed, so that get_stats()
+        # does not go backwards when an idle host pool is dropped.
+        self._retired_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
         # The last time the pool was cleaned.
         self.last_clean_time = 0.0
         self.mutex = threading.Lock()
         ConnectionPool.STALE_DURATION = \
             config.getfloat('Boto', 'connection_stale_duration',
                             ConnectionPool.STALE_DURATION)
+        self.max_pool_size = config.getint('Boto', 'connection_pool_size',
+                                           ConnectionPool.MAX_POOL_SIZE)
+        if not ON_APP_ENGINE:
+            _PoolReaper.register(self)
 
     def __getstate__(self):
         pickled_dict = copy.copy(self.__dict__)
@@ -257,6 +378,40 @@ class ConnectionPool(object):
         """
         return sum(pool.size() for pool in self.host_to_pool.values())
 
+    def get_stats(self):
+        """
+        Returns the pool counters summed over all hosts, as a dict with
+        ``hits``, ``misses``, ``evictions``, ``idle`` and ``in_use``
+        keys.  Per-host counters are available from
+        :meth:`get_host_stats`.
+        """
+        stats = {'idle': 0, 'in_use': 0}
+        with self.mutex:
+            stats.update(self._retired_stats)
+            pools = self.host_to_pool.values()
+        for pool in pools:
+            for name, value in pool.get_stats().items():
+                stats[name] += value
+        return stats
+
+    def get_host_stats(self):
+        """
+        Returns a dict mapping (host,is_secure) to the counters of that
+        host's pool.
+        """
+        with self.mutex:
+            items = self.host_to_pool.items()
+        return dict((key, pool.get_stats()) for (key, pool) in items)
+
+    def _get_pool(self, host, is_secure):
+        key = (host, is_secure)
+        with self.mutex:
+            pool = self.host_to_pool.get(key)
+            if pool is None:
+                pool = HostConnectionPool(self.max_pool_size)
+                self.host_to_pool[key] = pool
+            return pool
+
     def get_http_connection(self, host, is_secure):
         """
         Gets a connection from the pool for the named host.  Returns
@@ -264,43 +419,52 @@ class ConnectionPool(object):
         responsibility to call close() on the connection when it's no longer
         needed.
         """
-        self.clean()
-        with self.mutex:
-            key = (host, is_secure)
-            if key not in self.host_to_pool:
-                return None
-            return self.host_to_pool[key].get()
+        if ON_APP_ENGINE:
+            self.clean()
+        return self._get_pool(host, is_secure).get()
 
     def put_http_connection(self, host, is_secure, conn):
         """
         Adds a connection to the pool of connections that can be
         reused for the named host.
         """
-        with self.mutex:
-            key = (host, is_secure)
-            if key not in self.host_to_pool:
-                self.host_to_pool[key] = HostConnectionPool()
-            self.host_to_pool[key].put(conn)
+        self._get_pool(host, is_secure).put(conn)
+
+    def mark_in_use(self, host, is_secure, conn):
+        """
+        Records a connection that was created outside of the pool as
+        checked out for the named host, so that it is counted in the
+        ``in_use`` statistic until it is put back or discarded.
+        """
+        self._get_pool(host, is_secure).mark_in_use(conn)
 
     def clean(self):
         """
         Clean up the stale connections in all of the pools, and then
-        get rid of empty pools.  Pools clean themselves every time a
-        connection is fetched; this cleaning takes care of pools that
-        aren't being used any more, so nothing is being gotten from
-        them.
+        get rid of empty pools.  This is normally called by a background
+        thread every CLEAN_INTERVAL seconds, so that the request path
+        never has to walk the pools.
         """
+        now = time.time()
         with self.mutex:
-            now = time.time()
-            if self.last_clean_time + self.CLEAN_INTERVAL < now:
-                to_remove = []
-                for (host, pool) in self.host_to_pool.items():
-                    pool.clean()
-                    if pool.size() == 0:
-                        to_remove.append(host)
-                for host in to_remove:
-                    del self.host_to_pool[host]
-                self.last_clean_time = now
+            if self.last_clean_time + self.CLEAN_INTERVAL >= now:
+                return
+            self.last_clean_time = now
+            items = self.host_to_pool.items()
+        to_remove = []
+        for (key, pool) in items:
+            pool.clean()
+            if pool.size() == 0 and len(pool.in_use) == 0:
+                to_remove.append(key)
+        with self.mutex:
+            for key in to_remove:
+                pool = self.host_to_pool.get(key)
+                if pool is None or pool.size() or len(pool.in_use):
+                    continue
+                del self.host_to_pool[key]
+                stats = pool.get_stats()
+                for name in self._retired_stats:
+                    self._retired_stats[name] += stats[name]
 
 
 class HTTPRequest(object):
@@ -464,6 +628,16 @@ class AWSAuthConnection(object):
         """
         self.suppress_consec_slashes = suppress_consec_slashes
         self.num_retries = 6
+        # Decides how failed requests are backed off and retried.
+        self.retry_policy = RetryPolicy.from_config()
+        # Called with a boto.instrumentation.RequestRecord for each request.
+        self.request_listeners = []
+        # Whether XML responses are parsed incrementally as they are
+        # read from the socket, rather than read fully and then parsed.
+        self.streaming_parse = config.getbool('Boto', 'streaming_parse',
+                                              False)
+        # The boto.handler.PARSERS backend used for XML responses.
+        self.xml_parser = config.get('Boto', 'xml_parser', 'sax')
         # Override passed-in is_secure setting if value was defined in config.
         if config.has_option('Boto', 'is_secure'):
             is_secure = config.getboolean('Boto', 'is_secure')
@@ -677,6 +851,7 @@ class AWSAuthConnection(object):
             return self.new_http_connection(host, is_secure)
 
     def new_http_connection(self, host, is_secure):
+        pool_key = (host or self.server_name(), is_secure)
         if self.use_proxy and not is_secure:
             host = '%s:%d' % (self.proxy, int(self.proxy_port))
         if host is None:
@@ -717,11 +892,31 @@ class AWSAuthConnection(object):
         # Set the response class of the http connection to use our custom
         # class.
         connection.response_class = HTTPResponse
+        self._pool.mark_in_use(pool_key[0], pool_key[1], connection)
         return connection
 
     def put_http_connection(self, host, is_secure, connection):
         self._pool.put_http_connection(host, is_secure, connection)
 
+    def add_request_listener(self, listener):
+        """
+        Calls ``listener`` with a
+        :class:`boto.instrumentation.RequestRecord` describing each
+        request made by this connection.
+        """
+        self.request_listeners.append(listener)
+
+    def remove_request_listener(self, listener):
+        self.request_listeners.remove(listener)
+
+    def get_pool_stats(self):
+        """
+        Returns the hit, miss, eviction, idle and in-use counters of
+        this connection's pool.  See
+        :meth:`boto.connection.ConnectionPool.get_stats`.
+        """
+        return self._pool.get_stats()
+
     def proxy_ssl(self, host=None, port=None):
         if host and port:
             host = '%s:%d' % (host, port)
@@ -806,6 +1001,27 @@ class AWSAuthConnection(object):
         Google group by Larry Bates.  Thanks!
 
         """
+        record = boto.instrumentation.start_record(self, request)
+        if record is None:
+            return self._mexe_with_retries(request, sender,
+                                           override_num_retries,
+                                           retry_handler, None)
+        try:
+            response = self._mexe_with_retries(request, sender,
+                                               override_num_retries,
+                                               retry_handler, record)
+        except Exception:
+            exc_info = sys.exc_info()
+            record.error = exc_info[0].__name__
+            record.finish()
+            raise exc_info[0], exc_info[1], exc_info[2]
+        record.set_response(response)
+        response.request_record = record
+        record.finish()
+        return response
+
+    def _mexe_with_retries(self, request, sender, override_num_retries,
+                           retry_handler, record):
         boto.log.debug('Method: %s' % request.method)
         boto.log.debug('Path: %s' % request.path)
         boto.log.debug('Data: %s' % request.body)
@@ -819,21 +1035,41 @@ class AWSAuthConnection(object):
         else:
             num_retries = override_num_retries
         i = 0
+        next_sleep = 0
+        policy = self.retry_policy
         connection = self.get_http_connection(request.host, self.is_secure)
+        if record is not None:
+            record.checkout = time.time() - record.start
         while i <= num_retries:
-            # Use binary exponential backoff to desynchronize client requests
-            next_sleep = random.random() * (2 ** i)
+            next_sleep = policy.backoff(i, next_sleep)
+            try:
+                policy.before_request(request.host)
+            except CircuitBreakerOpenError:
+                # Don't leave the connection checked out of the pool.
+                self.put_http_connection(request.host, self.is_secure,
+                                         connection)
+                raise
             try:
                 # we now re-sign each request before it is retried
                 boto.log.debug('Token: %s' % self.provider.security_token)
                 request.authorize(connection=self)
+                if record is not None:
+                    self._timed_connect(record, connection)
+                    sent = time.time()
                 if callable(sender):
                     response = sender(connection, request.method, request.path,
                                       request.body, request.headers)
+                    if record is not None:
+                        record.send = time.time() - sent
                 else:
                     connection.request(request.method, request.path,
                                        request.body, request.headers)
+                    if record is not None:
+                        received = time.time()
+                        record.send = received - sent
                     response = connection.getresponse()
+                    if record is not None:
+                        record.ttfb = time.time() - received
                 location = response.getheader('location')
                 # -- gross hack --
                 # httplib gets confused with chunked responses to HEAD requests
@@ -847,15 +1083,34 @@ class AWSAuthConnection(object):
                         msg, i, next_sleep = status
                         if msg:
                             boto.log.debug(msg)
+                        if record is not None:
+                            record.add_retry(i, msg, next_sleep)
                         time.sleep(next_sleep)
                         continue
-                if response.status == 500 or response.status == 503:
+                status = policy.check_response(request.host, response, i,
+                                               next_sleep, num_retries)
+                if status:
+                    msg, i, next_sleep = status
+                    boto.log.debug(msg)
+                    if record is not None:
+                        record.add_retry(i, msg, next_sleep)
+                    time.sleep(next_sleep)
+                    continue
+                if policy.is_retryable(response):
                     msg = 'Received %d response.  ' % response.status
                     msg += 'Retrying in %3.1f seconds' % next_sleep
                     boto.log.debug(msg)
+                    if record is not None:
+                        record.add_retry(i, 'HTTP %d' % response.status,
+                                         next_sleep)
                     body = response.read()
+                    policy.record_failure(request.host)
+                    if i < num_retries and \
+                            not policy.allow_retry(request.host):
+                        break
                 elif response.status < 300 or response.status >= 400 or \
                         not location:
+                    policy.record_success(request.host)
                     self.put_http_connection(request.host, self.is_secure,
                                              connection)
                     return response
@@ -878,8 +1133,14 @@ class AWSAuthConnection(object):
                             'encountered unretryable %s exception, re-raising' %
                             e.__class__.__name__)
                         raise e
+                policy.record_failure(request.host)
+                if i < num_retries and \
+                        not policy.allow_retry(request.host, error=True):
+                    raise e
                 boto.log.debug('encountered %s exception, reconnecting' % \
                                   e.__class__.__name__)
+                if record is not None:
+                    record.add_retry(i, e.__class__.__name__, next_sleep)
                 connection = self.new_http_connection(request.host,
                                                       self.is_secure)
             time.sleep(next_sleep)
@@ -896,6 +1157,32 @@ class AWSAuthConnection(object):
             msg = 'Please report this exception as a Boto Issue!'
             raise BotoClientError(msg)
 
+    def _timed_connect(self, record, connection):
+        record.attempts += 1
+        reused = getattr(connection, 'sock', None) is not None
+        if record.attempts == 1:
+            record.pool_hit = reused
+        if reused:
+            return
+        start = time.time()
+        connection.connect()
+        record.connect = time.time() - start
+        handshake = getattr(connection, 'handshake_time', None)
+        if handshake is not None:
+            record.handshake = handshake
+            record.connect -= handshake
+
+    def _mexe_async(self, request, override_num_retries=None,
+                    retry_handler=None, loop=None):
+        """
+        Non-blocking version of :meth:`_mexe`.  Returns a
+        :class:`boto.nonblocking.Future` for the response, driven by
+        ``loop`` (the calling thread's default event loop if omitted).
+        """
+        from boto.nonblocking import MultiExecute
+        return MultiExecute(self, request, override_num_retries,
+                            retry_handler, loop).start()
+
     def build_base_http_request(self, method, path, auth_path,
                                 params=None, headers=None, data='', host=None):
         path = self.get_path(path)
@@ -931,6 +1218,22 @@ class AWSAuthConnection(object):
                                                     params, headers, data, host)
         return self._mexe(http_request, sender, override_num_retries)
 
+    def make_request_async(self, method, path, headers=None, data='',
+                           host=None, auth_path=None,
+                           override_num_retries=None, params=None,
+                           loop=None):
+        """
+        Like :meth:`make_request`, but returns a
+        :class:`boto.nonblocking.Future` instead of blocking.  The
+        request body must be a string.
+        """
+        if params is None:
+            params = {}
+        http_request = self.build_base_http_request(method, path, auth_path,
+                                                    params, headers, data, host)
+        return self._mexe_async(http_request, override_num_retries,
+                                loop=loop)
+
     def close(self):
         """(Optional) Close any open HTTP connections.  This is non-destructive,
         and making a new request will open a connection again."""
@@ -963,7 +1266,7 @@ class AWSQueryConnection(AWSAuthConnection):
     def get_utf8_value(self, value):
         return boto.utils.get_utf8_value(value)
 
-    def make_request(self, action, params=None, path='/', verb='GET'):
+    def _build_query_request(self, action, params, path, verb):
         http_request = self.build_base_http_request(verb, path, None,
                                                     params, {}, '',
                                                     self.server_name())
@@ -971,8 +1274,21 @@ class AWSQueryConnection(AWSAuthConnection):
             http_request.params['Action'] = action
         if self.APIVersion:
             http_request.params['Version'] = self.APIVersion
+        return http_request
+
+    def make_request(self, action, params=None, path='/', verb='GET'):
+        http_request = self._build_query_request(action, params, path, verb)
         return self._mexe(http_request)
 
+    def make_request_async(self, action, params=None, path='/', verb='GET',
+                           loop=None):
+        """
+        Like :meth:`make_request`, but returns a
+        :class:`boto.nonblocking.Future` for the response.
+        """
+        http_request = self._build_query_request(action, params, path, verb)
+        return self._mexe_async(http_request, loop=loop)
+
     def build_list_params(self, params, items, label):
         if isinstance(items, basestring):
             items = [items]
@@ -1023,59 +1339,103 @@ class AWSQueryConnection(AWSAuthConnection):
 
     def get_list(self, action, params, markers, path='/',
                  parent=None, verb='GET'):
-        if not parent:
-            parent = self
-        response = self.make_request(action, params, path, verb)
-        body = response.read()
-        boto.log.debug(body)
-        if not body:
-            boto.log.error('Null body %s' % body)
-            raise self.ResponseError(response.status, response.reason, body)
-        elif response.status == 200:
-            rs = ResultSet(markers)
-            h = boto.handler.XmlHandler(rs, parent)
-            xml.sax.parseString(body, h)
-            return rs
-        else:
-            boto.log.error('%s %s' % (response.status, response.reason))
-            boto.log.error('%s' % body)
-            raise self.ResponseError(response.status, response.reason, body)
+        with boto.instrumentation.request_scope(self):
+            response = self.make_request(action, params, path, verb)
+            return self._process_list_response(response, markers, parent)
 
     def get_object(self, action, params, cls, path='/',
                    parent=None, verb='GET'):
-        if not parent:
-            parent = self
-        response = self.make_request(action, params, path, verb)
+        with boto.instrumentation.request_scope(self):
+            response = self.make_request(action, params, path, verb)
+            return self._process_object_response(response, cls, parent)
+
+    def get_status(self, action, params, path='/', parent=None, verb='GET'):
+        with boto.instrumentation.request_scope(self):
+            response = self.make_request(action, params, path, verb)
+            return self._process_status_response(response, parent)
+
+    def get_list_async(self, action, params, markers, path='/',
+                       parent=None, verb='GET', loop=None):
+        """
+        Non-blocking version of :meth:`get_list`.  Returns a
+        :class:`boto.nonblocking.Future` for the ResultSet.
+        """
+        future = self.make_request_async(action, params, path, verb, loop)
+        return future.then(lambda response: self._process_list_response(
+            response, markers, parent))
+
+    def get_object_async(self, action, params, cls, path='/',
+                         parent=None, verb='GET', loop=None):
+        """
+        Non-blocking version of :meth:`get_object`.  Returns a
+        :class:`boto.nonblocking.Future` for the object.
+        """
+        future = self.make_request_async(action, params, path, verb, loop)
+        return future.then(lambda response: self._process_object_response(
+            response, cls, parent))
+
+    def get_status_async(self, action, params, path='/', parent=None,
+                         verb='GET', loop=None):
+        """
+        Non-blocking version of :meth:`get_status`.  Returns a
+        :class:`boto.nonblocking.Future` for the status.
+        """
+        future = self.make_request_async(action, params, path, verb, loop)
+        return future.then(lambda response: self._process_status_response(
+            response, parent))
+
+    def _parse_response(self, response, h):
+        record = boto.instrumentation.response_record(response)
+        if self.streaming_parse and response.status == 200:
+            start = time.time()
+            size = boto.handler.parse_stream(response, h,
+                                             parser=self.xml_parser)
+            if not size:
+                boto.log.error('Null body')
+                raise self.ResponseError(response.status, response.reason,
+                                         '')
+            if record is not None:
+                # Reading and parsing overlap, so they are one phase.
+                record.parse = time.time() - start
+                record.bytes_in = size
+            return
+        if record is not None:
+            start = time.time()
         body = response.read()
+        if record is not None:
+            record.body = time.time() - start
+            record.bytes_in = len(body)
         boto.log.debug(body)
         if not body:
             boto.log.error('Null body %s' % body)
             raise self.ResponseError(response.status, response.reason, body)
-        elif response.status == 200:
-            obj = cls(parent)
-            h = boto.handler.XmlHandler(obj, parent)
-            xml.sax.parseString(body, h)
-            return obj
-        else:
+        elif response.status != 200:
             boto.log.error('%s %s' % (response.status, response.reason))
             boto.log.error('%s' % body)
             raise self.ResponseError(response.status, response.reason, body)
+        if record is not None:
+            start = time.time()
+        boto.handler.parse_string(body, h, self.xml_parser)
+        if record is not None:
+            record.parse = time.time() - start
 
-    def get_status(self, action, params, path='/', parent=None, verb='GET'):
+    def _process_list_response(self, response, markers, parent=None):
         if not parent:
             parent = self
-        response = self.make_request(action, params, path, verb)
-        body = response.read()
-        boto.log.debug(body)
-        if not body:
-            boto.log.error('Null body %s' % body)
-            raise self.ResponseError(response.status, response.reason, body)
-        elif response.status == 200:
-            rs = ResultSet()
-            h = boto.handler.XmlHandler(rs, parent)
-            xml.sax.parseString(body, h)
-            return rs.status
-        else:
-            boto.log.error('%s %s' % (response.status, response.reason))
-            boto.log.error('%s' % body)
-            raise self.ResponseError(response.status, response.reason, body)
+        rs = ResultSet(markers)
+        self._parse_response(response, boto.handler.XmlHandler(rs, parent))
+        return rs
+
+    def _process_object_response(self, response, cls, parent=None):
+        if not parent:
+            parent = self
+        obj = cls(parent)
+        self._parse_response(response, boto.handler.XmlHandler(obj, parent))
+        return obj
+
+    def _process_status_response(self, response, parent=None):
+        if not parent:
+            parent = self
+        rs = ResultSet()
+        self._parse_response(response, boto.handler.XmlHandler(rs, parent))
+        return rs.status
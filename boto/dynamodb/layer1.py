@@ -20,12 +20,14 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
 # IN THE SOFTWARE.
 #
+from __future__ import with_statement
 import time
 from binascii import crc32
 
 import boto
+import boto.instrumentation
 from boto.connection import AWSAuthConnection
-from boto.exception import DynamoDBResponseError
+from boto.exception import BotoServerError, DynamoDBResponseError
 from boto.provider import Provider
 from boto.dynamodb import exceptions as dynamodb_exceptions
 from boto.compat import json
@@ -71,6 +73,9 @@ class Layer1(AWSAuthConnection):
     NumberRetries = 10
     """The number of times an error is retried."""
 
+    ThruputBaseBackoff = 0.05
+    """The base of the backoff of throttled requests with legacy jitter."""
+
     def __init__(self, aws_access_key_id=None, aws_secret_access_key=None,
                  is_secure=True, port=None, proxy=None, proxy_port=None,
                  debug=0, security_token=None, region=None,
@@ -101,29 +106,65 @@ class Layer1(AWSAuthConnection):
     def _required_auth_capability(self):
         return ['hmac-v4']
 
-    def make_request(self, action, body='', object_hook=None):
-        """
-        :raises: ``DynamoDBExpiredTokenError`` if the security token expires.
-        """
+    def _build_request(self, action, body):
         headers = {'X-Amz-Target': '%s_%s.%s' % (self.ServiceName,
                                                  self.Version, action),
                    'Host': self.region.endpoint,
                    'Content-Type': 'application/x-amz-json-1.0',
                    'Content-Length': str(len(body))}
-        http_request = self.build_base_http_request('POST', '/', '/',
-                                                    {}, headers, body, None)
-        start = time.time()
-        response = self._mexe(http_request, sender=None,
-                              override_num_retries=self.NumberRetries,
-                              retry_handler=self._retry_handler)
+        return self.build_base_http_request('POST', '/', '/',
+                                            {}, headers, body,
+                                            self.server_name())
+
+    def _process_response(self, http_request, response, start, object_hook):
         elapsed = (time.time() - start) * 1000
         request_id = response.getheader('x-amzn-RequestId')
         boto.log.debug('RequestId: %s' % request_id)
         boto.perflog.debug('%s: id=%s time=%sms',
-                           headers['X-Amz-Target'], request_id, int(elapsed))
+                           http_request.headers['X-Amz-Target'], request_id,
+                           int(elapsed))
+        record = boto.instrumentation.response_record(response)
+        if record is None:
+            response_body = response.read()
+            boto.log.debug(response_body)
+            return json.loads(response_body, object_hook=object_hook)
+        start = time.time()
         response_body = response.read()
+        record.body = time.time() - start
+        record.bytes_in = len(response_body)
         boto.log.debug(response_body)
-        return json.loads(response_body, object_hook=object_hook)
+        start = time.time()
+        result = json.loads(response_body, object_hook=object_hook)
+        record.parse = time.time() - start
+        return result
+
+    def make_request(self, action, body='', object_hook=None):
+        """
+        :raises: ``DynamoDBExpiredTokenError`` if the security token expires.
+        """
+        http_request = self._build_request(action, body)
+        start = time.time()
+        with boto.instrumentation.request_scope(self):
+            response = self._mexe(http_request, sender=None,
+                                  override_num_retries=self.NumberRetries,
+                                  retry_handler=self._retry_handler)
+            return self._process_response(http_request, response, start,
+                                          object_hook)
+
+    def make_request_async(self, action, body='', object_hook=None,
+                           loop=None):
+        """
+        Non-blocking version of :meth:`make_request`.  Returns a
+        :class:`boto.nonblocking.Future` for the decoded response.
+        """
+        http_request = self._build_request(action, body)
+        start = time.time()
+        future = self._mexe_async(http_request,
+                                  override_num_retries=self.NumberRetries,
+                                  retry_handler=self._retry_handler,
+                                  loop=loop)
+        return future.then(lambda response: self._process_response(
+            http_request, response, start, object_hook))
 
     def _retry_handler(self, response, i, next_sleep):
         status = None
@@ -133,14 +174,17 @@ class Layer1(AWSAuthConnection):
             data = json.loads(response_body)
             if self.ThruputError in data.get('__type'):
                 self.throughput_exceeded_events += 1
-                msg = "%s, retry attempt %s" % (self.ThruputError, i)
-                next_sleep = self._exponential_time(i)
-                i += 1
-                status = (msg, i, next_sleep)
-                if i == self.NumberRetries:
-                    # If this was our last retry attempt, raise
-                    # a specific error saying that the throughput
-                    # was exceeded.
+                # Throttling is always retried, NumberRetries attempts in
+                # all, and by default on DynamoDB's own short schedule.
+                try:
+                    return self.retry_policy.check_response(
+                        self.server_name(), response, i, next_sleep,
+                        self.NumberRetries - 1, retry_throttled=True,
+                        legacy_base=self.ThruputBaseBackoff)
+                except BotoServerError:
+                    # If this was our last retry attempt, or the retry
+                    # budget is used up, raise a specific error saying
+                    # that the throughput was exceeded.
                     raise dynamodb_exceptions.DynamoDBThroughputExceededError(
                         response.status, response.reason, data)
             elif self.SessionExpiredError in data.get('__type'):
@@ -474,3 +474,16 @@ class TooManyRecordsException(Exception):
     def __init__(self, message):
         Exception.__init__(self, message)
         self.message = message
+
+class CircuitBreakerOpenError(BotoClientError):
+    """
+    Raised instead of sending a request to an endpoint whose circuit
+    breaker is open.
+    """
+
+    def __init__(self, endpoint, retry_after):
+        BotoClientError.__init__(
+            self, 'Circuit breaker for %s is open, retry in %.1f seconds' %
+            (endpoint, retry_after))
+        self.endpoint = endpoint
+        self.retry_after = retry_after
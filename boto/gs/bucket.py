@@ -93,7 +93,9 @@ class Bucket(S3Bucket):
     def copy_key(self, new_key_name, src_bucket_name, src_key_name,
                  metadata=None, src_version_id=None, storage_class='STANDARD',
                  preserve_acl=False, encrypt_key=False, headers=None,
-                 query_args=None, src_generation=None):
+                 query_args=None, src_generation=None, src_size=None):
+        # src_size is accepted for Key.copy, but GS has no multipart
+        # copy, so every key is copied in one request.
         if src_generation:
             if headers is None:
                 headers = {}
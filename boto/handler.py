@@ -20,6 +20,145 @@
 # IN THE SOFTWARE.
 
 import xml.sax
+from xml.sax.xmlreader import AttributesImpl
+
+try:
+    import xml.parsers.expat as expat
+except ImportError:
+    expat = None
+
+#: The number of bytes read from a response per parser feed when
+#: responses are parsed incrementally.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+#: The XML parser backends.  ``sax`` uses xml.sax; ``expat`` drives the
+#: handler straight from pyexpat's callbacks, which skips the Python
+#: level SAX driver and delivers each run of text in one piece.  Both
+#: produce the same objects.
+PARSERS = ('sax', 'expat')
+
+
+def parse_string(body, handler, parser='sax'):
+    """
+    Parse the XML document ``body`` with ``handler``, using the
+    ``parser`` backend (see :data:`PARSERS`).  Malformed documents raise
+    xml.sax.SAXParseException with either backend.
+    """
+    if parser == 'expat' and expat is not None:
+        driver = _ExpatDriver(handler)
+        driver.feed(body, True)
+    else:
+        xml.sax.parseString(body, handler)
+
+
+def parse_stream(fp, handler, chunk_size=STREAM_CHUNK_SIZE, parser='sax'):
+    """
+    Parse the XML document read from the file-like object ``fp`` (an
+    HTTP response, for instance) with ``handler``, feeding it to an
+    incremental parser as it arrives instead of reading it into memory
+    first.  Returns the number of bytes parsed, which is 0 for an
+    empty document.
+    """
+    if parser == 'expat' and expat is not None:
+        sax_parser = _ExpatDriver(handler)
+    else:
+        sax_parser = xml.sax.make_parser()
+        sax_parser.setContentHandler(handler)
+    total = 0
+    while True:
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        sax_parser.feed(chunk)
+    if total:
+        sax_parser.close()
+    return total
+
+
+# Passed to startElement for the (usual) elements without attributes.
+_NO_ATTRS = AttributesImpl({})
+
+
+class _ExpatLocator(object):
+    """Enough of a SAX Locator to build a SAXParseException."""
+
+    def __init__(self, parser):
+        self.parser = parser
+
+    def getColumnNumber(self):
+        return self.parser.ErrorColumnNumber
+
+    def getLineNumber(self):
+        return self.parser.ErrorLineNumber
+
+    def getPublicId(self):
+        return None
+
+    def getSystemId(self):
+        return None
+
+
+class _ExpatDriver(object):
+    """
+    Feeds a document to pyexpat and calls ``handler`` like xml.sax
+    would.  For a plain XmlHandler the callbacks update the node stack
+    directly rather than going through its methods.
+    """
+
+    def __init__(self, handler):
+        self.parser = parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.buffer_size = STREAM_CHUNK_SIZE
+        if type(handler) is XmlHandler:
+            self._bind_xml_handler(handler)
+        else:
+            self._bind_content_handler(handler)
+
+    def _bind_xml_handler(self, handler):
+        nodes = handler.nodes
+        connection = handler.connection
+        text = []
+
+        def start(name, attrs):
+            del text[:]
+            if attrs:
+                attrs = AttributesImpl(attrs)
+            else:
+                attrs = _NO_ATTRS
+            new_node = nodes[-1][1].startElement(name, attrs, connection)
+            if new_node != None:
+                nodes.append((name, new_node))
+
+        def end(name):
+            node_name, node = nodes[-1]
+            node.endElement(name, ''.join(text), connection)
+            if node_name == name:
+                nodes.pop()
+            del text[:]
+
+        self.parser.StartElementHandler = start
+        self.parser.EndElementHandler = end
+        self.parser.CharacterDataHandler = text.append
+
+    def _bind_content_handler(self, handler):
+        def start(name, attrs):
+            handler.startElement(name, AttributesImpl(attrs))
+
+        self.parser.StartElementHandler = start
+        self.parser.EndElementHandler = handler.endElement
+        self.parser.CharacterDataHandler = handler.characters
+
+    def feed(self, data, is_final=False):
+        try:
+            self.parser.Parse(data, is_final)
+        except expat.ExpatError, e:
+            raise xml.sax.SAXParseException(expat.ErrorString(e.code), e,
+                                            _ExpatLocator(self.parser))
+
+    def close(self):
+        self.feed('', True)
+
 
 class XmlHandler(xml.sax.ContentHandler):
 
@@ -23,6 +23,7 @@ import httplib
 import re
 import socket
 import ssl
+import time
 
 import boto
 
@@ -109,10 +110,13 @@ class CertValidatingHTTPSConnection(httplib.HTTPConnection):
     sock.connect((self.host, self.port))
     boto.log.debug("wrapping ssl socket; CA certificate file=%s",
                    self.ca_certs)
+    start = time.time()
     self.sock = ssl.wrap_socket(sock, keyfile=self.key_file,
                                 certfile=self.cert_file,
                                 cert_reqs=ssl.CERT_REQUIRED,
                                 ca_certs=self.ca_certs)
+    # Read by the request instrumentation in boto.connection.
+    self.handshake_time = time.time() - start
     cert = self.sock.getpeercert()
     hostname = self.host.split(':', 0)[0]
     if not ValidateCertificateHostname(cert, hostname):
@@ -0,0 +1,330 @@
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+
+"""
+Per-request timing records.
+
+Every request sent by :meth:`boto.connection.AWSAuthConnection._mexe`
+can be described by a :class:`RequestRecord`, which is passed to the
+registered listeners once boto is done with the response.  Listeners
+are plain callables and can be registered for every connection::
+
+    >>> import boto.instrumentation
+    >>> histogram = boto.instrumentation.LatencyHistogram()
+    >>> boto.instrumentation.add_listener(histogram)
+
+or for a single connection::
+
+    >>> conn.add_request_listener(histogram)
+
+No records are created while no listener is registered.
+
+Listeners are called on the thread that made the request, so they
+should be quick; exceptions they raise are logged and ignored.
+"""
+
+from __future__ import with_statement
+import math
+import time
+
+import boto
+
+try:
+    import threading
+except ImportError:
+    import dummy_threading as threading
+
+#: Listeners called for the requests of every connection.
+listeners = []
+
+#: The phases a RequestRecord may time, in seconds.
+PHASES = ('checkout', 'connect', 'handshake', 'send', 'ttfb', 'body',
+          'parse', 'total')
+
+_local = threading.local()
+
+
+def add_listener(listener):
+    """Calls ``listener(record)`` for the requests of every connection."""
+    listeners.append(listener)
+
+
+def remove_listener(listener):
+    listeners.remove(listener)
+
+
+def start_record(connection, request):
+    """
+    Returns a new RequestRecord for ``request``, or None if nobody is
+    listening.
+    """
+    if not listeners and not connection.request_listeners:
+        return None
+    return RequestRecord(connection, request)
+
+
+class RequestRecord(object):
+    """
+    The timings of one request, including all of its retries.
+
+    The phase attributes (see :data:`PHASES`) are in seconds and are
+    None when the phase did not happen or could not be measured.
+    ``connect`` and ``handshake`` are only set when the request had to
+    open a new connection; for HTTPS connections that do not validate
+    certificates ``connect`` includes the TLS handshake.  ``body`` and
+    ``parse`` are only set when boto itself reads and parses the
+    response, e.g. in ``get_list`` or DynamoDB's ``make_request``.
+
+    ``retries`` is a list of ``(attempt, reason, sleep)`` tuples.
+    """
+
+    def __init__(self, connection, request):
+        self.start = time.time()
+        self.listeners = listeners + connection.request_listeners
+        self.service = service_name(connection)
+        self.operation = operation_name(request)
+        self.host = request.host
+        self.method = request.method
+        self.status = None
+        self.request_id = None
+        self.pool_hit = None
+        self.attempts = 0
+        self.retries = []
+        self.error = None
+        body = request.body
+        if isinstance(body, basestring):
+            self.bytes_out = len(body)
+        else:
+            self.bytes_out = None
+        self.bytes_in = None
+        for phase in PHASES:
+            setattr(self, phase, None)
+        self._finished = False
+
+    def __repr__(self):
+        return '<RequestRecord %s %s %s %s %.1fms>' % (
+            self.service, self.operation, self.host, self.status,
+            (self.total or 0) * 1000)
+
+    def add_retry(self, attempt, reason, sleep):
+        self.retries.append((attempt, reason, sleep))
+
+    def set_response(self, response):
+        self.status = response.status
+        self.request_id = (response.getheader('x-amzn-requestid') or
+                           response.getheader('x-amz-request-id'))
+        length = response.getheader('content-length')
+        if length and length.isdigit():
+            self.bytes_in = int(length)
+
+    def finish(self):
+        """
+        Sets ``total`` and passes the record to the listeners, unless an
+        enclosing :func:`request_scope` will do so later.  Only the first
+        call has any effect.
+        """
+        if self._finished:
+            return
+        pending = getattr(_local, 'pending', None)
+        if pending is not None:
+            pending.append(self)
+            return
+        self._emit()
+
+    def _emit(self):
+        self._finished = True
+        self.total = time.time() - self.start
+        for listener in self.listeners:
+            try:
+                listener(self)
+            except Exception:
+                boto.log.exception('Request listener %r failed', listener)
+
+    def as_dict(self):
+        d = {}
+        for name in ('service', 'operation', 'host', 'method', 'status',
+                     'request_id', 'pool_hit', 'attempts', 'bytes_out',
+                     'bytes_in', 'error') + PHASES:
+            d[name] = getattr(self, name)
+        d['retries'] = list(self.retries)
+        return d
+
+
+class _RequestScope(object):
+    """
+    Holds back the records of the requests made inside it, so that the
+    code reading and parsing the response can add its timings before the
+    listeners see them.
+    """
+
+    def __enter__(self):
+        self.outer = getattr(_local, 'pending', None)
+        _local.pending = []
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        pending = _local.pending
+        _local.pending = self.outer
+        for record in pending:
+            if exc_type is not None and record.error is None:
+                record.error = exc_type.__name__
+            record.finish()
+
+
+class _NullScope(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        pass
+
+_NULL_SCOPE = _NullScope()
+
+
+def request_scope(connection):
+    """
+    Returns a context manager that emits the records of the requests
+    made inside it when it exits.
+    """
+    if not listeners and not connection.request_listeners:
+        return _NULL_SCOPE
+    return _RequestScope()
+
+
+def response_record(response):
+    """Returns the RequestRecord of ``response``, if it has one."""
+    return getattr(response, 'request_record', None)
+
+
+def service_name(connection):
+    name = getattr(connection._auth_handler, 'service_name', None)
+    if name:
+        return name
+    return connection.host.split('.')[0]
+
+
+def operation_name(request):
+    action = request.params.get('Action')
+    if action:
+        return action
+    target = request.headers.get('X-Amz-Target')
+    if target:
+        return target.rsplit('.', 1)[-1]
+    return request.method
+
+
+class LatencyHistogram(object):
+    """
+    A listener that keeps a log-linear histogram of every phase of every
+    (service, operation) pair.
+
+    Buckets are ``2 ** (1.0 / resolution)`` wide, so with the default
+    resolution of 8 the reported percentiles are within 5% of the real
+    ones.  Memory use does not grow with the number of requests.
+    """
+
+    MIN_VALUE = 1e-6
+
+    def __init__(self, resolution=8):
+        self.resolution = resolution
+        self.histograms = {}
+        self.retry_reasons = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        key = (record.service, record.operation)
+        with self._lock:
+            for phase in PHASES:
+                value = getattr(record, phase)
+                if value is not None:
+                    self._add(key + (phase,), value)
+            for attempt, reason, sleep in record.retries:
+                reason_key = key + (reason,)
+                self.retry_reasons[reason_key] = (
+                    self.retry_reasons.get(reason_key, 0) + 1)
+
+    def _bucket(self, value):
+        if value <= self.MIN_VALUE:
+            return 0
+        return int(math.log(value / self.MIN_VALUE, 2) * self.resolution)
+
+    def _value(self, bucket):
+        # The middle of the bucket.
+        return self.MIN_VALUE * 2 ** ((bucket + 0.5) / self.resolution)
+
+    def _add(self, key, value):
+        stats = self.histograms.get(key)
+        if stats is None:
+            stats = self.histograms[key] = {'count': 0, 'sum': 0.0,
+                                            'min': value, 'max': value,
+                                            'buckets': {}}
+        stats['count'] += 1
+        stats['sum'] += value
+        stats['min'] = min(stats['min'], value)
+        stats['max'] = max(stats['max'], value)
+        bucket = self._bucket(value)
+        stats['buckets'][bucket] = stats['buckets'].get(bucket, 0) + 1
+
+    def percentile(self, service, operation, phase, percent):
+        """
+        Returns the ``percent`` percentile of ``phase`` in seconds, or
+        None if no request has been recorded for it.
+        """
+        with self._lock:
+            stats = self.histograms.get((service, operation, phase))
+            if stats is None:
+                return None
+            return self._percentile(stats, percent)
+
+    def _percentile(self, stats, percent):
+        rank = stats['count'] * percent / 100.0
+        seen = 0
+        for bucket in sorted(stats['buckets']):
+            seen += stats['buckets'][bucket]
+            if seen >= rank:
+                return min(max(self._value(bucket), stats['min']),
+                           stats['max'])
+        return stats['max']
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """
+        Returns a dict mapping ``(service, operation, phase)`` to a dict
+        with the count, mean, min, max and ``p50``, ``p90``... of the
+        phase in seconds.
+        """
+        result = {}
+        with self._lock:
+            for key, stats in self.histograms.items():
+                summary = {'count': stats['count'],
+                           'mean': stats['sum'] / stats['count'],
+                           'min': stats['min'], 'max': stats['max']}
+                for percent in percentiles:
+                    summary['p%s' % percent] = self._percentile(stats,
+                                                                percent)
+                result[key] = summary
+        return result
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.retry_reasons.clear()
@@ -0,0 +1,924 @@
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+
+"""
+A non-blocking, single-threaded HTTP/1.1 transport for AWSAuthConnection.
+
+Requests made through ``make_request_async`` (and the ``*_async`` helpers
+built on it) are driven by an :class:`EventLoop` instead of blocking a
+thread per request, so one thread can keep thousands of requests in
+flight::
+
+    >>> sqs = boto.connect_sqs()
+    >>> futures = [sqs.get_list_async('ListQueues', {}, [('QueueUrl', Queue)])
+    ...            for _ in range(1000)]
+    >>> results = [f.result() for f in futures]
+
+Signing, retries, redirects and ``retry_handler`` callbacks behave exactly
+as they do in :meth:`boto.connection.AWSAuthConnection._mexe`, except that
+backoff sleeps are scheduled on the loop rather than blocking it.  Request
+bodies must be strings; streaming uploads with a ``sender`` still need the
+blocking path.
+"""
+
+from __future__ import with_statement
+import asyncore
+import errno
+import heapq
+import httplib
+import itertools
+import os
+import select
+import socket
+import sys
+import threading
+import time
+import urlparse
+from collections import deque
+from StringIO import StringIO
+
+import boto
+from boto.exception import BotoClientError, BotoServerError
+
+try:
+    import ssl
+    from boto import https_connection
+    HAVE_SSL = True
+except ImportError:
+    HAVE_SSL = False
+
+try:
+    import threading
+except ImportError:
+    import dummy_threading as threading
+
+_WOULD_BLOCK = (errno.EWOULDBLOCK, errno.EAGAIN, errno.EINTR)
+_local = threading.local()
+
+
+def get_event_loop():
+    """
+    Returns the default :class:`EventLoop` for the calling thread,
+    creating it if necessary.
+    """
+    loop = getattr(_local, 'loop', None)
+    if loop is None:
+        loop = _local.loop = EventLoop()
+    return loop
+
+
+class Future(object):
+    """
+    The eventual result of a non-blocking operation.
+
+    Calling :meth:`result` runs the owning event loop until the
+    operation completes, then returns its value or raises its
+    exception.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self._done = False
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def done(self):
+        return self._done
+
+    def result(self):
+        if not self._done:
+            self.loop.run_until_complete(self)
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def exception(self):
+        if self._exc_info is not None:
+            return self._exc_info[1]
+        return None
+
+    def add_done_callback(self, fn):
+        """
+        Arranges for ``fn(future)`` to be called when the future
+        completes.  If it has already completed, ``fn`` is called
+        immediately.
+        """
+        if self._done:
+            fn(self)
+        else:
+            self._callbacks.append(fn)
+
+    def set_result(self, result):
+        self._result = result
+        self._finish()
+
+    def set_exception(self, exc, tb=None):
+        self._exc_info = (exc.__class__, exc, tb)
+        self._finish()
+
+    def set_exc_info(self, exc_info):
+        self._exc_info = exc_info
+        self._finish()
+
+    def _finish(self):
+        if self._done:
+            raise BotoClientError('Future is already done')
+        self._done = True
+        callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            fn(self)
+
+    def then(self, fn):
+        """
+        Returns a new future resolved with ``fn(result)`` once this one
+        succeeds.  Exceptions, from this future or raised by ``fn``, are
+        passed through to the new future.
+        """
+        chained = Future(self.loop)
+
+        def on_done(future):
+            if future._exc_info is not None:
+                chained.set_exc_info(future._exc_info)
+                return
+            try:
+                value = fn(future._result)
+            except Exception:
+                chained.set_exc_info(sys.exc_info())
+            else:
+                chained.set_result(value)
+        self.add_done_callback(on_done)
+        return chained
+
+
+class _Timer(object):
+
+    def __init__(self, when, fn, args):
+        self.when = when
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class EventLoop(object):
+    """
+    Multiplexes non-blocking HTTP connections and timers on one thread.
+
+    Idle keep-alive connections are reused per (host, port, is_secure),
+    and at most ``max_connections_per_host`` sockets are opened to any
+    one endpoint; requests beyond that wait for a connection to free up.
+
+    Host names are looked up on other threads, so that a slow DNS server
+    does not stall the requests in flight, and the addresses are cached
+    for ``dns_cache_ttl`` seconds.
+    """
+
+    DefaultMaxConnectionsPerHost = 100
+    DefaultDNSCacheTTL = 60
+    # How often the loop checks for finished lookups, which cannot wake
+    # it up while it waits for socket activity.
+    LookupPollInterval = 0.01
+
+    def __init__(self, max_connections_per_host=None, dns_cache_ttl=None):
+        if max_connections_per_host is None:
+            max_connections_per_host = boto.config.getint(
+                'Boto', 'async_max_connections_per_host',
+                self.DefaultMaxConnectionsPerHost)
+        if dns_cache_ttl is None:
+            dns_cache_ttl = boto.config.getint('Boto', 'async_dns_cache_ttl',
+                                               self.DefaultDNSCacheTTL)
+        self.max_connections_per_host = max_connections_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.map = {}
+        # (when, sequence, timer) entries, so that timers due at the
+        # same time fire in the order they were added.
+        self._timers = []
+        self._sequence = itertools.count()
+        self._addresses = {}
+        self._lookups = {}
+        self._resolved = deque()
+        self._idle = {}
+        self._open = {}
+        self._waiters = {}
+        self._use_poll = hasattr(select, 'poll')
+
+    def call_later(self, delay, fn, *args):
+        timer = _Timer(time.time() + delay, fn, args)
+        heapq.heappush(self._timers,
+                       (timer.when, self._sequence.next(), timer))
+        return timer
+
+    def call_soon(self, fn, *args):
+        return self.call_later(0, fn, *args)
+
+    def run_once(self, timeout=1.0):
+        """
+        Fires due timers, then waits at most ``timeout`` seconds for
+        socket activity and dispatches it.
+        """
+        self._finish_lookups()
+        now = time.time()
+        while self._timers and self._timers[0][0] <= now:
+            timer = heapq.heappop(self._timers)[2]
+            if not timer.cancelled:
+                timer.fn(*timer.args)
+        if self._timers:
+            timeout = max(0, min(timeout, self._timers[0][0] - time.time()))
+        if self._lookups:
+            timeout = min(timeout, self.LookupPollInterval)
+        if self.map:
+            asyncore.loop(timeout, self._use_poll, self.map, count=1)
+        elif self._timers or self._lookups:
+            time.sleep(timeout)
+
+    def has_pending_work(self):
+        # Idle keep-alive connections sit in the map but are not work.
+        if self._lookups:
+            return True
+        for conn in self.map.values():
+            if getattr(conn, '_future', None) is not None:
+                return True
+        for when, sequence, timer in self._timers:
+            if not timer.cancelled:
+                return True
+        return False
+
+    def run_until_complete(self, future):
+        while not future.done():
+            if not self.has_pending_work():
+                raise BotoClientError('The event loop ran out of work before '
+                                      'the future completed')
+            self.run_once()
+        return future
+
+    def run(self):
+        """Runs the loop until there is no more pending work."""
+        while self.has_pending_work():
+            self.run_once()
+
+    def acquire_connection(self, key, factory, callback):
+        """
+        Calls ``callback(conn)`` with an idle connection for ``key``, a
+        new one made by ``factory()``, or, if the endpoint is at its
+        connection limit, the next connection to become free.
+        """
+        idle = self._idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if conn.is_usable():
+                self.call_soon(callback, conn)
+                return
+        if self._open.get(key, 0) < self.max_connections_per_host:
+            self._open[key] = self._open.get(key, 0) + 1
+            self.call_soon(self._create, factory, callback)
+        else:
+            self._waiters.setdefault(key, deque()).append((factory, callback))
+
+    def resolve(self, host, port, callback):
+        """
+        Calls ``callback(addrinfo, None)`` with the first address
+        ``socket.getaddrinfo`` gives for ``host`` and ``port``, or
+        ``callback(None, exc_info)`` if the lookup fails.  Concurrent
+        lookups of the same address share one thread.
+        """
+        key = (host, port)
+        cached = self._addresses.get(key)
+        if cached is not None and cached[1] > time.time():
+            self.call_soon(callback, cached[0], None)
+            return
+        callbacks = self._lookups.get(key)
+        if callbacks is not None:
+            callbacks.append(callback)
+            return
+        self._lookups[key] = [callback]
+        thread = threading.Thread(target=self._lookup, args=(key,))
+        thread.daemon = True
+        thread.start()
+
+    def _lookup(self, key):
+        # Runs on its own thread; deque.append is thread-safe.
+        try:
+            addrinfo = socket.getaddrinfo(key[0], key[1], 0,
+                                          socket.SOCK_STREAM)[0]
+        except Exception:
+            self._resolved.append((key, None, sys.exc_info()))
+        else:
+            self._resolved.append((key, addrinfo, None))
+
+    def _finish_lookups(self):
+        while self._resolved:
+            key, addrinfo, exc_info = self._resolved.popleft()
+            if addrinfo is not None:
+                self._addresses[key] = (addrinfo,
+                                        time.time() + self.dns_cache_ttl)
+            for callback in self._lookups.pop(key, []):
+                callback(addrinfo, exc_info)
+
+    def _create(self, factory, callback):
+        def connect(addrinfo, exc_info):
+            try:
+                if exc_info is not None:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                conn = factory(addrinfo)
+            except Exception:
+                # The slot was never used; hand it to the next waiter.
+                self._slot_freed(factory.key)
+                callback(sys.exc_info())
+            else:
+                callback(conn)
+        host, port = factory.address()
+        self.resolve(host, port, connect)
+
+    def release_connection(self, conn):
+        """Returns a keep-alive connection for reuse."""
+        waiters = self._waiters.get(conn.key)
+        if waiters:
+            factory, callback = waiters.popleft()
+            self.call_soon(callback, conn)
+        else:
+            self._idle.setdefault(conn.key, []).append(conn)
+
+    def connection_closed(self, conn):
+        idle = self._idle.get(conn.key)
+        if idle and conn in idle:
+            idle.remove(conn)
+        self._slot_freed(conn.key)
+
+    def _slot_freed(self, key):
+        self._open[key] = self._open.get(key, 1) - 1
+        waiters = self._waiters.get(key)
+        if waiters:
+            factory, callback = waiters.popleft()
+            self._open[key] += 1
+            self.call_soon(self._create, factory, callback)
+
+    def close(self):
+        """Closes every connection owned by the loop."""
+        for conn in self.map.values():
+            conn.close()
+        self._idle.clear()
+
+
+class NonBlockingResponse(object):
+    """
+    A fully read HTTP response, with the parts of the
+    ``httplib.HTTPResponse`` interface that boto relies on.
+    """
+
+    def __init__(self, status, reason, version, msg, body):
+        self.status = status
+        self.reason = reason
+        self.version = version
+        self.msg = msg
+        self._body = body
+        self._pos = 0
+
+    def getheader(self, name, default=None):
+        return self.msg.getheader(name, default)
+
+    def getheaders(self):
+        return self.msg.items()
+
+    def read(self, amt=None):
+        # Like boto.connection.HTTPResponse, read() with no argument
+        # always returns the whole body.
+        if amt is None:
+            return self._body
+        data = self._body[self._pos:self._pos + amt]
+        self._pos += len(data)
+        return data
+
+    def isclosed(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class NonBlockingHTTPConnection(asyncore.dispatcher):
+    """
+    One HTTP/1.1 keep-alive connection, driven by an :class:`EventLoop`.
+    Only one request is outstanding at a time.
+    """
+
+    def __init__(self, loop, host, port, is_secure, ca_certs=None,
+                 validate_certs=True, timeout=None, connect_host=None,
+                 connect_port=None, addrinfo=None):
+        asyncore.dispatcher.__init__(self, map=loop.map)
+        self.loop = loop
+        self.host = host
+        self.port = port
+        self.is_secure = is_secure
+        self.key = (host, port, is_secure)
+        self.ca_certs = ca_certs
+        self.validate_certs = validate_certs
+        self.timeout = timeout
+        self._future = None
+        self._timer = None
+        self._out = ''
+        self._in = ''
+        self._handshaking = False
+        self._closed = False
+        if addrinfo is None:
+            addrinfo = socket.getaddrinfo(connect_host or host,
+                                          connect_port or port, 0,
+                                          socket.SOCK_STREAM)[0]
+        family, socktype, proto, _, address = addrinfo
+        self.create_socket(family, socktype)
+        try:
+            self.connect(address)
+        except socket.error:
+            # The caller releases the connection slot when we raise.
+            self._closed = True
+            asyncore.dispatcher.close(self)
+            raise
+
+    def is_usable(self):
+        return not self._closed and self._future is None
+
+    def request(self, method, path, body, headers):
+        """
+        Sends a request and returns a :class:`Future` for its
+        :class:`NonBlockingResponse`.
+        """
+        self._future = Future(self.loop)
+        self._method = method
+        self._state = 'status'
+        self._in = ''
+        self._received = False
+        lines = ['%s %s HTTP/1.1' % (method, path)]
+        names = set(name.lower() for name in headers)
+        if 'host' not in names:
+            if self.port == (self.is_secure and 443 or 80):
+                lines.append('Host: %s' % self.host)
+            else:
+                lines.append('Host: %s:%d' % (self.host, self.port))
+        if 'accept-encoding' not in names:
+            lines.append('Accept-Encoding: identity')
+        if 'content-length' not in names and body:
+            lines.append('Content-Length: %d' % len(body))
+        for name, value in headers.items():
+            lines.append('%s: %s' % (name, value))
+        self._out = '\r\n'.join(lines) + '\r\n\r\n' + (body or '')
+        if self.timeout is not None:
+            self._timer = self.loop.call_later(
+                self.timeout, self._fail, socket.timeout('timed out'))
+        return self._future
+
+    # asyncore callbacks
+
+    def handle_connect(self):
+        if self.is_secure:
+            self.del_channel()
+            self.socket = ssl.wrap_socket(
+                self.socket, do_handshake_on_connect=False,
+                cert_reqs=(self.validate_certs and ssl.CERT_REQUIRED or
+                           ssl.CERT_NONE),
+                ca_certs=self.ca_certs)
+            self.set_socket(self.socket, self.loop.map)
+            self._handshaking = True
+
+    def _do_handshake(self):
+        try:
+            self.socket.do_handshake()
+        except ssl.SSLError, e:
+            if e.args[0] in (ssl.SSL_ERROR_WANT_READ,
+                             ssl.SSL_ERROR_WANT_WRITE):
+                return
+            raise
+        self._handshaking = False
+        if self.validate_certs:
+            cert = self.socket.getpeercert()
+            if not https_connection.ValidateCertificateHostname(cert,
+                                                                self.host):
+                raise https_connection.InvalidCertificateException(
+                    self.host, cert, 'remote hostname "%s" does not match '
+                    'certificate' % self.host)
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return (not self.connected or self._handshaking or
+                bool(self._out))
+
+    def handle_write(self):
+        if self._handshaking:
+            self._do_handshake()
+            return
+        if not self._out:
+            return
+        try:
+            sent = self.socket.send(self._out[:65536])
+        except socket.error, e:
+            if _retry_io(e):
+                return
+            raise
+        self._out = self._out[sent:]
+
+    def handle_read(self):
+        if self._handshaking:
+            self._do_handshake()
+            return
+        while True:
+            try:
+                data = self.socket.recv(65536)
+            except socket.error, e:
+                if _retry_io(e):
+                    return
+                raise
+            if not data:
+                self._on_eof()
+                return
+            self._feed(data)
+            if not (self.is_secure and self.socket.pending()):
+                return
+
+    def handle_close(self):
+        err = 0
+        if not self.connected:
+            err = self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err:
+            self._fail(socket.error(err, os.strerror(err)))
+        else:
+            self._on_eof()
+
+    def handle_error(self):
+        self._fail_with_exc_info(sys.exc_info())
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+            asyncore.dispatcher.close(self)
+            self.loop.connection_closed(self)
+
+    # response parsing
+
+    def _on_eof(self):
+        if self._state == 'body_eof' and self._future is not None:
+            self._body.append(self._in)
+            self._in = ''
+            self._complete(keep_alive=False)
+        elif self._future is not None:
+            if self._received:
+                self._fail(httplib.IncompleteRead(self._in))
+            else:
+                # Most likely an idle keep-alive connection that the
+                # server closed; this is retryable.
+                self._fail(httplib.BadStatusLine(''))
+        else:
+            self.close()
+
+    def _feed(self, data):
+        if self._future is None:
+            # Nobody asked for this; the connection is out of sync.
+            self.close()
+            return
+        self._received = True
+        self._in += data
+        while self._future is not None:
+            if not getattr(self, '_parse_' + self._state)():
+                return
+
+    def _parse_status(self):
+        end = self._in.find('\r\n\r\n')
+        if end < 0:
+            return False
+        head, self._in = self._in[:end + 2], self._in[end + 4:]
+        status_line, _, header_block = head.partition('\r\n')
+        try:
+            version, status, reason = (status_line.split(None, 2) + [''])[:3]
+            status = int(status)
+            if not version.startswith('HTTP/'):
+                raise ValueError(version)
+        except ValueError:
+            raise httplib.BadStatusLine(status_line)
+        if status == 100:
+            return True
+        self._status = status
+        self._reason = reason.strip()
+        self._version = version == 'HTTP/1.0' and 10 or 11
+        self._msg = httplib.HTTPMessage(StringIO(header_block + '\r\n'))
+        self._body = []
+        if (self._method == 'HEAD' or status in (204, 304) or
+                100 <= status < 200):
+            self._complete()
+            return True
+        encoding = (self._msg.getheader('transfer-encoding') or '').lower()
+        length = self._msg.getheader('content-length')
+        if encoding == 'chunked':
+            self._state = 'chunk_size'
+        elif length is not None:
+            self._remaining = int(length)
+            self._state = 'body_length'
+        else:
+            self._state = 'body_eof'
+        return True
+
+    def _parse_body_length(self):
+        if len(self._in) < self._remaining:
+            return False
+        self._body.append(self._in[:self._remaining])
+        self._in = self._in[self._remaining:]
+        self._complete()
+        return True
+
+    def _parse_body_eof(self):
+        return False
+
+    def _parse_chunk_size(self):
+        end = self._in.find('\r\n')
+        if end < 0:
+            return False
+        line, self._in = self._in[:end], self._in[end + 2:]
+        try:
+            size = int(line.split(';', 1)[0].strip(), 16)
+        except ValueError:
+            raise httplib.IncompleteRead(''.join(self._body))
+        if size == 0:
+            self._state = 'trailer'
+        else:
+            self._remaining = size
+            self._state = 'chunk_data'
+        return True
+
+    def _parse_chunk_data(self):
+        if len(self._in) < self._remaining + 2:
+            return False
+        self._body.append(self._in[:self._remaining])
+        self._in = self._in[self._remaining + 2:]
+        self._state = 'chunk_size'
+        return True
+
+    def _parse_trailer(self):
+        while True:
+            end = self._in.find('\r\n')
+            if end < 0:
+                return False
+            line, self._in = self._in[:end], self._in[end + 2:]
+            if not line:
+                self._complete()
+                return True
+
+    def _complete(self, keep_alive=True):
+        response = NonBlockingResponse(self._status, self._reason,
+                                       self._version, self._msg,
+                                       ''.join(self._body))
+        connection_header = (self._msg.getheader('connection') or '').lower()
+        if self._version == 10 or 'close' in connection_header:
+            keep_alive = False
+        future, self._future = self._future, None
+        self._body = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if keep_alive and not self._in:
+            self.loop.release_connection(self)
+        else:
+            self.close()
+        future.set_result(response)
+
+    def _fail(self, exc):
+        self._fail_with_exc_info((exc.__class__, exc, None))
+
+    def _fail_with_exc_info(self, exc_info):
+        future, self._future = self._future, None
+        self.close()
+        if future is not None and not future.done():
+            future.set_exc_info(exc_info)
+
+
+def _retry_io(e):
+    if HAVE_SSL and isinstance(e, ssl.SSLError):
+        return e.args[0] in (ssl.SSL_ERROR_WANT_READ,
+                             ssl.SSL_ERROR_WANT_WRITE)
+    return e.args[0] in _WOULD_BLOCK
+
+
+class _ConnectionFactory(object):
+
+    def __init__(self, loop, aws_connection, key):
+        self.loop = loop
+        self.aws_connection = aws_connection
+        self.key = key
+
+    def address(self):
+        """Returns the host and port to connect to."""
+        host, port, is_secure = self.key
+        conn = self.aws_connection
+        if conn.use_proxy:
+            return conn.proxy, int(conn.proxy_port)
+        return host, port
+
+    def __call__(self, addrinfo=None):
+        host, port, is_secure = self.key
+        conn = self.aws_connection
+        kwargs = {'addrinfo': addrinfo}
+        if conn.use_proxy:
+            if is_secure:
+                raise BotoClientError('HTTPS requests through a proxy are '
+                                      'not supported by the non-blocking '
+                                      'transport')
+            kwargs['connect_host'] = conn.proxy
+            kwargs['connect_port'] = int(conn.proxy_port)
+        return NonBlockingHTTPConnection(
+            self.loop, host, port, is_secure,
+            ca_certs=conn.ca_certificates_file,
+            validate_certs=conn.https_validate_certificates,
+            timeout=conn.http_connection_kwargs.get('timeout'),
+            **kwargs)
+
+
+class MultiExecute(object):
+    """
+    The non-blocking counterpart of
+    :meth:`boto.connection.AWSAuthConnection._mexe`.
+
+    Each attempt re-signs the request, sends it on a pooled connection
+    and feeds the response through the same retry, redirect and
+    ``retry_handler`` logic as the blocking loop.  The result is
+    delivered through ``self.future``.
+    """
+
+    def __init__(self, connection, request, override_num_retries=None,
+                 retry_handler=None, loop=None):
+        self.connection = connection
+        self.request = request
+        self.retry_handler = retry_handler
+        self.loop = loop or get_event_loop()
+        self.future = Future(self.loop)
+        if override_num_retries is None:
+            self.num_retries = boto.config.getint('Boto', 'num_retries',
+                                                  connection.num_retries)
+        else:
+            self.num_retries = override_num_retries
+        self.is_secure = connection.is_secure
+        self.policy = connection.retry_policy
+        self.i = 0
+        self.next_sleep = 0
+        self.response = None
+        self.body = None
+        self.error = None
+
+    def start(self):
+        boto.log.debug('Method: %s' % self.request.method)
+        boto.log.debug('Path: %s' % self.request.path)
+        boto.log.debug('Host: %s' % self.request.host)
+        self._attempt()
+        return self.future
+
+    def _connection_key(self):
+        host = self.request.host
+        default_port = self.is_secure and 443 or 80
+        if ':' in host:
+            host, port = host.rsplit(':', 1)
+            port = int(port)
+        else:
+            port = default_port
+        return (host, port, self.is_secure)
+
+    def _attempt(self):
+        if self.i > self.num_retries:
+            self._give_up()
+            return
+        self.next_sleep = self.policy.backoff(self.i, self.next_sleep)
+        try:
+            self.policy.before_request(self.request.host)
+            self.request.authorize(connection=self.connection)
+        except Exception:
+            self.future.set_exc_info(sys.exc_info())
+            return
+        key = self._connection_key()
+        factory = _ConnectionFactory(self.loop, self.connection, key)
+        self.loop.acquire_connection(key, factory, self._send)
+
+    def _send(self, conn):
+        if isinstance(conn, tuple):
+            # The connection could not be created.
+            self._on_exception(conn)
+            return
+        request = self.request
+        response_future = conn.request(request.method, request.path,
+                                       request.body, request.headers)
+        response_future.add_done_callback(self._on_response)
+
+    def _on_response(self, response_future):
+        exc_info = response_future._exc_info
+        if exc_info is not None:
+            self._on_exception(exc_info)
+            return
+        try:
+            self._handle_response(response_future._result)
+        except Exception:
+            self.future.set_exc_info(sys.exc_info())
+
+    def _handle_response(self, response):
+        request = self.request
+        self.response = response
+        location = response.getheader('location')
+        if callable(self.retry_handler):
+            status = self.retry_handler(response, self.i, self.next_sleep)
+            if status:
+                msg, self.i, next_sleep = status
+                if msg:
+                    boto.log.debug(msg)
+                self.loop.call_later(next_sleep, self._attempt)
+                return
+        status = self.policy.check_response(request.host, response, self.i,
+                                            self.next_sleep, self.num_retries)
+        if status:
+            msg, self.i, next_sleep = status
+            boto.log.debug(msg)
+            self.loop.call_later(next_sleep, self._attempt)
+            return
+        if self.policy.is_retryable(response):
+            msg = 'Received %d response.  ' % response.status
+            msg += 'Retrying in %3.1f seconds' % self.next_sleep
+            boto.log.debug(msg)
+            self.body = response.read()
+            self.policy.record_failure(request.host)
+            if self.i < self.num_retries and \
+                    not self.policy.allow_retry(request.host):
+                self._give_up()
+                return
+        elif response.status < 300 or response.status >= 400 or \
+                not location:
+            self.policy.record_success(request.host)
+            self.future.set_result(response)
+            return
+        else:
+            scheme, request.host, request.path, \
+                params, query, fragment = urlparse.urlparse(location)
+            if query:
+                request.path += '?' + query
+            msg = 'Redirecting: %s' % scheme + '://'
+            msg += request.host + request.path
+            boto.log.debug(msg)
+            self.is_secure = scheme == 'https'
+            self.response = None
+            self.loop.call_soon(self._attempt)
+            return
+        self._retry_later()
+
+    def _on_exception(self, exc_info):
+        e = exc_info[1]
+        if not isinstance(e, self.connection.http_exceptions):
+            self.future.set_exc_info(exc_info)
+            return
+        for unretryable in self.connection.http_unretryable_exceptions:
+            if isinstance(e, unretryable):
+                boto.log.debug(
+                    'encountered unretryable %s exception, re-raising' %
+                    e.__class__.__name__)
+                self.future.set_exc_info(exc_info)
+                return
+        self.policy.record_failure(self.request.host)
+        if self.i < self.num_retries and \
+                not self.policy.allow_retry(self.request.host, error=True):
+            self.future.set_exc_info(exc_info)
+            return
+        boto.log.debug('encountered %s exception, reconnecting' %
+                       e.__class__.__name__)
+        self.error = exc_info
+        self.is_secure = self.connection.is_secure
+        self._retry_later()
+
+    def _retry_later(self):
+        self.i += 1
+        self.loop.call_later(self.next_sleep, self._attempt)
+
+    def _give_up(self):
+        # We have exhausted our retries and still haven't succeeded.
+        if self.response:
+            self.future.set_exception(
+                BotoServerError(self.response.status, self.response.reason,
+                                self.body))
+        elif self.error:
+            self.future.set_exc_info(self.error)
+        else:
+            msg = 'Please report this exception as a Boto Issue!'
+            self.future.set_exception(BotoClientError(msg))
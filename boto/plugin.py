@@ -37,8 +37,7 @@ The actual interface is duck typed.
  
 """
 
-import glob
-import imp, os.path
+import os.path
 
 class Plugin(object):
     """Base class for all plugins."""
@@ -55,6 +54,10 @@ class Plugin(object):
         return True
 
 def get_plugin(cls, requested_capability=None):
+    # Plugins are only needed once an auth handler is looked up, so they
+    # are not loaded when boto is imported.
+    import boto
+    load_plugins(boto.config)
     if not requested_capability:
         requested_capability = []
     result = []
@@ -64,6 +67,7 @@ def get_plugin(cls, requested_capability=None):
     return result
 
 def _import_module(filename):
+    import imp
     (path, name) = os.path.split(filename)
     (name, ext) = os.path.splitext(name)
 
@@ -84,6 +88,7 @@ def load_plugins(config):
 
     if not config.has_option('Plugin', 'plugin_directory'):
         return
+    import glob
     directory = config.get('Plugin', 'plugin_directory')
     for file in glob.glob(os.path.join(directory, '*.py')):
         _import_module(file)
@@ -0,0 +1,389 @@
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+
+"""
+Retry policies for AWSAuthConnection.
+
+A :class:`RetryPolicy` decides how long ``_mexe`` sleeps between
+attempts and whether a failed attempt may be retried at all.  The
+default policy behaves exactly like earlier versions of boto.  The
+optional pieces are meant for processes with many threads talking to
+the same endpoint:
+
+* full or decorrelated jitter with a cap on the sleep time,
+* a :class:`RetryBudget` (a token bucket shared by every connection in
+  the process that talks to the same endpoint), so that a brown-out
+  does not multiply the load on the service,
+* a :class:`CircuitBreaker` per endpoint, which fails requests fast
+  once the endpoint has failed repeatedly, and
+* retrying throttling errors (``Throttling``, ``SlowDown``,
+  ``ProvisionedThroughputExceededException``...) that would otherwise
+  be returned to the caller.
+
+These can be turned on per connection::
+
+    >>> conn.retry_policy = RetryPolicy(jitter='full', retry_budget=True,
+    ...                                 circuit_breaker=True,
+    ...                                 retry_throttled=True)
+
+or for every connection through the ``retry_*`` options of the
+``Boto`` config section.
+"""
+
+from __future__ import with_statement
+import random
+import re
+import time
+
+import boto
+from boto.exception import BotoClientError, BotoServerError
+from boto.exception import CircuitBreakerOpenError
+
+try:
+    import threading
+except ImportError:
+    import dummy_threading as threading
+
+
+#: Error codes, from any service, that mean the caller is being
+#: throttled rather than that the request failed.
+THROTTLING_ERROR_CODES = (
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'RequestLimitExceeded',
+    'BandwidthLimitExceeded',
+    'SlowDown',
+)
+
+_THROTTLING_RE = re.compile(r'(?:<Code>|[#"])(%s)(?:</Code>|")' %
+                            '|'.join(THROTTLING_ERROR_CODES))
+
+
+class _ReplayBody(object):
+    """Stands in for ``response.read`` once the body has been read."""
+
+    def __init__(self, body):
+        self.body = body
+        self.pos = 0
+
+    def __call__(self, amt=None):
+        if amt is None:
+            end = len(self.body)
+        else:
+            end = self.pos + amt
+        data = self.body[self.pos:end]
+        self.pos += len(data)
+        return data
+
+
+def throttling_error_code(response):
+    """
+    Returns the throttling error code in ``response``, or None.
+
+    Only statuses that can carry a throttling error are looked at.  The
+    body has to be read to find the code, so ``response.read`` is
+    replaced with one that returns the same body again.
+    """
+    if response.status not in (400, 429, 503):
+        return None
+    body = response.read() or ''
+    response.read = _ReplayBody(body)
+    match = _THROTTLING_RE.search(body)
+    if match:
+        return match.group(1)
+    return None
+
+
+class _EndpointRegistry(object):
+    """Process-wide, per-endpoint instances of a class."""
+
+    def __init__(self):
+        self.instances = {}
+        self.lock = threading.Lock()
+
+    def get(self, endpoint, factory):
+        with self.lock:
+            instance = self.instances.get(endpoint)
+            if instance is None:
+                instance = self.instances[endpoint] = factory()
+            return instance
+
+
+class RetryBudget(object):
+    """
+    A token bucket that limits how many retries may be sent to an
+    endpoint.
+
+    Every retry takes ``retry_cost`` tokens (``error_cost`` for a
+    connection error or timeout), and every successful request puts
+    ``success_refund`` tokens back.  The bucket also refills at
+    ``refill_rate`` tokens per second.  When the bucket is empty,
+    failed requests are not retried, so a service that is browning
+    out sees roughly one request per caller instead of seven.
+    """
+
+    _registry = _EndpointRegistry()
+
+    def __init__(self, capacity=500, retry_cost=5, error_cost=10,
+                 success_refund=1, refill_rate=1.0):
+        self.capacity = capacity
+        self.retry_cost = retry_cost
+        self.error_cost = error_cost
+        self.success_refund = success_refund
+        self.refill_rate = refill_rate
+        self.tokens = float(capacity)
+        self._last_refill = time.time()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_endpoint(cls, endpoint):
+        """Returns the budget shared by the whole process for endpoint."""
+        return cls._registry.get(endpoint, cls)
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self.tokens = min(self.capacity,
+                          self.tokens + elapsed * self.refill_rate)
+
+    def acquire(self, error=False):
+        """
+        Takes the tokens for one retry.  Returns False, taking nothing,
+        if there are not enough left.
+        """
+        if error:
+            cost = self.error_cost
+        else:
+            cost = self.retry_cost
+        with self._lock:
+            self._refill(time.time())
+            if self.tokens < cost:
+                return False
+            self.tokens -= cost
+            return True
+
+    def release(self):
+        """Records a successful request."""
+        with self._lock:
+            self._refill(time.time())
+            self.tokens = min(self.capacity,
+                              self.tokens + self.success_refund)
+
+
+class CircuitBreaker(object):
+    """
+    Tracks consecutive failures of an endpoint.
+
+    After ``failure_threshold`` consecutive failures the breaker opens
+    and requests fail immediately with :class:`CircuitBreakerOpenError`.
+    After ``reset_timeout`` seconds one trial request is let through
+    (half-open): if it succeeds the breaker closes, otherwise it opens
+    again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    _registry = _EndpointRegistry()
+
+    def __init__(self, failure_threshold=20, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_endpoint(cls, endpoint):
+        """Returns the breaker shared by the whole process for endpoint."""
+        return cls._registry.get(endpoint, cls)
+
+    def before_request(self, endpoint):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            now = time.time()
+            retry_after = self.opened_at + self.reset_timeout - now
+            if retry_after > 0:
+                raise CircuitBreakerOpenError(endpoint, retry_after)
+            # Let this request through as the trial, and keep failing
+            # everybody else fast for another reset_timeout.
+            self.state = self.HALF_OPEN
+            self.opened_at = now
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if (self.state == self.HALF_OPEN or
+                    self.failures >= self.failure_threshold):
+                if self.state != self.OPEN:
+                    boto.log.warning('Opening circuit breaker after %d '
+                                     'consecutive failures', self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+
+class RetryPolicy(object):
+    """
+    Decides how ``_mexe`` backs off and whether it may retry.
+
+    :type jitter: str
+    :param jitter: ``'legacy'`` sleeps ``random() * 2 ** attempt``
+        seconds, as boto always has.  ``'full'`` sleeps a random time
+        between 0 and ``min(max_backoff, base_backoff * 2 ** attempt)``.
+        ``'decorrelated'`` sleeps a random time between ``base_backoff``
+        and three times the previous sleep, capped at ``max_backoff``.
+
+    :type retry_budget: bool
+    :param retry_budget: Whether retries are limited by the process-wide
+        :class:`RetryBudget` of the endpoint.
+
+    :type circuit_breaker: bool
+    :param circuit_breaker: Whether requests to an endpoint fail fast
+        while its :class:`CircuitBreaker` is open.
+
+    :type retry_throttled: bool
+    :param retry_throttled: Whether throttling errors are retried.
+    """
+
+    JITTER_MODES = ('legacy', 'full', 'decorrelated')
+
+    def __init__(self, jitter='legacy', base_backoff=0.5, max_backoff=20.0,
+                 retry_budget=False, circuit_breaker=False,
+                 retry_throttled=False):
+        if jitter not in self.JITTER_MODES:
+            raise BotoClientError('Unknown retry jitter mode: %s' % jitter)
+        self.jitter = jitter
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.retry_budget = retry_budget
+        self.circuit_breaker = circuit_breaker
+        self.retry_throttled = retry_throttled
+
+    @classmethod
+    def from_config(cls, config=None):
+        """
+        Builds a policy from the ``retry_*`` and ``circuit_breaker``
+        options of the ``Boto`` config section.
+        """
+        if config is None:
+            config = boto.config
+        return cls(
+            jitter=config.get('Boto', 'retry_jitter', 'legacy'),
+            base_backoff=config.getfloat('Boto', 'retry_base_backoff', 0.5),
+            max_backoff=config.getfloat('Boto', 'retry_max_backoff', 20.0),
+            retry_budget=config.getbool('Boto', 'retry_budget', False),
+            circuit_breaker=config.getbool('Boto', 'circuit_breaker', False),
+            retry_throttled=config.getbool('Boto', 'retry_throttled', False))
+
+    def backoff(self, attempt, last_sleep=0):
+        """Returns how long to sleep before retry number ``attempt + 1``."""
+        if self.jitter == 'full':
+            return random.uniform(
+                0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+        elif self.jitter == 'decorrelated':
+            upper = max(self.base_backoff, last_sleep * 3)
+            return min(self.max_backoff,
+                       random.uniform(self.base_backoff, upper))
+        # Use binary exponential backoff to desynchronize client requests
+        return random.random() * (2 ** attempt)
+
+    def before_request(self, endpoint):
+        """
+        Called before every attempt.  Raises CircuitBreakerOpenError if
+        the endpoint is failing and should not be sent requests.
+        """
+        if self.circuit_breaker:
+            CircuitBreaker.for_endpoint(endpoint).before_request(endpoint)
+
+    def is_retryable(self, response):
+        """Whether a response with this status is retried by _mexe."""
+        return response.status == 500 or response.status == 503
+
+    def check_response(self, endpoint, response, attempt, next_sleep,
+                       num_retries, retry_throttled=None, legacy_base=None):
+        """
+        Inspects a response before _mexe does.  Like the ``retry_handler``
+        argument of ``_mexe``, this returns None to let _mexe handle the
+        response, or a ``(message, attempt, sleep)`` tuple to sleep and
+        send the request again.
+
+        A throttled request counts as a failure of the endpoint for its
+        circuit breaker.  Throttled requests that may not be retried any
+        more raise a BotoServerError.
+
+        ``retry_throttled`` overrides the policy's own setting, for
+        services such as DynamoDB that always retry throttling errors.
+        With ``legacy`` jitter, such a service can keep its own shorter
+        schedule by passing ``legacy_base``: the sleep is then 0 before
+        the first retry and ``legacy_base * 2 ** attempt`` after that.
+        """
+        if retry_throttled is None:
+            retry_throttled = self.retry_throttled
+        if not retry_throttled:
+            return None
+        code = throttling_error_code(response)
+        if code is None:
+            return None
+        self.record_failure(endpoint)
+        if self.jitter == 'legacy' and legacy_base is not None:
+            next_sleep = attempt and legacy_base * (2 ** attempt)
+        if attempt >= num_retries or not self.allow_retry(endpoint):
+            raise BotoServerError(response.status, response.reason,
+                                  response.read())
+        return ('%s, retry attempt %s' % (code, attempt), attempt + 1,
+                next_sleep)
+
+    def allow_retry(self, endpoint, error=False):
+        """
+        Called when an attempt failed and could be retried.  Returns
+        False if the endpoint's retry budget is exhausted.
+        """
+        if not self.retry_budget:
+            return True
+        allowed = RetryBudget.for_endpoint(endpoint).acquire(error)
+        if not allowed:
+            boto.log.debug('Retry budget for %s exhausted, not retrying',
+                           endpoint)
+        return allowed
+
+    def record_success(self, endpoint):
+        if self.retry_budget:
+            RetryBudget.for_endpoint(endpoint).release()
+        if self.circuit_breaker:
+            CircuitBreaker.for_endpoint(endpoint).record_success()
+
+    def record_failure(self, endpoint):
+        if self.circuit_breaker:
+            CircuitBreaker.for_endpoint(endpoint).record_failure()
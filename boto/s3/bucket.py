@@ -27,6 +27,7 @@ from boto.resultset import ResultSet
 from boto.exception import BotoClientError
 from boto.s3.acl import Policy, CannedACLStrings, Grant
 from boto.s3.key import Key
+from boto.s3.keyrecord import KeyRecord
 from boto.s3.prefix import Prefix
 from boto.s3.deletemarker import DeleteMarker
 from boto.s3.multipart import MultiPartUpload
@@ -34,12 +35,16 @@ from boto.s3.multipart import CompleteMultiPartUpload
 from boto.s3.multidelete import MultiDeleteResult
 from boto.s3.multidelete import Error
 from boto.s3.bucketlistresultset import BucketListResultSet
+from boto.s3.bucketlistresultset import bucket_column_lister
+from boto.s3.bucketlistresultset import ParallelBucketListResultSet
 from boto.s3.bucketlistresultset import VersionedBucketListResultSet
 from boto.s3.bucketlistresultset import MultiPartUploadListResultSet
 from boto.s3.lifecycle import Lifecycle
 from boto.s3.tagging import Tags
 from boto.s3.cors import CORSConfiguration
 from boto.s3.bucketlogging import BucketLogging
+from boto.s3.concurrent import BulkDeleter, MultipartCopier
+from boto.s3.concurrent import multipart_threshold
 import boto.jsonresponse
 import boto.utils
 import xml.sax
@@ -48,6 +53,7 @@ import StringIO
 import urllib
 import re
 import base64
+import hashlib
 from collections import defaultdict
 
 # as per http://goo.gl/BDuud (02/19/2011)
@@ -173,9 +179,53 @@ class Bucket(object):
             for rk, rv in response_headers.iteritems():
                 query_args_l.append('%s=%s' % (rk, urllib.quote(rv)))
 
+        cache = getattr(self.connection, 'metadata_cache', None)
+        if cache is None or headers or query_args_l:
+            key, resp = self._get_key_internal(key_name, headers,
+                                               query_args_l)
+            return key
+        hit, attrs = cache.get(self.name, key_name)
+        if hit:
+            return self._key_from_attrs(attrs)
+        generation = cache.generation
         key, resp = self._get_key_internal(key_name, headers, query_args_l)
+        cache.put(self.name, key_name, self._key_attrs(key), generation)
+        return key
+
+    # The attributes of a key that _get_key_internal sets from a HEAD.
+    _HEAD_ATTRS = ('name', 'metadata', 'etag', 'content_type',
+                   'content_encoding', 'content_disposition',
+                   'content_language', 'last_modified', 'size',
+                   'cache_control', 'version_id', 'source_version_id',
+                   'delete_marker', 'encrypted', 'ongoing_restore',
+                   'expiry_date')
+
+    def _key_attrs(self, key):
+        # The attributes of a key found by a HEAD, as the connection's
+        # metadata cache keeps them, or None if it was not found.
+        if key is None:
+            return None
+        attrs = dict((name, getattr(key, name)) for name in
+                     self._HEAD_ATTRS)
+        # The key is returned to the caller, who may change its metadata.
+        attrs['metadata'] = dict(key.metadata)
+        return attrs
+
+    def _key_from_attrs(self, attrs):
+        if attrs is None:
+            return None
+        key = self.key_class(self)
+        key.__dict__.update(attrs)
+        key.metadata = dict(attrs['metadata'])
         return key
 
+    def _invalidate_key(self, key_name):
+        # Drops a key that was written or deleted from the connection's
+        # metadata cache.
+        cache = getattr(self.connection, 'metadata_cache', None)
+        if cache is not None:
+            cache.invalidate(self.name, key_name)
+
     def _get_key_internal(self, key_name, headers, query_args_l):
         query_args = '&'.join(query_args_l) or None
         response = self.connection.make_request('HEAD', self.name, key_name,
@@ -216,7 +266,8 @@ class Bucket(object):
                 raise self.connection.provider.storage_response_error(
                     response.status, response.reason, '')
 
-    def list(self, prefix='', delimiter='', marker='', headers=None):
+    def list(self, prefix='', delimiter='', marker='', headers=None,
+             prefetch=None, compact=False):
         """
         List key objects within a bucket.  This returns an instance of an
         BucketListResultSet that automatically handles all of the result
@@ -248,13 +299,91 @@ class Bucket(object):
         :type marker: string
         :param marker: The "marker" of where you are in the result set
 
+        :type prefetch: int
+        :param prefetch: The number of pages of results fetched ahead by
+            a background thread while the iterator is consumed.  0
+            fetches each page when it is needed.  Defaults to the
+            ``list_prefetch`` option of the ``s3`` config section, or 0.
+
+        :type compact: bool
+        :param compact: If True, the iterator returns
+            :class:`boto.s3.keyrecord.KeyRecord` objects, which hold
+            only the fields of the listing in a fraction of the memory
+            of a Key, instead of Key objects.
+
         :rtype: :class:`boto.s3.bucketlistresultset.BucketListResultSet`
         :return: an instance of a BucketListResultSet that handles paging, etc
         """
-        return BucketListResultSet(self, prefix, delimiter, marker, headers)
+        return BucketListResultSet(self, prefix, delimiter, marker, headers,
+                                   self._list_prefetch(prefetch), compact)
+
+    def list_columns(self, prefix='', delimiter='', marker='', headers=None,
+                     prefetch=None):
+        """
+        List the keys within a bucket a page at a time, each page a
+        :class:`boto.s3.keyrecord.KeyColumns` holding the fields of its
+        keys as columns, such as an array of their sizes.  The pages
+        can be joined with ``KeyColumns.extend``.
+
+        The parameters are as for :meth:`list`.
+
+        :rtype: generator
+        :return: a generator of KeyColumns objects
+        """
+        return bucket_column_lister(self, prefix, delimiter, marker,
+                                    headers, self._list_prefetch(prefetch))
+
+    def parallel_list(self, prefix='', shards=None, split_points=None,
+                      delimiter='/', num_threads=10, ordered=False,
+                      headers=None):
+        """
+        List key objects within a bucket, listing several ranges of keys
+        at a time.  This returns an instance of a
+        ParallelBucketListResultSet; like :meth:`list`, it handles all
+        of the result paging.
+
+        S3 lists keys one page after the other, each page starting
+        after the last key of the one before.  This splits the keys
+        into ranges and lists them concurrently, so a listing of a large
+        bucket scales with the number of threads, and so connections.
+
+        :type prefix: string
+        :param prefix: allows you to limit the listing to a particular
+            prefix.
+
+        :type shards: int
+        :param shards: The number of ranges to list, if the split points
+            are discovered.  Defaults to four times ``num_threads``.
+
+        :type split_points: list
+        :param split_points: The key names at which to split the keys
+            into ranges; each is the last key name of its range.  By
+            default they are taken from the common prefixes and keys of
+            the first page of a listing of ``prefix`` with ``delimiter``.
+
+        :type delimiter: string
+        :param delimiter: The delimiter of the listing that discovers
+            the split points.
+
+        :type num_threads: int
+        :param num_threads: The number of ranges listed at a time.
+
+        :type ordered: bool
+        :param ordered: If True, keys are returned in key order, as by
+            :meth:`list`.  Otherwise they are returned as they arrive,
+            and only the keys of each page are in order.
+
+        :rtype: :class:`boto.s3.bucketlistresultset.ParallelBucketListResultSet`
+        :return: an instance of a ParallelBucketListResultSet
+        """
+        if shards is None:
+            shards = num_threads * 4
+        return ParallelBucketListResultSet(self, prefix, split_points,
+                                           delimiter, shards, num_threads,
+                                           ordered, headers)
 
     def list_versions(self, prefix='', delimiter='', key_marker='',
-                      version_id_marker='', headers=None):
+                      version_id_marker='', headers=None, prefetch=None):
         """
         List version objects within a bucket.  This returns an
         instance of an VersionedBucketListResultSet that automatically
@@ -279,16 +408,21 @@ class Bucket(object):
         :type marker: string
         :param marker: The "marker" of where you are in the result set
 
+        :type prefetch: int
+        :param prefetch: The number of pages of results fetched ahead by
+            a background thread.  See :meth:`list`.
+
         :rtype: :class:`boto.s3.bucketlistresultset.BucketListResultSet`
         :return: an instance of a BucketListResultSet that handles paging, etc
         """
         return VersionedBucketListResultSet(self, prefix, delimiter,
                                             key_marker, version_id_marker,
-                                            headers)
+                                            headers,
+                                            self._list_prefetch(prefetch))
 
     def list_multipart_uploads(self, key_marker='',
                                upload_id_marker='',
-                               headers=None):
+                               headers=None, prefetch=None):
         """
         List multipart upload objects within a bucket.  This returns an
         instance of an MultiPartUploadListResultSet that automatically
@@ -298,12 +432,22 @@ class Bucket(object):
         :type marker: string
         :param marker: The "marker" of where you are in the result set
 
+        :type prefetch: int
+        :param prefetch: The number of pages of results fetched ahead by
+            a background thread.  See :meth:`list`.
+
         :rtype: :class:`boto.s3.bucketlistresultset.BucketListResultSet`
         :return: an instance of a BucketListResultSet that handles paging, etc
         """
         return MultiPartUploadListResultSet(self, key_marker,
                                             upload_id_marker,
-                                            headers)
+                                            headers,
+                                            self._list_prefetch(prefetch))
+
+    def _list_prefetch(self, prefetch):
+        if prefetch is None:
+            prefetch = boto.config.getint('s3', 'list_prefetch', 0)
+        return prefetch
 
     def _get_all(self, element_map, initial_query_string='',
                  headers=None, **params):
@@ -323,14 +467,22 @@ class Bucket(object):
         response = self.connection.make_request('GET', self.name,
                                                 headers=headers,
                                                 query_args=s)
-        body = response.read()
-        boto.log.debug(body)
         if response.status == 200:
             rs = ResultSet(element_map)
             h = handler.XmlHandler(rs, self)
-            xml.sax.parseString(body, h)
+            parser = self.connection.xml_parser
+            if self.connection.streaming_parse:
+                if not handler.parse_stream(response, h, parser=parser):
+                    raise self.connection.provider.storage_response_error(
+                        response.status, response.reason, '')
+            else:
+                body = response.read()
+                boto.log.debug(body)
+                handler.parse_string(body, h, parser)
             return rs
         else:
+            body = response.read()
+            boto.log.debug(body)
             raise self.connection.provider.storage_response_error(
                 response.status, response.reason, body)
 
@@ -359,11 +511,19 @@ class Bucket(object):
             element in the CommonPrefixes collection. These rolled-up
             keys are not returned elsewhere in the response.
 
+        :type compact: bool
+        :param compact: If True, the keys are
+            :class:`boto.s3.keyrecord.KeyRecord` objects rather than
+            Key objects.
+
         :rtype: ResultSet
         :return: The result from S3 listing the keys requested
 
         """
-        return self._get_all([('Contents', self.key_class),
+        key_class = self.key_class
+        if params.pop('compact', False):
+            key_class = KeyRecord
+        return self._get_all([('Contents', key_class),
                               ('CommonPrefixes', Prefix)],
                              '', headers, **params)
 
@@ -498,70 +658,115 @@ class Bucket(object):
         """
         ikeys = iter(keys)
         result = MultiDeleteResult(self)
-        provider = self.connection.provider
-        query_args = 'delete'
-
-        def delete_keys2(hdrs):
-            hdrs = hdrs or {}
-            data = u"""<?xml version="1.0" encoding="UTF-8"?>"""
-            data += u"<Delete>"
-            if quiet:
-                data += u"<Quiet>true</Quiet>"
-            count = 0
-            while count < 1000:
-                try:
-                    key = ikeys.next()
-                except StopIteration:
-                    break
-                if isinstance(key, basestring):
-                    key_name = key
-                    version_id = None
-                elif isinstance(key, tuple) and len(key) == 2:
-                    key_name, version_id = key
-                elif (isinstance(key, Key) or isinstance(key, DeleteMarker)) and key.name:
-                    key_name = key.name
-                    version_id = key.version_id
-                else:
-                    if isinstance(key, Prefix):
-                        key_name = key.name
-                        code = 'PrefixSkipped'   # Don't delete Prefix
-                    else:
-                        key_name = repr(key)   # try get a string
-                        code = 'InvalidArgument'  # other unknown type
-                    message = 'Invalid. No delete action taken for this object.'
-                    error = Error(key_name, code=code, message=message)
-                    result.errors.append(error)
+        while True:
+            objects = []
+            for key in ikeys:
+                target = self._delete_target(key)
+                if isinstance(target, Error):
+                    result.errors.append(target)
                     continue
-                count += 1
-                data += u"<Object><Key>%s</Key>" % xml.sax.saxutils.escape(key_name)
-                if version_id:
-                    data += u"<VersionId>%s</VersionId>" % version_id
-                data += u"</Object>"
-            data += u"</Delete>"
-            if count <= 0:
-                return False  # no more
-            data = data.encode('utf-8')
-            fp = StringIO.StringIO(data)
-            md5 = boto.utils.compute_md5(fp)
-            hdrs['Content-MD5'] = md5[1]
-            hdrs['Content-Type'] = 'text/xml'
-            if mfa_token:
-                hdrs[provider.mfa_header] = ' '.join(mfa_token)
+                objects.append(target)
+                if len(objects) >= 1000:
+                    break
+            if not objects:
+                break
+            self._delete_objects(objects, quiet, mfa_token, headers, result)
+            if len(objects) < 1000:
+                break
+        return result
+
+    def bulk_delete(self, keys, quiet=True, mfa_token=None, headers=None,
+                    num_threads=None, cb=None):
+        """
+        Deletes the keys from an iterable, such as a listing, using
+        S3's Multi-object delete API with several requests in flight
+        at a time.  Unlike :meth:`delete_keys`, the keys are read a
+        batch at a time as they are deleted, and the result keeps only
+        the errors, so any number of keys can be deleted.  Keys that
+        fail with ``InternalError``, ``ServiceUnavailable`` or
+        ``SlowDown`` are retried.
+
+        :type keys: iterable
+        :param keys: The keys to delete, as for :meth:`delete_keys`.
+
+        :type num_threads: int
+        :param num_threads: The number of delete requests in flight at
+            a time.  Defaults to the ``multipart_threads`` option of the
+            ``s3`` config section, or 10.
+
+        :type cb: function
+        :param cb: Called with the number of keys deleted and the number
+            that could not be, so far, after each batch.
+
+        The other parameters are as for :meth:`delete_keys`.
+
+        :rtype: :class:`boto.s3.concurrent.BulkDeleteResult`
+        :returns: The number of keys deleted, and the errors.
+        """
+        deleter = BulkDeleter(self, num_threads=num_threads)
+        return deleter.delete(keys, quiet, mfa_token, headers, cb)
+
+    def _delete_target(self, key):
+        # The (key_name, version_id) to delete for an item of the keys
+        # given to delete_keys, or the Error to report if there is none.
+        if isinstance(key, basestring):
+            return key, None
+        elif isinstance(key, tuple) and len(key) == 2:
+            return key
+        elif (isinstance(key, (Key, DeleteMarker)) and key.name):
+            return key.name, key.version_id
+        elif isinstance(key, KeyRecord) and key.name:
+            return key.name, None
+        if isinstance(key, Prefix):
+            key_name = key.name
+            code = 'PrefixSkipped'   # Don't delete Prefix
+        else:
+            key_name = repr(key)   # try get a string
+            code = 'InvalidArgument'  # other unknown type
+        message = 'Invalid. No delete action taken for this object.'
+        return Error(key_name, code=code, message=message)
+
+    def _delete_objects(self, objects, quiet=False, mfa_token=None,
+                        headers=None, result=None):
+        # Sends one Multi-object delete request for a list of
+        # (key_name, version_id) pairs and parses the response into
+        # result.
+        if result is None:
+            result = MultiDeleteResult(self)
+        provider = self.connection.provider
+        parts = [u'<?xml version="1.0" encoding="UTF-8"?><Delete>']
+        if quiet:
+            parts.append(u'<Quiet>true</Quiet>')
+        escape = xml.sax.saxutils.escape
+        for key_name, version_id in objects:
+            if version_id:
+                parts.append(u'<Object><Key>%s</Key><VersionId>%s'
+                             u'</VersionId></Object>' % (escape(key_name),
+                                                         version_id))
+            else:
+                parts.append(u'<Object><Key>%s</Key></Object>' %
+                             escape(key_name))
+        parts.append(u'</Delete>')
+        data = u''.join(parts).encode('utf-8')
+        hdrs = dict(headers or {})
+        hdrs['Content-MD5'] = base64.b64encode(hashlib.md5(data).digest())
+        hdrs['Content-Type'] = 'text/xml'
+        if mfa_token:
+            hdrs[provider.mfa_header] = ' '.join(mfa_token)
+        try:
             response = self.connection.make_request('POST', self.name,
                                                     headers=hdrs,
-                                                    query_args=query_args,
+                                                    query_args='delete',
                                                     data=data)
-            body = response.read()
-            if response.status == 200:
-                h = handler.XmlHandler(result, self)
-                xml.sax.parseString(body, h)
-                return count >= 1000  # more?
-            else:
-                raise provider.storage_response_error(response.status,
-                                                      response.reason,
-                                                      body)
-        while delete_keys2(headers):
-            pass
+        finally:
+            for key_name, version_id in objects:
+                self._invalidate_key(key_name)
+        body = response.read()
+        if response.status != 200:
+            raise provider.storage_response_error(response.status,
+                                                  response.reason, body)
+        h = handler.XmlHandler(result, self)
+        handler.parse_string(body, h, self.connection.xml_parser)
         return result
 
     def delete_key(self, key_name, headers=None, version_id=None,
@@ -605,9 +810,13 @@ class Bucket(object):
             if not headers:
                 headers = {}
             headers[provider.mfa_header] = ' '.join(mfa_token)
-        response = self.connection.make_request('DELETE', self.name, key_name,
-                                                headers=headers,
-                                                query_args=query_args)
+        try:
+            response = self.connection.make_request('DELETE', self.name,
+                                                    key_name,
+                                                    headers=headers,
+                                                    query_args=query_args)
+        finally:
+            self._invalidate_key(key_name)
         body = response.read()
         if response.status != 204:
             raise provider.storage_response_error(response.status,
@@ -622,10 +831,22 @@ class Bucket(object):
     def copy_key(self, new_key_name, src_bucket_name,
                  src_key_name, metadata=None, src_version_id=None,
                  storage_class='STANDARD', preserve_acl=False,
-                 encrypt_key=False, headers=None, query_args=None):
+                 encrypt_key=False, headers=None, query_args=None,
+                 src_size=None):
         """
         Create a new key in the bucket by copying another existing key.
 
+        A source of at least ``multipart_threshold`` bytes (see
+        :func:`boto.s3.concurrent.multipart_threshold`) is copied as a
+        multipart upload whose parts are copied concurrently, with a
+        :class:`boto.s3.concurrent.MultipartCopier`.  If ``src_size``
+        is not given, the source is copied in one request, and only if
+        S3 rejects it as too large to be, as it does sources over 5GB,
+        is it copied as a multipart upload.  :meth:`Key.copy` passes the
+        size of the key when it is known.
+        Either way the data is copied by S3 without passing through the
+        client.
+
         :type new_key_name: string
         :param new_key_name: The name of the new key
 
@@ -673,9 +894,15 @@ class Bucket(object):
         :param query_args: A string of additional querystring arguments
             to append to the request
 
+        :type src_size: int
+        :param src_size: The size of the source key in bytes, if known.
+
         :rtype: :class:`boto.s3.key.Key` or subclass
         :returns: An instance of the newly created key object
         """
+        copy_args = (new_key_name, src_bucket_name, src_key_name, metadata,
+                     src_version_id, storage_class, encrypt_key,
+                     dict(headers or {}))
         headers = headers or {}
         provider = self.connection.provider
         src_key_name = boto.utils.get_utf8_value(src_key_name)
@@ -685,6 +912,12 @@ class Bucket(object):
             else:
                 src_bucket = self.connection.get_bucket(src_bucket_name)
             acl = src_bucket.get_xml_acl(src_key_name)
+        if query_args is None and src_size is not None:
+            if 0 < multipart_threshold() <= src_size:
+                key = self._copy_key_multipart(*copy_args)
+                if preserve_acl:
+                    self.set_xml_acl(acl, new_key_name)
+                return key
         if encrypt_key:
             headers[provider.server_side_encryption_header] = 'AES256'
         src = '%s/%s' % (src_bucket_name, urllib.quote(src_key_name))
@@ -699,9 +932,13 @@ class Bucket(object):
             headers = boto.utils.merge_meta(headers, metadata, provider)
         elif not query_args:  # Can't use this header with multi-part copy.
             headers[provider.metadata_directive_header] = 'COPY'
-        response = self.connection.make_request('PUT', self.name, new_key_name,
-                                                headers=headers,
-                                                query_args=query_args)
+        try:
+            response = self.connection.make_request('PUT', self.name,
+                                                    new_key_name,
+                                                    headers=headers,
+                                                    query_args=query_args)
+        finally:
+            self._invalidate_key(new_key_name)
         body = response.read()
         if response.status == 200:
             key = self.new_key(new_key_name)
@@ -713,10 +950,38 @@ class Bucket(object):
             if preserve_acl:
                 self.set_xml_acl(acl, new_key_name)
             return key
+        elif (response.status == 400 and query_args is None and
+              '<Code>InvalidRequest</Code>' in body and
+              'copy source is larger' in body):
+            key = self._copy_key_multipart(*copy_args)
+            if preserve_acl:
+                self.set_xml_acl(acl, new_key_name)
+            return key
         else:
             raise provider.storage_response_error(response.status,
                                                   response.reason, body)
 
+    def _copy_key_multipart(self, new_key_name, src_bucket_name,
+                            src_key_name, metadata, src_version_id,
+                            storage_class, encrypt_key, headers):
+        if self.name == src_bucket_name:
+            src_bucket = self
+        else:
+            src_bucket = self.connection.get_bucket(src_bucket_name,
+                                                    validate=False)
+        src_key = src_bucket.get_key(src_key_name, version_id=src_version_id)
+        if src_key is None:
+            raise self.connection.provider.storage_response_error(
+                404, 'Not Found', 'No such key: %s' % src_key_name)
+        copier = MultipartCopier(self)
+        result = copier.copy(new_key_name, src_key, metadata, storage_class,
+                             encrypt_key, headers)
+        key = self.new_key(new_key_name)
+        key.etag = result.etag
+        key.version_id = result.version_id
+        key.size = src_key.size
+        return key
+
     def set_canned_acl(self, acl_str, key_name='', headers=None,
                        version_id=None):
         assert acl_str in CannedACLStrings
@@ -1526,9 +1791,14 @@ class Bucket(object):
         if headers is None:
             headers = {}
         headers['Content-Type'] = 'text/xml'
-        response = self.connection.make_request('POST', self.name, key_name,
-                                                query_args=query_args,
-                                                headers=headers, data=xml_body)
+        try:
+            response = self.connection.make_request('POST', self.name,
+                                                    key_name,
+                                                    query_args=query_args,
+                                                    headers=headers,
+                                                    data=xml_body)
+        finally:
+            self._invalidate_key(key_name)
         contains_error = False
         body = response.read()
         # Some errors will be reported in the body of the response
@@ -19,21 +19,347 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
 # IN THE SOFTWARE.
 
-def bucket_lister(bucket, prefix='', delimiter='', marker='', headers=None):
+import sys
+import threading
+from Queue import Queue, Empty, Full
+
+from boto.s3.keyrecord import KeyColumns
+from boto.utils import get_utf8_value
+
+_DONE = object()
+
+
+def prefetch_pages(pages, prefetch):
+    """
+    Iterates over the pages of results produced by the iterator
+    ``pages``, which are fetched by a background thread that keeps up
+    to ``prefetch`` pages ready ahead of the consumer.  Each page still
+    needs the markers of the one before, so the pages are requested one
+    after the other, but while the consumer works through a page.
+
+    Closing the generator, or dropping it, stops the thread once its
+    current request is done.  An error raised fetching a page is raised
+    by the generator when it reaches that page.
+    """
+    queue = Queue(prefetch)
+    stop = threading.Event()
+    thread = threading.Thread(target=_fetch_pages, args=(pages, queue, stop))
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            # A blocking get() cannot be interrupted by Ctrl-C.
+            try:
+                page = queue.get(timeout=1)
+            except Empty:
+                continue
+            if page is _DONE:
+                return
+            if isinstance(page, tuple):
+                raise page[0], page[1], page[2]
+            yield page
+    finally:
+        stop.set()
+
+
+def _fetch_pages(pages, queue, stop):
+    def put(item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+    try:
+        for page in pages:
+            if not put(page):
+                return
+    except Exception:
+        put(sys.exc_info())
+        return
+    put(_DONE)
+
+
+def _paged(pages, prefetch):
+    if prefetch:
+        pages = prefetch_pages(pages, prefetch)
+    for page in pages:
+        for item in page:
+            yield item
+
+
+def bucket_pages(bucket, prefix='', delimiter='', marker='', headers=None,
+                 compact=False):
     """
-    A generator function for listing keys in a bucket.
+    A generator function for listing the pages of keys in a bucket.
+    If ``compact`` is True, the keys are
+    :class:`boto.s3.keyrecord.KeyRecord` objects.
     """
+    params = {}
+    if compact:
+        params['compact'] = True
     more_results = True
     k = None
     while more_results:
         rs = bucket.get_all_keys(prefix=prefix, marker=marker,
-                                 delimiter=delimiter, headers=headers)
-        for k in rs:
-            yield k
+                                 delimiter=delimiter, headers=headers,
+                                 **params)
+        yield rs
+        if len(rs):
+            k = rs[-1]
         if k:
             marker = rs.next_marker or k.name
         more_results= rs.is_truncated
-        
+
+
+def bucket_lister(bucket, prefix='', delimiter='', marker='', headers=None,
+                  prefetch=0, compact=False):
+    """
+    A generator function for listing keys in a bucket.  If ``prefetch``
+    is not 0, up to that many pages are fetched ahead by a background
+    thread; see :func:`prefetch_pages`.
+    """
+    return _paged(bucket_pages(bucket, prefix, delimiter, marker, headers,
+                               compact), prefetch)
+
+
+def bucket_column_lister(bucket, prefix='', delimiter='', marker='',
+                         headers=None, prefetch=0):
+    """
+    A generator function for listing the pages of keys in a bucket as
+    :class:`boto.s3.keyrecord.KeyColumns` objects.
+    """
+    pages = bucket_pages(bucket, prefix, delimiter, marker, headers, True)
+    if prefetch:
+        pages = prefetch_pages(pages, prefetch)
+    for page in pages:
+        yield KeyColumns.from_records(bucket, page)
+
+
+def bucket_range_pages(bucket, prefix='', marker='', end=None, headers=None):
+    """
+    A generator function for listing the pages of the keys in a bucket
+    that come after ``marker`` and no later than ``end``.  S3 cannot
+    stop a listing at a key, so the last page is cut short here.
+    """
+    if end is None:
+        for rs in bucket_pages(bucket, prefix, '', marker, headers):
+            yield rs
+        return
+    end = get_utf8_value(end)
+    for rs in bucket_pages(bucket, prefix, '', marker, headers):
+        keys = [k for k in rs if get_utf8_value(k.name) <= end]
+        if len(keys) < len(rs):
+            yield keys
+            return
+        yield rs
+
+
+def discover_split_points(bucket, prefix='', delimiter='/', shards=16,
+                          headers=None):
+    """
+    Returns up to ``shards - 1`` key names that split the keys under
+    ``prefix`` into ranges, taken evenly from the common prefixes and
+    keys of the first page of a listing with ``delimiter``.
+
+    If that page is truncated it only covers the start of the keys, so
+    the ranges after it are found by probing the rest of the key space
+    with one-key listings instead; see :func:`_probe_split_points`.
+    """
+    rs = bucket.get_all_keys(prefix=prefix, delimiter=delimiter,
+                             headers=headers)
+    names = sorted(set(get_utf8_value(k.name) for k in rs))
+    if shards < 2 or not names:
+        return []
+    if rs.is_truncated:
+        return _probe_split_points(bucket, get_utf8_value(prefix), delimiter,
+                                   names[-1], shards - 1, headers)
+    step = max(len(names) / float(shards), 1)
+    points = []
+    i = step
+    while i < len(names) and len(points) < shards - 1:
+        points.append(names[int(i)])
+        i += step
+    return sorted(set(points))
+
+
+# The most one-key listings made per split point wanted.
+_PROBES_PER_POINT = 8
+# How many characters after the prefix are compared to size a range.
+_SPAN_WIDTH = 16
+
+
+def _probe_split_points(bucket, prefix, delimiter, last, count, headers):
+    """
+    Returns up to ``count`` sorted key names (or common prefixes) after
+    ``last``, spread over the key space by bisection: the widest range
+    not yet probed is halved, and a listing of one key from its middle
+    either finds a key in the upper half or shows that half is empty.
+
+    The first range bisected ends at the shortest name past every key,
+    found by a binary search over the leading characters of ``last``, so
+    names sharing a long start with it are not bisected one character at
+    a time.
+    Only printable ASCII markers are probed, so they are valid in both
+    the query string and the XML of the response.
+    """
+    state = {'probes': 0}
+
+    def first_after(marker):
+        state['probes'] += 1
+        rs = bucket.get_all_keys(prefix=prefix, delimiter=delimiter,
+                                 marker=marker, max_keys=1, headers=headers)
+        return rs and get_utf8_value(rs[0].name) or None
+
+    def past(name):
+        # A common prefix stands for every key under it.
+        if delimiter and name.endswith(delimiter):
+            return name + '\x7f'
+        return name
+
+    def span(gap):
+        low, high = [_key_value(n[len(prefix):], _SPAN_WIDTH) for n in gap]
+        return high - low
+
+    budget = count * _PROBES_PER_POINT
+    shortest, longest = len(prefix), len(last)
+    while shortest < longest and state['probes'] < budget:
+        length = (shortest + longest + 1) // 2
+        if first_after(last[:length] + '~') is None:
+            shortest = length
+        else:
+            longest = length - 1
+    if shortest > len(prefix):
+        high = last[:shortest] + '~'
+    else:
+        high = prefix + '\x7f'
+    found = []
+    gaps = [(past(last), high)]
+    while gaps and len(found) < count and state['probes'] < budget:
+        gaps.sort(key=span)
+        low, high = gaps.pop()
+        middle = _midpoint(low, high)
+        if not low < middle < high:
+            continue
+        name = first_after(middle)
+        if name and low < name < high:
+            found.append(name)
+            gaps.append((low, min(middle, name)))
+            gaps.append((past(name), high))
+        else:
+            gaps.append((low, middle))
+    return sorted(found)
+
+
+def _key_value(name, width):
+    """
+    Reads the first ``width`` characters of ``name`` as a number in base
+    95, one digit per printable ASCII character.
+    """
+    value = 0
+    for c in name[:width].ljust(width, ' '):
+        value = value * 95 + min(max(ord(c) - 32, 0), 94)
+    return value
+
+
+def _midpoint(low, high):
+    """Returns the printable name halfway between ``low`` and ``high``."""
+    width = max(len(low), len(high)) + 1
+    value = (_key_value(low, width) + _key_value(high, width)) // 2
+    chars = []
+    for i in range(width):
+        value, c = divmod(value, 95)
+        chars.append(chr(c + 32))
+    return ''.join(reversed(chars)).rstrip(' ')
+
+
+def parallel_bucket_lister(bucket, prefix='', split_points=None,
+                           delimiter='/', shards=16, num_threads=10,
+                           ordered=False, headers=None):
+    """
+    A generator function for listing the keys in a bucket with
+    ``num_threads`` threads, each listing a range of keys at a time.
+
+    The ranges end at ``split_points``, each of which is the last key
+    name of its range; if there are none, they are found with
+    :func:`discover_split_points`.  Keys are yielded as the pages of the
+    ranges arrive, or in key order if ``ordered`` is True.  Closing the
+    generator stops the threads once their current requests are done.
+    """
+    if split_points is None:
+        split_points = discover_split_points(bucket, prefix, delimiter,
+                                             shards, headers)
+    points = sorted(set(get_utf8_value(p) for p in split_points))
+    ranges = zip([''] + points, points + [None])
+    work = Queue()
+    for i, (marker, end) in enumerate(ranges):
+        work.put((i, marker, end))
+    if ordered:
+        # One queue per range, drained in order.
+        results = [Queue(2) for _ in ranges]
+    else:
+        results = Queue(num_threads * 2)
+    stop = threading.Event()
+    threads = []
+    for _ in xrange(min(num_threads, len(ranges))):
+        thread = threading.Thread(target=_list_ranges,
+                                  args=(bucket, prefix, headers, work,
+                                        results, stop))
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+    try:
+        remaining = len(ranges)
+        current = 0
+        while remaining:
+            queue = results
+            if ordered:
+                queue = results[current]
+            try:
+                i, page = queue.get(timeout=1)
+            except Empty:
+                continue
+            if page is _DONE:
+                remaining -= 1
+                current += 1
+            elif isinstance(page, tuple):
+                raise page[0], page[1], page[2]
+            else:
+                for key in page:
+                    yield key
+    finally:
+        stop.set()
+
+
+def _list_ranges(bucket, prefix, headers, work, results, stop):
+    def put(i, item):
+        queue = results
+        if isinstance(results, list):
+            queue = results[i]
+        while not stop.is_set():
+            try:
+                queue.put((i, item), timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+    while not stop.is_set():
+        try:
+            i, marker, end = work.get_nowait()
+        except Empty:
+            return
+        try:
+            for page in bucket_range_pages(bucket, prefix, marker, end,
+                                           headers):
+                if not put(i, page):
+                    return
+        except Exception:
+            put(i, sys.exc_info())
+            return
+        put(i, _DONE)
+
+
 class BucketListResultSet:
     """
     A resultset for listing keys within a bucket.  Uses the bucket_lister
@@ -43,36 +369,76 @@ class BucketListResultSet:
     keys in a reasonably efficient manner.
     """
 
-    def __init__(self, bucket=None, prefix='', delimiter='', marker='', headers=None):
+    def __init__(self, bucket=None, prefix='', delimiter='', marker='', headers=None,
+                 prefetch=0, compact=False):
         self.bucket = bucket
         self.prefix = prefix
         self.delimiter = delimiter
         self.marker = marker
         self.headers = headers
+        self.prefetch = prefetch
+        self.compact = compact
 
     def __iter__(self):
         return bucket_lister(self.bucket, prefix=self.prefix,
                              delimiter=self.delimiter, marker=self.marker,
-                             headers=self.headers)
+                             headers=self.headers, prefetch=self.prefetch,
+                             compact=self.compact)
 
-def versioned_bucket_lister(bucket, prefix='', delimiter='',
-                            key_marker='', version_id_marker='', headers=None):
+class ParallelBucketListResultSet:
     """
-    A generator function for listing versions in a bucket.
+    A resultset for listing the keys within a bucket concurrently.  Uses
+    the parallel_bucket_lister generator function and implements the
+    iterator interface.
+    """
+
+    def __init__(self, bucket=None, prefix='', split_points=None,
+                 delimiter='/', shards=16, num_threads=10, ordered=False,
+                 headers=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.split_points = split_points
+        self.delimiter = delimiter
+        self.shards = shards
+        self.num_threads = num_threads
+        self.ordered = ordered
+        self.headers = headers
+
+    def __iter__(self):
+        return parallel_bucket_lister(self.bucket, prefix=self.prefix,
+                                      split_points=self.split_points,
+                                      delimiter=self.delimiter,
+                                      shards=self.shards,
+                                      num_threads=self.num_threads,
+                                      ordered=self.ordered,
+                                      headers=self.headers)
+
+def versioned_bucket_pages(bucket, prefix='', delimiter='', key_marker='',
+                           version_id_marker='', headers=None):
+    """
+    A generator function for listing the pages of versions in a bucket.
     """
     more_results = True
-    k = None
     while more_results:
         rs = bucket.get_all_versions(prefix=prefix, key_marker=key_marker,
                                      version_id_marker=version_id_marker,
                                      delimiter=delimiter, headers=headers,
                                      max_keys=999)
-        for k in rs:
-            yield k
+        yield rs
         key_marker = rs.next_key_marker
         version_id_marker = rs.next_version_id_marker
         more_results= rs.is_truncated
-        
+
+def versioned_bucket_lister(bucket, prefix='', delimiter='',
+                            key_marker='', version_id_marker='', headers=None,
+                            prefetch=0):
+    """
+    A generator function for listing versions in a bucket.
+    """
+    return _paged(versioned_bucket_pages(bucket, prefix, delimiter,
+                                         key_marker, version_id_marker,
+                                         headers), prefetch)
+
 class VersionedBucketListResultSet:
     """
     A resultset for listing versions within a bucket.  Uses the bucket_lister
@@ -83,39 +449,49 @@ class VersionedBucketListResultSet:
     """
 
     def __init__(self, bucket=None, prefix='', delimiter='', key_marker='',
-                 version_id_marker='', headers=None):
+                 version_id_marker='', headers=None, prefetch=0):
         self.bucket = bucket
         self.prefix = prefix
         self.delimiter = delimiter
         self.key_marker = key_marker
         self.version_id_marker = version_id_marker
         self.headers = headers
+        self.prefetch = prefetch
 
     def __iter__(self):
         return versioned_bucket_lister(self.bucket, prefix=self.prefix,
                                        delimiter=self.delimiter,
                                        key_marker=self.key_marker,
                                        version_id_marker=self.version_id_marker,
-                                       headers=self.headers)
+                                       headers=self.headers,
+                                       prefetch=self.prefetch)
 
-def multipart_upload_lister(bucket, key_marker='',
-                            upload_id_marker='',
-                            headers=None):
+def multipart_upload_pages(bucket, key_marker='', upload_id_marker='',
+                           headers=None):
     """
-    A generator function for listing multipart uploads in a bucket.
+    A generator function for listing the pages of multipart uploads in
+    a bucket.
     """
     more_results = True
-    k = None
     while more_results:
         rs = bucket.get_all_multipart_uploads(key_marker=key_marker,
                                               upload_id_marker=upload_id_marker,
                                               headers=headers)
-        for k in rs:
-            yield k
+        yield rs
         key_marker = rs.next_key_marker
         upload_id_marker = rs.next_upload_id_marker
         more_results= rs.is_truncated
-        
+
+def multipart_upload_lister(bucket, key_marker='',
+                            upload_id_marker='',
+                            headers=None, prefetch=0):
+    """
+    A generator function for listing multipart uploads in a bucket.
+    """
+    return _paged(multipart_upload_pages(bucket, key_marker,
+                                         upload_id_marker, headers),
+                  prefetch)
+
 class MultiPartUploadListResultSet:
     """
     A resultset for listing multipart uploads within a bucket.
@@ -126,14 +502,16 @@ class MultiPartUploadListResultSet:
     keys in a reasonably efficient manner.
     """
     def __init__(self, bucket=None, key_marker='',
-                 upload_id_marker='', headers=None):
+                 upload_id_marker='', headers=None, prefetch=0):
         self.bucket = bucket
         self.key_marker = key_marker
         self.upload_id_marker = upload_id_marker
         self.headers = headers
+        self.prefetch = prefetch
 
     def __iter__(self):
         return multipart_upload_lister(self.bucket,
                                        key_marker=self.key_marker,
                                        upload_id_marker=self.upload_id_marker,
-                                       headers=self.headers)
+                                       headers=self.headers,
+                                       prefetch=self.prefetch)
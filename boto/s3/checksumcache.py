@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+"""
+A persistent cache of the checksums of local files.
+
+Before a file is uploaded, boto reads it once to compute the MD5 that is
+sent as its Content-MD5, and a multipart upload reads each part once to
+compute the MD5 of the part.  :class:`ChecksumCache` keeps these
+checksums in a small sqlite database, keyed by the path, inode, size and
+modification time of the file, so that a file which has not changed is
+not read twice.
+
+The cache is off unless the ``checksum_cache`` option of the ``s3``
+config section names its database::
+
+    [s3]
+    checksum_cache = ~/.boto_checksums
+
+:meth:`boto.s3.key.Key.set_contents_from_filename` and
+:class:`boto.s3.concurrent.MultipartUploader` then use it, and
+:meth:`ChecksumCache.warm` fills it for many files at once.
+"""
+from __future__ import with_statement
+import base64
+import os
+import threading
+
+import boto
+
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import md5
+
+#: The part size under which whole-file checksums are stored.
+WHOLE_FILE = 0
+
+_BUFFER_SIZE = 1024 * 1024
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_checksum_cache():
+    """
+    Returns the :class:`ChecksumCache` named by the ``checksum_cache``
+    option of the ``s3`` config section, or None if there is none.
+    """
+    global _cache
+    filename = boto.config.get('s3', 'checksum_cache', None)
+    if not filename:
+        return None
+    filename = os.path.expanduser(filename)
+    with _cache_lock:
+        if _cache is None or _cache.filename != filename:
+            _cache = ChecksumCache(filename)
+        return _cache
+
+
+def file_key(path):
+    """
+    Returns the (inode, size, mtime in nanoseconds) of the file
+    ``path``, which change whenever its contents do.
+    """
+    st = os.stat(path)
+    return (st.st_ino, st.st_size, int(round(st.st_mtime * 10 ** 9)))
+
+
+def base64_md5(hex_md5):
+    """Returns the base64 form of the hex digest ``hex_md5``."""
+    return base64.b64encode(hex_md5.decode('hex'))
+
+
+def hash_file(path, part_sizes=()):
+    """
+    Reads the file ``path`` once and returns its key (see
+    :func:`file_key`), the hex MD5 of the whole file and a dict mapping
+    each of ``part_sizes`` to the hex MD5s of the parts of that size.
+    Returns None for the key if the file changed while it was read.
+    """
+    key = file_key(path)
+    whole = md5()
+    parts = dict((part_size, []) for part_size in part_sizes)
+    # The MD5 of the current part of each size, and the bytes left in it.
+    current = dict((part_size, [md5(), part_size]) for part_size in parts)
+    fp = open(path, 'rb')
+    try:
+        while True:
+            chunk = fp.read(_BUFFER_SIZE)
+            if not chunk:
+                break
+            read = len(chunk)
+            whole.update(chunk)
+            for part_size, state in current.iteritems():
+                offset = 0
+                while offset < read:
+                    take = min(state[1], read - offset)
+                    state[0].update(chunk[offset:offset + take])
+                    offset += take
+                    state[1] -= take
+                    if not state[1]:
+                        parts[part_size].append(state[0].hexdigest())
+                        state[0] = md5()
+                        state[1] = part_size
+    finally:
+        fp.close()
+    for part_size, state in current.iteritems():
+        if state[1] != part_size or not parts[part_size]:
+            parts[part_size].append(state[0].hexdigest())
+    if file_key(path) != key:
+        key = None
+    return key, whole.hexdigest(), parts
+
+
+def _hash_file(args):
+    # multiprocessing can only call functions of one argument.
+    path, part_sizes = args
+    try:
+        return (path,) + hash_file(path, part_sizes)
+    except (IOError, OSError):
+        return path, None, None, None
+
+
+class ChecksumCache(object):
+    """
+    The MD5s of local files, and of their parts, stored in a sqlite
+    database.  An entry is only returned while the inode, size and
+    modification time of its file are those it was stored with.
+
+    A cache may be shared between threads, and the database between
+    processes.
+    """
+
+    def __init__(self, filename):
+        """
+        :type filename: string
+        :param filename: The name of the database file, which is created
+            if it does not exist.
+        """
+        # sqlite3 is only needed by the few programs that use a cache.
+        import sqlite3
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filename, timeout=30,
+                                   check_same_thread=False)
+        with self._lock:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS checksums ('
+                'path BLOB, part_size INTEGER, inode INTEGER, size INTEGER, '
+                'mtime_ns INTEGER, md5s TEXT, PRIMARY KEY (path, part_size))')
+            self._db.commit()
+
+    def _path(self, path):
+        path = os.path.abspath(path)
+        if isinstance(path, unicode):
+            path = path.encode('utf-8')
+        return buffer(path)
+
+    def _get(self, path, part_size):
+        try:
+            key = file_key(path)
+        except OSError:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                'SELECT inode, size, mtime_ns, md5s FROM checksums '
+                'WHERE path = ? AND part_size = ?',
+                (self._path(path), part_size)).fetchone()
+        if row is None or tuple(row[:3]) != key:
+            return None
+        return [(hex_md5, base64_md5(hex_md5))
+                for hex_md5 in row[3].split(',')]
+
+    def _set(self, rows, commit=True):
+        with self._lock:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO checksums VALUES (?, ?, ?, ?, ?, ?)',
+                [(self._path(path), part_size) + tuple(key) +
+                 (','.join(md5s),) for path, part_size, key, md5s in rows])
+            if commit:
+                self._db.commit()
+
+    def _is_current(self, path, key):
+        try:
+            return key is not None and file_key(path) == tuple(key)
+        except OSError:
+            return False
+
+    def get_md5(self, path):
+        """
+        Returns the MD5 of the file ``path`` as a (hex digest, base64
+        digest) tuple, the form that
+        :meth:`boto.s3.key.Key.compute_md5` returns, or None if it is
+        not cached.
+        """
+        md5s = self._get(path, WHOLE_FILE)
+        return md5s and md5s[0]
+
+    def set_md5(self, path, hex_md5, key):
+        """
+        Stores the hex MD5 of the file ``path``.  ``key`` is the
+        :func:`file_key` of the file taken before it was hashed; nothing
+        is stored if the file has changed since.
+        """
+        if self._is_current(path, key):
+            self._set([(path, WHOLE_FILE, key, [hex_md5])])
+
+    def get_part_md5s(self, path, part_size):
+        """
+        Returns the MD5s of the parts of ``part_size`` bytes of the file
+        ``path``, as a list of (hex digest, base64 digest) tuples, or
+        None if they are not cached.
+        """
+        return self._get(path, part_size)
+
+    def set_part_md5s(self, path, part_size, hex_md5s, key):
+        """
+        Stores the hex MD5s of the parts of ``part_size`` bytes of the
+        file ``path``.  ``key`` is as for :meth:`set_md5`.
+        """
+        if self._is_current(path, key):
+            self._set([(path, part_size, key, hex_md5s)])
+
+    def warm(self, paths, part_sizes=None, processes=None):
+        """
+        Hashes the files in ``paths`` whose checksums are not cached
+        yet, in ``processes`` processes, and stores their checksums.
+
+        :type part_sizes: list
+        :param part_sizes: The part sizes whose part MD5s to store as
+            well.  By default, the part MD5s a multipart upload of the
+            file by :meth:`boto.s3.key.Key.set_contents_from_filename`
+            would need are stored.
+
+        :type processes: int
+        :param processes: The number of processes hashing files.
+            Defaults to the number of CPUs.
+
+        :rtype: int
+        :return: The number of files hashed.
+        """
+        work = []
+        for path in paths:
+            sizes = part_sizes
+            if sizes is None:
+                sizes = self._upload_part_sizes(path)
+            if (self.get_md5(path) is None or
+                    [s for s in sizes if self._get(path, s) is None]):
+                work.append((path, tuple(sizes)))
+        if not work:
+            return 0
+        if processes == 1 or len(work) == 1:
+            self._store(map(_hash_file, work))
+        else:
+            import multiprocessing
+            pool = multiprocessing.Pool(processes)
+            try:
+                self._store(pool.imap_unordered(_hash_file, work))
+            finally:
+                pool.close()
+                pool.join()
+        return len(work)
+
+    def _store(self, results):
+        for path, key, hex_md5, parts in results:
+            if key is None:
+                continue
+            rows = [(path, WHOLE_FILE, key, [hex_md5])]
+            for part_size, hex_md5s in parts.iteritems():
+                rows.append((path, part_size, key, hex_md5s))
+            self._set(rows, commit=False)
+        with self._lock:
+            self._db.commit()
+
+    def _upload_part_sizes(self, path):
+        from boto.s3.concurrent import multipart_threshold
+        from boto.s3.concurrent import MultipartUploader
+        size = os.path.getsize(path)
+        threshold = multipart_threshold()
+        if not threshold or size < threshold:
+            return []
+        return [MultipartUploader(None)._calculate_part_size(size)]
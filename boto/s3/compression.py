@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+"""
+Compression of key data on the fly.
+
+:meth:`boto.s3.key.Key.set_contents_from_file` and its siblings take a
+``compress`` codec, which compresses the data as it is sent and sets
+the ``Content-Encoding`` of the key, and
+:meth:`boto.s3.key.Key.get_contents_to_file` and its siblings take a
+``decompress`` flag, which decompresses the data as it is received.
+Neither stages the data in a temporary file.  Content-MD5 and ETag
+checks are of the bytes sent and received, that is of the compressed
+data.
+
+The codecs are ``gzip``, ``zlib`` (sent as the ``deflate`` content
+encoding) and ``bz2`` (as ``bzip2``).  Others can be added with
+:func:`register_codec`.  A codec can also decompress the chunks
+iterating over a key gives::
+
+    codec = get_codec('gzip')
+    for data in codec.decompress_iter(bucket.get_key('log.gz')):
+        ...
+"""
+import bz2
+import zlib
+
+from boto.exception import BotoClientError
+
+_BUFFER_SIZE = 64 * 1024
+
+
+class Codec(object):
+    """
+    A compression format.  ``name`` is the name it is registered under
+    and ``content_encoding`` the ``Content-Encoding`` of the keys it
+    compresses.  Subclasses return compressor and decompressor objects
+    with the interface of those of :mod:`zlib`.
+    """
+
+    name = None
+    content_encoding = None
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def __repr__(self):
+        return '<%s: %s>' % (self.__class__.__name__, self.name)
+
+    def compressor(self):
+        raise NotImplementedError
+
+    def decompressor(self):
+        raise NotImplementedError
+
+    def decompress_iter(self, chunks):
+        """Decompresses the iterable of strings ``chunks``."""
+        decompressor = self.decompressor()
+        for chunk in chunks:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+        data = decompressor.flush()
+        if data:
+            yield data
+
+
+class GzipCodec(Codec):
+    name = 'gzip'
+    content_encoding = 'gzip'
+
+    def compressor(self):
+        return zlib.compressobj(self.level, zlib.DEFLATED,
+                                16 + zlib.MAX_WBITS)
+
+    def decompressor(self):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+class ZlibCodec(Codec):
+    name = 'zlib'
+    content_encoding = 'deflate'
+
+    def compressor(self):
+        return zlib.compressobj(self.level)
+
+    def decompressor(self):
+        return zlib.decompressobj()
+
+
+class _BZ2Decompressor(object):
+    # bz2.BZ2Decompressor has no flush().
+
+    def __init__(self):
+        self._decompressor = bz2.BZ2Decompressor()
+
+    def decompress(self, data):
+        return self._decompressor.decompress(data)
+
+    def flush(self):
+        return ''
+
+
+class BZ2Codec(Codec):
+    name = 'bz2'
+    content_encoding = 'bzip2'
+
+    def __init__(self, level=9):
+        super(BZ2Codec, self).__init__(level)
+
+    def compressor(self):
+        return bz2.BZ2Compressor(self.level)
+
+    def decompressor(self):
+        return _BZ2Decompressor()
+
+
+_codecs = {}
+
+
+def register_codec(codec):
+    """
+    Makes ``codec`` available under its name and its content encoding,
+    replacing any codec registered under them.
+    """
+    _codecs[codec.name] = codec
+    _codecs[codec.content_encoding] = codec
+
+
+def get_codec(codec):
+    """
+    Returns the codec registered under the name or content encoding
+    ``codec``, or ``codec`` itself if it is a :class:`Codec`.
+    """
+    if isinstance(codec, Codec):
+        return codec
+    try:
+        return _codecs[codec.lower()]
+    except (KeyError, AttributeError):
+        raise BotoClientError('Unknown compression codec: %s' % codec)
+
+
+def find_codec(content_encoding):
+    """
+    Returns the codec of the ``Content-Encoding`` ``content_encoding``,
+    or None if it is not compressed with a registered codec.
+    """
+    if not content_encoding:
+        return None
+    return _codecs.get(content_encoding.lower())
+
+
+for _codec in (GzipCodec(), ZlibCodec(), BZ2Codec()):
+    register_codec(_codec)
+
+
+class CompressingReader(object):
+    """
+    A read-only, non-seekable file object of the compressed data of the
+    file object ``fp``, of which at most ``size`` bytes are read.
+    ``bytes_read`` counts the bytes read from ``fp`` and
+    ``bytes_compressed`` the bytes of compressed data returned.
+    """
+
+    def __init__(self, fp, codec, size=None):
+        self._fp = fp
+        self._compressor = get_codec(codec).compressor()
+        self._remaining = size
+        self._buffer = ''
+        self._done = False
+        self.bytes_read = 0
+        self.bytes_compressed = 0
+
+    def tell(self):
+        raise IOError('A compressed stream has no position')
+
+    def read(self, size=-1):
+        chunks = [self._buffer]
+        length = len(self._buffer)
+        while not self._done and (size < 0 or length < size):
+            read_size = _BUFFER_SIZE
+            if self._remaining is not None:
+                read_size = min(read_size, self._remaining)
+            data = read_size and self._fp.read(read_size)
+            if data:
+                self.bytes_read += len(data)
+                if self._remaining is not None:
+                    self._remaining -= len(data)
+                data = self._compressor.compress(data)
+            else:
+                data = self._compressor.flush()
+                self._done = True
+            chunks.append(data)
+            length += len(data)
+        data = ''.join(chunks)
+        if size < 0:
+            size = length
+        self._buffer = data[size:]
+        data = data[:size]
+        self.bytes_compressed += len(data)
+        return data
+
+    def unread(self, data):
+        """Puts back ``data`` to be read again."""
+        self._buffer = data + self._buffer
+        self.bytes_compressed -= len(data)
+
+
+class DecompressingWriter(object):
+    """
+    A write-only file object that decompresses the data written to it
+    into the file object ``fp``.  :meth:`close` writes the end of the
+    data, but leaves ``fp`` open.
+    """
+
+    def __init__(self, fp, codec):
+        self._fp = fp
+        self._decompressor = get_codec(codec).decompressor()
+
+    def write(self, data):
+        data = self._decompressor.decompress(data)
+        if data:
+            self._fp.write(data)
+
+    def close(self):
+        if self._decompressor is not None:
+            data = self._decompressor.flush()
+            if data:
+                self._fp.write(data)
+            self._decompressor = None
@@ -0,0 +1,1471 @@
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+"""
+Concurrent transfers of large S3 objects.
+
+:class:`MultipartUploader` uploads a file as a multipart upload, with a
+pool of threads sending the parts, and :class:`ConcurrentDownloader`
+downloads an object with a pool of threads fetching byte ranges of it.
+All of the threads share the bucket's connection, and so its connection
+pool.  :meth:`boto.s3.key.Key.set_contents_from_filename` and
+:meth:`boto.s3.key.Key.get_contents_to_filename` use them for objects of
+at least ``multipart_threshold`` bytes (see :func:`multipart_threshold`).
+
+:class:`MultipartWriter` is a file object whose data is uploaded as it is
+written, for streams of unknown length; :meth:`boto.s3.key.Key.open_write`
+returns one.
+
+:class:`MultipartCopier` copies an object as a multipart upload whose
+parts are copied concurrently by S3, for
+:meth:`boto.s3.bucket.Bucket.copy_key`, and :class:`BulkDeleter` deletes
+keys with a pool of threads sending Multi-object delete requests, for
+:meth:`boto.s3.bucket.Bucket.bulk_delete`.
+"""
+from __future__ import with_statement
+import httplib
+import logging
+import math
+import os
+import socket
+import sys
+import threading
+import time
+from Queue import Queue, Empty, Full
+from xml.sax.saxutils import escape
+
+import boto
+from boto.compat import memoryview
+from boto.exception import BotoClientError, BotoServerError, S3DataError
+from boto.s3.checksumcache import file_key, get_checksum_cache
+from boto.utils import compute_md5
+
+_END_SENTINEL = object()
+log = logging.getLogger('boto.s3.concurrent')
+
+#: S3 does not accept parts smaller than this, except for the last one.
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+#: The most parts a multipart upload can have.
+MAX_PARTS = 10000
+
+DEFAULT_THRESHOLD = 100 * 1024 * 1024
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+DEFAULT_NUM_THREADS = 10
+DEFAULT_MAX_INFLIGHT_BYTES = 256 * 1024 * 1024
+
+#: The most keys a Multi-object delete request can name.
+MAX_DELETE_BATCH = 1000
+
+#: The error codes of keys that a Multi-object delete retries.
+RETRYABLE_DELETE_ERRORS = ('InternalError', 'ServiceUnavailable', 'SlowDown')
+
+
+def multipart_threshold():
+    """
+    Returns the size, in bytes, from which
+    :meth:`boto.s3.key.Key.set_contents_from_filename` uses a multipart
+    upload and :meth:`boto.s3.key.Key.get_contents_to_filename` a ranged
+    download, from the ``multipart_threshold`` option of the ``s3``
+    config section.  0 means never.
+    """
+    return boto.config.getint('s3', 'multipart_threshold', DEFAULT_THRESHOLD)
+
+
+class _RetryableDeleteErrors(Exception):
+    """
+    Raised for a Multi-object delete some of whose keys failed with one
+    of :data:`RETRYABLE_DELETE_ERRORS`, which are in ``errors``.
+    """
+
+    def __init__(self, errors):
+        Exception.__init__(self, '%d keys could not be deleted' %
+                           len(errors))
+        self.errors = errors
+
+
+def _is_retryable(e):
+    if isinstance(e, _RetryableDeleteErrors):
+        return True
+    if isinstance(e, BotoServerError):
+        return e.status >= 500 or e.error_code == 'RequestTimeout'
+    return isinstance(e, (S3DataError, socket.error, httplib.HTTPException))
+
+
+class _FilePart(object):
+    """
+    A read-only file object for ``size`` bytes of the file descriptor
+    ``fd`` starting at ``offset``.  Every read seeks first, so the
+    descriptor is only ever positioned by its owner.
+    """
+
+    def __init__(self, fd, offset, size, name=None):
+        self._fd = fd
+        self._offset = offset
+        self._size = size
+        self._pos = 0
+        self.name = name
+
+    def read(self, size=-1):
+        remaining = self._size - self._pos
+        if size < 0 or size > remaining:
+            size = remaining
+        chunks = []
+        os.lseek(self._fd, self._offset + self._pos, os.SEEK_SET)
+        while size > 0:
+            chunk = os.read(self._fd, size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            self._pos += len(chunk)
+            size -= len(chunk)
+        return ''.join(chunks)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._size
+        self._pos = min(max(offset, 0), self._size)
+
+    def tell(self):
+        return self._pos
+
+
+class _BufferPart(object):
+    """
+    A read-only file object for the data of a stream part, a string or
+    a view of a reused buffer.  ``readinto`` copies from it without
+    creating a string, except on Python 2.6, which has no memoryview.
+    """
+
+    def __init__(self, data):
+        if memoryview is not None:
+            data = memoryview(data)
+        self._view = data
+        self._size = len(self._view)
+        self._pos = 0
+
+    def read(self, size=-1):
+        end = self._size
+        if size >= 0:
+            end = min(self._pos + size, end)
+        data = self._view[self._pos:end]
+        if not isinstance(data, str):
+            data = data.tobytes()
+        self._pos = end
+        return data
+
+    def readinto(self, b):
+        end = min(self._pos + len(b), self._size)
+        size = end - self._pos
+        b[:size] = self._view[self._pos:end]
+        self._pos = end
+        return size
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._size
+        self._pos = min(max(offset, 0), self._size)
+
+    def tell(self):
+        return self._pos
+
+
+class _FileWriter(object):
+    """
+    A write-only file object that writes to the file descriptor ``fd``
+    from ``offset`` onwards.  Like :class:`_FilePart`, it seeks before
+    every write.
+    """
+
+    def __init__(self, fd, offset):
+        self._fd = fd
+        self._offset = offset
+        self.written = 0
+
+    def write(self, data):
+        os.lseek(self._fd, self._offset + self.written, os.SEEK_SET)
+        while data:
+            written = os.write(self._fd, data)
+            self.written += written
+            data = data[written:]
+
+
+class _InflightLimit(object):
+    """Blocks readers while too many bytes are waiting to be sent."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, size):
+        with self._cond:
+            # A part larger than the limit is let through on its own.
+            while self.used and self.used + size > self.max_bytes:
+                self._cond.wait()
+            self.used += size
+
+    def release(self, size):
+        with self._cond:
+            self.used -= size
+            self._cond.notify_all()
+
+
+class _Progress(object):
+    """
+    Sums the progress of the parts and calls ``cb(sent, total)`` about
+    ``num_cb`` times over the whole transfer.  If the total is not known
+    it is passed as 0, and ``cb`` is called as each part is sent, as by
+    :class:`MultipartWriter`.
+    """
+
+    def __init__(self, cb, total, num_cb):
+        self._cb = cb
+        self._total = total
+        self._step = total / max(num_cb - 1, 1) if num_cb > 1 else 0
+        self._next = 0
+        self._parts = {}
+        self._sent = 0
+        self._lock = threading.Lock()
+
+    def part_callback(self, part_number):
+        def cb(sent, size):
+            self.update(part_number, sent, sent == size)
+        return cb
+
+    def update(self, part_number, sent, part_done=True):
+        with self._lock:
+            self._sent += sent - self._parts.get(part_number, 0)
+            self._parts[part_number] = sent
+            if not self._total:
+                if part_done:
+                    self._cb(self._sent, 0)
+            elif self._sent >= self._next and self._sent < self._total:
+                self._next = self._sent + self._step
+                self._cb(self._sent, self._total)
+
+    def done(self):
+        with self._lock:
+            total = self._total or self._sent
+            self._cb(total, total)
+
+
+class _ConcurrentTransfer(object):
+    """The thread pool shared by the uploader and the downloader."""
+
+    def __init__(self, bucket, part_size=None, num_threads=None,
+                 num_retries=5):
+        self.bucket = bucket
+        self.part_size = part_size or boto.config.getint(
+            's3', 'multipart_chunksize', DEFAULT_PART_SIZE)
+        self.num_threads = num_threads or boto.config.getint(
+            's3', 'multipart_threads', DEFAULT_NUM_THREADS)
+        self.num_retries = num_retries
+        self._threads = []
+
+    def _calculate_part_size(self, total_size):
+        part_size = max(self.part_size, MIN_PART_SIZE)
+        if total_size > part_size * MAX_PARTS:
+            # Round up to a whole megabyte.
+            mb = 1024 * 1024
+            part_size = int(math.ceil(total_size / float(MAX_PARTS) / mb)) * mb
+            log.debug('Using a part size of %s for %s bytes',
+                      part_size, total_size)
+        return part_size
+
+    def _complete_xml(self, etags):
+        parts = ['<CompleteMultipartUpload>']
+        for part_number in sorted(etags):
+            parts.append('<Part><PartNumber>%d</PartNumber><ETag>%s</ETag>'
+                         '</Part>' % (part_number, escape(etags[part_number])))
+        parts.append('</CompleteMultipartUpload>')
+        return ''.join(parts)
+
+    def _start_threads(self, thread_class, *args):
+        log.debug('Starting threads.')
+        for _ in xrange(self.num_threads):
+            thread = thread_class(*args)
+            thread.start()
+            self._threads.append(thread)
+
+    def _get_result(self, result_queue):
+        # A blocking get() cannot be interrupted by Ctrl-C.
+        while True:
+            try:
+                part_number, result = result_queue.get(timeout=1)
+                break
+            except Empty:
+                pass
+        if isinstance(result, BaseException):
+            log.debug('Part %s failed, terminating threads: %s',
+                      part_number, result)
+            raise result
+        return part_number, result
+
+    def _pipeline(self, items, handle_result, thread_class, *args):
+        """
+        Processes the items of the iterable ``items`` with threads of
+        ``thread_class``, which are given a work queue, a result queue
+        and ``args``.  The items are read only as fast as they are
+        processed: no more than two per thread are waiting.  Each
+        result is passed to ``handle_result`` with the number of its
+        item, in the order they are done.
+        """
+        worker_queue = Queue(self.num_threads * 2)
+        result_queue = Queue()
+        self._start_threads(thread_class, worker_queue, result_queue, *args)
+        try:
+            queued = done = 0
+            for item in items:
+                while True:
+                    # Handles the results done while waiting to queue
+                    # the next item.
+                    while done < queued and not result_queue.empty():
+                        handle_result(*self._get_result(result_queue))
+                        done += 1
+                    try:
+                        worker_queue.put((queued, item), timeout=0.1)
+                        break
+                    except Full:
+                        pass
+                queued += 1
+            while done < queued:
+                handle_result(*self._get_result(result_queue))
+                done += 1
+            for _ in xrange(self.num_threads):
+                worker_queue.put(_END_SENTINEL)
+        finally:
+            self._shutdown_threads()
+
+    def _shutdown_threads(self):
+        for thread in self._threads:
+            thread.should_continue = False
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+class MultipartUploader(_ConcurrentTransfer):
+    """
+    Uploads a file or stream to S3 as a multipart upload, sending the
+    parts concurrently.
+
+    Each thread reads the parts of a file through its own file
+    descriptor, so no file object is shared between threads and no part
+    is held in memory.  Parts read from a stream are buffered; at most
+    ``max_inflight_bytes`` of them are held at a time.
+
+    A part that fails with a server error, a timeout, a bad ETag or a
+    network error is retried up to ``num_retries`` times, with the
+    backoff of the connection's retry policy.  If a part still fails,
+    or the upload is interrupted, the multipart upload is cancelled and
+    the error is raised; otherwise it is completed.  Either way no
+    orphaned parts are left behind.
+
+    The MD5s of the parts of a file are taken from a
+    :class:`boto.s3.checksumcache.ChecksumCache` when it has them, and
+    stored in it otherwise.
+
+    If a resumable upload handler (see
+    :mod:`boto.s3.resumable_upload_handler`) is given, the upload ID and
+    the parts are recorded in its tracker file as they complete, and a
+    failed upload is left in place instead of being cancelled.  A later
+    upload of the same file with the same handler lists the parts of that
+    upload and only sends those that S3 does not have with the MD5 of
+    the local part.
+    """
+
+    def __init__(self, bucket, part_size=None, num_threads=None,
+                 max_inflight_bytes=None, num_retries=5,
+                 checksum_cache=None):
+        """
+        :type bucket: :class:`boto.s3.bucket.Bucket`
+        :param bucket: The bucket to upload to.
+
+        :type part_size: int
+        :param part_size: The size of the parts in bytes.  Defaults to
+            the ``multipart_chunksize`` option of the ``s3`` config
+            section, or 16MB.  Larger parts are used when a file would
+            otherwise need more than 10000 of them.
+
+        :type num_threads: int
+        :param num_threads: The number of parts sent at a time.
+            Defaults to the ``multipart_threads`` option, or 10.
+
+        :type max_inflight_bytes: int
+        :param max_inflight_bytes: The most bytes of a stream buffered
+            at a time.  Defaults to the ``multipart_max_inflight_bytes``
+            option, or 256MB.
+
+        :type num_retries: int
+        :param num_retries: How many times a failed part is retried.
+
+        :type checksum_cache: :class:`boto.s3.checksumcache.ChecksumCache`
+        :param checksum_cache: The cache of the MD5s of the parts of
+            files.  Defaults to the one named by the ``checksum_cache``
+            option of the ``s3`` config section, if any.
+        """
+        super(MultipartUploader, self).__init__(bucket, part_size,
+                                                num_threads, num_retries)
+        self.max_inflight_bytes = max_inflight_bytes or boto.config.getint(
+            's3', 'multipart_max_inflight_bytes', DEFAULT_MAX_INFLIGHT_BYTES)
+        self.checksum_cache = checksum_cache
+
+    def upload(self, source, key_name, headers=None, cb=None, num_cb=10,
+               policy=None, reduced_redundancy=False, encrypt_key=False,
+               metadata=None, size=None, res_upload_handler=None):
+        """
+        Uploads ``source`` to the key ``key_name``.
+
+        :type source: string or file
+        :param source: The name of the file to upload, or a file object
+            to read the data from.  A file object is read sequentially
+            from its current position.
+
+        :type size: int
+        :param size: The number of bytes of ``source`` to upload.  If it
+            is not given for a stream, ``cb`` is called with 0 as the
+            total as each part is sent.
+
+        :type res_upload_handler: ResumableMultipartUploadHandler
+        :param res_upload_handler: If provided, the handler whose tracker
+            file records the upload, so that it can be resumed.  Only
+            uploads of files can be resumed.
+
+        The other parameters are as for
+        :meth:`boto.s3.bucket.Bucket.initiate_multipart_upload` and
+        :meth:`boto.s3.key.Key.set_contents_from_file`; ``cb`` is called
+        with the bytes sent of all of the parts.
+
+        :rtype: :class:`boto.s3.multipart.CompleteMultiPartUpload`
+        :return: The completed upload.
+        """
+        if isinstance(source, basestring):
+            total_size = os.path.getsize(source)
+            if size is not None:
+                total_size = min(size, total_size)
+        elif res_upload_handler is not None:
+            raise ValueError('Only uploads of files can be resumed')
+        else:
+            total_size = size
+        part_size = self._calculate_part_size(total_size or 0)
+        num_retries = self.num_retries
+        mp = None
+        uploaded = {}
+        if res_upload_handler is not None:
+            if res_upload_handler.num_retries is not None:
+                num_retries = res_upload_handler.num_retries
+            mp, uploaded = self._resume_upload(res_upload_handler, key_name)
+            if mp is not None:
+                part_size = res_upload_handler.part_size
+        if total_size is not None:
+            total_parts = max(int(math.ceil(total_size /
+                                            float(part_size))), 1)
+        else:
+            total_parts = None
+        progress = None
+        if cb:
+            progress = _Progress(cb, total_size or 0, num_cb)
+        cache = part_md5s = None
+        if (isinstance(source, basestring) and
+                total_size == os.path.getsize(source)):
+            cache = self.checksum_cache or get_checksum_cache()
+        if cache is not None:
+            source_key = file_key(source)
+            part_md5s = cache.get_part_md5s(source, part_size)
+            if part_md5s is not None and len(part_md5s) != total_parts:
+                part_md5s = None
+
+        if mp is None:
+            mp = self.bucket.initiate_multipart_upload(
+                key_name, headers=headers,
+                reduced_redundancy=reduced_redundancy, metadata=metadata,
+                encrypt_key=encrypt_key, policy=policy)
+            if res_upload_handler is not None:
+                res_upload_handler._save_tracker_info(mp.id, part_size)
+        worker_queue = Queue()
+        result_queue = Queue()
+        limit = _InflightLimit(self.max_inflight_bytes)
+        try:
+            self._start_threads(UploadWorkerThread, mp, source, worker_queue,
+                                result_queue, limit, progress, num_retries)
+            if isinstance(source, basestring):
+                for i in xrange(total_parts):
+                    offset = i * part_size
+                    part_size_i = min(part_size, total_size - offset)
+                    # The ETag of the part if S3 already has one of the
+                    # right size, which is checked against the MD5 of
+                    # the local part before it is skipped.
+                    part = uploaded.get(i + 1)
+                    etag = None
+                    if part is not None and part.size == part_size_i:
+                        etag = part.etag
+                    worker_queue.put((i + 1, offset, part_size_i,
+                                      part_md5s and part_md5s[i], etag))
+                queued = total_parts
+            else:
+                queued = self._queue_stream_parts(source, total_size,
+                                                  part_size, worker_queue,
+                                                  result_queue, limit)
+            for _ in xrange(self.num_threads):
+                worker_queue.put(_END_SENTINEL)
+            parts = self._wait_for_upload_threads(result_queue, queued,
+                                                  res_upload_handler)
+            log.debug('Completing upload of %s parts.', len(parts))
+            result = self.bucket.complete_multipart_upload(
+                key_name, mp.id, self._complete_xml(
+                    dict((n, part.etag) for n, part in parts.iteritems())))
+        except:
+            exc_info = sys.exc_info()
+            self._shutdown_threads()
+            if res_upload_handler is not None:
+                log.debug('An error occurred while uploading %s, leaving '
+                          'multipart upload %s to be resumed', key_name,
+                          mp.id)
+            else:
+                log.debug('An error occurred while uploading %s, cancelling '
+                          'multipart upload %s', key_name, mp.id)
+                try:
+                    self.bucket.cancel_multipart_upload(key_name, mp.id)
+                except Exception:
+                    log.exception('Could not cancel multipart upload %s',
+                                  mp.id)
+            raise exc_info[0], exc_info[1], exc_info[2]
+        self._shutdown_threads()
+        if res_upload_handler is not None:
+            res_upload_handler._remove_tracker_file()
+        if cache is not None and part_md5s is None:
+            cache.set_part_md5s(source, part_size,
+                                [parts[n].md5 for n in sorted(parts)],
+                                source_key)
+        if progress is not None:
+            progress.done()
+        return result
+
+    def _queue_stream_parts(self, fp, total_size, part_size, worker_queue,
+                            result_queue, limit):
+        part_number = 0
+        remaining = total_size
+        while remaining is None or remaining > 0:
+            if remaining is not None:
+                read_size = min(part_size, remaining)
+            else:
+                read_size = part_size
+            limit.acquire(read_size)
+            data = fp.read(read_size)
+            if not data and part_number:
+                limit.release(read_size)
+                break
+            if len(data) != read_size:
+                limit.release(read_size - len(data))
+            part_number += 1
+            worker_queue.put((part_number, data, len(data), None, None))
+            if remaining is not None:
+                remaining -= len(data)
+            if len(data) < read_size:
+                break
+            self._check_results(result_queue)
+        return part_number
+
+    def _check_results(self, result_queue):
+        # Stops reading a stream as soon as a part has failed.
+        try:
+            result = result_queue.get_nowait()
+        except Empty:
+            return
+        result_queue.put(result)
+        if isinstance(result, tuple) and isinstance(result[1], BaseException):
+            raise result[1]
+
+    def _wait_for_upload_threads(self, result_queue, total_parts,
+                                 res_upload_handler=None):
+        parts = {}
+        for _ in xrange(total_parts):
+            part_number, part = self._get_result(result_queue)
+            parts[part_number] = part
+            if (res_upload_handler is not None and
+                    res_upload_handler.completed_parts.get(part_number) !=
+                    part.etag):
+                res_upload_handler._save_completed_part(part_number,
+                                                        part.etag)
+        return parts
+
+    def _resume_upload(self, res_upload_handler, key_name):
+        # Returns the multipart upload recorded by the handler, and the
+        # parts S3 has of it by number, or (None, {}) if there is none
+        # to resume.
+        # boto.s3.multipart imports boto.s3.key, which imports this.
+        from boto.s3.multipart import MultiPartUpload
+        upload_id = res_upload_handler.upload_id
+        if upload_id is None:
+            return None, {}
+        mp = MultiPartUpload(self.bucket)
+        mp.key_name = key_name
+        mp.id = upload_id
+        parts = {}
+        marker = None
+        while True:
+            page = mp.get_all_parts(part_number_marker=marker)
+            if page is None:
+                log.debug('Could not list the parts of multipart upload %s '
+                          'of %s, starting a new upload', upload_id,
+                          key_name)
+                return None, {}
+            for part in page:
+                parts[part.part_number] = part
+            if not mp.is_truncated:
+                break
+            marker = mp.next_part_number_marker
+        log.debug('Resuming multipart upload %s of %s, %s parts uploaded',
+                  upload_id, key_name, len(parts))
+        return mp, parts
+
+
+class MultipartWriter(_ConcurrentTransfer):
+    """
+    A write-only file object that uploads what is written to it to a
+    key, for streams whose length is not known in advance.
+
+    The data is copied into buffers of one part each, which are reused
+    once their part is sent.  At most ``num_threads + 1`` of them are
+    allocated, so no more than that many parts are held in memory
+    however much is written.  Each full part is sent by a pool of
+    threads as a part of a multipart upload, which is initiated with
+    the first part and completed by :meth:`close`.  If less than a part
+    is written in all, it is sent with a single PUT instead.
+
+    Parts are retried as by :class:`MultipartUploader`.  If a part still
+    fails, the upload is cancelled and the error is raised by the next
+    call to :meth:`write` or by :meth:`close`.  Used as a context
+    manager, the writer is closed at the end of the block, or aborted if
+    the block raises.
+    """
+
+    def __init__(self, bucket, key_name, headers=None, policy=None,
+                 reduced_redundancy=False, encrypt_key=False, metadata=None,
+                 part_size=None, num_threads=None, num_retries=5, cb=None):
+        """
+        :type bucket: :class:`boto.s3.bucket.Bucket`
+        :param bucket: The bucket to upload to.
+
+        :type key_name: string
+        :param key_name: The name of the key to upload to.
+
+        :type part_size: int
+        :param part_size: The size of the parts in bytes.  Defaults to
+            the ``multipart_chunksize`` option of the ``s3`` config
+            section, or 16MB.  As there are at most 10000 parts, no
+            more than 10000 times this can be written.
+
+        :type num_threads: int
+        :param num_threads: The number of parts sent at a time.
+            Defaults to the ``multipart_threads`` option, or 10.
+
+        :type num_retries: int
+        :param num_retries: How many times a failed part is retried.
+
+        :type cb: function
+        :param cb: A callback called with the bytes sent and 0 as each
+            part is sent, as the total is not known, and with the
+            total twice once the upload is complete.
+
+        The other parameters are as for
+        :meth:`boto.s3.bucket.Bucket.initiate_multipart_upload`.
+        """
+        super(MultipartWriter, self).__init__(bucket, part_size, num_threads,
+                                              num_retries)
+        self.key_name = key_name
+        self.headers = headers
+        self.policy = policy
+        self.reduced_redundancy = reduced_redundancy
+        self.encrypt_key = encrypt_key
+        self.metadata = metadata
+        self.cb = cb
+        #: The number of bytes written.
+        self.size = 0
+        #: The ETag and version of the key, once it is closed.
+        self.etag = None
+        self.version_id = None
+        self.closed = False
+        self._part_size = self._calculate_part_size(0)
+        self._mp = None
+        self._buffer = None
+        self._length = 0
+        self._num_buffers = 0
+        self._free = []
+        # The buffer and length of each part being sent, by number.
+        self._pending = {}
+        self._etags = {}
+        self._sent = 0
+        self._worker_queue = Queue()
+        self._result_queue = Queue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError('I/O operation on closed file')
+        if memoryview is not None:
+            data = memoryview(data)
+        offset = 0
+        try:
+            while offset < len(data):
+                if self._buffer is None:
+                    self._buffer = self._get_buffer()
+                size = min(len(data) - offset,
+                           self._part_size - self._length)
+                self._buffer[self._length:self._length + size] = \
+                    data[offset:offset + size]
+                self._length += size
+                self.size += size
+                offset += size
+                if self._length == self._part_size:
+                    self._send_part()
+        except:
+            exc_info = sys.exc_info()
+            self.abort()
+            raise exc_info[0], exc_info[1], exc_info[2]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        """
+        Sends what is left and completes the upload.  Does nothing if
+        the writer is already closed.
+        """
+        if self.closed:
+            return
+        try:
+            if self._mp is None:
+                self._put()
+            else:
+                if self._length:
+                    self._send_part()
+                for _ in xrange(self.num_threads):
+                    self._worker_queue.put(_END_SENTINEL)
+                while self._pending:
+                    self._collect(block=True)
+                log.debug('Completing upload of %s parts.', len(self._etags))
+                result = self.bucket.complete_multipart_upload(
+                    self.key_name, self._mp.id,
+                    self._complete_xml(self._etags))
+                self._shutdown_threads()
+                self.etag = result.etag
+                self.version_id = result.version_id
+        except:
+            exc_info = sys.exc_info()
+            self.abort()
+            raise exc_info[0], exc_info[1], exc_info[2]
+        self.closed = True
+        self._buffer = None
+        self._free = []
+        if self.cb is not None:
+            self.cb(self.size, self.size)
+
+    def abort(self):
+        """
+        Discards what was written, cancelling the multipart upload if
+        one was initiated.  Does nothing if the writer is closed.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self._shutdown_threads()
+        self._buffer = None
+        self._free = []
+        self._pending = {}
+        if self._mp is not None:
+            log.debug('Cancelling multipart upload %s of %s', self._mp.id,
+                      self.key_name)
+            try:
+                self.bucket.cancel_multipart_upload(self.key_name,
+                                                    self._mp.id)
+            except Exception:
+                log.exception('Could not cancel multipart upload %s',
+                              self._mp.id)
+
+    def _get_buffer(self):
+        self._collect(block=False)
+        if not self._free:
+            if self._num_buffers <= self.num_threads:
+                self._num_buffers += 1
+                return bytearray(self._part_size)
+            # Every buffer is being sent: wait for one of them.
+            self._collect(block=True)
+        return self._free.pop()
+
+    def _collect(self, block):
+        # Records the parts that are done and frees their buffers,
+        # waiting for one first if block is true.  Raises the error of
+        # a part that failed.
+        while self._pending and (block or not self._result_queue.empty()):
+            part_number, part = self._get_result(self._result_queue)
+            block = False
+            buf, size = self._pending.pop(part_number)
+            self._free.append(buf)
+            self._etags[part_number] = part.etag
+            self._sent += size
+            if self.cb is not None:
+                self.cb(self._sent, 0)
+
+    def _send_part(self):
+        part_number = len(self._etags) + len(self._pending) + 1
+        if part_number > MAX_PARTS:
+            raise BotoClientError('Cannot write more than %d parts of %d '
+                                  'bytes to %s' % (MAX_PARTS,
+                                                   self._part_size,
+                                                   self.key_name))
+        if self._mp is None:
+            self._mp = self.bucket.initiate_multipart_upload(
+                self.key_name, headers=self.headers,
+                reduced_redundancy=self.reduced_redundancy,
+                metadata=self.metadata, encrypt_key=self.encrypt_key,
+                policy=self.policy)
+            self._start_threads(UploadWorkerThread, self._mp, None,
+                                self._worker_queue, self._result_queue, None,
+                                None, self.num_retries)
+        self._pending[part_number] = (self._buffer, self._length)
+        self._worker_queue.put((part_number, self._view(), self._length,
+                                None, None))
+        self._buffer = None
+        self._length = 0
+
+    def _put(self):
+        # Less than a part was written: a single PUT, whose Content-MD5
+        # is checked, is enough.
+        data = ''
+        if self._buffer is not None:
+            data = self._view()
+        key = self.bucket.new_key(self.key_name)
+        if self.metadata:
+            key.metadata = self.metadata.copy()
+        key.set_contents_from_file(_BufferPart(data), headers=self.headers,
+                                   policy=self.policy,
+                                   reduced_redundancy=self.reduced_redundancy,
+                                   encrypt_key=self.encrypt_key,
+                                   size=self._length)
+        self.etag = key.etag
+        self.version_id = key.version_id
+
+    def _view(self):
+        # The data in the current buffer, without copying it.
+        if memoryview is None:
+            return buffer(self._buffer, 0, self._length)
+        return memoryview(self._buffer)[:self._length]
+
+
+class ConcurrentDownloader(_ConcurrentTransfer):
+    """
+    Downloads an S3 object to a file, fetching byte ranges of it
+    concurrently.
+
+    The file is created at its full size, and each thread writes the
+    ranges it fetches at their offsets through its own file descriptor.
+    Every range is requested with ``If-Match`` set to the ETag of the
+    key, so an object replaced during the download fails instead of
+    producing a mix of both versions.  A range that fails with a server
+    error, a timeout, a short read or a network error is retried up to
+    ``num_retries`` times.  Once all of the ranges are written, the MD5
+    of the file is checked against the ETag of an S3 object, unless the
+    ETag is that of a multipart upload, which is not the MD5 of the
+    object.  The ETags of other providers, such as those of composite
+    Google Storage objects, are not known to be MD5s and are not checked.
+
+    If a :class:`boto.s3.resumable_download_handler.ResumableDownloadHandler`
+    is given, the ranges are recorded in its tracker file as they
+    complete, and a later download of the same object to the same file
+    only fetches the ranges that are missing.
+    """
+
+    def __init__(self, bucket, part_size=None, num_threads=None,
+                 num_retries=5):
+        """
+        :type bucket: :class:`boto.s3.bucket.Bucket`
+        :param bucket: The bucket to download from.
+
+        :type part_size: int
+        :param part_size: The size of the ranges in bytes.  Defaults to
+            the ``multipart_chunksize`` option of the ``s3`` config
+            section, or 16MB.
+
+        :type num_threads: int
+        :param num_threads: The number of ranges fetched at a time.
+            Defaults to the ``multipart_threads`` option, or 10.
+
+        :type num_retries: int
+        :param num_retries: How many times a failed range is retried.
+        """
+        super(ConcurrentDownloader, self).__init__(bucket, part_size,
+                                                   num_threads, num_retries)
+
+    def download(self, key, filename, headers=None, cb=None, num_cb=10,
+                 version_id=None, response_headers=None,
+                 res_download_handler=None):
+        """
+        Downloads ``key`` to the file ``filename``.
+
+        :type key: :class:`boto.s3.key.Key`
+        :param key: The key to download.  Its ``size`` and ``etag``
+            must be set, as they are for keys returned by
+            :meth:`boto.s3.bucket.Bucket.get_key` or by a listing.
+
+        :type res_download_handler: ResumableDownloadHandler
+        :param res_download_handler: If provided, the handler whose
+            tracker file records the completed ranges.  The file is
+            then kept if the download fails, so that it can be resumed.
+
+        The other parameters are as for
+        :meth:`boto.s3.key.Key.get_contents_to_filename`; ``cb`` is
+        called with the bytes received of all of the ranges.
+        """
+        if headers is None:
+            headers = {}
+        else:
+            headers = headers.copy()
+        etag = (key.etag or '').strip('"\'')
+        if etag:
+            headers['If-Match'] = '"%s"' % etag
+        if version_id is None:
+            version_id = key.version_id
+        size = key.size
+        ranges = [(start, min(start + self.part_size, size) - 1)
+                  for start in xrange(0, size, self.part_size)]
+        completed = set()
+        if res_download_handler is not None:
+            if (etag and os.path.exists(filename) and
+                    os.path.getsize(filename) == size and
+                    res_download_handler.etag_value_for_current_download ==
+                    etag):
+                completed = set(res_download_handler.completed_ranges)
+                log.debug('Resuming download of %s, %s ranges done',
+                          key.name, len(completed))
+            else:
+                res_download_handler._save_tracker_info(key)
+        progress = None
+        if cb and size:
+            progress = _Progress(cb, size, num_cb)
+
+        # The file is truncated first so that no stale data survives
+        # in the ranges that are still to be written.
+        fp = open(filename, completed and 'r+b' or 'wb')
+        try:
+            fp.truncate(size)
+        finally:
+            fp.close()
+        worker_queue = Queue()
+        result_queue = Queue()
+        try:
+            self._start_threads(DownloadWorkerThread, key, filename,
+                                worker_queue, result_queue, progress,
+                                self.num_retries, headers, version_id,
+                                response_headers)
+            queued = 0
+            for i, (start, end) in enumerate(ranges):
+                if (start, end) in completed:
+                    if progress is not None:
+                        progress.update(i, end - start + 1)
+                    continue
+                worker_queue.put((i, start, end))
+                queued += 1
+            for _ in xrange(self.num_threads):
+                worker_queue.put(_END_SENTINEL)
+            for _ in xrange(queued):
+                i, result = self._get_result(result_queue)
+                if res_download_handler is not None:
+                    res_download_handler._save_completed_range(*ranges[i])
+        except:
+            exc_info = sys.exc_info()
+            self._shutdown_threads()
+            if res_download_handler is None:
+                os.remove(filename)
+            raise exc_info[0], exc_info[1], exc_info[2]
+        self._shutdown_threads()
+        if res_download_handler is not None:
+            res_download_handler._remove_tracker_file()
+        if self._etag_is_md5(etag):
+            self._check_md5(key, filename, etag)
+        if progress is not None:
+            progress.done()
+
+    def _etag_is_md5(self, etag):
+        provider = self.bucket.connection.provider
+        return (etag and '-' not in etag and
+                provider.name == 'aws')
+
+    def _check_md5(self, key, filename, etag):
+        fp = open(filename, 'rb')
+        try:
+            hex_md5 = compute_md5(fp, buf_size=1024 * 1024)[0]
+        finally:
+            fp.close()
+        if hex_md5 != etag:
+            os.remove(filename)
+            raise S3DataError('MD5 of the download of %s (%s) does not '
+                              'match its ETag (%s)' % (key.name, hex_md5,
+                                                       etag))
+        key.md5 = hex_md5
+
+
+class MultipartCopier(_ConcurrentTransfer):
+    """
+    Copies an S3 object to a key as a multipart upload, with a pool of
+    threads copying byte ranges of it as the parts.  The data is copied
+    by S3 and never passes through the client, and objects larger than
+    the 5GB that a single copy accepts can be copied.
+
+    Every part is copied with ``x-amz-copy-source-if-match`` set to the
+    ETag of the source, so a source replaced during the copy fails it
+    instead of producing a mix of both.  Failed parts are retried as by
+    :class:`MultipartUploader`, and if a part still fails the multipart
+    upload is cancelled.
+    """
+
+    def __init__(self, bucket, part_size=None, num_threads=None,
+                 num_retries=5):
+        """
+        :type bucket: :class:`boto.s3.bucket.Bucket`
+        :param bucket: The bucket to copy to.
+
+        :type part_size: int
+        :param part_size: The size of the parts in bytes.  Defaults to
+            the ``multipart_chunksize`` option of the ``s3`` config
+            section, or 16MB.
+
+        :type num_threads: int
+        :param num_threads: The number of parts copied at a time.
+            Defaults to the ``multipart_threads`` option, or 10.
+
+        :type num_retries: int
+        :param num_retries: How many times a failed part is retried.
+        """
+        super(MultipartCopier, self).__init__(bucket, part_size, num_threads,
+                                              num_retries)
+
+    def copy(self, new_key_name, src_key, metadata=None,
+             storage_class='STANDARD', encrypt_key=False, headers=None):
+        """
+        Copies ``src_key`` to the key ``new_key_name``.
+
+        :type src_key: :class:`boto.s3.key.Key`
+        :param src_key: The source key, as returned by
+            :meth:`boto.s3.bucket.Bucket.get_key`, which gives its size,
+            ETag, version, metadata and content headers.
+
+        :type metadata: dict
+        :param metadata: The metadata of the new key.  If None, the
+            metadata and the content headers of the source are copied.
+
+        The other parameters are as for
+        :meth:`boto.s3.bucket.Bucket.copy_key`.
+
+        :rtype: :class:`boto.s3.multipart.CompleteMultiPartUpload`
+        :return: The completed upload.
+        """
+        provider = self.bucket.connection.provider
+        headers = dict(headers or {})
+        if metadata is None:
+            metadata = src_key.metadata
+            for name, value in (('Cache-Control', src_key.cache_control),
+                                ('Content-Type', src_key.content_type),
+                                ('Content-Encoding', src_key.content_encoding),
+                                ('Content-Disposition',
+                                 src_key.content_disposition),
+                                ('Content-Language',
+                                 src_key.content_language)):
+                if value and name not in headers:
+                    headers[name] = value
+        if provider.storage_class_header and storage_class:
+            headers[provider.storage_class_header] = storage_class
+        total_size = src_key.size
+        part_size = self._calculate_part_size(total_size)
+        total_parts = max(int(math.ceil(total_size / float(part_size))), 1)
+
+        mp = self.bucket.initiate_multipart_upload(
+            new_key_name, headers=headers, metadata=metadata,
+            encrypt_key=encrypt_key)
+        worker_queue = Queue()
+        result_queue = Queue()
+        try:
+            self._start_threads(CopyWorkerThread, mp, src_key, worker_queue,
+                                result_queue, self.num_retries)
+            for i in xrange(total_parts):
+                start = i * part_size
+                end = min(start + part_size, total_size) - 1
+                worker_queue.put((i + 1, start, end))
+            for _ in xrange(self.num_threads):
+                worker_queue.put(_END_SENTINEL)
+            etags = {}
+            for _ in xrange(total_parts):
+                part_number, part = self._get_result(result_queue)
+                etags[part_number] = part.etag
+            log.debug('Completing copy of %s parts.', total_parts)
+            result = self.bucket.complete_multipart_upload(
+                new_key_name, mp.id, self._complete_xml(etags))
+        except:
+            exc_info = sys.exc_info()
+            log.debug('An error occurred while copying to %s, cancelling '
+                      'multipart upload %s', new_key_name, mp.id)
+            self._shutdown_threads()
+            try:
+                self.bucket.cancel_multipart_upload(new_key_name, mp.id)
+            except Exception:
+                log.exception('Could not cancel multipart upload %s', mp.id)
+            raise exc_info[0], exc_info[1], exc_info[2]
+        self._shutdown_threads()
+        return result
+
+
+class BulkDeleteResult(object):
+    """
+    The result of :meth:`BulkDeleter.delete`.
+
+    :ivar deleted_count: The number of keys deleted.
+
+    :ivar errors: A list of :class:`boto.s3.multidelete.Error` objects
+        for the keys that could not be deleted.
+    """
+
+    def __init__(self):
+        self.deleted_count = 0
+        self.errors = []
+
+    def __repr__(self):
+        return '<BulkDeleteResult: %d deleted, %d errors>' % (
+            self.deleted_count, len(self.errors))
+
+
+class BulkDeleter(_ConcurrentTransfer):
+    """
+    Deletes keys with Multi-object delete requests, several of them in
+    flight at a time.
+
+    The keys are read from an iterable a batch at a time, and no more
+    than two batches per thread are waiting to be sent, so a listing of
+    any size can be deleted as it is read.  Only the errors are kept.
+
+    A request that fails with a server error or a network error is
+    retried up to ``num_retries`` times, as are the keys of a batch
+    that fail with one of :data:`RETRYABLE_DELETE_ERRORS`, with the
+    backoff of the connection's retry policy.  Any other error is
+    raised once the requests in flight are done.
+    """
+
+    def __init__(self, bucket, num_threads=None, num_retries=5,
+                 batch_size=MAX_DELETE_BATCH):
+        """
+        :type bucket: :class:`boto.s3.bucket.Bucket`
+        :param bucket: The bucket to delete from.
+
+        :type num_threads: int
+        :param num_threads: The number of requests in flight at a time.
+            Defaults to the ``multipart_threads`` option of the ``s3``
+            config section, or 10.
+
+        :type num_retries: int
+        :param num_retries: How many times a failed request, or key, is
+            retried.
+
+        :type batch_size: int
+        :param batch_size: The number of keys deleted by each request,
+            at most 1000.
+        """
+        super(BulkDeleter, self).__init__(bucket, None, num_threads,
+                                          num_retries)
+        self.batch_size = min(batch_size, MAX_DELETE_BATCH)
+
+    def delete(self, keys, quiet=True, mfa_token=None, headers=None,
+               cb=None):
+        """
+        Deletes the keys from the iterable ``keys``.
+
+        The parameters are as for
+        :meth:`boto.s3.bucket.Bucket.bulk_delete`.
+
+        :rtype: :class:`BulkDeleteResult`
+        """
+        result = BulkDeleteResult()
+
+        def add_result(batch, batch_result):
+            deleted_count, errors = batch_result
+            result.deleted_count += deleted_count
+            result.errors.extend(errors)
+            if cb is not None:
+                cb(result.deleted_count, len(result.errors))
+        self._pipeline(self._batches(keys, result), add_result,
+                       DeleteWorkerThread, self.bucket, quiet, mfa_token,
+                       headers, self.num_retries)
+        return result
+
+    def _batches(self, keys, result):
+        objects = []
+        for key in keys:
+            target = self.bucket._delete_target(key)
+            if isinstance(target, tuple):
+                objects.append(target)
+            else:
+                result.errors.append(target)
+            if len(objects) == self.batch_size:
+                yield objects
+                objects = []
+        if objects:
+            yield objects
+
+
+class TransferThread(threading.Thread):
+    def __init__(self, worker_queue, result_queue):
+        super(TransferThread, self).__init__()
+        self.daemon = True
+        self._worker_queue = worker_queue
+        self._result_queue = result_queue
+        # This value can be set externally by other objects
+        # to indicate that the thread should be shut down.
+        self.should_continue = True
+        # Set by the subclasses whose work is retried.
+        self._num_retries = 0
+        self._policy = None
+
+    def run(self):
+        try:
+            while self.should_continue:
+                try:
+                    work = self._worker_queue.get(timeout=1)
+                except Empty:
+                    continue
+                if work is _END_SENTINEL:
+                    return
+                result = self._process_chunk(work)
+                self._result_queue.put((work[0], result))
+        finally:
+            self._cleanup()
+
+    def _process_chunk(self, work):
+        pass
+
+    def _with_retries(self, fn, describe):
+        """
+        Calls ``fn`` until it succeeds, retrying the errors that
+        :func:`_is_retryable` accepts up to ``_num_retries`` times with
+        the backoff of the connection's retry policy.  Returns the
+        result of ``fn``, or the exception of its last attempt.
+        ``describe`` names the work in the log.
+        """
+        sleep = 0
+        for attempt in xrange(self._num_retries + 1):
+            try:
+                return fn()
+            except Exception, e:
+                if (attempt == self._num_retries or
+                        not _is_retryable(e) or not self.should_continue):
+                    return e
+                sleep = self._policy.backoff(attempt, sleep)
+                log.debug('%s failed (%s), retrying in %.2fs', describe, e,
+                          sleep)
+                time.sleep(sleep)
+
+    def _cleanup(self):
+        pass
+
+
+class UploadWorkerThread(TransferThread):
+    def __init__(self, mp, source, worker_queue, result_queue, limit,
+                 progress=None, num_retries=5):
+        super(UploadWorkerThread, self).__init__(worker_queue, result_queue)
+        self._mp = mp
+        self._source = source
+        self._limit = limit
+        self._progress = progress
+        self._num_retries = num_retries
+        self._policy = mp.bucket.connection.retry_policy
+        self._fd = None
+        if isinstance(source, basestring):
+            self._fd = os.open(source, os.O_RDONLY | getattr(os, 'O_BINARY',
+                                                             0))
+
+    def _process_chunk(self, work):
+        # The second item is the offset of a file part, or the data of
+        # a stream part; the fourth is its MD5, if it is known, and the
+        # last the ETag of the part if it was uploaded before.
+        part_number, offset_or_data, size, md5, etag = work
+        if self._fd is not None:
+            fp = _FilePart(self._fd, offset_or_data, size, self._source)
+        else:
+            fp = _BufferPart(offset_or_data)
+        try:
+            if etag is not None:
+                try:
+                    part, md5 = self._uploaded_part(fp, part_number, size,
+                                                    md5, etag)
+                except Exception, e:
+                    return e
+                if part is not None:
+                    return part
+            return self._with_retries(
+                lambda: self._upload_part(fp, part_number, size, md5),
+                'Part %s of %s' % (part_number, self._mp.key_name))
+        finally:
+            if self._fd is None and self._limit is not None:
+                self._limit.release(size)
+
+    def _uploaded_part(self, fp, part_number, size, md5, etag):
+        # Returns the part uploaded before as etag if it has the MD5 of
+        # the local part, or None, and the MD5.
+        if md5 is None:
+            md5 = compute_md5(fp, size=size)[:2]
+        if md5[0] != etag.strip('"'):
+            log.debug('Part %s of %s has changed, uploading it again',
+                      part_number, self._mp.key_name)
+            return None, md5
+        part = self._mp.bucket.new_key(self._mp.key_name)
+        part.etag = etag
+        part.md5 = md5[0]
+        if self._progress is not None:
+            self._progress.update(part_number, size)
+        return part, md5
+
+    def _upload_part(self, fp, part_number, size, md5=None):
+        fp.seek(0)
+        cb = None
+        if self._progress is not None:
+            cb = self._progress.part_callback(part_number)
+        return self._mp.upload_part_from_file(fp, part_number, cb=cb,
+                                              md5=md5, size=size)
+
+    def _cleanup(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class CopyWorkerThread(TransferThread):
+    def __init__(self, mp, src_key, worker_queue, result_queue,
+                 num_retries=5):
+        super(CopyWorkerThread, self).__init__(worker_queue, result_queue)
+        self._mp = mp
+        self._src_key = src_key
+        self._num_retries = num_retries
+        self._policy = mp.bucket.connection.retry_policy
+
+    def _process_chunk(self, work):
+        part_number, start, end = work
+        src_key = self._src_key
+        headers = {'x-amz-copy-source-if-match': src_key.etag}
+        return self._with_retries(
+            lambda: self._mp.copy_part_from_key(
+                src_key.bucket.name, src_key.name, part_number, start, end,
+                src_version_id=src_key.version_id, headers=headers),
+            'Part %s of the copy to %s' % (part_number, self._mp.key_name))
+
+
+class DownloadWorkerThread(TransferThread):
+    def __init__(self, key, filename, worker_queue, result_queue,
+                 progress=None, num_retries=5, headers=None,
+                 version_id=None, response_headers=None):
+        super(DownloadWorkerThread, self).__init__(worker_queue,
+                                                   result_queue)
+        self._key = key
+        self._progress = progress
+        self._num_retries = num_retries
+        self._headers = headers or {}
+        self._version_id = version_id
+        self._response_headers = response_headers
+        self._policy = key.bucket.connection.retry_policy
+        self._fd = os.open(filename, os.O_WRONLY | getattr(os, 'O_BINARY', 0))
+
+    def _process_chunk(self, work):
+        index, start, end = work
+        return self._with_retries(
+            lambda: self._download_range(index, start, end),
+            'Range %s-%s of %s' % (start, end, self._key.name))
+
+    def _download_range(self, index, start, end):
+        headers = self._headers.copy()
+        headers['Range'] = 'bytes=%d-%d' % (start, end)
+        cb = None
+        if self._progress is not None:
+            cb = self._progress.part_callback(index)
+        # Key objects hold the response being read, so every range
+        # gets its own.
+        key = self._key.bucket.new_key(self._key.name)
+        fp = _FileWriter(self._fd, start)
+        key.get_file(fp, headers, cb=cb, version_id=self._version_id,
+                     response_headers=self._response_headers)
+        if fp.written != end - start + 1:
+            raise S3DataError('Expected %d bytes of %s, got %d' %
+                              (end - start + 1, self._key.name, fp.written))
+
+    def _cleanup(self):
+        os.close(self._fd)
+
+
+class DeleteWorkerThread(TransferThread):
+    def __init__(self, worker_queue, result_queue, bucket, quiet=True,
+                 mfa_token=None, headers=None, num_retries=5):
+        super(DeleteWorkerThread, self).__init__(worker_queue, result_queue)
+        self._bucket = bucket
+        self._quiet = quiet
+        self._mfa_token = mfa_token
+        self._headers = headers
+        self._num_retries = num_retries
+        self._policy = bucket.connection.retry_policy
+
+    def _process_chunk(self, work):
+        # Returns the number of keys deleted and the errors of the
+        # rest, or the exception of a request that failed.
+        batch, objects = work
+        # The keys still to delete, the number deleted and the errors
+        # that are not retried, across the attempts.
+        state = {'objects': objects, 'deleted_count': 0, 'errors': []}
+        result = self._with_retries(
+            lambda: self._delete_batch(state),
+            'Batch %s of deletes from %s' % (batch, self._bucket.name))
+        if isinstance(result, _RetryableDeleteErrors):
+            state['errors'].extend(result.errors)
+        elif isinstance(result, Exception):
+            return result
+        return state['deleted_count'], state['errors']
+
+    def _delete_batch(self, state):
+        objects = state['objects']
+        rs = self._bucket._delete_objects(objects, self._quiet,
+                                          self._mfa_token, self._headers)
+        state['deleted_count'] += len(objects) - len(rs.errors)
+        retryable = []
+        for error in rs.errors:
+            if error.code in RETRYABLE_DELETE_ERRORS:
+                retryable.append(error)
+            else:
+                state['errors'].append(error)
+        if retryable:
+            state['objects'] = [(error.key, error.version_id)
+                                for error in retryable]
+            raise _RetryableDeleteErrors(retryable)
@@ -32,6 +32,7 @@ from boto.connection import AWSAuthConnection
 from boto import handler
 from boto.s3.bucket import Bucket
 from boto.s3.key import Key
+from boto.s3.metadatacache import MetadataCache
 from boto.resultset import ResultSet
 from boto.exception import BotoClientError, S3ResponseError
 
@@ -169,6 +170,9 @@ class S3Connection(AWSAuthConnection):
                 path=path, provider=provider, security_token=security_token,
                 suppress_consec_slashes=suppress_consec_slashes,
                 validate_certs=validate_certs)
+        # A boto.s3.metadatacache.MetadataCache of the keys found by
+        # Bucket.get_key, or None.
+        self.metadata_cache = MetadataCache.from_config()
 
     def _required_auth_capability(self):
         if self.anon:
@@ -378,13 +382,18 @@ class S3Connection(AWSAuthConnection):
 
     def get_all_buckets(self, headers=None):
         response = self.make_request('GET', headers=headers)
-        body = response.read()
         if response.status > 300:
+            body = response.read()
             raise self.provider.storage_response_error(
                 response.status, response.reason, body)
         rs = ResultSet([('Bucket', self.bucket_class)])
         h = handler.XmlHandler(rs, self)
-        xml.sax.parseString(body, h)
+        if self.streaming_parse:
+            if not handler.parse_stream(response, h, parser=self.xml_parser):
+                raise self.provider.storage_response_error(
+                    response.status, response.reason, '')
+        else:
+            handler.parse_string(response.read(), h, self.xml_parser)
         return rs
 
     def get_canonical_user_id(self, headers=None):
@@ -32,8 +32,16 @@ import urllib
 import boto.utils
 from boto.exception import BotoClientError
 from boto.provider import Provider
+from boto.s3.checksumcache import file_key, get_checksum_cache
+from boto.s3.concurrent import ConcurrentDownloader, MultipartUploader
+from boto.s3.concurrent import MultipartWriter
+from boto.s3.compression import CompressingReader, DecompressingWriter
+from boto.s3.compression import find_codec, get_codec
+from boto.s3.concurrent import MIN_PART_SIZE, multipart_threshold
+from boto.s3.keyfile import KeyFile
 from boto.s3.user import User
 from boto import UserAgent
+from boto.compat import memoryview
 from boto.utils import compute_md5
 try:
     from hashlib import md5
@@ -79,6 +87,7 @@ class Key(object):
 
 
     BufferSize = 8192
+    SendBufferSize = 1024 * 1024
 
     # The object metadata fields a user can set, other than custom metadata
     # fields (i.e., those beginning with a provider-specific prefix like
@@ -112,6 +121,7 @@ class Key(object):
         self.path = None
         self.resp = None
         self.mode = None
+        self._writer = None
         self.size = None
         self.version_id = None
         self.source_version_id = None
@@ -268,17 +278,50 @@ class Key(object):
 
     def open_write(self, headers=None, override_num_retries=None):
         """
-        Open this key for writing.
-        Not yet implemented
+        Open this key for writing.  The data passed to :meth:`write` is
+        uploaded as it is written, as a multipart upload whose parts are
+        sent concurrently once more than a part has been written, and
+        the upload is completed by :meth:`close`.  The length of the
+        data does not need to be known, and no more than a few parts of
+        it are held in memory.  See
+        :class:`boto.s3.concurrent.MultipartWriter`.
 
         :type headers: dict
         :param headers: Headers to pass in the write request
 
         :type override_num_retries: int
-        :param override_num_retries: If not None will override configured
-            num_retries parameter for underlying PUT.
+        :param override_num_retries: If not None will override the
+            number of times a failed part is retried.
+
+        :rtype: :class:`boto.s3.concurrent.MultipartWriter`
+        :return: The writer, which can also be written to and closed
+            directly, or used as a context manager.
+        """
+        self._writer = self._multipart_writer(
+            headers, override_num_retries,
+            reduced_redundancy=self.storage_class == 'REDUCED_REDUNDANCY')
+        return self._writer
+
+    def _multipart_writer(self, headers=None, num_retries=None, policy=None,
+                          reduced_redundancy=False, cb=None):
+        headers = headers and headers.copy() or {}
+        if 'Content-Type' not in headers:
+            headers['Content-Type'] = self.content_type
+        self.content_type = headers['Content-Type']
+        if num_retries is None:
+            num_retries = 5
+        return MultipartWriter(self.bucket, self.name, headers, policy,
+                               reduced_redundancy, metadata=self.metadata,
+                               num_retries=num_retries, cb=cb)
+
+    def write(self, data):
+        """
+        Write data to a key opened with ``open('w')`` or
+        :meth:`open_write`.
         """
-        raise BotoClientError('Not Implemented')
+        if self._writer is None:
+            raise BotoClientError('%s is not open for writing' % self.name)
+        self._writer.write(data)
 
     def open(self, mode='r', headers=None, query_args=None,
              override_num_retries=None):
@@ -293,6 +336,36 @@ class Key(object):
         else:
             raise BotoClientError('Invalid mode: %s' % mode)
 
+    def open_seekable(self, headers=None, version_id=None, block_size=None,
+                      cache_blocks=None, prefetch_threads=0):
+        """
+        Open the data of this key as a seekable, read-only file object
+        that reads blocks of it with ranged GETs and caches them.  It
+        can be handed to ``zipfile``, ``tarfile`` and other readers
+        that seek around a file, or wrapped in ``io.BufferedReader``.
+
+        :type headers: dict
+        :param headers: Headers to send with each GET.
+
+        :type version_id: string
+        :param version_id: The version of the key to read.
+
+        :type block_size: int
+        :param block_size: The size of the blocks read, in bytes.
+
+        :type cache_blocks: int
+        :param cache_blocks: The number of blocks cached.
+
+        :type prefetch_threads: int
+        :param prefetch_threads: The number of threads reading blocks
+            ahead of sequential reads.
+
+        :rtype: :class:`boto.s3.keyfile.KeyFile`
+        """
+        return KeyFile(self, headers=headers, version_id=version_id,
+                       block_size=block_size, cache_blocks=cache_blocks,
+                       prefetch_threads=prefetch_threads)
+
     closed = False
 
     def close(self):
@@ -301,6 +374,16 @@ class Key(object):
         self.resp = None
         self.mode = None
         self.closed = True
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.close()
+            self._written(writer)
+
+    def _written(self, writer):
+        self.size = writer.size
+        self.etag = writer.etag
+        self.version_id = writer.version_id
+        self.md5 = self.base64md5 = None
 
     def next(self):
         """
@@ -422,7 +505,8 @@ class Key(object):
                                    self.name, metadata,
                                    storage_class=storage_class,
                                    preserve_acl=preserve_acl,
-                                   encrypt_key=encrypt_key)
+                                   encrypt_key=encrypt_key,
+                                   src_size=self.size)
 
     def startElement(self, name, attrs, connection):
         if name == 'Owner':
@@ -707,21 +791,51 @@ class Key(object):
                 if chunked_transfer and cb_size == 0:
                     # For chunked Transfer, we call the cb for every 1MB
                     # of data transferred, except when we know size.
-                    cb_count = (1024 * 1024) / self.BufferSize
+                    cb_step = 1024 * 1024
                 elif num_cb > 1:
-                    cb_count = int(math.ceil(cb_size / self.BufferSize / (num_cb - 1.0)))
+                    cb_step = int(math.ceil(cb_size / (num_cb - 1.0)))
                 elif num_cb < 0:
-                    cb_count = -1
+                    cb_step = 1
                 else:
-                    cb_count = 0
-                i = 0
+                    cb_step = 0
+                next_cb = cb_step
                 cb(data_len, cb_size)
+                cb_len = data_len
+
+            # Read into one buffer for the whole upload where the file
+            # supports it, so that no string is allocated per chunk.  An
+            # upload of unknown size starts with a small buffer, which
+            # grows while the reads fill it.
+            max_buf_size = self._send_buffer_size(size or self.size)
+            if size or self.size:
+                buf = {'size': max_buf_size}
+            else:
+                buf = {'size': min(self.BufferSize, max_buf_size)}
+            readinto = None
+            if memoryview is not None:
+                readinto = getattr(fp, 'readinto', None)
+            if readinto is not None:
+                buf['view'] = memoryview(bytearray(buf['size']))
+
+            def read_chunk(bytes_togo):
+                buf_size = buf['size']
+                if bytes_togo and bytes_togo < buf_size:
+                    read_size = bytes_togo
+                else:
+                    read_size = buf_size
+                if readinto is None:
+                    chunk = fp.read(read_size)
+                else:
+                    view = buf['view']
+                    chunk = view[:readinto(view[:read_size])]
+                if len(chunk) == buf_size < max_buf_size:
+                    buf['size'] = min(buf_size * 2, max_buf_size)
+                    if readinto is not None:
+                        buf['view'] = memoryview(bytearray(buf['size']))
+                return chunk
 
             bytes_togo = size
-            if bytes_togo and bytes_togo < self.BufferSize:
-                chunk = fp.read(bytes_togo)
-            else:
-                chunk = fp.read(self.BufferSize)
+            chunk = read_chunk(bytes_togo)
             if spos is None:
                 # read at least something from a non-seekable fp.
                 self.read_from_stream = True
@@ -740,15 +854,11 @@ class Key(object):
                     bytes_togo -= chunk_len
                     if bytes_togo <= 0:
                         break
-                if cb:
-                    i += 1
-                    if i == cb_count or cb_count == -1:
-                        cb(data_len, cb_size)
-                        i = 0
-                if bytes_togo and bytes_togo < self.BufferSize:
-                    chunk = fp.read(bytes_togo)
-                else:
-                    chunk = fp.read(self.BufferSize)
+                if cb and cb_step and data_len >= next_cb:
+                    cb(data_len, cb_size)
+                    cb_len = data_len
+                    next_cb = data_len + cb_step
+                chunk = read_chunk(bytes_togo)
 
             self.size = data_len
 
@@ -762,7 +872,7 @@ class Key(object):
                     # http_conn.send("Content-MD5: %s\r\n" % self.base64md5)
                 http_conn.send('\r\n')
 
-            if cb and (cb_count <= 1 or i > 0) and data_len > 0:
+            if cb and data_len > cb_len:
                 cb(data_len, cb_size)
 
             response = http_conn.getresponse()
@@ -821,12 +931,28 @@ class Key(object):
             headers['Content-Length'] = str(self.size)
         headers['Expect'] = '100-Continue'
         headers = boto.utils.merge_meta(headers, self.metadata, provider)
-        resp = self.bucket.connection.make_request('PUT', self.bucket.name,
-                                                   self.name, headers,
-                                                   sender=sender,
-                                                   query_args=query_args)
+        try:
+            resp = self.bucket.connection.make_request('PUT',
+                                                       self.bucket.name,
+                                                       self.name, headers,
+                                                       sender=sender,
+                                                       query_args=query_args)
+        finally:
+            self.bucket._invalidate_key(self.name)
         self.handle_version_headers(resp, force=True)
 
+    def _send_buffer_size(self, size=None):
+        """
+        The size of the reads of an upload of ``size`` bytes: the
+        ``send_buffer_size`` option of the ``s3`` config section, but
+        no more than the upload needs.
+        """
+        buf_size = boto.config.getint('s3', 'send_buffer_size',
+                                      self.SendBufferSize)
+        if size:
+            buf_size = min(buf_size, size)
+        return max(buf_size, 1)
+
     def compute_md5(self, fp, size=None):
         """
         :type fp: file
@@ -845,7 +971,8 @@ class Key(object):
             hash as the first element and the base64 encoded version
             of the plain digest as the second element.
         """
-        tup = compute_md5(fp, size=size)
+        tup = compute_md5(fp, buf_size=self._send_buffer_size(size),
+                          size=size)
         # Returned values are MD5 hash, base64 encoded MD5 hash, and data size.
         # The internal implementation of compute_md5() needs to return the
         # data size but we don't want to return that value to the external
@@ -915,18 +1042,26 @@ class Key(object):
             into different ranges to be uploaded. If not specified,
             the default behaviour is to read all bytes from the file
             pointer. Less bytes may be available.
+
+        Providers that do not support chunked transfer, such as S3, are
+        sent the stream through :meth:`open_write` instead, as a
+        multipart upload, or as a single PUT if it is smaller than a
+        part; ``cb`` is then called as each part is sent.
         """
 
         provider = self.bucket.connection.provider
-        if not provider.supports_chunked_transfer():
-            raise BotoClientError('%s does not support chunked transfer'
-                % provider.get_provider_name())
-
         # Name of the Object should be specified explicitly for Streams.
         if not self.name or self.name == '':
             raise BotoClientError('Cannot determine the destination '
                                 'object name for the given stream')
 
+        if not provider.supports_chunked_transfer():
+            if query_args:
+                raise BotoClientError('%s does not support chunked transfer'
+                    % provider.get_provider_name())
+            return self._set_contents_from_stream_multipart(
+                fp, headers, replace, cb, policy, reduced_redundancy, size)
+
         if headers is None:
             headers = {}
         if policy:
@@ -944,10 +1079,40 @@ class Key(object):
             self.send_file(fp, headers, cb, num_cb, query_args,
                            chunked_transfer=True, size=size)
 
+    def _set_contents_from_stream_multipart(self, fp, headers, replace, cb,
+                                            policy, reduced_redundancy,
+                                            size):
+        if self.bucket is None:
+            return
+        if not replace and self.bucket.lookup(self.name):
+            return
+        if reduced_redundancy:
+            self.storage_class = 'REDUCED_REDUNDANCY'
+        writer = self._multipart_writer(headers, policy=policy,
+                                        reduced_redundancy=reduced_redundancy,
+                                        cb=cb)
+        buf_size = self._send_buffer_size(size)
+        try:
+            while size is None or writer.size < size:
+                read_size = buf_size
+                if size is not None:
+                    read_size = min(read_size, size - writer.size)
+                data = fp.read(read_size)
+                if not data:
+                    break
+                writer.write(data)
+        except:
+            writer.abort()
+            raise
+        writer.close()
+        self._written(writer)
+        return self.size
+
     def set_contents_from_file(self, fp, headers=None, replace=True,
                                cb=None, num_cb=10, policy=None, md5=None,
                                reduced_redundancy=False, query_args=None,
-                               encrypt_key=False, size=None, rewind=False):
+                               encrypt_key=False, size=None, rewind=False,
+                               compress=None):
         """
         Store an object in S3 using the name of the Key object as the
         key in S3 and the contents of the file pointed to by 'fp' as the
@@ -1020,9 +1185,25 @@ class Key(object):
             it. The default behaviour is False which reads from the
             current position of the file pointer (fp).
 
+        :type compress: string
+        :param compress: (optional) The name of a codec of
+            :mod:`boto.s3.compression`, such as ``gzip``, with which to
+            compress the data as it is sent.  The Content-Encoding of
+            the key is set to that of the codec.  The compressed data is
+            sent in one PUT if it fits in a part of a multipart upload,
+            and as a multipart upload otherwise.  Cannot be combined
+            with ``md5`` or ``query_args``.
+
         :rtype: int
         :return: The number of bytes written to the key.
         """
+        if compress is not None:
+            if md5 or query_args:
+                raise BotoClientError('Compressed uploads cannot be given '
+                                      'an MD5 or query args')
+            return self._set_contents_compressed(
+                fp, headers, replace, cb, num_cb, policy, reduced_redundancy,
+                encrypt_key, size, rewind, compress)
         provider = self.bucket.connection.provider
         headers = headers or {}
         if policy:
@@ -1095,10 +1276,59 @@ class Key(object):
             # return number of bytes written.
             return self.size
 
+    def _set_contents_compressed(self, fp, headers, replace, cb, num_cb,
+                                 policy, reduced_redundancy, encrypt_key,
+                                 size, rewind, compress):
+        if self.bucket is None:
+            return
+        codec = get_codec(compress)
+        if not replace and self.bucket.lookup(self.name):
+            return
+        if rewind:
+            fp.seek(0, os.SEEK_SET)
+        headers = headers and headers.copy() or {}
+        headers['Content-Encoding'] = self.content_encoding = \
+            codec.content_encoding
+        if hasattr(fp, 'name'):
+            self.path = fp.name
+        reader = CompressingReader(fp, codec, size)
+        provider = self.bucket.connection.provider
+        if provider.supports_chunked_transfer():
+            self.set_contents_from_stream(reader, headers, True, cb, num_cb,
+                                          policy, reduced_redundancy)
+            return self.size
+        uploader = MultipartUploader(self.bucket)
+        part_size = max(uploader.part_size, MIN_PART_SIZE)
+        data = reader.read(part_size)
+        if len(data) < part_size:
+            # Small enough for one PUT, whose Content-MD5 is checked.
+            return self.set_contents_from_string(
+                data, headers, True, cb, num_cb, policy, None,
+                reduced_redundancy, encrypt_key)
+        reader.unread(data)
+        if 'Content-Type' not in headers:
+            headers['Content-Type'] = (
+                self.path and mimetypes.guess_type(self.path)[0] or
+                self.DefaultContentType)
+        self.content_type = headers['Content-Type']
+        if reduced_redundancy:
+            self.storage_class = 'REDUCED_REDUNDANCY'
+        result = uploader.upload(reader, self.name, headers=headers,
+                                 cb=cb, num_cb=num_cb, policy=policy,
+                                 reduced_redundancy=reduced_redundancy,
+                                 encrypt_key=encrypt_key,
+                                 metadata=self.metadata)
+        self.size = reader.bytes_compressed
+        self.etag = result.etag
+        self.version_id = result.version_id
+        self.md5 = self.base64md5 = None
+        return self.size
+
     def set_contents_from_filename(self, filename, headers=None, replace=True,
                                    cb=None, num_cb=10, policy=None, md5=None,
                                    reduced_redundancy=False,
-                                   encrypt_key=False):
+                                   encrypt_key=False,
+                                   res_upload_handler=None, compress=None):
         """
         Store an object in S3 using the name of the Key object as the
         key in S3 and the contents of the file named by 'filename'.
@@ -1148,23 +1378,98 @@ class Key(object):
         :param reduced_redundancy: If True, this will set the storage
             class of the new Key to be REDUCED_REDUNDANCY. The Reduced
             Redundancy Storage (RRS) feature of S3, provides lower
-            redundancy at lower storage cost.  :type encrypt_key: bool
-            :param encrypt_key: If True, the new copy of the object
+            redundancy at lower storage cost.
+
+        :type encrypt_key: bool
+        :param encrypt_key: If True, the new copy of the object
             will be encrypted on the server-side by S3 and will be
             stored in an encrypted form while at rest in S3.
+
+        :type res_upload_handler: ResumableMultipartUploadHandler
+        :param res_upload_handler: If provided, the file is uploaded as a
+            multipart upload whatever its size, and this handler records
+            it so that it can be resumed if it fails.  See
+            :mod:`boto.s3.resumable_upload_handler`.
+
+        :type compress: string
+        :param compress: The codec with which to compress the file as it
+            is sent.  See :meth:`set_contents_from_file`.
+
+        Files of at least ``multipart_threshold`` bytes (an option of
+        the ``s3`` config section, 100MB by default) are uploaded as a
+        multipart upload whose parts are sent concurrently, unless
+        ``md5`` is given.  See :class:`boto.s3.concurrent.MultipartUploader`.
+
+        If the ``checksum_cache`` option of the ``s3`` config section is
+        set, the MD5 of the file is taken from that cache when the file
+        has not changed since it was stored.  See
+        :class:`boto.s3.checksumcache.ChecksumCache`.
         """
+        if compress is not None and res_upload_handler is not None:
+            raise BotoClientError('Compressed uploads cannot be resumed')
+        if self.bucket is not None and md5 is None and compress is None:
+            threshold = multipart_threshold()
+            if (res_upload_handler is not None or
+                    threshold and os.path.getsize(filename) >= threshold):
+                return self._set_contents_multipart(
+                    filename, headers, replace, cb, num_cb, policy,
+                    reduced_redundancy, encrypt_key, res_upload_handler)
         fp = open(filename, 'rb')
         try:
+            if self.bucket is not None and md5 is None and compress is None:
+                md5 = self._cached_md5(fp)
             self.set_contents_from_file(fp, headers, replace, cb, num_cb,
                                         policy, md5, reduced_redundancy,
-                                        encrypt_key=encrypt_key)
+                                        encrypt_key=encrypt_key,
+                                        compress=compress)
         finally:
             fp.close()
 
+    def _cached_md5(self, fp):
+        cache = get_checksum_cache()
+        if cache is None:
+            return None
+        md5 = cache.get_md5(fp.name)
+        provider = self.bucket.connection.provider
+        if md5 is None and not provider.supports_chunked_transfer():
+            # The MD5 is needed before the upload anyway.
+            key = file_key(fp.name)
+            md5 = self.compute_md5(fp)
+            cache.set_md5(fp.name, md5[0], key)
+        return md5
+
+    def _set_contents_multipart(self, filename, headers, replace, cb, num_cb,
+                                policy, reduced_redundancy, encrypt_key,
+                                res_upload_handler=None):
+        if not replace and self.bucket.lookup(self.name):
+            return
+        headers = headers and headers.copy() or {}
+        if 'Content-Type' not in headers:
+            headers['Content-Type'] = (mimetypes.guess_type(filename)[0] or
+                                       self.DefaultContentType)
+        if headers['Content-Type'] is None:
+            del headers['Content-Type']
+        else:
+            self.content_type = headers['Content-Type']
+        self.path = filename
+        if reduced_redundancy:
+            self.storage_class = 'REDUCED_REDUNDANCY'
+        uploader = MultipartUploader(self.bucket)
+        result = uploader.upload(filename, self.name, headers=headers, cb=cb,
+                                 num_cb=num_cb, policy=policy,
+                                 reduced_redundancy=reduced_redundancy,
+                                 encrypt_key=encrypt_key,
+                                 metadata=self.metadata,
+                                 res_upload_handler=res_upload_handler)
+        self.size = os.path.getsize(filename)
+        self.etag = result.etag
+        self.version_id = result.version_id
+        self.md5 = self.base64md5 = None
+
     def set_contents_from_string(self, s, headers=None, replace=True,
                                  cb=None, num_cb=10, policy=None, md5=None,
                                  reduced_redundancy=False,
-                                 encrypt_key=False):
+                                 encrypt_key=False, compress=None):
         """
         Store an object in S3 using the name of the Key object as the
         key in S3 and the string 's' as the contents.
@@ -1217,19 +1522,24 @@ class Key(object):
         :param encrypt_key: If True, the new copy of the object will
             be encrypted on the server-side by S3 and will be stored
             in an encrypted form while at rest in S3.
+
+        :type compress: string
+        :param compress: The codec with which to compress the string as
+            it is sent.  See :meth:`set_contents_from_file`.
         """
         if isinstance(s, unicode):
             s = s.encode("utf-8")
         fp = StringIO.StringIO(s)
         r = self.set_contents_from_file(fp, headers, replace, cb, num_cb,
                                         policy, md5, reduced_redundancy,
-                                        encrypt_key=encrypt_key)
+                                        encrypt_key=encrypt_key,
+                                        compress=compress)
         fp.close()
         return r
 
     def get_file(self, fp, headers=None, cb=None, num_cb=10,
                  torrent=False, version_id=None, override_num_retries=None,
-                 response_headers=None):
+                 response_headers=None, decompress=False):
         """
         Retrieves a file from an S3 Key
 
@@ -1265,16 +1575,22 @@ class Key(object):
             headers/values that will override any headers associated
             with the stored object in the response.  See
             http://goo.gl/EWOPb for details.
+
+        :type decompress: bool or string
+        :param decompress: If True, data whose Content-Encoding is that
+            of a codec of :mod:`boto.s3.compression` is decompressed as
+            it is received.  A codec name decompresses with that codec
+            whatever the Content-Encoding.
         """
         self._get_file_internal(fp, headers=headers, cb=cb, num_cb=num_cb,
                                 torrent=torrent, version_id=version_id,
                                 override_num_retries=override_num_retries,
                                 response_headers=response_headers,
-                                query_args=None)
+                                query_args=None, decompress=decompress)
 
     def _get_file_internal(self, fp, headers=None, cb=None, num_cb=10,
                  torrent=False, version_id=None, override_num_retries=None,
-                 response_headers=None, query_args=None):
+                 response_headers=None, query_args=None, decompress=False):
         if headers is None:
             headers = {}
         save_debug = self.bucket.connection.debug
@@ -1300,6 +1616,15 @@ class Key(object):
         query_args = '&'.join(query_args)
         self.open('r', headers, query_args=query_args,
                   override_num_retries=override_num_retries)
+        writer = None
+        if decompress:
+            if decompress is True:
+                codec = find_codec(self.content_encoding)
+            else:
+                codec = get_codec(decompress)
+            if codec is not None:
+                # The MD5 is still that of the bytes received.
+                fp = writer = DecompressingWriter(fp, codec)
 
         data_len = 0
         if cb:
@@ -1333,6 +1658,8 @@ class Key(object):
                     i = 0
         if cb and (cb_count <= 1 or i > 0) and data_len > 0:
             cb(data_len, cb_size)
+        if writer is not None:
+            writer.close()
         if m:
             self.md5 = m.hexdigest()
         if self.size is None and not torrent and "Range" not in headers:
@@ -1372,7 +1699,8 @@ class Key(object):
                              torrent=False,
                              version_id=None,
                              res_download_handler=None,
-                             response_headers=None):
+                             response_headers=None,
+                             decompress=False):
         """
         Retrieve an object from S3 using the name of the Key object as the
         key in S3.  Write the contents of the object to the file pointed
@@ -1412,12 +1740,24 @@ class Key(object):
             headers/values that will override any headers associated
             with the stored object in the response.  See
             http://goo.gl/EWOPb for details.
+
+        :type decompress: bool or string
+        :param decompress: Whether to decompress the data as it is
+            received.  See :meth:`get_file`.
         """
         if self.bucket != None:
+            if res_download_handler and decompress:
+                raise BotoClientError('Decompressed downloads cannot be '
+                                      'resumed')
             if res_download_handler:
                 res_download_handler.get_file(self, fp, headers, cb, num_cb,
                                               torrent=torrent,
                                               version_id=version_id)
+            elif decompress:
+                self.get_file(fp, headers, cb, num_cb, torrent=torrent,
+                              version_id=version_id,
+                              response_headers=response_headers,
+                              decompress=decompress)
             else:
                 self.get_file(fp, headers, cb, num_cb, torrent=torrent,
                               version_id=version_id,
@@ -1428,7 +1768,8 @@ class Key(object):
                                  torrent=False,
                                  version_id=None,
                                  res_download_handler=None,
-                                 response_headers=None):
+                                 response_headers=None,
+                                 decompress=False):
         """
         Retrieve an object from S3 using the name of the Key object as the
         key in S3.  Store contents of the object to a file named by 'filename'.
@@ -1468,32 +1809,63 @@ class Key(object):
             headers/values that will override any headers associated
             with the stored object in the response.  See
             http://goo.gl/EWOPb for details.
+
+        Objects of at least ``multipart_threshold`` bytes (an option of
+        the ``s3`` config section, 100MB by default) whose size is known
+        are downloaded as byte ranges fetched concurrently, unless a
+        Range header or ``torrent`` is given.  Google Storage keys are
+        always downloaded with a single GET.  See
+        :class:`boto.s3.concurrent.ConcurrentDownloader`.
+
+        :type decompress: bool or string
+        :param decompress: Whether to decompress the data as it is
+            received, in a single GET.  See :meth:`get_file`.
         """
-        fp = open(filename, 'wb')
-        try:
-            self.get_contents_to_file(fp, headers, cb, num_cb, torrent=torrent,
-                                      version_id=version_id,
-                                      res_download_handler=res_download_handler,
-                                      response_headers=response_headers)
-        except Exception:
-            os.remove(filename)
-            raise
-        finally:
-            fp.close()
+        if not decompress and self._use_ranged_download(headers, torrent):
+            downloader = ConcurrentDownloader(self.bucket)
+            if (res_download_handler is not None and
+                    res_download_handler.num_retries is not None):
+                downloader.num_retries = res_download_handler.num_retries
+            downloader.download(self, filename, headers, cb, num_cb,
+                                version_id=version_id,
+                                response_headers=response_headers,
+                                res_download_handler=res_download_handler)
+        else:
+            fp = open(filename, 'wb')
+            try:
+                self.get_contents_to_file(
+                    fp, headers, cb, num_cb, torrent=torrent,
+                    version_id=version_id,
+                    res_download_handler=res_download_handler,
+                    response_headers=response_headers,
+                    decompress=decompress)
+            except Exception:
+                os.remove(filename)
+                raise
+            finally:
+                fp.close()
         # if last_modified date was sent from s3, try to set file's timestamp
         if self.last_modified != None:
             try:
                 modified_tuple = rfc822.parsedate_tz(self.last_modified)
                 modified_stamp = int(rfc822.mktime_tz(modified_tuple))
-                os.utime(fp.name, (modified_stamp, modified_stamp))
+                os.utime(filename, (modified_stamp, modified_stamp))
             except Exception:
                 pass
 
+    def _use_ranged_download(self, headers, torrent):
+        if self.bucket is None or torrent or not self.size:
+            return False
+        if headers and 'Range' in headers:
+            return False
+        return 0 < multipart_threshold() <= self.size
+
     def get_contents_as_string(self, headers=None,
                                cb=None, num_cb=10,
                                torrent=False,
                                version_id=None,
-                               response_headers=None):
+                               response_headers=None,
+                               decompress=False):
         """
         Retrieve an object from S3 using the name of the Key object as the
         key in S3.  Return the contents of the object as a string.
@@ -1527,13 +1899,18 @@ class Key(object):
             with the stored object in the response.  See
             http://goo.gl/EWOPb for details.
 
+        :type decompress: bool or string
+        :param decompress: Whether to decompress the data as it is
+            received.  See :meth:`get_file`.
+
         :rtype: string
         :returns: The contents of the file as a string
         """
         fp = StringIO.StringIO()
         self.get_contents_to_file(fp, headers, cb, num_cb, torrent=torrent,
                                   version_id=version_id,
-                                  response_headers=response_headers)
+                                  response_headers=response_headers,
+                                  decompress=decompress)
         return fp.getvalue()
 
     def add_email_grant(self, permission, email_address, headers=None):
@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+"""
+Random access to the data of S3 keys.
+
+:class:`KeyFile` is a read-only file object over a key that can seek
+anywhere in it.  It reads whole blocks of the key with ranged GETs and
+keeps the most recently used ones, so that formats read by seeking to
+an index or a footer, such as zip and tar files, can be read without
+downloading the whole object::
+
+    key = bucket.get_key('archive.zip')
+    archive = zipfile.ZipFile(key.open_seekable())
+"""
+from __future__ import with_statement
+import io
+import logging
+import threading
+from Queue import Queue, Empty
+
+import boto
+from boto.exception import S3DataError
+from boto.utils import LRUCache
+
+log = logging.getLogger('boto.s3.keyfile')
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+DEFAULT_CACHE_BLOCKS = 32
+
+#: The most blocks read ahead of sequential reads.
+MAX_READAHEAD_BLOCKS = 16
+
+# Put in the prefetch queue to stop a thread.
+_STOP = object()
+
+
+class KeyFile(io.RawIOBase):
+    """
+    A seekable, read-only file object over the data of a key.
+
+    Data is read a block at a time with ranged GETs, and up to
+    ``cache_blocks`` blocks are kept in a least recently used cache.
+    The missing blocks that a read needs are fetched with as few GETs
+    as possible, one for each run of adjacent blocks.  While reads are
+    sequential, more and more of the blocks that follow them are read
+    ahead: in the same GETs, or, if there are ``prefetch_threads``, by
+    background threads while the reader works through the data it has.
+
+    Every GET is sent with ``If-Match`` set to the ETag of the key, so
+    if the key is replaced while it is open reads fail instead of
+    mixing the data of both.
+    """
+
+    def __init__(self, key, headers=None, version_id=None, block_size=None,
+                 cache_blocks=None, prefetch_threads=0):
+        """
+        :type key: :class:`boto.s3.key.Key`
+        :param key: The key to read.  Its size and ETag are looked up
+            with a HEAD request if they are not known.
+
+        :type headers: dict
+        :param headers: Headers to send with each GET.
+
+        :type version_id: string
+        :param version_id: The version of the key to read.
+
+        :type block_size: int
+        :param block_size: The size of the blocks in bytes.  Defaults
+            to the ``read_block_size`` option of the ``s3`` config
+            section, or 1MB.
+
+        :type cache_blocks: int
+        :param cache_blocks: The number of blocks cached.  Defaults to
+            the ``read_cache_blocks`` option, or 32.
+
+        :type prefetch_threads: int
+        :param prefetch_threads: The number of threads reading blocks
+            ahead of sequential reads.  0 reads them ahead in the GETs
+            of the reads.
+        """
+        super(KeyFile, self).__init__()
+        version_id = version_id or key.version_id
+        if key.size is None or key.etag is None:
+            found = key.bucket.get_key(key.name, headers=headers,
+                                       version_id=version_id)
+            if found is None:
+                raise key.provider.storage_response_error(
+                    404, 'Not Found', 'No such key: %s' % key.name)
+            key = found
+        self.key = key
+        self.name = key.name
+        self.size = key.size
+        self.block_size = block_size or boto.config.getint(
+            's3', 'read_block_size', DEFAULT_BLOCK_SIZE)
+        cache_blocks = cache_blocks or boto.config.getint(
+            's3', 'read_cache_blocks', DEFAULT_CACHE_BLOCKS)
+        self.num_requests = 0
+        self._headers = dict(headers or {})
+        self._headers['If-Match'] = key.etag
+        self._version_id = version_id
+        self._last_block = max(self.size - 1, 0) // self.block_size
+        self._cache = LRUCache(cache_blocks)
+        # Read ahead no further than half the cache, or the blocks read
+        # ahead would push out those being read.
+        self._max_readahead = min(MAX_READAHEAD_BLOCKS, cache_blocks // 2)
+        self._readahead = 0
+        self._pos = 0
+        self._sequential_pos = 0
+        # Guards the cache, the blocks being fetched and num_requests.
+        self._lock = threading.Condition()
+        self._fetching = set()
+        self._prefetch_queue = None
+        self._threads = []
+        self._stop = threading.Event()
+        if prefetch_threads:
+            self._prefetch_queue = Queue()
+            for _ in xrange(prefetch_threads):
+                thread = threading.Thread(target=self._prefetch)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        elif whence != io.SEEK_SET:
+            raise ValueError('Invalid whence (%r)' % whence)
+        if offset < 0:
+            raise ValueError('Negative seek position %d' % offset)
+        self._pos = offset
+        return offset
+
+    def readinto(self, b):
+        if self.closed:
+            raise ValueError('I/O operation on closed file')
+        start = self._pos
+        end = min(start + len(b), self.size)
+        if start >= end:
+            return 0
+        blocks = self._get_blocks(start // self.block_size,
+                                  (end - 1) // self.block_size,
+                                  start == self._sequential_pos)
+        written = 0
+        for index in sorted(blocks):
+            data = blocks[index]
+            offset = index * self.block_size
+            lo = max(start - offset, 0)
+            hi = min(end - offset, len(data))
+            b[written:written + hi - lo] = data[lo:hi]
+            written += hi - lo
+        self._pos = self._sequential_pos = start + written
+        return written
+
+    def close(self):
+        self._stop.set()
+        if self._prefetch_queue is not None:
+            for _ in xrange(len(self._threads)):
+                self._prefetch_queue.put(_STOP)
+        super(KeyFile, self).close()
+
+    def _get_blocks(self, first, last, sequential):
+        # Returns a dict of the blocks from first to last.
+        if sequential:
+            self._readahead = min(max(self._readahead * 2, 1),
+                                  self._max_readahead)
+        else:
+            self._readahead = 0
+        ahead = range(last + 1, min(last + self._readahead,
+                                    self._last_block) + 1)
+        blocks = {}
+        with self._lock:
+            for index in xrange(first, last + 1):
+                data = self._cache.get(index)
+                if data is not None:
+                    blocks[index] = data
+            missing = [index for index in xrange(first, last + 1)
+                       if index not in blocks and
+                       index not in self._fetching]
+            ahead = [index for index in ahead if index not in self._cache
+                     and index not in self._fetching]
+            if self._prefetch_queue is None:
+                # Without threads, blocks are read ahead only in the GET
+                # of blocks that are needed.
+                if missing:
+                    missing.extend(ahead)
+                ahead = []
+            self._fetching.update(missing + ahead)
+        for index in ahead:
+            self._prefetch_queue.put(index)
+        # One GET for each run of adjacent blocks.
+        runs = []
+        for index in missing:
+            if runs and runs[-1][1] == index - 1:
+                runs[-1][1] = index
+            else:
+                runs.append([index, index])
+        try:
+            for run_first, run_last in runs:
+                blocks.update(self._fetch(run_first, run_last))
+        finally:
+            with self._lock:
+                # Unmarks the blocks of runs that were not fetched.
+                self._fetching.difference_update(missing)
+                self._lock.notify_all()
+        for index in xrange(first, last + 1):
+            if index not in blocks:
+                blocks[index] = self._wait_for(index)
+        return dict((index, blocks[index])
+                    for index in xrange(first, last + 1))
+
+    def _wait_for(self, index):
+        # Waits for a block being prefetched, or fetches it if it is not
+        # cached once its prefetch is over.
+        with self._lock:
+            while True:
+                data = self._cache.get(index)
+                if data is not None:
+                    return data
+                if index not in self._fetching:
+                    self._fetching.add(index)
+                    break
+                self._lock.wait(1)
+        try:
+            return self._fetch(index, index)[index]
+        finally:
+            with self._lock:
+                self._fetching.discard(index)
+                self._lock.notify_all()
+
+    def _fetch(self, first, last):
+        # Reads the blocks from first to last with one GET and caches
+        # them.  The caller marks them as being fetched.
+        start = first * self.block_size
+        end = min((last + 1) * self.block_size, self.size) - 1
+        headers = self._headers.copy()
+        headers['Range'] = 'bytes=%d-%d' % (start, end)
+        # Key objects hold the response being read, so every GET gets
+        # its own.
+        key = self.key.bucket.new_key(self.key.name)
+        data = key.get_contents_as_string(headers,
+                                          version_id=self._version_id)
+        if len(data) != end - start + 1:
+            raise S3DataError('Expected %d bytes of %s, got %d' %
+                              (end - start + 1, self.key.name, len(data)))
+        blocks = {}
+        with self._lock:
+            self.num_requests += 1
+            for index in xrange(first, last + 1):
+                offset = (index - first) * self.block_size
+                blocks[index] = data[offset:offset + self.block_size]
+                self._cache[index] = blocks[index]
+                self._fetching.discard(index)
+            self._lock.notify_all()
+        return blocks
+
+    def _prefetch(self):
+        while not self._stop.is_set():
+            try:
+                index = self._prefetch_queue.get(timeout=1)
+            except Empty:
+                continue
+            if index is _STOP:
+                return
+            try:
+                self._fetch(index, index)
+            except Exception, e:
+                # A reader that needs the block fetches it again, and
+                # gets the error.
+                log.debug('Could not prefetch block %d of %s: %s', index,
+                          self.key.name, e)
+            finally:
+                with self._lock:
+                    self._fetching.discard(index)
+                    self._lock.notify_all()
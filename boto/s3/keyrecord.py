@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Compact representations of the keys of a bucket listing, for listings
+too large to hold as :class:`boto.s3.key.Key` objects.
+"""
+
+from array import array
+
+from boto.s3.user import User
+
+# array('q') is not available before Python 3.3; 'l' is 64 bits on
+# most platforms, and sizes fall back to doubles where it is not.
+SIZE_TYPECODE = 'l' if array('l').itemsize >= 8 else 'd'
+
+# Storage classes and owners repeat across a listing, so each distinct
+# value is kept once.
+_interned = {}
+
+
+def _intern(value):
+    return _interned.setdefault(value, value)
+
+
+class KeyRecord(object):
+    """
+    A key of a bucket listing, holding only the fields of the listing:
+    ``name``, ``size``, ``etag``, ``last_modified``, ``storage_class``
+    and ``owner_id``.  Use :meth:`to_key` for a full
+    :class:`boto.s3.key.Key`.
+    """
+
+    __slots__ = ('bucket', 'name', 'size', 'etag', 'last_modified',
+                 'storage_class', 'owner_id')
+
+    def __init__(self, bucket=None, name=None, size=None, etag=None,
+                 last_modified=None, storage_class=None, owner_id=None):
+        self.bucket = bucket
+        self.name = name
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.storage_class = storage_class
+        self.owner_id = owner_id
+
+    def __repr__(self):
+        if self.bucket:
+            return '<KeyRecord: %s,%s>' % (self.bucket.name, self.name)
+        return '<KeyRecord: None,%s>' % self.name
+
+    def __eq__(self, other):
+        if not isinstance(other, KeyRecord):
+            return NotImplemented
+        return all(getattr(self, s) == getattr(other, s)
+                   for s in self.__slots__)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def startElement(self, name, attrs, connection):
+        return None
+
+    def endElement(self, name, value, connection):
+        if name == 'Key':
+            self.name = value
+        elif name == 'Size':
+            self.size = int(value)
+        elif name == 'ETag':
+            self.etag = value
+        elif name == 'LastModified':
+            self.last_modified = value
+        elif name == 'StorageClass':
+            self.storage_class = _intern(value)
+        elif name == 'ID':
+            self.owner_id = _intern(value)
+
+    def to_key(self):
+        """
+        Returns a :class:`boto.s3.key.Key`, of the key class of the
+        bucket, with the fields of this record.
+
+        :rtype: :class:`boto.s3.key.Key`
+        """
+        key = self.bucket.new_key(self.name)
+        key.size = self.size
+        key.etag = self.etag
+        key.last_modified = self.last_modified
+        key.storage_class = self.storage_class
+        if self.owner_id is not None:
+            key.owner = User(id=self.owner_id)
+        return key
+
+
+class KeyColumns(object):
+    """
+    The keys of a bucket listing held as columns, one per field of
+    :class:`KeyRecord`: ``names``, ``etags`` and ``last_modified`` are
+    lists, ``sizes`` is an array, and ``storage_classes`` and
+    ``owner_ids`` are lists of shared strings.  ``prefixes`` holds the
+    common prefixes of a listing with a delimiter.
+    """
+
+    def __init__(self, bucket=None):
+        self.bucket = bucket
+        self.names = []
+        self.sizes = array(SIZE_TYPECODE)
+        self.etags = []
+        self.last_modified = []
+        self.storage_classes = []
+        self.owner_ids = []
+        self.prefixes = []
+
+    @classmethod
+    def from_records(cls, bucket, records):
+        """
+        Returns the columns of ``records``, a page of a listing of
+        :class:`KeyRecord` and :class:`boto.s3.prefix.Prefix` objects.
+        """
+        columns = cls(bucket)
+        for record in records:
+            if isinstance(record, KeyRecord):
+                columns.append(record)
+            else:
+                columns.prefixes.append(record.name)
+        return columns
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
+        return KeyRecord(self.bucket, self.names[i], self.sizes[i],
+                         self.etags[i], self.last_modified[i],
+                         self.storage_classes[i], self.owner_ids[i])
+
+    def __iter__(self):
+        for i in xrange(len(self.names)):
+            yield self[i]
+
+    def append(self, record):
+        self.names.append(record.name)
+        self.sizes.append(record.size or 0)
+        self.etags.append(record.etag)
+        self.last_modified.append(record.last_modified)
+        self.storage_classes.append(record.storage_class)
+        self.owner_ids.append(record.owner_id)
+
+    def extend(self, other):
+        """Appends the keys and prefixes of another KeyColumns."""
+        self.names.extend(other.names)
+        self.sizes.extend(other.sizes)
+        self.etags.extend(other.etags)
+        self.last_modified.extend(other.last_modified)
+        self.storage_classes.extend(other.storage_classes)
+        self.owner_ids.extend(other.owner_ids)
+        self.prefixes.extend(other.prefixes)
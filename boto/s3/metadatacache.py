@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+"""
+An in-memory cache of the metadata of keys.
+
+:meth:`boto.s3.bucket.Bucket.get_key` sends a HEAD request each time it
+is called.  A :class:`MetadataCache` set as the ``metadata_cache`` of an
+:class:`boto.s3.connection.S3Connection` keeps what those requests
+return, and that keys do not exist, for a few seconds, so that checking
+the same keys over and over does not cost a request each time.
+
+The cache is off unless the ``metadata_cache_size`` option of the ``s3``
+config section gives its size::
+
+    [s3]
+    metadata_cache_size = 10000
+    metadata_cache_ttl = 30
+    metadata_cache_negative_ttl = 5
+
+Writes to keys through the connection that owns the cache remove them
+from it, but writes by other clients are only seen once the cached
+metadata expires.
+"""
+from __future__ import with_statement
+import threading
+import time
+
+import boto
+from boto.utils import LRUCache, get_utf8_value
+
+DEFAULT_TTL = 30
+DEFAULT_NEGATIVE_TTL = 5
+
+
+class MetadataCache(object):
+    """
+    A thread-safe cache of the metadata of keys, by bucket and key name.
+
+    Holds at most ``max_items`` keys, dropping the least recently used
+    first.  The metadata of a key is kept for ``ttl`` seconds, and the
+    fact that a key does not exist for ``negative_ttl`` seconds.
+
+    ``hits``, ``negative_hits`` (those of the hits that found a key did
+    not exist), ``misses`` and ``invalidations`` count the uses of the
+    cache.
+    """
+
+    def __init__(self, max_items, ttl=DEFAULT_TTL,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Counts the invalidations, so that metadata read before one is
+        # not cached after it.
+        self.generation = 0
+        self._cache = LRUCache(max_items)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls):
+        """
+        Returns a cache configured by the ``s3`` config section, or None
+        if ``metadata_cache_size`` is not set.
+        """
+        max_items = boto.config.getint('s3', 'metadata_cache_size', 0)
+        if max_items <= 0:
+            return None
+        return cls(max_items,
+                   boto.config.getfloat('s3', 'metadata_cache_ttl',
+                                        DEFAULT_TTL),
+                   boto.config.getfloat('s3', 'metadata_cache_negative_ttl',
+                                        DEFAULT_NEGATIVE_TTL))
+
+    def __len__(self):
+        return len(self._cache)
+
+    @property
+    def hit_rate(self):
+        """The fraction of lookups that were hits."""
+        lookups = self.hits + self.misses
+        if not lookups:
+            return 0.0
+        return float(self.hits) / lookups
+
+    def get(self, bucket_name, key_name):
+        """
+        Returns a ``(hit, attrs)`` pair.  On a hit ``attrs`` is the dict
+        of the cached attributes of the key, or None if it does not
+        exist.  On a miss it is None.
+        """
+        name = (bucket_name, get_utf8_value(key_name))
+        with self._lock:
+            entry = self._cache.get(name)
+            if entry is not None:
+                expires, attrs = entry
+                if expires > time.time():
+                    self.hits += 1
+                    if attrs is None:
+                        self.negative_hits += 1
+                    return True, attrs
+                del self._cache[name]
+            self.misses += 1
+            return False, None
+
+    def put(self, bucket_name, key_name, attrs, generation=None):
+        """
+        Caches the attributes of a key, or None if it does not exist.
+        If ``generation`` is given and the cache has been invalidated
+        since it was read from :attr:`generation`, nothing is cached,
+        as ``attrs`` may predate a write.
+        """
+        name = (bucket_name, get_utf8_value(key_name))
+        if attrs is None:
+            ttl = self.negative_ttl
+        else:
+            ttl = self.ttl
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._cache[name] = (time.time() + ttl, attrs)
+
+    def invalidate(self, bucket_name, key_name):
+        """Removes a key from the cache."""
+        name = (bucket_name, get_utf8_value(key_name))
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            if name in self._cache:
+                del self._cache[name]
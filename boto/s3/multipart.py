@@ -216,11 +216,20 @@ class MultiPartUpload(object):
         response = self.bucket.connection.make_request('GET', self.bucket.name,
                                                        self.key_name,
                                                        query_args=query_args)
-        body = response.read()
         if response.status == 200:
             h = handler.XmlHandler(self, self)
-            xml.sax.parseString(body, h)
+            connection = self.bucket.connection
+            if connection.streaming_parse:
+                if not handler.parse_stream(response, h,
+                                            parser=connection.xml_parser):
+                    raise connection.provider.storage_response_error(
+                        response.status, response.reason, '')
+            else:
+                handler.parse_string(response.read(), h,
+                                     connection.xml_parser)
             return self._parts
+        # The body is read so that the connection can be reused.
+        response.read()
 
     def upload_part_from_file(self, fp, part_num, headers=None, replace=True,
                               cb=None, num_cb=10, md5=None, size=None):
@@ -235,6 +244,9 @@ class MultiPartUpload(object):
 
         The other parameters are exactly as defined for the
         :class:`boto.s3.key.Key` set_contents_from_file method.
+
+        :rtype: :class:`boto.s3.key.Key`
+        :return: A key whose ``etag`` is the ETag of the part.
         """
         if part_num < 1:
             raise ValueError('Part numbers must be greater than zero')
@@ -244,6 +256,7 @@ class MultiPartUpload(object):
                                    cb=cb, num_cb=num_cb, md5=md5,
                                    reduced_redundancy=False,
                                    query_args=query_args, size=size)
+        return key
 
     def copy_part_from_key(self, src_bucket_name, src_key_name, part_num,
                            start=None, end=None, src_version_id=None,
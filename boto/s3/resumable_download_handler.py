@@ -43,6 +43,10 @@ ResumableDownloadHandler constructor. If you do this, that file will
 save the state needed to allow retrying later, in a separate process
 (e.g., in a later run of gsutil).
 
+Downloads made by boto.s3.concurrent.ConcurrentDownloader also record
+each byte range as it completes in the tracker file, one "start-end" line
+after the ETag, and resume by fetching only the ranges that are missing.
+
 Note that resumable downloads work across providers (they depend only
 on support Range GETs), but this code is in the boto.s3 package
 because it is the wrong abstraction level to go in the top-level boto
@@ -86,7 +90,9 @@ class ResumableDownloadHandler(object):
     Handler for resumable downloads.
     """
 
-    ETAG_REGEX = '([a-z0-9]{32})\n'
+    ETAG_REGEX = '([a-z0-9]{32}(-[0-9]+)?)\n'
+
+    RANGE_REGEX = '([0-9]+)-([0-9]+)\n'
 
     RETRYABLE_EXCEPTIONS = (httplib.HTTPException, IOError, socket.error,
                             socket.gaierror)
@@ -112,6 +118,8 @@ class ResumableDownloadHandler(object):
         self.tracker_file_name = tracker_file_name
         self.num_retries = num_retries
         self.etag_value_for_current_download = None
+        # The (start, end) byte ranges completed by a concurrent download.
+        self.completed_ranges = []
         if tracker_file_name:
             self._load_tracker_file_etag()
         # Save download_start_point in instance state so caller can
@@ -127,6 +135,11 @@ class ResumableDownloadHandler(object):
             m = re.search(self.ETAG_REGEX, etag_line)
             if m:
                 self.etag_value_for_current_download = m.group(1)
+                for line in f:
+                    m = re.match(self.RANGE_REGEX, line)
+                    if m:
+                        self.completed_ranges.append((int(m.group(1)),
+                                                      int(m.group(2))))
             else:
                 print('Couldn\'t read etag in tracker file (%s). Restarting '
                       'download from scratch.' % self.tracker_file_name)
@@ -145,6 +158,7 @@ class ResumableDownloadHandler(object):
 
     def _save_tracker_info(self, key):
         self.etag_value_for_current_download = key.etag.strip('"\'')
+        self.completed_ranges = []
         if not self.tracker_file_name:
             return
         f = None
@@ -163,6 +177,23 @@ class ResumableDownloadHandler(object):
             if f:
                 f.close()
 
+    def _save_completed_range(self, start, end):
+        self.completed_ranges.append((start, end))
+        if not self.tracker_file_name:
+            return
+        f = None
+        try:
+            f = open(self.tracker_file_name, 'a')
+            f.write('%d-%d\n' % (start, end))
+        except IOError, e:
+            raise ResumableDownloadException(
+                'Couldn\'t write tracker file (%s): %s.' %
+                (self.tracker_file_name, e.strerror),
+                ResumableTransferDisposition.ABORT)
+        finally:
+            if f:
+                f.close()
+
     def _remove_tracker_file(self):
         if (self.tracker_file_name and
             os.path.exists(self.tracker_file_name)):
@@ -176,6 +207,17 @@ class ResumableDownloadHandler(object):
         Raises ResumableDownloadException if any problems occur.
         """
         cur_file_size = get_cur_file_size(fp, position_to_eof=True)
+        if self.completed_ranges:
+            # The file was written by a concurrent download, whose
+            # ranges may have completed in any order; only the bytes
+            # up to the first missing range can be kept.
+            cur_file_size = self._completed_prefix()
+            fp.truncate(cur_file_size)
+            fp.seek(cur_file_size)
+            if (self.etag_value_for_current_download ==
+                key.etag.strip('"\'')):
+                # Forget the ranges, which this download does not track.
+                self._save_tracker_info(key)
 
         if (cur_file_size and 
             self.etag_value_for_current_download and
@@ -195,7 +237,8 @@ class ResumableDownloadHandler(object):
                 print 'Resuming download.'
             headers = headers.copy()
             headers['Range'] = 'bytes=%d-%d' % (cur_file_size, key.size - 1)
-            cb = ByteTranslatingCallbackHandler(cb, cur_file_size).call
+            if cb:
+                cb = ByteTranslatingCallbackHandler(cb, cur_file_size).call
             self.download_start_point = cur_file_size
         else:
             if key.bucket.connection.debug >= 1:
@@ -212,6 +255,14 @@ class ResumableDownloadHandler(object):
                      override_num_retries=0)
         fp.flush()
 
+    def _completed_prefix(self):
+        prefix = 0
+        for start, end in sorted(self.completed_ranges):
+            if start > prefix:
+                break
+            prefix = max(prefix, end + 1)
+        return prefix
+
     def get_file(self, key, fp, headers, cb=None, num_cb=10, torrent=False,
                  version_id=None):
         """
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+"""
+Resumable multipart uploads to S3.
+
+A :class:`ResumableMultipartUploadHandler` given to
+:meth:`boto.s3.concurrent.MultipartUploader.upload` or
+:meth:`boto.s3.key.Key.set_contents_from_filename` keeps the state of a
+multipart upload in a tracker file: the upload ID and part size on the
+first two lines, then one "part-number etag" line for each part as it
+completes.  If the upload fails, or the process dies, the multipart
+upload is left in place, and uploading the same file with the same
+tracker file later resumes it.
+
+On resume the parts S3 lists for the upload are authoritative.  A part
+is only skipped if S3 has it and the MD5 of the same part of the local
+file matches its ETag; every other part is uploaded again.
+"""
+import errno
+import logging
+import os
+import re
+
+from boto.exception import ResumableTransferDisposition
+from boto.exception import ResumableUploadException
+
+log = logging.getLogger('boto.s3.resumable_upload_handler')
+
+
+class ResumableMultipartUploadHandler(object):
+    """
+    Handler for resumable multipart uploads.
+    """
+
+    UPLOAD_ID_REGEX = '([^\s]+)\n'
+
+    PART_SIZE_REGEX = '([0-9]+)\n'
+
+    PART_REGEX = '([0-9]+) ("?[a-f0-9]{32}"?)\n'
+
+    def __init__(self, tracker_file_name=None, num_retries=None):
+        """
+        Constructor. Instantiate once for each uploaded file.
+
+        :type tracker_file_name: string
+        :param tracker_file_name: optional file name to save tracking info
+            about this upload.  If supplied and the current process fails
+            the upload, it can be resumed in a new process.  Without it,
+            an upload can only be resumed by uploading again with the
+            same handler.
+
+        :type num_retries: int
+        :param num_retries: the number of times a failed part is retried
+            within the current process.
+        """
+        self.tracker_file_name = tracker_file_name
+        self.num_retries = num_retries
+        self.upload_id = None
+        self.part_size = None
+        # The ETags of the parts completed, by part number.
+        self.completed_parts = {}
+        if tracker_file_name:
+            self._load_tracker_file()
+
+    def _load_tracker_file(self):
+        try:
+            f = open(self.tracker_file_name, 'r')
+        except IOError, e:
+            # Ignore non-existent file (happens first time an upload is
+            # attempted), but warn user for other errors.
+            if e.errno != errno.ENOENT:
+                log.warning('Couldn\'t read tracker file (%s): %s. '
+                            'Restarting upload from scratch.',
+                            self.tracker_file_name, e.strerror)
+            return
+        try:
+            id_match = re.match(self.UPLOAD_ID_REGEX, f.readline())
+            size_match = re.match(self.PART_SIZE_REGEX, f.readline())
+            if not (id_match and size_match):
+                log.warning('Couldn\'t read upload ID in tracker file (%s). '
+                            'Restarting upload from scratch.',
+                            self.tracker_file_name)
+                return
+            self.upload_id = id_match.group(1)
+            self.part_size = int(size_match.group(1))
+            for line in f:
+                m = re.match(self.PART_REGEX, line)
+                if m:
+                    self.completed_parts[int(m.group(1))] = m.group(2)
+        finally:
+            f.close()
+
+    def _write_tracker_file(self, mode, data):
+        if not self.tracker_file_name:
+            return
+        f = None
+        try:
+            f = open(self.tracker_file_name, mode)
+            f.write(data)
+        except IOError, e:
+            raise ResumableUploadException(
+                'Couldn\'t write tracker file (%s): %s.' %
+                (self.tracker_file_name, e.strerror),
+                ResumableTransferDisposition.ABORT)
+        finally:
+            if f:
+                f.close()
+
+    def _save_tracker_info(self, upload_id, part_size):
+        self.upload_id = upload_id
+        self.part_size = part_size
+        self.completed_parts = {}
+        self._write_tracker_file('w', '%s\n%d\n' % (upload_id, part_size))
+
+    def _save_completed_part(self, part_number, etag):
+        self.completed_parts[part_number] = etag
+        self._write_tracker_file('a', '%d %s\n' % (part_number, etag))
+
+    def _remove_tracker_file(self):
+        self.upload_id = self.part_size = None
+        self.completed_parts = {}
+        if (self.tracker_file_name and
+                os.path.exists(self.tracker_file_name)):
+            os.unlink(self.tracker_file_name)
@@ -0,0 +1,466 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+"""
+Synchronization of a local directory tree with the keys under a prefix
+of a bucket.
+
+:class:`Sync` walks the tree and streams a compact listing of the
+bucket, and joins the two, both sorted by key name, in one pass.  Files
+and keys that differ in size, or exist on one side only, are
+transferred by a pool of threads; those of the same size are compared
+by MD5 in the threads, using the ETag of the key, so unchanged files
+are never transferred::
+
+    sync = Sync(bucket, manifest=SyncManifest('/var/tmp/photos.sync'))
+    sync.upload('/home/me/photos', 'photos/', delete=True)
+
+A :class:`SyncManifest` remembers the size, modification time and ETag
+of every file once it is in sync, so that the next run skips the files
+and keys that have not changed since without reading them.  The MD5s of
+files are taken from the checksum cache, if there is one (see
+:mod:`boto.s3.checksumcache`).
+"""
+from __future__ import with_statement
+import calendar
+import errno
+import logging
+import math
+import os
+import stat
+import threading
+
+from boto.s3.checksumcache import file_key, get_checksum_cache, hash_file
+from boto.s3.concurrent import TransferThread, _ConcurrentTransfer
+from boto.utils import get_utf8_value, parse_ts
+
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import md5
+
+log = logging.getLogger('boto.s3.sync')
+
+TRANSFERRED = 'transferred'
+UNCHANGED = 'unchanged'
+
+
+class LocalFile(object):
+    """A file of a directory tree, named by the key it syncs with."""
+
+    __slots__ = ('name', 'path', 'size', 'mtime_ns')
+
+    def __init__(self, name, path, size, mtime_ns):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def __repr__(self):
+        return '<LocalFile: %s>' % self.path
+
+
+def walk_directory(root, prefix=''):
+    """
+    Returns a :class:`LocalFile` for each regular file under ``root``,
+    sorted by name.  The name of a file is ``prefix`` followed by its
+    path relative to ``root``, with ``/`` as the separator, encoded as
+    UTF-8.
+    """
+    files = []
+    prefix = get_utf8_value(prefix)
+    for dirpath, dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                st = os.stat(path)
+            except OSError:
+                # Removed while the tree was walked.
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            relpath = os.path.relpath(path, root).replace(os.sep, '/')
+            files.append(LocalFile(prefix + get_utf8_value(relpath), path,
+                                   st.st_size,
+                                   int(round(st.st_mtime * 10 ** 9))))
+    files.sort(key=lambda f: f.name)
+    return files
+
+
+def merge_listings(local, remote):
+    """
+    Joins ``local``, an iterable of :class:`LocalFile` objects, and
+    ``remote``, an iterable of keys, both sorted by name, and yields a
+    (local, remote) pair for each name, with None for the side that
+    does not have it.
+    """
+    local = iter(local)
+    remote = iter(remote)
+    l = next(local, None)
+    r = next(remote, None)
+    while l is not None or r is not None:
+        if r is not None:
+            remote_name = get_utf8_value(r.name)
+        if r is None or (l is not None and l.name < remote_name):
+            yield l, None
+            l = next(local, None)
+        elif l is None or l.name > remote_name:
+            yield None, r
+            r = next(remote, None)
+        else:
+            yield l, r
+            l = next(local, None)
+            r = next(remote, None)
+
+
+class SyncManifest(object):
+    """
+    The size, modification time and ETag of each file as it was when it
+    was last in sync with its key, stored in a sqlite database.  A file
+    whose size and modification time, and whose key's ETag, are still
+    those of its entry is in sync.
+    """
+
+    def __init__(self, filename):
+        """
+        :type filename: string
+        :param filename: The name of the database file, which is created
+            if it does not exist.
+        """
+        # sqlite3 is only needed by the few programs that sync.
+        import sqlite3
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filename, timeout=30,
+                                   check_same_thread=False)
+        with self._lock:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS files (name BLOB PRIMARY KEY, '
+                'size INTEGER, mtime_ns INTEGER, etag TEXT)')
+            self._db.commit()
+
+    def get(self, name):
+        """
+        Returns the (size, mtime in nanoseconds, ETag) of the entry of
+        the key ``name``, or None if it has none.
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT size, mtime_ns, etag FROM files WHERE name = ?',
+                (buffer(get_utf8_value(name)),)).fetchone()
+        return row and tuple(row)
+
+    def set(self, name, size, mtime_ns, etag):
+        """Stores the entry of the key ``name``."""
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO files VALUES '
+                             '(?, ?, ?, ?)',
+                             (buffer(get_utf8_value(name)), size, mtime_ns,
+                              etag))
+
+    def remove(self, name):
+        """Removes the entry of the key ``name``, if there is one."""
+        with self._lock:
+            self._db.execute('DELETE FROM files WHERE name = ?',
+                             (buffer(get_utf8_value(name)),))
+
+    def commit(self):
+        """Writes the entries stored since the last commit."""
+        with self._lock:
+            self._db.commit()
+
+
+class SyncResult(object):
+    """
+    The result of :meth:`Sync.upload` or :meth:`Sync.download`.
+
+    :ivar transferred: The number of files or keys transferred.
+
+    :ivar unchanged: The number of files that were already in sync.
+
+    :ivar deleted: The number of extraneous keys or files deleted.
+
+    :ivar errors: A list of (name, exception) pairs for the keys that
+        could not be synced.
+    """
+
+    def __init__(self):
+        self.transferred = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.errors = []
+
+    def __repr__(self):
+        return ('<SyncResult: %d transferred, %d unchanged, %d deleted, '
+                '%d errors>' % (self.transferred, self.unchanged,
+                                self.deleted, len(self.errors)))
+
+
+class Sync(_ConcurrentTransfer):
+    """
+    Synchronizes directory trees with prefixes of a bucket, in either
+    direction, transferring a file or key at a time in each of a pool
+    of threads.  Large files are transferred as multipart uploads and
+    ranged downloads, as by :meth:`boto.s3.key.Key.set_contents_from_filename`
+    and :meth:`boto.s3.key.Key.get_contents_to_filename`.
+
+    An error transferring a file is recorded in the result and the sync
+    goes on with the others.
+    """
+
+    def __init__(self, bucket, num_threads=None, manifest=None,
+                 checksum_cache=None):
+        """
+        :type bucket: :class:`boto.s3.bucket.Bucket`
+        :param bucket: The bucket to sync with.
+
+        :type num_threads: int
+        :param num_threads: The number of files transferred at a time.
+            Defaults to the ``multipart_threads`` option of the ``s3``
+            config section, or 10.
+
+        :type manifest: :class:`SyncManifest`
+        :param manifest: The manifest of the previous syncs of the same
+            tree and prefix, which is updated by this one.
+
+        :type checksum_cache: :class:`boto.s3.checksumcache.ChecksumCache`
+        :param checksum_cache: The cache of the MD5s of files.  Defaults
+            to the one named by the ``checksum_cache`` option of the
+            ``s3`` config section, if any.
+        """
+        super(Sync, self).__init__(bucket, None, num_threads)
+        self.manifest = manifest
+        self.checksum_cache = checksum_cache or get_checksum_cache()
+
+    def upload(self, root, prefix='', delete=False, headers=None):
+        """
+        Uploads the files under ``root`` that are missing from, or
+        differ from, the keys under ``prefix``.
+
+        :type delete: bool
+        :param delete: If True, keys under ``prefix`` that have no file
+            are deleted.
+
+        :type headers: dict
+        :param headers: Additional headers to send with the uploads.
+
+        :rtype: :class:`SyncResult`
+        """
+        return self._sync(root, prefix, delete, headers, True)
+
+    def download(self, root, prefix='', delete=False, headers=None):
+        """
+        Downloads the keys under ``prefix`` that are missing from, or
+        differ from, the files under ``root``.  Each key is downloaded
+        to a temporary file that replaces its file once it is complete.
+
+        :type delete: bool
+        :param delete: If True, files under ``root`` that have no key
+            are deleted.
+
+        :type headers: dict
+        :param headers: Additional headers to send with the downloads.
+
+        :rtype: :class:`SyncResult`
+        """
+        return self._sync(root, prefix, delete, headers, False)
+
+    def _sync(self, root, prefix, delete, headers, upload):
+        result = SyncResult()
+        extraneous = []
+
+        def candidates():
+            pairs = merge_listings(walk_directory(root, prefix),
+                                   self._list(prefix, headers))
+            for local, remote in pairs:
+                source, target = local, remote
+                if not upload:
+                    source, target = remote, local
+                if source is None:
+                    if delete:
+                        extraneous.append(target)
+                    continue
+                if target is not None and self._in_manifest(local, remote):
+                    result.unchanged += 1
+                    continue
+                yield local, remote
+
+        def add_result(number, file_result):
+            name, status = file_result
+            if status is TRANSFERRED:
+                result.transferred += 1
+            elif status is UNCHANGED:
+                result.unchanged += 1
+            else:
+                log.debug('Could not sync %s: %s', name, status)
+                result.errors.append((name, status))
+        try:
+            self._pipeline(candidates(), add_result, SyncWorkerThread, self,
+                           root, prefix, headers, upload)
+            if extraneous:
+                self._delete(extraneous, upload, headers, result)
+        finally:
+            if self.manifest is not None:
+                self.manifest.commit()
+        return result
+
+    def _list(self, prefix, headers):
+        for key in self.bucket.list(prefix, headers=headers, compact=True):
+            # Skips the keys that stand in for directories.
+            if not key.name.endswith('/'):
+                yield key
+
+    def _in_manifest(self, local, remote):
+        if self.manifest is None or local.size != remote.size:
+            return False
+        return self.manifest.get(local.name) == (local.size, local.mtime_ns,
+                                                 remote.etag)
+
+    def _record(self, name, path, etag):
+        if self.manifest is not None:
+            inode, size, mtime_ns = file_key(path)
+            self.manifest.set(name, size, mtime_ns, etag)
+
+    def _delete(self, extraneous, upload, headers, result):
+        if upload:
+            deleted = self.bucket.bulk_delete(
+                [key.name for key in extraneous], headers=headers,
+                num_threads=self.num_threads)
+            result.deleted += deleted.deleted_count
+            result.errors.extend((error.key, error) for error in
+                                 deleted.errors)
+            failed = set(get_utf8_value(error.key) for error in deleted.errors)
+            names = [key.name for key in extraneous
+                     if get_utf8_value(key.name) not in failed]
+        else:
+            names = []
+            for local in extraneous:
+                try:
+                    os.remove(local.path)
+                except OSError, e:
+                    if e.errno != errno.ENOENT:
+                        result.errors.append((local.name, e))
+                        continue
+                result.deleted += 1
+                names.append(local.name)
+        if self.manifest is not None:
+            for name in names:
+                self.manifest.remove(name)
+
+    def _sync_file(self, root, prefix, headers, upload, local, remote):
+        # Transfers one file or key, unless it is already in sync.
+        if (local is not None and remote is not None and
+                local.size == remote.size and
+                self._same_contents(local, remote, upload)):
+            self._record(local.name, local.path, remote.etag)
+            return UNCHANGED
+        if upload:
+            key = self.bucket.new_key(local.name)
+            key.set_contents_from_filename(local.path, headers=headers)
+            self._record(local.name, local.path, key.etag)
+            return TRANSFERRED
+        if local is not None:
+            path = local.path
+        else:
+            path = self._local_path(root, prefix, remote.name)
+        dirname = os.path.dirname(path)
+        if not os.path.isdir(dirname):
+            try:
+                os.makedirs(dirname)
+            except OSError, e:
+                if e.errno != errno.EEXIST:
+                    raise
+        temp = '%s.%d.part' % (path, threading.current_thread().ident)
+        try:
+            remote.to_key().get_contents_to_filename(temp, headers)
+            if os.name == 'nt' and os.path.exists(path):
+                os.remove(path)
+            os.rename(temp, path)
+        except:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        self._record(remote.name, path, remote.etag)
+        return TRANSFERRED
+
+    def _local_path(self, root, prefix, name):
+        relpath = get_utf8_value(name)[len(get_utf8_value(prefix)):]
+        parts = relpath.split('/')
+        if [part for part in parts if part in ('', '.', '..')]:
+            raise ValueError('The key %r has no safe local path' % name)
+        return os.path.join(root, *parts)
+
+    def _same_contents(self, local, remote, upload):
+        etag = remote.etag.strip('"')
+        if '-' not in etag:
+            return self._md5s(local.path)[0] == etag
+        # The ETag of a multipart upload is the MD5 of the MD5s of its
+        # parts, which can be computed if the parts were the size this
+        # library would use.
+        num_parts = etag.rsplit('-', 1)[1]
+        part_size = self._calculate_part_size(local.size)
+        if int(math.ceil(local.size / float(part_size))) == int(num_parts):
+            part_md5s = self._md5s(local.path, part_size)[1]
+            digests = ''.join(hex_md5.decode('hex') for hex_md5 in part_md5s)
+            return '%s-%s' % (md5(digests).hexdigest(), num_parts) == etag
+        # Otherwise the destination is taken to be in sync unless it is
+        # older than the source.
+        remote_ns = calendar.timegm(
+            parse_ts(remote.last_modified).timetuple()) * 10 ** 9
+        if upload:
+            return local.mtime_ns <= remote_ns
+        return remote_ns <= local.mtime_ns
+
+    def _md5s(self, path, part_size=None):
+        # Returns the hex MD5 of the file and the hex MD5s of its parts
+        # of part_size bytes.
+        cache = self.checksum_cache
+        if cache is not None:
+            whole = cache.get_md5(path)
+            parts = part_size and cache.get_part_md5s(path, part_size)
+            if whole is not None and (not part_size or parts is not None):
+                return whole[0], parts and [p[0] for p in parts]
+        part_sizes = part_size and [part_size] or []
+        key, hex_md5, parts = hash_file(path, part_sizes)
+        if cache is not None and key is not None:
+            cache.set_md5(path, hex_md5, key)
+            if part_size:
+                cache.set_part_md5s(path, part_size, parts[part_size], key)
+        return hex_md5, part_size and parts[part_size]
+
+
+class SyncWorkerThread(TransferThread):
+    def __init__(self, worker_queue, result_queue, sync, root, prefix,
+                 headers, upload):
+        super(SyncWorkerThread, self).__init__(worker_queue, result_queue)
+        self._sync = sync
+        self._args = (root, prefix, headers, upload)
+
+    def _process_chunk(self, work):
+        # Returns the name and the status of the file, or the exception
+        # that its transfer failed with.
+        number, (local, remote) = work
+        name = (local or remote).name
+        try:
+            return name, self._sync._sync_file(*(self._args + (local, remote)))
+        except Exception, e:
+            return name, e
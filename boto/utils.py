@@ -41,24 +41,13 @@ Some handy utility functions used by several classes.
 
 import socket
 import urllib
-import urllib2
-import imp
-import subprocess
 import StringIO
 import time
 import logging.handlers
 import boto
 import boto.provider
-import tempfile
-import smtplib
 import datetime
 import re
-import email.mime.multipart
-import email.mime.base
-import email.mime.text
-import email.utils
-import email.encoders
-import gzip
 import base64
 try:
     from hashlib import md5
@@ -199,6 +188,7 @@ def retry_url(url, retry_on_404=True, num_retries=10):
     (for security reasons), we create a ProxyHandler with a NULL
     dictionary to override any proxy settings in the environment.
     """
+    import urllib2
     for i in range(0, num_retries):
         try:
             proxy_handler = urllib2.ProxyHandler({})
@@ -321,6 +311,7 @@ def get_instance_metadata(version='latest', url='http://169.254.169.254',
     will time out after the specified number of seconds.
 
     """
+    import urllib2
     if timeout is not None:
         original = socket.getdefaulttimeout()
         socket.setdefaulttimeout(timeout)
@@ -339,6 +330,7 @@ def get_instance_identity(version='latest', url='http://169.254.169.254',
     """
     Returns the instance identity as a nested Python dictionary.
     """
+    import urllib2
     iid = {}
     base_url = 'http://169.254.169.254/latest/dynamic/instance-identity'
     if timeout is not None:
@@ -415,6 +407,7 @@ def update_dme(username, password, dme_id, ip_address):
     """
     Update your Dynamic DNS record with DNSMadeEasy.com
     """
+    import urllib2
     dme_url = 'https://www.dnsmadeeasy.com/servlet/updateip'
     dme_url += '?username=%s&password=%s&id=%s&ip=%s'
     s = urllib2.urlopen(dme_url % (username, password, dme_id, ip_address))
@@ -428,6 +421,8 @@ def fetch_file(uri, file=None, username=None, password=None):
     retrieved is returned.
     The URI can be either an HTTP url, or "s3://bucket_name/key_name"
     """
+    import tempfile
+    import urllib2
     boto.log.info('Fetching %s' % uri)
     if file == None:
         file = tempfile.NamedTemporaryFile()
@@ -467,6 +462,7 @@ class ShellCommand(object):
         self.run(cwd=cwd)
 
     def run(self, cwd=None):
+        import subprocess
         boto.log.info('running:%s' % self.command)
         self.process = subprocess.Popen(self.command, shell=True,
                                         stdin=subprocess.PIPE,
@@ -536,6 +532,8 @@ class AuthSMTPHandler(logging.handlers.SMTPHandler):
         It would be really nice if I could add authorization to this class
         without having to resort to cut and paste inheritance but, no.
         """
+        import email.utils
+        import smtplib
         try:
             port = self.mailport
             if not port:
@@ -637,6 +635,28 @@ class LRUCache(dict):
             self._update_item(item)
             self._manage_size()
 
+    def get(self, key, default=None):
+        """
+        Returns the value of ``key``, which becomes the most recently
+        used, or ``default`` if it is not in the cache.
+        """
+        item = self._dict.get(key)
+        if item is None:
+            return default
+        self._update_item(item)
+        return item.value
+
+    def __delitem__(self, key):
+        item = self._dict.pop(key)
+        if item.previous is not None:
+            item.previous.next = item.next
+        else:
+            self.head = item.next
+        if item.next is not None:
+            item.next.previous = item.previous
+        else:
+            self.tail = item.previous
+
     def __repr__(self):
         return repr(self._dict)
 
@@ -711,6 +731,12 @@ class Password(object):
 
 def notify(subject, body=None, html_body=None, to_string=None,
            attachments=None, append_instance_id=True):
+    import email.encoders
+    import email.mime.base
+    import email.mime.multipart
+    import email.mime.text
+    import email.utils
+    import smtplib
     attachments = attachments or []
     if append_instance_id:
         subject = "[%s] %s" % (boto.config.get_value("Instance", "instance-id"), subject)
@@ -815,6 +841,11 @@ def write_mime_multipart(content, compress=False, deftype='text/plain', delimite
     :return: Final mime multipart
     :rtype: str:
     """
+    import email.encoders
+    import email.mime.base
+    import email.mime.multipart
+    import email.mime.text
+    import gzip
     wrapper = email.mime.multipart.MIMEMultipart()
     for name, con in content:
         definite_type = guess_mime_type(con, deftype)
@@ -0,0 +1,125 @@
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+"""
+Import-time benchmark.
+
+Imports a few common entry points in fresh interpreters and reports the
+median wall time and number of modules loaded.  With ``--report`` it
+also prints a per-module breakdown in the format of Python 3's
+``-X importtime``, for the first statement.  Run with::
+
+    python -m tests.benchmarks.importtime [iterations] [--report]
+"""
+import os
+import subprocess
+import sys
+
+STATEMENTS = (
+    'import boto',
+    'import boto.connection',
+    'import boto.ec2.connection',
+    'import boto.s3.connection',
+)
+
+# Executed in the child interpreter.  Wraps __import__ to time every
+# import that loads new modules, and prints one line per import to
+# stderr, innermost first, like -X importtime.
+CHILD = r'''
+import sys, time, __builtin__
+_import = __builtin__.__import__
+_stack = []
+_lines = []
+
+def _timed_import(name, *args, **kwargs):
+    loaded = len(sys.modules)
+    _stack.append(0.0)
+    start = time.time()
+    try:
+        return _import(name, *args, **kwargs)
+    finally:
+        elapsed = time.time() - start
+        children = _stack.pop()
+        if _stack:
+            _stack[-1] += elapsed
+        if len(sys.modules) != loaded:
+            _lines.append('import time: %9d | %10d | %s%s' % (
+                (elapsed - children) * 1e6, elapsed * 1e6,
+                '  ' * len(_stack), name))
+
+if REPORT:
+    __builtin__.__import__ = _timed_import
+start = time.time()
+exec STATEMENT
+elapsed = time.time() - start
+__builtin__.__import__ = _import
+sys.stdout.write('%f %d\n' % (elapsed, len([m for m in sys.modules.values()
+                                             if m is not None])))
+if REPORT:
+    sys.stderr.write('import time: self [us] | cumulative | imported package\n')
+    sys.stderr.write('\n'.join(_lines) + '\n')
+'''
+
+
+def run_child(statement, report=False):
+    source = 'STATEMENT = %r\nREPORT = %r\n%s' % (statement, report, CHILD)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    # Installed packages have their .pyc files; compiling every module
+    # on each run would swamp what is being measured.
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    process = subprocess.Popen([sys.executable, '-S', '-c', source],
+                               cwd=root, env=env, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    stdout, stderr = process.communicate()
+    if process.returncode:
+        raise RuntimeError(stderr)
+    elapsed, modules = stdout.split()
+    return float(elapsed), int(modules), stderr
+
+
+def main(iterations=10, report=False):
+    results = {}
+    for statement in STATEMENTS:
+        # Writes the .pyc files.
+        run_child(statement)
+        times = []
+        for _ in range(iterations):
+            elapsed, modules, _ = run_child(statement)
+            times.append(elapsed)
+        times.sort()
+        median = times[len(times) // 2]
+        print '%-30s %8.1f ms  %4d modules' % (statement, median * 1000,
+                                                modules)
+        results[statement] = {'median_ms': median * 1000,
+                              'modules': modules}
+    if report:
+        sys.stdout.write(run_child(STATEMENTS[0], report=True)[2])
+    return results
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if arg != '--report']
+    if args:
+        main(int(args[0]), '--report' in sys.argv)
+    else:
+        main(report='--report' in sys.argv)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+"""
+JSON parse throughput of DynamoDB responses.
+
+Decodes a 1000 item Query response the way Layer1 does (plain
+json.loads) and the way Layer2 does (with the Dynamizer's object
+hook).  Run with::
+
+    python -m tests.benchmarks.jsonparse [iterations]
+"""
+import sys
+import timeit
+
+from boto.compat import json
+from boto.dynamodb.types import Dynamizer, LossyFloatDynamizer
+from tests.unit.fakeaws import query_items
+
+QUERY_RESPONSE = json.dumps(query_items(1000))
+
+
+def main(iterations=20):
+    results = {}
+    for name, object_hook in (('json.loads', None),
+                              ('Dynamizer', Dynamizer().decode),
+                              ('LossyFloatDynamizer',
+                               LossyFloatDynamizer().decode)):
+        elapsed = min(timeit.repeat(
+            lambda: json.loads(QUERY_RESPONSE, object_hook=object_hook),
+            number=iterations, repeat=3)) / iterations
+        mb_per_second = len(QUERY_RESPONSE) / elapsed / 2 ** 20
+        print '%-20s %7.2f ms  %6.1f MB/s  %8.0f items/s' % (
+            name, elapsed * 1000, mb_per_second, 1000 / elapsed)
+        results[name] = {'ms': elapsed * 1000, 'mb_per_second': mb_per_second}
+    return results
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+"""
+Runs the benchmarks and writes their results as JSON.
+
+::
+
+    python -m tests.benchmarks.run [--quick] [-o results.json]
+        [-c baseline.json] [benchmark ...]
+
+Every benchmark module has a ``main(iterations)`` that prints its
+results and returns them as a dict; this script runs them in turn (all
+of them unless some are named) and writes::
+
+    {"commit": ..., "python": ..., "platform": ..., "time": ...,
+     "results": {"signing": {...}, "throughput": {...}, ...}}
+
+``--quick`` runs fewer iterations, for a smoke test.  ``--compare``
+prints the change of every number relative to an earlier results file,
+so that runs on two commits can be compared.
+"""
+from __future__ import with_statement
+import json
+import optparse
+import os
+import platform
+import subprocess
+import sys
+import time
+
+#: (name, full iterations, quick iterations).  Each name is a module in
+#: this package.
+BENCHMARKS = (
+    ('signing', 5000, 500),
+    ('sigv4', 20000, 2000),
+    ('querysig', 20000, 2000),
+    ('xmlparse', 20, 3),
+    ('jsonparse', 20, 3),
+    ('throughput', 2000, 200),
+    ('transfer', 3, 1),
+    ('importtime', 10, 3),
+)
+
+
+def git_commit():
+    root = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    try:
+        process = subprocess.Popen(['git', 'rev-parse', 'HEAD'], cwd=root,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+    except OSError:
+        return None
+    commit = process.communicate()[0].strip()
+    return commit or None
+
+
+def run(names=None, quick=False):
+    results = {}
+    for name, iterations, quick_iterations in BENCHMARKS:
+        if names and name not in names:
+            continue
+        print '== %s' % name
+        module = __import__('tests.benchmarks.' + name, fromlist=['main'])
+        results[name] = module.main(quick and quick_iterations or iterations)
+        print
+    return {'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'results': results}
+
+
+def flatten(results, prefix=''):
+    flat = {}
+    for name, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, prefix + name + ' / '))
+        elif isinstance(value, (int, long, float)):
+            flat[prefix + name] = value
+    return flat
+
+
+def compare(baseline, report):
+    old = flatten(baseline['results'])
+    new = flatten(report['results'])
+    print '== compared with %s' % (baseline.get('commit') or 'baseline')
+    for name in sorted(new):
+        if name in old and old[name]:
+            print '%-60s %12.3f %12.3f %+7.1f%%' % (
+                name, old[name], new[name],
+                (new[name] - old[name]) / float(old[name]) * 100)
+
+
+def main(argv=None):
+    parser = optparse.OptionParser(
+        usage='%prog [options] [benchmark ...]',
+        description='Benchmarks: %s' % ', '.join(b[0] for b in BENCHMARKS))
+    parser.add_option('-q', '--quick', action='store_true', default=False,
+                      help='run fewer iterations')
+    parser.add_option('-o', '--output', help='write the results to OUTPUT')
+    parser.add_option('-c', '--compare', metavar='BASELINE',
+                      help='compare the results with an earlier run')
+    options, names = parser.parse_args(argv)
+    known = [b[0] for b in BENCHMARKS]
+    for name in names:
+        if name not in known:
+            parser.error('unknown benchmark %r' % name)
+    report = run(names, options.quick)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if options.compare:
+        with open(options.compare) as f:
+            compare(json.load(f), report)
+    return report
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+"""
+Signing throughput of every request signer.
+
+Signs a representative request with each auth handler and reports the
+time per request.  Each iteration signs a new HTTPRequest, as boto
+does, so the numbers include building the request.  Run with::
+
+    python -m tests.benchmarks.signing [iterations]
+"""
+import sys
+import timeit
+
+from boto.auth import (HmacAuthV1Handler, HmacAuthV2Handler,
+                       HmacAuthV3Handler, HmacAuthV3HTTPHandler,
+                       HmacAuthV4Handler, QuerySignatureV2AuthHandler)
+from boto.connection import HTTPRequest
+from boto.provider import Provider
+from tests.benchmarks.querysig import make_params
+from tests.benchmarks.sigv4 import BODY
+
+
+def s3_request():
+    return HTTPRequest('PUT', 'https', 's3.amazonaws.com', 443,
+                       '/bucket/photos/2013/01/image.jpg',
+                       '/bucket/photos/2013/01/image.jpg', {},
+                       {'Content-Type': 'image/jpeg',
+                        'Content-MD5': 'bf1d737a4d46a19f3bced6905cc8b902',
+                        'x-amz-meta-owner': 'someone'}, '')
+
+
+def cloudfront_request():
+    return HTTPRequest('GET', 'https', 'cloudfront.amazonaws.com', 443,
+                       '/2010-11-01/distribution',
+                       '/2010-11-01/distribution', {}, {}, '')
+
+
+def route53_request():
+    return HTTPRequest('GET', 'https', 'route53.amazonaws.com', 443,
+                       '/2012-02-29/hostedzone', '/2012-02-29/hostedzone',
+                       {}, {}, '')
+
+
+def json_request(host, target):
+    return HTTPRequest('POST', 'https', host, 443, '/', '/', {},
+                       {'X-Amz-Target': target, 'Host': host,
+                        'Content-Type': 'application/x-amz-json-1.0',
+                        'Content-Length': str(len(BODY))}, BODY)
+
+
+def query_request():
+    return HTTPRequest('POST', 'https', 'ec2.us-east-1.amazonaws.com', 443,
+                       '/', '/', make_params(), {}, '')
+
+#: (name, handler class, host, request factory)
+SIGNERS = (
+    ('s3 (hmac-v1)', HmacAuthV1Handler, 's3.amazonaws.com', s3_request),
+    ('cloudfront (hmac-v2)', HmacAuthV2Handler, 'cloudfront.amazonaws.com',
+     cloudfront_request),
+    ('route53 (hmac-v3)', HmacAuthV3Handler, 'route53.amazonaws.com',
+     route53_request),
+    ('dynamodb (hmac-v3-http)', HmacAuthV3HTTPHandler,
+     'dynamodb.us-east-1.amazonaws.com',
+     lambda: json_request('dynamodb.us-east-1.amazonaws.com',
+                          'DynamoDB_20111205.GetItem')),
+    ('dynamodb (hmac-v4)', HmacAuthV4Handler,
+     'dynamodb.us-east-1.amazonaws.com',
+     lambda: json_request('dynamodb.us-east-1.amazonaws.com',
+                          'DynamoDB_20111205.GetItem')),
+    ('ec2 (sign-v2)', QuerySignatureV2AuthHandler,
+     'ec2.us-east-1.amazonaws.com', query_request),
+)
+
+
+def bench(handler_class, host, make_request, iterations):
+    provider = Provider('aws', 'access_key', 'secret_key')
+    handler = handler_class(host, None, provider)
+
+    def sign():
+        handler.add_auth(make_request())
+    return min(timeit.repeat(sign, number=iterations, repeat=3)) / iterations
+
+
+def main(iterations=5000):
+    results = {}
+    for name, handler_class, host, make_request in SIGNERS:
+        elapsed = bench(handler_class, host, make_request, iterations)
+        print '%-24s %8.1f us/request %9.0f requests/s' % (
+            name, elapsed * 1e6, 1 / elapsed)
+        results[name] = {'us': elapsed * 1e6, 'per_second': 1 / elapsed}
+    return results
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+"""
+Micro-benchmark for HmacAuthV4Handler.add_auth.
+
+Signs a DynamoDB-sized request repeatedly with the signing key cache
+in place, and again with the cache emptied before every request, which
+is equivalent to deriving the key chain each time.  Run with::
+
+    python -m tests.benchmarks.sigv4 [iterations]
+"""
+import sys
+import timeit
+
+from boto.auth import HmacAuthV4Handler
+from boto.connection import HTTPRequest
+from boto.provider import Provider
+
+HOST = 'dynamodb.us-east-1.amazonaws.com'
+BODY = '{"TableName": "mytable", "Key": {"HashKeyElement": {"S": "key"}}}'
+
+
+def make_handler():
+    provider = Provider('aws', 'access_key', 'secret_key')
+    return HmacAuthV4Handler(HOST, None, provider)
+
+
+def make_request():
+    headers = {'X-Amz-Target': 'DynamoDB_20111205.GetItem',
+               'Host': HOST,
+               'Content-Type': 'application/x-amz-json-1.0',
+               'Content-Length': str(len(BODY))}
+    return HTTPRequest('POST', 'https', HOST, 443, '/', '/', {}, headers,
+                       BODY)
+
+
+def bench(iterations, clear_cache):
+    handler = make_handler()
+    request = make_request()
+
+    def sign():
+        if clear_cache:
+            handler._signing_keys.clear()
+        handler.add_auth(request)
+    return min(timeit.repeat(sign, number=iterations, repeat=3))
+
+
+def main(iterations=20000):
+    uncached = bench(iterations, clear_cache=True)
+    cached = bench(iterations, clear_cache=False)
+    print 'add_auth, key derived per request: %8.1f us/request' % (
+        uncached / iterations * 1e6)
+    print 'add_auth, cached signing key:      %8.1f us/request' % (
+        cached / iterations * 1e6)
+    print 'reduction: %.1f%%' % ((1 - cached / uncached) * 100)
+    return {'uncached_us': uncached / iterations * 1e6,
+            'cached_us': cached / iterations * 1e6}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+"""
+Request throughput and latency against the fake AWS endpoint.
+
+Sends requests through ``AWSAuthConnection.make_request`` (and, for the
+query API and DynamoDB, the usual response parsing) one after the other
+on a single pooled connection, and reports requests per second and the
+median and 99th percentile latency.  Run with::
+
+    python -m tests.benchmarks.throughput [requests]
+"""
+import sys
+import time
+
+from tests.unit.fakeaws import FakeAWS
+
+SMALL_OBJECT = 'x' * 1024
+GET_ITEM = '{"TableName": "footest", "Key": {"HashKeyElement": {"N": "1"}}}'
+
+
+def percentile(sorted_values, percent):
+    index = int(round(percent / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def measure(operation, requests):
+    # Opens the connection and warms any caches.
+    for _ in range(min(requests // 10, 50) or 1):
+        operation()
+    latencies = []
+    start = time.time()
+    for _ in range(requests):
+        request_start = time.time()
+        operation()
+        latencies.append(time.time() - request_start)
+    elapsed = time.time() - start
+    latencies.sort()
+    return {'requests_per_second': requests / elapsed,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000}
+
+
+def operations(fake):
+    s3 = fake.s3_connection()
+    s3.create_bucket('bucket').new_key('small').set_contents_from_string(
+        SMALL_OBJECT)
+    ec2 = fake.ec2_connection()
+    sqs = fake.sqs_connection()
+    dynamodb = fake.dynamodb_connection()
+    return (
+        ('s3 GET 1KB',
+         lambda: s3.make_request('GET', 'bucket', 'small').read()),
+        ('s3 PUT 1KB',
+         lambda: s3.make_request('PUT', 'bucket', 'small',
+                                 data=SMALL_OBJECT).read()),
+        ('ec2 make_request',
+         lambda: ec2.make_request('DescribeInstances').read()),
+        ('ec2 get_all_instances', ec2.get_all_instances),
+        ('sqs create_queue', lambda: sqs.create_queue('queue')),
+        ('dynamodb GetItem', lambda: dynamodb.make_request('GetItem',
+                                                           GET_ITEM)),
+    )
+
+
+def main(requests=2000):
+    results = {}
+    with FakeAWS() as fake:
+        for name, operation in operations(fake):
+            result = measure(operation, requests)
+            print '%-22s %8.0f requests/s  p50 %6.3f ms  p99 %6.3f ms' % (
+                name, result['requests_per_second'], result['p50_ms'],
+                result['p99_ms'])
+            results[name] = result
+    return results
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+"""
+S3 upload and download throughput against the fake AWS endpoint.
+
+Uploads a file with ``Key.set_contents_from_file`` and with a
+concurrent multipart upload, and downloads it again with
+``Key.get_contents_to_file`` and with concurrent ranged GETs, for a few
+object sizes, and reports the
+best MB/s of a few runs.  The upload times include computing the MD5s
+of the file or its parts, as boto does before every PUT.
+
+``bandwidth`` limits every connection to that many MB/s, which is where
+concurrent transfers pay off.  Run with::
+
+    python -m tests.benchmarks.transfer [runs] [bandwidth]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from boto.s3.concurrent import ConcurrentDownloader, MultipartUploader
+from tests.unit.fakeaws import FakeAWS
+
+SIZES = (1 * 2 ** 20, 16 * 2 ** 20, 64 * 2 ** 20)
+PART_SIZE = 8 * 2 ** 20
+
+
+def best_rate(fn, size, runs):
+    best = None
+    for _ in range(runs):
+        start = time.time()
+        fn()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return size / best / 2 ** 20
+
+
+def main(runs=3, bandwidth=None):
+    results = {}
+    source = tempfile.NamedTemporaryFile()
+    target = tempfile.NamedTemporaryFile()
+    try:
+        if bandwidth:
+            bandwidth = bandwidth * 2 ** 20
+        with FakeAWS(bandwidth=bandwidth) as fake:
+            bucket = fake.s3_connection().create_bucket('bucket')
+            uploader = MultipartUploader(bucket, part_size=PART_SIZE)
+            downloader = ConcurrentDownloader(bucket, part_size=PART_SIZE)
+            for size in SIZES:
+                source.seek(0)
+                source.truncate()
+                source.write(os.urandom(size))
+                source.flush()
+                key = bucket.new_key('object-%d' % size)
+
+                def upload():
+                    source.seek(0)
+                    key.set_contents_from_file(source)
+
+                def multipart_upload():
+                    uploader.upload(source.name, key.name)
+
+                def download():
+                    target.seek(0)
+                    target.truncate()
+                    key.get_contents_to_file(target)
+
+                def ranged_download():
+                    downloader.download(bucket.get_key(key.name),
+                                        target.name)
+                upload_rate = best_rate(upload, size, runs)
+                multipart_rate = best_rate(multipart_upload, size, runs)
+                download_rate = best_rate(download, size, runs)
+                assert target.tell() == size
+                ranged_rate = best_rate(ranged_download, size, runs)
+                assert os.path.getsize(target.name) == size
+                name = '%dMB' % (size // 2 ** 20)
+                print ('%-5s upload %7.1f MB/s  multipart upload %7.1f MB/s'
+                       '  download %7.1f MB/s  ranged download %7.1f MB/s' %
+                       (name, upload_rate, multipart_rate, download_rate,
+                        ranged_rate))
+                results[name] = {'upload_mb_per_second': upload_rate,
+                                 'multipart_upload_mb_per_second':
+                                 multipart_rate,
+                                 'download_mb_per_second': download_rate,
+                                 'ranged_download_mb_per_second':
+                                 ranged_rate}
+    finally:
+        source.close()
+        target.close()
+    return results
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2:
+        main(int(sys.argv[1]), float(sys.argv[2]))
+    elif len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
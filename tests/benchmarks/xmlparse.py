@@ -0,0 +1,134 @@
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+"""
+Benchmark of the XML parser backends in boto.handler.
+
+Parses a 1000 key ListBucketResult, a DescribeSpotPriceHistory response
+with 1000 prices and a DescribeInstances response with 100 instances
+into boto objects with each backend.  Run with::
+
+    python -m tests.benchmarks.xmlparse [iterations]
+"""
+import sys
+import timeit
+
+import boto.handler
+from boto.ec2.instance import Reservation
+from boto.ec2.spotpricehistory import SpotPriceHistory
+from boto.handler import XmlHandler
+from boto.resultset import ResultSet
+from boto.s3.bucket import Bucket
+from boto.s3.key import Key
+
+KEY = """<Contents><Key>photos/2006/February/sample-%d.jpg</Key>
+<LastModified>2011-02-26T01:56:20.000Z</LastModified>
+<ETag>&quot;bf1d737a4d46a19f3bced6905cc8b902&quot;</ETag><Size>142863</Size>
+<Owner><ID>canonical-user-id</ID><DisplayName>display-name</DisplayName>
+</Owner><StorageClass>STANDARD</StorageClass></Contents>
+"""
+
+LIST_BUCKET = ('<ListBucketResult xmlns="http://s3.amazonaws.com/doc/'
+               '2006-03-01/"><Name>bucket</Name><Prefix/><Marker/>'
+               '<MaxKeys>1000</MaxKeys><IsTruncated>false</IsTruncated>%s'
+               '</ListBucketResult>' % ''.join(KEY % i for i in range(1000)))
+
+PRICE = """<item><instanceType>m1.small</instanceType>
+<productDescription>Linux/UNIX</productDescription><spotPrice>0.0%d</spotPrice>
+<timestamp>2013-01-08T17:00:00.000Z</timestamp>
+<availabilityZone>us-east-1a</availabilityZone></item>
+"""
+
+SPOT_PRICES = ('<DescribeSpotPriceHistoryResponse><requestId>r</requestId>'
+               '<spotPriceHistorySet>%s</spotPriceHistorySet>'
+               '</DescribeSpotPriceHistoryResponse>' %
+               ''.join(PRICE % (i % 10) for i in range(1000)))
+
+INSTANCE = """<item><instanceId>i-%08d</instanceId><imageId>ami-1624987f</imageId>
+<instanceState><code>16</code><name>running</name></instanceState>
+<privateDnsName>ip-10-0-0-25.ec2.internal</privateDnsName><dnsName/>
+<keyName>mykeypair</keyName><amiLaunchIndex>0</amiLaunchIndex>
+<instanceType>m1.small</instanceType>
+<launchTime>2012-12-14T23:48:37.000Z</launchTime>
+<placement><availabilityZone>us-east-1d</availabilityZone>
+<groupName/><tenancy>default</tenancy></placement>
+<monitoring><state>disabled</state></monitoring>
+<subnetId>subnet-0dc60667</subnetId><vpcId>vpc-id</vpcId>
+<privateIpAddress>10.0.0.25</privateIpAddress>
+<groupSet><item><groupId>sg-id</groupId><groupName>WebServerSG</groupName>
+</item></groupSet><architecture>x86_64</architecture>
+<rootDeviceType>ebs</rootDeviceType><rootDeviceName>/dev/sda1</rootDeviceName>
+<blockDeviceMapping><item><deviceName>/dev/sda1</deviceName><ebs>
+<volumeId>vol-id</volumeId><status>attached</status>
+<attachTime>2012-12-14T23:48:43.000Z</attachTime>
+<deleteOnTermination>true</deleteOnTermination></ebs></item>
+</blockDeviceMapping><virtualizationType>paravirtual</virtualizationType>
+<tagSet><item><key>Name</key><value>web-%d</value></item></tagSet>
+<hypervisor>xen</hypervisor></item>
+"""
+
+DESCRIBE_INSTANCES = ('<DescribeInstancesResponse><requestId>r</requestId>'
+                      '<reservationSet><item><reservationId>r-1</reservationId>'
+                      '<ownerId>1</ownerId><groupSet/><instancesSet>%s'
+                      '</instancesSet></item></reservationSet>'
+                      '</DescribeInstancesResponse>' %
+                      ''.join(INSTANCE % (i, i) for i in range(100)))
+
+
+def parse_listing(parser):
+    rs = ResultSet([('Contents', Key)])
+    boto.handler.parse_string(LIST_BUCKET, XmlHandler(rs, Bucket(None, 'b')),
+                              parser)
+
+
+def parse_spot_prices(parser):
+    rs = ResultSet([('item', SpotPriceHistory)])
+    boto.handler.parse_string(SPOT_PRICES, XmlHandler(rs, None), parser)
+
+
+def parse_instances(parser):
+    rs = ResultSet([('item', Reservation)])
+    boto.handler.parse_string(DESCRIBE_INSTANCES, XmlHandler(rs, None), parser)
+
+
+def main(iterations=20):
+    results = {}
+    for name, fn in (('ListBucketResult', parse_listing),
+                     ('DescribeSpotPriceHistory', parse_spot_prices),
+                     ('DescribeInstances', parse_instances)):
+        times = {}
+        for parser in boto.handler.PARSERS:
+            times[parser] = min(timeit.repeat(lambda: fn(parser),
+                                              number=iterations,
+                                              repeat=3)) / iterations
+        print '%-26s sax %7.2f ms  expat %7.2f ms  (%.0f%% faster)' % (
+            name, times['sax'] * 1000, times['expat'] * 1000,
+            (1 - times['expat'] / times['sax']) * 100)
+        results[name] = {'sax_ms': times['sax'] * 1000,
+                         'expat_ms': times['expat'] * 1000}
+    return results
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
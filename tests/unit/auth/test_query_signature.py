@@ -0,0 +1,93 @@
+# Copyright (c) 2012 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+import base64
+import hmac
+import urllib
+from hashlib import sha1, sha256
+
+from mock import Mock
+from tests.unit import unittest
+
+from boto.auth import HmacAuthV1Handler, QuerySignatureV2AuthHandler
+
+
+class TestQuerySignatureV2(unittest.TestCase):
+    def setUp(self):
+        self.provider = Mock()
+        self.provider.access_key = 'access_key'
+        self.provider.secret_key = 'secret_key'
+        self.provider.security_token = None
+        self.auth = QuerySignatureV2AuthHandler('sqs.amazonaws.com',
+                                                Mock(), self.provider)
+
+    def expected(self, secret, params, verb='GET', host='sqs.amazonaws.com',
+                 path='/'):
+        pairs = []
+        for key in sorted(params):
+            pairs.append(urllib.quote(key, safe='') + '=' +
+                         urllib.quote(params[key], safe='-_~'))
+        qs = '&'.join(pairs)
+        string_to_sign = '%s\n%s\n%s\n%s' % (verb, host, path, qs)
+        digest = hmac.new(secret, string_to_sign, sha256).digest()
+        return qs, base64.b64encode(digest)
+
+    def test_signature_matches_reference(self):
+        params = {'Action': 'SendMessage', 'Version': '2012-11-05',
+                  'MessageBody': 'hello world/~*\xe2\x98\x83',
+                  'Attribute.1.Name': 'a b',
+                  'Timestamp': '2013-01-01T00:00:00Z'}
+        qs, signature = self.auth._calc_signature(
+            params, 'GET', '/', 'sqs.amazonaws.com')
+        self.assertEqual((qs, signature),
+                         self.expected('secret_key', params))
+
+    def test_hmac_is_rekeyed_when_credentials_change(self):
+        params = {'Action': 'ListQueues'}
+        self.auth._calc_signature(params, 'GET', '/', 'sqs.amazonaws.com')
+        self.provider.secret_key = 'new_secret_key'
+        qs, signature = self.auth._calc_signature(
+            params, 'GET', '/', 'sqs.amazonaws.com')
+        self.assertEqual(signature,
+                         self.expected('new_secret_key', params)[1])
+
+
+class TestHmacKeys(unittest.TestCase):
+    def setUp(self):
+        self.provider = Mock()
+        self.provider.access_key = 'access_key'
+        self.provider.secret_key = 'secret_key'
+
+    def test_sign_string_uses_sha1_for_v1(self):
+        auth = HmacAuthV1Handler('s3.amazonaws.com', Mock(), self.provider)
+        expected = base64.encodestring(
+            hmac.new('secret_key', 'to sign', sha1).digest()).strip()
+        self.assertEqual(auth.sign_string('to sign'), expected)
+        # Signing again from the same pre-keyed HMAC gives the same result.
+        self.assertEqual(auth.sign_string('to sign'), expected)
+        self.provider.secret_key = 'other'
+        expected = base64.encodestring(
+            hmac.new('other', 'to sign', sha1).digest()).strip()
+        self.assertEqual(auth.sign_string('to sign'), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
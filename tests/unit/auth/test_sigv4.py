@@ -71,3 +71,60 @@ class TestSigV4Handler(unittest.TestCase):
         auth.service_name = 'sqs'
         scope = auth.credential_scope(self.request)
         self.assertEqual(scope, '20121121/us-west-2/sqs/aws4_request')
+
+    def test_scope_is_parsed_from_host(self):
+        auth = HmacAuthV4Handler('glacier.us-west-2.amazonaws.com',
+                                 Mock(), self.provider)
+        self.request.host = 'glacier.us-west-2.amazonaws.com'
+        self.request.headers['X-Amz-Date'] = '20121121T000000Z'
+        scope = auth.credential_scope(self.request)
+        self.assertEqual(scope, '20121121/us-west-2/glacier/aws4_request')
+        # The override still wins over the cached host parse.
+        auth.region_name = 'eu-west-1'
+        scope = auth.credential_scope(self.request)
+        self.assertEqual(scope, '20121121/eu-west-1/glacier/aws4_request')
+
+
+class TestSigV4SigningKeyCache(unittest.TestCase):
+    def setUp(self):
+        self.provider = Mock()
+        self.provider.access_key = 'access_key'
+        self.provider.secret_key = 'secret_key'
+        self.auth = HmacAuthV4Handler('glacier.us-east-1.amazonaws.com',
+                                      Mock(), self.provider)
+
+    def derive(self, secret, date, region, service):
+        k_date = self.auth._sign('AWS4' + secret, date)
+        k_region = self.auth._sign(k_date, region)
+        k_service = self.auth._sign(k_region, service)
+        return self.auth._sign(k_service, 'aws4_request')
+
+    def test_signing_key_matches_derivation(self):
+        key = self.auth.signing_key('20121121', 'us-east-1', 'glacier')
+        self.assertEqual(key, self.derive('secret_key', '20121121',
+                                          'us-east-1', 'glacier'))
+
+    def test_signing_key_is_cached(self):
+        self.auth._sign = Mock(wraps=self.auth._sign)
+        self.auth.signing_key('20121121', 'us-east-1', 'glacier')
+        self.assertEqual(self.auth._sign.call_count, 4)
+        self.auth.signing_key('20121121', 'us-east-1', 'glacier')
+        self.assertEqual(self.auth._sign.call_count, 4)
+
+    def test_date_rollover_drops_old_keys(self):
+        self.auth.signing_key('20121121', 'us-east-1', 'glacier')
+        self.auth.signing_key('20121121', 'us-west-2', 'glacier')
+        self.auth.signing_key('20121122', 'us-east-1', 'glacier')
+        self.assertEqual(self.auth._signing_keys.keys(),
+                         [('secret_key', '20121122', 'us-east-1', 'glacier')])
+
+    def test_new_credentials_get_new_keys(self):
+        self.auth.signing_key('20121121', 'us-east-1', 'glacier')
+        provider = Mock()
+        provider.access_key = 'access_key'
+        provider.secret_key = 'new_secret_key'
+        self.auth.update_provider(provider)
+        self.assertEqual(self.auth._signing_keys, {})
+        key = self.auth.signing_key('20121121', 'us-east-1', 'glacier')
+        self.assertEqual(key, self.derive('new_secret_key', '20121121',
+                                          'us-east-1', 'glacier'))
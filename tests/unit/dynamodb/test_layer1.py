@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+from tests.unit import unittest
+
+from boto.dynamodb.layer1 import Layer1
+from boto.regioninfo import RegionInfo
+
+
+class TestLayer1Requests(unittest.TestCase):
+
+    def test_requests_go_to_the_configured_port(self):
+        region = RegionInfo(name='us-east-1', endpoint='localhost')
+        layer1 = Layer1('access_key', 'secret_key', is_secure=False,
+                        port=8000, region=region)
+        request = layer1._build_request('ListTables', '{}')
+        self.assertEqual(request.host, 'localhost:8000')
+        self.assertEqual(request.headers['Host'], 'localhost')
+
+    def test_default_port_host_is_unchanged(self):
+        layer1 = Layer1('access_key', 'secret_key')
+        request = layer1._build_request('ListTables', '{}')
+        self.assertEqual(request.host, 'dynamodb.us-east-1.amazonaws.com')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,641 @@
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+"""
+An in-process HTTP server that impersonates S3, SQS, EC2 and DynamoDB
+closely enough for boto to talk to it.  The S3 unit tests of transfers
+that span many requests (multipart uploads, ranged downloads, listings,
+sync) run against it, as do the benchmarks in ``tests/benchmarks``.
+
+Requests are told apart the way the services tell them apart: DynamoDB
+requests carry an ``X-Amz-Target`` header, query API requests an
+``Action`` parameter, and everything else is S3, addressed with the
+path-style calling format.  Query API and DynamoDB responses are the
+fixture bodies of the unit tests; S3 keeps its buckets in memory and
+supports object GET (with ranges), PUT, copy, HEAD and DELETE, object
+ACLs, multi-object delete, bucket listings and multipart uploads.
+Signatures are not checked.
+
+::
+
+    with FakeAWS() as fake:
+        conn = fake.s3_connection()
+        bucket = conn.create_bucket('bucket')
+
+``latency`` delays every response by that many seconds, which stands in
+for the round trip to a real endpoint, and ``bandwidth`` limits each
+connection to that many bytes per second, like a long-distance TCP
+connection.  Functions in ``fake.hooks`` are
+called with the request handler before each request is served; one
+that returns True has answered the request itself, which lets tests
+inject failures.
+"""
+import BaseHTTPServer
+import SocketServer
+import binascii
+import bisect
+import cgi
+import hashlib
+import re
+import socket
+import threading
+import time
+import urllib
+import urlparse
+import uuid
+from xml.sax.saxutils import escape
+
+from boto.compat import json
+from boto.dynamodb.layer1 import Layer1
+from boto.ec2.connection import EC2Connection
+from boto.regioninfo import RegionInfo
+from boto.s3.connection import OrdinaryCallingFormat, S3Connection
+from boto.sqs.connection import SQSConnection
+from boto.sqs.regioninfo import SQSRegionInfo
+from tests.unit.dynamodb.test_layer2 import DESCRIBE_TABLE
+from tests.unit.ec2.test_instance import DESCRIBE_INSTANCE_VPC
+from tests.unit.sqs.test_connection import SQSAuthParams
+
+S3_NS = 'http://s3.amazonaws.com/doc/2006-03-01/'
+TIMESTAMP = '2013-01-01T00:00:00.000Z'
+DEFAULT_ACL = ('<AccessControlPolicy><Owner><ID>id</ID><DisplayName>name'
+               '</DisplayName></Owner><AccessControlList><Grant><Grantee '
+               'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+               'xsi:type="CanonicalUser"><ID>id</ID><DisplayName>name'
+               '</DisplayName></Grantee><Permission>FULL_CONTROL</Permission>'
+               '</Grant></AccessControlList></AccessControlPolicy>')
+
+QUERY_RESPONSES = {
+    'DescribeInstances': DESCRIBE_INSTANCE_VPC,
+    'CreateQueue': SQSAuthParams.__dict__['default_body'](None),
+}
+
+GENERIC_QUERY_RESPONSE = '<Response><return>true</return></Response>'
+
+ITEM = {'Item': {'foo': {'N': '1'}, 'bar': {'S': 'value'}},
+        'ConsumedCapacityUnits': 0.5}
+
+
+def query_items(count):
+    items = [{'foo': {'N': str(i)}, 'bar': {'S': 'value %d' % i},
+              'tags': {'SS': ['a', 'b', 'c']}} for i in range(count)]
+    return {'Count': count, 'Items': items, 'ConsumedCapacityUnits': 1.0}
+
+DYNAMODB_RESPONSES = {
+    'DescribeTable': DESCRIBE_TABLE,
+    'GetItem': ITEM,
+    'Query': query_items(100),
+}
+
+
+def quote_etag(data):
+    return '"%s"' % hashlib.md5(data).hexdigest()
+
+
+def error_body(code, message):
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<Error><Code>%s</Code>'
+            '<Message>%s</Message><RequestId>fake</RequestId></Error>' %
+            (code, escape(message)))
+
+
+class S3Object(object):
+
+    def __init__(self, data, etag=None, metadata=None):
+        self.data = data
+        self.etag = etag or quote_etag(data)
+        self.metadata = metadata or {}
+        self.last_modified = TIMESTAMP
+        self.acl = None
+
+
+class FakeAWSHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Write each response in one piece, or Nagle's algorithm and delayed
+    # ACKs add 40ms to every request.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    # A list while responses are being held back; see s3().
+    deferred = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch()
+
+    do_PUT = do_POST = do_DELETE = do_HEAD = do_GET
+
+    def dispatch(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        length = int(self.headers.get('Content-Length') or 0)
+        self.body = self.rfile.read(length) if length else ''
+        self.throttle(len(self.body))
+        parts = urlparse.urlsplit(self.path)
+        self.query = cgi.parse_qs(parts.query, keep_blank_values=True)
+        self.url_path = urllib.unquote(parts.path)
+        for hook in self.server.hooks:
+            if hook(self):
+                return
+        if 'X-Amz-Target' in self.headers:
+            self.dynamodb()
+        elif 'Action' in self.query:
+            self.query_api(self.query)
+        elif (self.command == 'POST' and self.headers.get('Content-Type', '')
+              .startswith('application/x-www-form-urlencoded')):
+            self.query_api(cgi.parse_qs(self.body, keep_blank_values=True))
+        else:
+            self.s3()
+
+    def respond(self, status, body='', headers=None):
+        if self.deferred is not None:
+            self.deferred.append((status, body, headers))
+            return
+        self.send_response(status)
+        headers = headers or {}
+        if 'Content-Length' not in headers:
+            headers['Content-Length'] = str(len(body))
+        headers.setdefault('x-amz-request-id', 'fake')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.throttle(len(body))
+            self.wfile.write(body)
+
+    def throttle(self, size):
+        if self.server.bandwidth and size:
+            time.sleep(size / float(self.server.bandwidth))
+
+    def respond_xml(self, body, status=200):
+        self.respond(status, body, {'Content-Type': 'application/xml'})
+
+    def error(self, status, code, message=''):
+        self.respond_xml(error_body(code, message), status)
+
+    def query_api(self, params):
+        action = params['Action'][0]
+        self.respond_xml(QUERY_RESPONSES.get(action, GENERIC_QUERY_RESPONSE))
+
+    def dynamodb(self):
+        action = self.headers['X-Amz-Target'].rsplit('.', 1)[-1]
+        body = json.dumps(DYNAMODB_RESPONSES.get(action, {}))
+        self.respond(200, body, {
+            'Content-Type': 'application/x-amz-json-1.0',
+            'x-amzn-RequestId': 'fake',
+            'x-amz-crc32': str(binascii.crc32(body) & 0xffffffff)})
+
+    # S3
+
+    def s3(self):
+        path = self.url_path.lstrip('/')
+        bucket_name, _, key_name = path.partition('/')
+        store = self.server.store
+        # Responses are sent once the lock is released, so that the
+        # bandwidth limit does not serialize concurrent requests.
+        self.deferred = []
+        try:
+            with store.lock:
+                self.s3_locked(store, bucket_name, key_name)
+        finally:
+            responses, self.deferred = self.deferred, None
+        for response in responses:
+            self.respond(*response)
+
+    def s3_locked(self, store, bucket_name, key_name):
+        if not bucket_name:
+            return self.list_buckets()
+        bucket = store.buckets.get(bucket_name)
+        if bucket is None:
+            if self.command == 'PUT' and not key_name:
+                store.buckets[bucket_name] = Objects()
+                return self.respond(200)
+            return self.error(404, 'NoSuchBucket', bucket_name)
+        if not key_name:
+            return self.bucket_request(bucket_name, bucket)
+        if 'uploads' in self.query or 'uploadId' in self.query:
+            return self.multipart(bucket_name, bucket, key_name)
+        return self.object_request(bucket, key_name)
+
+    def list_buckets(self):
+        buckets = ''.join('<Bucket><Name>%s</Name><CreationDate>%s'
+                          '</CreationDate></Bucket>' % (escape(name),
+                                                        TIMESTAMP)
+                          for name in sorted(self.server.store.buckets))
+        self.respond_xml('<ListAllMyBucketsResult xmlns="%s"><Owner><ID>id'
+                         '</ID><DisplayName>name</DisplayName></Owner>'
+                         '<Buckets>%s</Buckets></ListAllMyBucketsResult>' %
+                         (S3_NS, buckets))
+
+    def bucket_request(self, bucket_name, bucket):
+        if self.command == 'PUT':
+            self.respond(200)
+        elif self.command == 'DELETE':
+            if bucket:
+                return self.error(409, 'BucketNotEmpty', bucket_name)
+            del self.server.store.buckets[bucket_name]
+            self.respond(204)
+        elif self.command == 'POST' and 'delete' in self.query:
+            self.delete_objects(bucket)
+        elif self.command in ('GET', 'HEAD'):
+            self.list_objects(bucket_name, bucket)
+        else:
+            self.error(501, 'NotImplemented')
+
+    def list_objects(self, bucket_name, bucket):
+        prefix = self.query.get('prefix', [''])[0]
+        marker = self.query.get('marker', [''])[0]
+        delimiter = self.query.get('delimiter', [''])[0]
+        max_keys = int(self.query.get('max-keys', ['1000'])[0])
+        contents = []
+        prefixes = []
+        truncated = False
+        last = None
+        names = bucket.sorted_names()
+        start = max(bisect.bisect_right(names, marker),
+                    bisect.bisect_left(names, prefix))
+        for name in names[start:]:
+            if not name.startswith(prefix):
+                break
+            common = None
+            if delimiter:
+                index = name.find(delimiter, len(prefix))
+                if index != -1:
+                    common = name[:index + len(delimiter)]
+                    if prefixes and prefixes[-1] == common:
+                        continue
+            if len(contents) + len(prefixes) >= max_keys:
+                truncated = True
+                break
+            if common is not None:
+                prefixes.append(common)
+            else:
+                contents.append(name)
+            last = common or name
+        body = ['<ListBucketResult xmlns="%s"><Name>%s</Name><Prefix>%s'
+                '</Prefix><Marker>%s</Marker><MaxKeys>%d</MaxKeys>'
+                '<IsTruncated>%s</IsTruncated>' % (
+                    S3_NS, escape(bucket_name), escape(prefix),
+                    escape(marker), max_keys, str(truncated).lower())]
+        if truncated and delimiter:
+            body.append('<NextMarker>%s</NextMarker>' % escape(last))
+        if delimiter:
+            body.append('<Delimiter>%s</Delimiter>' % escape(delimiter))
+        for name in contents:
+            obj = bucket[name]
+            body.append('<Contents><Key>%s</Key><LastModified>%s'
+                        '</LastModified><ETag>%s</ETag><Size>%d</Size>'
+                        '<Owner><ID>id</ID><DisplayName>name</DisplayName>'
+                        '</Owner><StorageClass>STANDARD</StorageClass>'
+                        '</Contents>' % (escape(name), obj.last_modified,
+                                         escape(obj.etag), len(obj.data)))
+        for common in prefixes:
+            body.append('<CommonPrefixes><Prefix>%s</Prefix>'
+                        '</CommonPrefixes>' % escape(common))
+        body.append('</ListBucketResult>')
+        self.respond_xml(''.join(body))
+
+    def delete_objects(self, bucket):
+        names = [urllib.unquote(name) for name in
+                 re.findall(r'<Key>(.*?)</Key>', self.body, re.S)]
+        quiet = '<Quiet>true</Quiet>' in self.body
+        delete_errors = self.server.store.delete_errors
+        results = []
+        for name in names:
+            name = name.replace('&lt;', '<').replace('&gt;', '>').replace(
+                '&amp;', '&')
+            codes = delete_errors.get(name)
+            if codes:
+                results.append('<Error><Key>%s</Key><Code>%s</Code><Message>'
+                               '</Message></Error>' % (escape(name),
+                                                       codes.pop(0)))
+                continue
+            bucket.pop(name, None)
+            if not quiet:
+                results.append('<Deleted><Key>%s</Key></Deleted>' %
+                               escape(name))
+        self.respond_xml('<DeleteResult xmlns="%s">%s</DeleteResult>' %
+                         (S3_NS, ''.join(results)))
+
+    def metadata(self):
+        return dict((name.lower(), value) for name, value in
+                    self.headers.items()
+                    if name.lower().startswith('x-amz-meta-') or
+                    name.lower() == 'content-encoding')
+
+    def copy_source(self):
+        source = urllib.unquote(self.headers['x-amz-copy-source'])
+        bucket_name, _, key_name = source.lstrip('/').partition('/')
+        bucket = self.server.store.buckets.get(bucket_name, {})
+        obj = bucket.get(key_name)
+        if obj is None:
+            self.error(404, 'NoSuchKey', source)
+            return None
+        if self.headers.get('x-amz-copy-source-if-match',
+                            obj.etag) != obj.etag:
+            self.error(412, 'PreconditionFailed',
+                       'x-amz-copy-source-If-Match')
+            return None
+        data = obj.data
+        byte_range = self.headers.get('x-amz-copy-source-range')
+        if byte_range:
+            first, last = byte_range.split('=', 1)[1].split('-')
+            data = data[int(first):int(last) + 1]
+        elif len(data) > self.server.store.max_copy_size:
+            self.error(400, 'InvalidRequest', 'The specified copy source is '
+                       'larger than the maximum allowable size for a copy '
+                       'source: %d' % self.server.store.max_copy_size)
+            return None
+        return obj, data
+
+    def acl_request(self, bucket, key_name):
+        obj = bucket.get(key_name)
+        if obj is None:
+            return self.error(404, 'NoSuchKey', key_name)
+        if self.command == 'PUT':
+            obj.acl = self.body
+            return self.respond(200)
+        self.respond_xml(obj.acl or DEFAULT_ACL)
+
+    def object_request(self, bucket, key_name):
+        if 'acl' in self.query:
+            return self.acl_request(bucket, key_name)
+        if self.command == 'PUT':
+            metadata = self.metadata()
+            if 'x-amz-copy-source' in self.headers:
+                source = self.copy_source()
+                if source is None:
+                    return
+                obj, data = source
+                if self.headers.get('x-amz-metadata-directive') != 'REPLACE':
+                    metadata = obj.metadata
+                new = bucket[key_name] = S3Object(data, obj.etag, metadata)
+                return self.respond_xml(
+                    '<CopyObjectResult><LastModified>%s</LastModified>'
+                    '<ETag>%s</ETag></CopyObjectResult>' %
+                    (new.last_modified, escape(new.etag)))
+            obj = bucket[key_name] = S3Object(self.body, metadata=metadata)
+            return self.respond(200, '', {'ETag': obj.etag})
+        if self.command == 'DELETE':
+            bucket.pop(key_name, None)
+            return self.respond(204)
+        obj = bucket.get(key_name)
+        if obj is None:
+            if self.command == 'HEAD':
+                return self.respond(404)
+            return self.error(404, 'NoSuchKey', key_name)
+        if self.headers.get('If-Match', obj.etag) != obj.etag:
+            return self.error(412, 'PreconditionFailed', 'If-Match')
+        headers = {'ETag': obj.etag, 'Last-Modified':
+                   'Tue, 01 Jan 2013 00:00:00 GMT',
+                   'Content-Type': 'application/octet-stream'}
+        headers.update(obj.metadata)
+        data = obj.data
+        status = 200
+        byte_range = self.headers.get('Range')
+        if byte_range:
+            first, last = byte_range.split('=', 1)[1].split('-')
+            size = len(data)
+            if not first:
+                first, last = max(size - int(last), 0), size - 1
+            else:
+                first = int(first)
+                last = min(int(last), size - 1) if last else size - 1
+            if first >= size:
+                return self.error(416, 'InvalidRange')
+            headers['Content-Range'] = 'bytes %d-%d/%d' % (first, last, size)
+            data = data[first:last + 1]
+            status = 206
+        headers['Content-Length'] = str(len(data))
+        self.respond(status, data, headers)
+
+    def multipart(self, bucket_name, bucket, key_name):
+        uploads = self.server.store.uploads
+        if 'uploads' in self.query:
+            upload_id = uuid.uuid4().hex
+            uploads[upload_id] = Upload(self.metadata())
+            return self.respond_xml(
+                '<InitiateMultipartUploadResult xmlns="%s"><Bucket>%s'
+                '</Bucket><Key>%s</Key><UploadId>%s</UploadId>'
+                '</InitiateMultipartUploadResult>' % (
+                    S3_NS, escape(bucket_name), escape(key_name), upload_id))
+        upload_id = self.query['uploadId'][0]
+        upload = uploads.get(upload_id)
+        if upload is None:
+            return self.error(404, 'NoSuchUpload', upload_id)
+        parts = upload.parts
+        if self.command == 'PUT':
+            number = int(self.query['partNumber'][0])
+            if 'x-amz-copy-source' in self.headers:
+                source = self.copy_source()
+                if source is None:
+                    return
+                part = parts[number] = S3Object(source[1])
+                return self.respond_xml(
+                    '<CopyPartResult><LastModified>%s</LastModified>'
+                    '<ETag>%s</ETag></CopyPartResult>' % (
+                        part.last_modified, escape(part.etag)))
+            part = parts[number] = S3Object(self.body)
+            return self.respond(200, '', {'ETag': part.etag})
+        if self.command == 'DELETE':
+            del uploads[upload_id]
+            return self.respond(204)
+        if self.command == 'GET':
+            body = ''.join('<Part><PartNumber>%d</PartNumber><LastModified>'
+                           '%s</LastModified><ETag>%s</ETag><Size>%d</Size>'
+                           '</Part>' % (number, TIMESTAMP,
+                                        escape(parts[number].etag),
+                                        len(parts[number].data))
+                           for number in sorted(parts))
+            return self.respond_xml(
+                '<ListPartsResult xmlns="%s"><Bucket>%s</Bucket><Key>%s'
+                '</Key><UploadId>%s</UploadId><IsTruncated>false'
+                '</IsTruncated>%s</ListPartsResult>' % (
+                    S3_NS, escape(bucket_name), escape(key_name), upload_id,
+                    body))
+        numbers = [int(n) for n in
+                   re.findall(r'<PartNumber>(\d+)</PartNumber>', self.body)]
+        missing = [n for n in numbers if n not in parts]
+        if missing:
+            return self.error(400, 'InvalidPart', str(missing[0]))
+        data = ''.join(parts[n].data for n in numbers)
+        digests = ''.join(binascii.unhexlify(parts[n].etag.strip('"'))
+                          for n in numbers)
+        etag = '"%s-%d"' % (hashlib.md5(digests).hexdigest(), len(numbers))
+        bucket[key_name] = S3Object(data, etag, upload.metadata)
+        del uploads[upload_id]
+        self.respond_xml(
+            '<CompleteMultipartUploadResult xmlns="%s"><Location>'
+            'http://%s/%s/%s</Location><Bucket>%s</Bucket><Key>%s</Key>'
+            '<ETag>%s</ETag></CompleteMultipartUploadResult>' % (
+                S3_NS, self.headers.get('Host', ''), escape(bucket_name),
+                escape(key_name), escape(bucket_name), escape(key_name),
+                escape(etag)))
+
+
+class Objects(dict):
+    """The objects of a bucket, which keeps their names sorted for listing."""
+
+    _names = None
+
+    def __setitem__(self, name, obj):
+        if name not in self:
+            self._names = None
+        dict.__setitem__(self, name, obj)
+
+    def __delitem__(self, name):
+        dict.__delitem__(self, name)
+        self._names = None
+
+    def pop(self, name, *default):
+        self._names = None
+        return dict.pop(self, name, *default)
+
+    def sorted_names(self):
+        if self._names is None:
+            self._names = sorted(self)
+        return self._names
+
+
+class Upload(object):
+
+    def __init__(self, metadata):
+        self.metadata = metadata
+        self.parts = {}
+
+
+class S3Store(object):
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.buckets = {}
+        self.uploads = {}
+        # The largest object a PUT-copy accepts.
+        self.max_copy_size = 5 * 1024 * 1024 * 1024
+        # Key names mapped to the error codes that their next
+        # multi-object deletes fail with, one per delete.
+        self.delete_errors = {}
+
+
+class FakeAWSServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    def __init__(self, latency=0, bandwidth=None):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0),
+                                           FakeAWSHandler)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.store = S3Store()
+        self.connections = {}
+        self.hooks = []
+
+    def process_request(self, request, client_address):
+        # As ThreadingMixIn does, but keeping the thread of every
+        # connection so that FakeAWS.stop() can end them all.
+        thread = threading.Thread(target=self._process_request_thread,
+                                  args=(request, client_address))
+        thread.daemon = True
+        self.connections[request] = thread
+        thread.start()
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.process_request_thread(request, client_address)
+        finally:
+            self.connections.pop(request, None)
+
+    def handle_error(self, request, client_address):
+        # Clients drop pooled keep-alive connections whenever they like.
+        pass
+
+
+class FakeAWS(object):
+    """Runs a FakeAWSServer on a background thread."""
+
+    def __init__(self, latency=0, bandwidth=None):
+        self.server = FakeAWSServer(latency, bandwidth)
+        self.host, self.port = self.server.server_address
+        self.thread = None
+
+    def start(self):
+        # A short poll interval makes stop() quick.
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       args=(0.01,))
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        # Wakes the threads still serving requests or waiting on
+        # keep-alive connections, and waits for them, so that none is
+        # left running when the interpreter shuts down.
+        connections = self.server.connections.items()
+        for connection, thread in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+        for connection, thread in connections:
+            thread.join(5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+
+    @property
+    def store(self):
+        return self.server.store
+
+    @property
+    def hooks(self):
+        return self.server.hooks
+
+    def _connection_args(self):
+        return {'aws_access_key_id': 'access_key',
+                'aws_secret_access_key': 'secret_key',
+                'is_secure': False, 'port': self.port}
+
+    def s3_connection(self, **kwargs):
+        args = self._connection_args()
+        args.update(kwargs)
+        return S3Connection(host=self.host,
+                            calling_format=OrdinaryCallingFormat(), **args)
+
+    def sqs_connection(self, **kwargs):
+        args = self._connection_args()
+        args.update(kwargs)
+        region = SQSRegionInfo(name='us-east-1', endpoint=self.host)
+        return SQSConnection(region=region, **args)
+
+    def ec2_connection(self, **kwargs):
+        args = self._connection_args()
+        args.update(kwargs)
+        region = RegionInfo(name='us-east-1', endpoint=self.host)
+        return EC2Connection(region=region, **args)
+
+    def dynamodb_connection(self, **kwargs):
+        args = self._connection_args()
+        args.update(kwargs)
+        region = RegionInfo(name='us-east-1', endpoint=self.host)
+        return Layer1(region=region, **args)
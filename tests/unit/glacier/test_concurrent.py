@@ -60,7 +60,7 @@ class TestConcurrentUploader(unittest.TestCase):
         self.stat_mock.return_value.st_size = 1024 * 1024 * 8
 
     def tearDown(self):
-        self.stat_mock = self.stat_patch.start()
+        self.stat_patch.stop()
 
     def test_calculate_required_part_size(self):
         self.stat_mock.return_value.st_size = 1024 * 1024 * 8
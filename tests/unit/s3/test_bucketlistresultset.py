@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+import threading
+import time
+
+from tests.unit import unittest
+from mock import Mock
+
+from boto.exception import S3ResponseError
+from boto.resultset import ResultSet
+from boto.s3.bucketlistresultset import BucketListResultSet
+from boto.s3.bucketlistresultset import discover_split_points
+from boto.s3.bucketlistresultset import MultiPartUploadListResultSet
+from boto.s3.bucketlistresultset import VersionedBucketListResultSet
+from boto.s3.multipart import MultiPartUpload
+from tests.unit.fakeaws import FakeAWS, S3Object
+
+
+def page(names, truncated):
+    rs = ResultSet()
+    rs.extend(Mock(name=name) for name in names)
+    for key, name in zip(rs, names):
+        key.name = name
+    rs.is_truncated = truncated
+    rs.next_marker = None
+    rs.next_key_marker = rs.next_upload_id_marker = names[-1]
+    rs.next_version_id_marker = 'v'
+    return rs
+
+
+class PagedBucket(object):
+    """A bucket whose listings return ``num_pages`` pages of two keys."""
+
+    def __init__(self, num_pages, fail_at=None):
+        self.num_pages = num_pages
+        self.fail_at = fail_at
+        self.calls = []
+
+    def _page(self, marker):
+        number = len(self.calls)
+        self.calls.append(marker)
+        if number == self.fail_at:
+            raise IOError('page %d' % number)
+        return page(['key-%d-0' % number, 'key-%d-1' % number],
+                    number < self.num_pages - 1)
+
+    def get_all_keys(self, marker='', **kwargs):
+        return self._page(marker)
+
+    def get_all_versions(self, key_marker='', **kwargs):
+        return self._page(key_marker)
+
+    def get_all_multipart_uploads(self, key_marker='', **kwargs):
+        return self._page(key_marker)
+
+
+def names(keys):
+    return [key.name for key in keys]
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def test_results_are_unchanged(self):
+        for cls in (BucketListResultSet, VersionedBucketListResultSet,
+                    MultiPartUploadListResultSet):
+            plain = PagedBucket(5)
+            prefetching = PagedBucket(5)
+            self.assertEqual(names(cls(plain)),
+                             names(cls(prefetching, prefetch=2)))
+            self.assertEqual(plain.calls, prefetching.calls)
+            self.assertEqual(len(plain.calls), 5)
+
+    def test_pages_are_fetched_ahead(self):
+        bucket = PagedBucket(20)
+        keys = iter(BucketListResultSet(bucket, prefetch=3))
+        keys.next()
+        time.sleep(0.3)
+        # The page being consumed, three queued and one waiting to be.
+        self.assertEqual(len(bucket.calls), 5)
+        self.assertEqual(bucket.calls[1], 'key-0-1')
+        self.assertEqual(len(list(keys)), 39)
+
+    def test_errors_are_raised_in_order(self):
+        keys = iter(BucketListResultSet(PagedBucket(5, fail_at=2),
+                                        prefetch=2))
+        self.assertEqual(len([keys.next() for _ in range(4)]), 4)
+        self.assertRaises(IOError, keys.next)
+
+    def test_closing_stops_the_thread(self):
+        threads = threading.active_count()
+        bucket = PagedBucket(1000)
+        keys = iter(BucketListResultSet(bucket, prefetch=1))
+        keys.next()
+        keys.close()
+        for _ in range(50):
+            if threading.active_count() == threads:
+                break
+            time.sleep(0.05)
+        self.assertEqual(threading.active_count(), threads)
+        self.assertTrue(len(bucket.calls) < 5)
+
+
+class TestBucketList(unittest.TestCase):
+
+    def test_list_with_prefetch(self):
+        with FakeAWS() as fake:
+            bucket = fake.s3_connection().create_bucket('bucket')
+            objects = fake.store.buckets['bucket']
+            for i in range(2500):
+                objects['key-%04d' % i] = S3Object('')
+            self.assertEqual(names(bucket.list(prefetch=2)), sorted(objects))
+
+
+class TestEmptyStreamedListing(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeAWS().start()
+        self.addCleanup(self.fake.stop)
+        self.connection = self.fake.s3_connection()
+        self.connection.streaming_parse = True
+        self.bucket = self.connection.create_bucket('bucket')
+
+        def empty(handler):
+            if handler.command == 'GET':
+                handler.respond(200)
+                return True
+        self.fake.hooks.append(empty)
+
+    def test_keys(self):
+        self.assertRaises(S3ResponseError, list, self.bucket.list())
+
+    def test_buckets(self):
+        self.assertRaises(S3ResponseError, self.connection.get_all_buckets)
+
+    def test_parts(self):
+        mp = MultiPartUpload(self.bucket)
+        mp.id = 'upload'
+        self.assertRaises(S3ResponseError, mp.get_all_parts)
+
+    def test_parts_error_body_is_read(self):
+        response = Mock(status=404)
+        self.bucket.connection = Mock()
+        self.bucket.connection.make_request.return_value = response
+        mp = MultiPartUpload(self.bucket)
+        mp.id = 'upload'
+        self.assertIsNone(mp.get_all_parts())
+        self.assertTrue(response.read.called)
+
+
+class TestParallelList(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeAWS().start()
+        self.addCleanup(self.fake.stop)
+        self.bucket = self.fake.s3_connection().create_bucket('bucket')
+        objects = self.fake.store.buckets['bucket']
+        for prefix in 'abcde':
+            for i in range(700):
+                objects['%s/%04d' % (prefix, i)] = S3Object('')
+        objects['c/'] = S3Object('')
+        objects['top'] = S3Object('')
+        self.names = sorted(objects)
+
+    def test_unordered(self):
+        listed = names(self.bucket.parallel_list(shards=4, num_threads=3))
+        self.assertEqual(len(listed), len(self.names))
+        self.assertEqual(sorted(listed), self.names)
+
+    def test_ordered(self):
+        self.assertEqual(names(self.bucket.parallel_list(ordered=True)),
+                         self.names)
+
+    def test_split_points(self):
+        listed = names(self.bucket.parallel_list(
+            split_points=[u'b/0100', 'c/', 'd/0699'], ordered=True))
+        self.assertEqual(listed, self.names)
+
+    def test_prefix(self):
+        listed = names(self.bucket.parallel_list(prefix='b/',
+                                                 split_points=['b/0350']))
+        self.assertEqual(sorted(listed),
+                         [n for n in self.names if n.startswith('b/')])
+
+    def test_discover_split_points(self):
+        self.assertEqual(discover_split_points(self.bucket, shards=3),
+                         ['c/', 'e/'])
+        self.assertEqual(discover_split_points(self.bucket, shards=100),
+                         ['b/', 'c/', 'd/', 'e/', 'top'])
+
+    def test_errors_are_raised(self):
+        def hook(handler):
+            if handler.query.get('marker') == ['c/']:
+                handler.error(403, 'AccessDenied')
+                return True
+        self.fake.hooks.append(hook)
+        self.assertRaises(S3ResponseError, list,
+                          self.bucket.parallel_list(split_points=['c/']))
+
+
+class TestTruncatedDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeAWS().start()
+        self.addCleanup(self.fake.stop)
+        self.bucket = self.fake.s3_connection().create_bucket('bucket')
+        self.objects = self.fake.store.buckets['bucket']
+
+    def assertRangesAreEven(self, keys, points, most):
+        self.assertEqual(points, sorted(set(points)))
+        ranges = [0] * (len(points) + 1)
+        for name in keys:
+            ranges[sum(1 for p in points if name > p)] += 1
+        self.assertTrue(max(ranges) <= most, ranges)
+
+    def test_flat_prefix(self):
+        keys = ['flat/%05d' % i for i in range(5000)]
+        for name in keys:
+            self.objects[name] = S3Object('')
+        points = discover_split_points(self.bucket, 'flat/', shards=8)
+        self.assertEqual(len(points), 7)
+        self.assertRangesAreEven(keys, points, 1500)
+        listed = names(self.bucket.parallel_list(
+            prefix='flat/', split_points=points, ordered=True))
+        self.assertEqual(listed, keys)
+
+    def test_many_common_prefixes(self):
+        for i in range(3000):
+            self.objects['dir%04d/key' % i] = S3Object('')
+        points = discover_split_points(self.bucket, shards=4)
+        self.assertEqual(len(points), 3)
+        self.assertRangesAreEven(sorted(self.objects), points, 1500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+import hashlib
+import os
+import shutil
+import tempfile
+
+from tests.unit import unittest
+from mock import patch
+
+from boto.s3.checksumcache import ChecksumCache, file_key, hash_file
+from boto.s3.concurrent import MultipartUploader
+from boto.s3.key import Key
+from tests.unit.fakeaws import FakeAWS
+
+PART_SIZE = 1000
+
+
+def md5(data):
+    return hashlib.md5(data).hexdigest()
+
+
+class ChecksumCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempdir)
+        self.cache = ChecksumCache(os.path.join(self.tempdir, 'cache'))
+        self.data = os.urandom(PART_SIZE * 2 + 100)
+        self.path = self.write('file', self.data)
+
+    def write(self, name, data):
+        path = os.path.join(self.tempdir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+
+class TestChecksumCache(ChecksumCacheTestCase):
+
+    def test_md5_is_stored(self):
+        self.assertEqual(self.cache.get_md5(self.path), None)
+        self.cache.set_md5(self.path, md5(self.data), file_key(self.path))
+        hex_md5, b64_md5 = self.cache.get_md5(self.path)
+        self.assertEqual(hex_md5, md5(self.data))
+        self.assertEqual(b64_md5, hashlib.md5(self.data).digest()
+                         .encode('base64').strip())
+        # The database is shared with other caches.
+        other = ChecksumCache(self.cache.filename)
+        self.assertEqual(other.get_md5(self.path)[0], md5(self.data))
+
+    def test_changed_file_is_not_returned(self):
+        self.cache.set_md5(self.path, md5(self.data), file_key(self.path))
+        os.utime(self.path, (0, 0))
+        self.assertEqual(self.cache.get_md5(self.path), None)
+
+    def test_file_changed_while_hashing_is_not_stored(self):
+        key = file_key(self.path)
+        self.write('file', 'changed')
+        self.cache.set_md5(self.path, md5(self.data), key)
+        self.assertEqual(self.cache.get_md5(self.path), None)
+
+    def test_part_md5s(self):
+        key, hex_md5, parts = hash_file(self.path, [PART_SIZE, 4096])
+        self.assertEqual(key, file_key(self.path))
+        self.assertEqual(hex_md5, md5(self.data))
+        self.assertEqual(parts[PART_SIZE], [
+            md5(self.data[:PART_SIZE]),
+            md5(self.data[PART_SIZE:PART_SIZE * 2]),
+            md5(self.data[PART_SIZE * 2:])])
+        self.assertEqual(parts[4096], [md5(self.data)])
+        self.cache.set_part_md5s(self.path, PART_SIZE, parts[PART_SIZE], key)
+        self.assertEqual([m[0] for m in
+                          self.cache.get_part_md5s(self.path, PART_SIZE)],
+                         parts[PART_SIZE])
+        self.assertEqual(self.cache.get_part_md5s(self.path, 4096), None)
+
+    def test_warm(self):
+        other = self.write('other', 'other data')
+        self.cache.set_md5(other, md5('other data'), file_key(other))
+        missing = os.path.join(self.tempdir, 'missing')
+        self.assertEqual(self.cache.warm([self.path, other, missing],
+                                         part_sizes=[PART_SIZE],
+                                         processes=2), 3)
+        self.assertEqual(self.cache.get_md5(self.path)[0], md5(self.data))
+        self.assertEqual(len(self.cache.get_part_md5s(self.path,
+                                                      PART_SIZE)), 3)
+        self.assertEqual(self.cache.get_part_md5s(other, PART_SIZE)[0][0],
+                         md5('other data'))
+        self.assertEqual(self.cache.warm([self.path, other],
+                                         part_sizes=[PART_SIZE]), 0)
+
+    def test_warm_uses_upload_part_sizes(self):
+        with patch('boto.s3.concurrent.multipart_threshold',
+                   return_value=PART_SIZE):
+            with patch('boto.s3.concurrent.MIN_PART_SIZE', PART_SIZE):
+                with patch('boto.s3.concurrent.DEFAULT_PART_SIZE',
+                           PART_SIZE):
+                    self.cache.warm([self.path], processes=1)
+        self.assertEqual(len(self.cache.get_part_md5s(self.path,
+                                                      PART_SIZE)), 3)
+
+
+class TestUploadsUseCache(ChecksumCacheTestCase):
+
+    def setUp(self):
+        super(TestUploadsUseCache, self).setUp()
+        self.fake = FakeAWS().start()
+        self.addCleanup(self.fake.stop)
+        self.bucket = self.fake.s3_connection().create_bucket('bucket')
+        patcher = patch('boto.s3.key.get_checksum_cache',
+                        return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stored(self):
+        return self.fake.store.buckets['bucket']['key'].data
+
+    def test_set_contents_from_filename(self):
+        key = self.bucket.new_key('key')
+        key.set_contents_from_filename(self.path)
+        self.assertEqual(self.cache.get_md5(self.path)[0], md5(self.data))
+        with patch.object(Key, 'compute_md5', side_effect=AssertionError):
+            key.set_contents_from_filename(self.path)
+        self.assertEqual(self.stored(), self.data)
+
+    def test_multipart_upload(self):
+        with patch('boto.s3.concurrent.MIN_PART_SIZE', PART_SIZE):
+            uploader = MultipartUploader(self.bucket, part_size=PART_SIZE,
+                                         num_threads=2,
+                                         checksum_cache=self.cache)
+            uploader.upload(self.path, 'key')
+            self.assertEqual(
+                len(self.cache.get_part_md5s(self.path, PART_SIZE)), 3)
+            with patch.object(Key, 'compute_md5',
+                              side_effect=AssertionError):
+                uploader.upload(self.path, 'key')
+        self.assertEqual(self.stored(), self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+import bz2
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import zlib
+from StringIO import StringIO
+
+from tests.unit import unittest
+from mock import patch
+
+from boto.exception import BotoClientError
+from boto.s3.compression import Codec, CompressingReader, GzipCodec
+from boto.s3.compression import find_codec, get_codec, register_codec
+from tests.unit.fakeaws import FakeAWS
+
+TEXT = ''.join('line %d of the log\n' % i for i in xrange(20000))
+
+PART_SIZE = 64 * 1024
+
+
+class ReversingCodec(Codec):
+    """A codec that is easy to check: it reverses each chunk."""
+    name = 'reverse'
+    content_encoding = 'x-reverse'
+
+    class _Reverser(object):
+
+        def compress(self, data):
+            return data[::-1]
+
+        decompress = compress
+
+        def flush(self):
+            return ''
+
+    def compressor(self):
+        return self._Reverser()
+
+    decompressor = compressor
+
+
+class TestCodecs(unittest.TestCase):
+
+    def test_round_trips(self):
+        for name, decompress in (('gzip', None),
+                                 ('zlib', zlib.decompress),
+                                 ('bz2', bz2.decompress)):
+            codec = get_codec(name)
+            data = CompressingReader(StringIO(TEXT), codec).read()
+            self.assertTrue(len(data) < len(TEXT) / 5)
+            if decompress is None:
+                decompress = gzip.GzipFile(fileobj=StringIO(data)).read
+                self.assertEqual(decompress(), TEXT)
+            else:
+                self.assertEqual(decompress(data), TEXT)
+            chunks = [data[i:i + 1000] for i in xrange(0, len(data), 1000)]
+            self.assertEqual(''.join(codec.decompress_iter(chunks)), TEXT)
+
+    def test_lookup(self):
+        self.assertEqual(get_codec('gzip').content_encoding, 'gzip')
+        self.assertEqual(get_codec('deflate').name, 'zlib')
+        self.assertEqual(find_codec('BZIP2').name, 'bz2')
+        self.assertEqual(find_codec('identity'), None)
+        self.assertEqual(find_codec(None), None)
+        codec = GzipCodec(level=1)
+        self.assertTrue(get_codec(codec) is codec)
+        self.assertRaises(BotoClientError, get_codec, 'lz4')
+        self.assertRaises(BotoClientError, get_codec, None)
+
+    def test_reader(self):
+        fp = StringIO(TEXT)
+        reader = CompressingReader(fp, 'gzip', size=1000)
+        first = reader.read(10)
+        reader.unread(first)
+        data = reader.read()
+        self.assertEqual(data[:10], first)
+        self.assertEqual(reader.read(), '')
+        self.assertEqual(gzip.GzipFile(fileobj=StringIO(data)).read(),
+                         TEXT[:1000])
+        self.assertEqual((reader.bytes_read, reader.bytes_compressed),
+                         (1000, len(data)))
+        self.assertEqual(fp.tell(), 1000)
+        self.assertRaises(IOError, reader.tell)
+
+
+class TestCompressedKeys(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeAWS().start()
+        self.addCleanup(self.fake.stop)
+        self.bucket = self.fake.s3_connection().create_bucket('bucket')
+        self.objects = self.fake.store.buckets['bucket']
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        for name, value in (('concurrent.MIN_PART_SIZE', 1024),
+                            ('key.MIN_PART_SIZE', 1024),
+                            ('concurrent.DEFAULT_PART_SIZE', PART_SIZE)):
+            patcher = patch('boto.s3.' + name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_small_upload_is_one_put(self):
+        key = self.bucket.new_key('log.txt')
+        size = key.set_contents_from_string(TEXT, compress='gzip')
+        stored = self.objects['log.txt']
+        self.assertEqual(size, len(stored.data))
+        self.assertEqual(stored.metadata['content-encoding'], 'gzip')
+        self.assertEqual(zlib.decompress(stored.data, 16 + zlib.MAX_WBITS),
+                         TEXT)
+        self.assertEqual(key.etag.strip('"'),
+                         hashlib.md5(stored.data).hexdigest())
+        self.assertEqual(key.content_encoding, 'gzip')
+
+    def test_large_upload_is_multipart(self):
+        data = os.urandom(PART_SIZE * 3)
+        path = os.path.join(self.tmpdir, 'random')
+        with open(path, 'wb') as f:
+            f.write(data)
+        key = self.bucket.new_key('random.gz')
+        progress = []
+        key.set_contents_from_filename(
+            path, compress='zlib', cb=lambda *args: progress.append(args))
+        stored = self.objects['random.gz']
+        self.assertTrue(stored.etag.endswith('-4"'), stored.etag)
+        self.assertEqual(stored.metadata['content-encoding'], 'deflate')
+        self.assertEqual(zlib.decompress(stored.data), data)
+        self.assertEqual(key.size, len(stored.data))
+        # The compressed size is not known until the end.
+        self.assertEqual(len(progress), 5)
+        self.assertEqual(set(total for sent, total in progress[:-1]), set([0]))
+        self.assertEqual(progress[-1], (key.size, key.size))
+
+    def test_download_decompresses(self):
+        key = self.bucket.new_key('log.txt')
+        key.set_contents_from_string(TEXT, compress='bz2')
+        key = self.bucket.get_key('log.txt')
+        self.assertEqual(key.get_contents_as_string(decompress=True), TEXT)
+        self.assertEqual(key.md5, self.objects['log.txt'].etag.strip('"'))
+        self.assertEqual(key.get_contents_as_string(),
+                         self.objects['log.txt'].data)
+        path = os.path.join(self.tmpdir, 'log.txt')
+        with patch('boto.s3.key.multipart_threshold', return_value=1):
+            key.get_contents_to_filename(path, decompress=True)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), TEXT)
+
+    def test_uncompressed_keys_are_not_decompressed(self):
+        self.bucket.new_key('plain').set_contents_from_string(TEXT)
+        key = self.bucket.get_key('plain')
+        self.assertEqual(key.get_contents_as_string(decompress=True), TEXT)
+
+    def test_registered_codec(self):
+        register_codec(ReversingCodec())
+        key = self.bucket.new_key('reversed')
+        key.set_contents_from_string('abc', compress='reverse')
+        self.assertEqual(self.objects['reversed'].data, 'cba')
+        self.assertEqual(self.bucket.get_key('reversed')
+                         .get_contents_as_string(decompress=True), 'abc')
+        self.assertEqual(key.get_contents_as_string(decompress='x-reverse'),
+                         'abc')
+
+    def test_compressed_uploads_cannot_be_given_an_md5(self):
+        self.assertRaises(BotoClientError,
+                          self.bucket.new_key('key').set_contents_from_string,
+                          TEXT, md5=('a', 'b'), compress='gzip')
+
+
+if __name__ == '__main__':
+    unittest.main()
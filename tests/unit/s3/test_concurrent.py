@@ -0,0 +1,675 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+
+from tests.unit import unittest
+from mock import patch
+
+from boto.exception import BotoClientError, BotoServerError, S3DataError
+from boto.exception import S3ResponseError
+from boto.gs.key import Key as GSKey
+from boto.s3.concurrent import BulkDeleter, ConcurrentDownloader
+from boto.s3.concurrent import MultipartUploader, MultipartWriter
+from boto.s3.concurrent import _InflightLimit
+from boto.s3.resumable_download_handler import ResumableDownloadHandler
+from boto.s3.resumable_upload_handler import ResumableMultipartUploadHandler
+from boto.s3.prefix import Prefix
+from tests.unit.fakeaws import FakeAWS, S3Object
+
+PART_SIZE = 64 * 1024
+
+
+def fail_part(number, status, times):
+    """A FakeAWS hook failing the PUTs of a part ``times`` times."""
+    failures = [times]
+
+    def hook(handler):
+        if (handler.command == 'PUT' and failures[0] and
+                handler.query.get('partNumber') == [str(number)]):
+            failures[0] -= 1
+            handler.error(status, 'InternalError' if status >= 500 else
+                          'AccessDenied')
+            return True
+    return hook
+
+
+def fail_range(start, status, times):
+    """A FakeAWS hook failing the GETs of the range at ``start``."""
+    failures = [times]
+
+    def hook(handler):
+        if (handler.command == 'GET' and failures[0] and
+                handler.headers.get('Range', '').startswith(
+                    'bytes=%d-' % start)):
+            failures[0] -= 1
+            handler.error(status, 'InternalError' if status >= 500 else
+                          'AccessDenied')
+            return True
+    return hook
+
+
+def fail_deletes(status, times):
+    """A FakeAWS hook failing ``times`` multi-object deletes."""
+    failures = [times]
+
+    def hook(handler):
+        if (handler.command == 'POST' and 'delete' in handler.query and
+                failures[0]):
+            failures[0] -= 1
+            handler.error(status, 'InternalError' if status >= 500 else
+                          'AccessDenied')
+            return True
+    return hook
+
+
+def record_parts(parts):
+    """A FakeAWS hook appending the number of every part PUT to parts."""
+    def hook(handler):
+        if handler.command == 'PUT' and 'partNumber' in handler.query:
+            parts.append(int(handler.query['partNumber'][0]))
+    return hook
+
+
+def record_ranges(ranges):
+    """A FakeAWS hook appending the Range header of every GET to ranges."""
+    def hook(handler):
+        if handler.command == 'GET':
+            ranges.append(handler.headers.get('Range'))
+    return hook
+
+
+class FakeS3TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeAWS().start()
+        connection = self.fake.s3_connection()
+        # Leave the retrying to the uploader.
+        connection.num_retries = 0
+        self.bucket = connection.create_bucket('bucket')
+        self.data = os.urandom(PART_SIZE * 3 + 100)
+        self.file = tempfile.NamedTemporaryFile()
+        self.file.write(self.data)
+        self.file.flush()
+        patcher = patch('boto.s3.concurrent.MIN_PART_SIZE', 1024)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('time.sleep')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.file.close()
+        self.fake.stop()
+
+    def uploader(self, **kwargs):
+        return MultipartUploader(self.bucket, part_size=PART_SIZE,
+                                 num_threads=3, **kwargs)
+
+    def stored(self, name):
+        return self.fake.store.buckets['bucket'][name]
+
+
+class TestMultipartUploader(FakeS3TestCase):
+
+    def test_upload_file(self):
+        progress = []
+        result = self.uploader().upload(self.file.name, 'key',
+                                        cb=lambda *args: progress.append(args))
+        self.assertEqual(self.stored('key').data, self.data)
+        self.assertTrue(result.etag.endswith('-4"'))
+        self.assertEqual(progress[-1], (len(self.data), len(self.data)))
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(self.fake.store.uploads, {})
+
+    def test_upload_stream(self):
+        limit = _InflightLimit(PART_SIZE * 2)
+        used = []
+        acquire = limit.acquire
+
+        def tracking_acquire(size):
+            acquire(size)
+            used.append(limit.used)
+        limit.acquire = tracking_acquire
+        with patch('boto.s3.concurrent._InflightLimit', return_value=limit):
+            self.uploader().upload(StringIO(self.data), 'key')
+        self.assertEqual(self.stored('key').data, self.data)
+        self.assertTrue(max(used) <= PART_SIZE * 2)
+        self.assertEqual(limit.used, 0)
+
+    def test_failed_part_is_retried(self):
+        self.fake.hooks.append(fail_part(2, 500, 2))
+        self.uploader().upload(self.file.name, 'key')
+        self.assertEqual(self.stored('key').data, self.data)
+
+    def test_failed_upload_is_cancelled(self):
+        self.fake.hooks.append(fail_part(2, 403, 1))
+        self.assertRaises(S3ResponseError, self.uploader().upload,
+                          self.file.name, 'key')
+        self.assertFalse('key' in self.fake.store.buckets['bucket'])
+        self.assertEqual(self.fake.store.uploads, {})
+
+    def test_retries_are_limited(self):
+        self.fake.hooks.append(fail_part(1, 500, 10))
+        self.assertRaises(BotoServerError, self.uploader(num_retries=2).upload,
+                          self.file.name, 'key')
+        self.assertEqual(self.fake.store.uploads, {})
+
+    def test_part_size_grows_for_huge_files(self):
+        uploader = MultipartUploader(self.bucket, part_size=PART_SIZE)
+        self.assertEqual(uploader._calculate_part_size(10 * PART_SIZE),
+                         PART_SIZE)
+        part_size = uploader._calculate_part_size(20000 * PART_SIZE)
+        self.assertTrue(part_size * 10000 >= 20000 * PART_SIZE)
+
+
+class TestSetContentsFromFilename(FakeS3TestCase):
+
+    def test_large_files_use_multipart(self):
+        key = self.bucket.new_key('key')
+        key.set_metadata('color', 'blue')
+        with patch('boto.s3.key.multipart_threshold',
+                   return_value=PART_SIZE):
+            with patch('boto.s3.concurrent.DEFAULT_PART_SIZE', PART_SIZE):
+                key.set_contents_from_filename(self.file.name)
+        self.assertEqual(self.stored('key').data, self.data)
+        self.assertEqual(key.size, len(self.data))
+        self.assertEqual(key.etag, self.stored('key').etag)
+        self.assertEqual(self.stored('key').metadata,
+                         {'x-amz-meta-color': 'blue'})
+
+    def test_small_files_use_one_put(self):
+        key = self.bucket.new_key('key')
+        with patch('boto.s3.key.multipart_threshold',
+                   return_value=len(self.data) + 1):
+            key.set_contents_from_filename(self.file.name)
+        self.assertEqual(self.stored('key').data, self.data)
+        self.assertFalse('-' in self.stored('key').etag)
+
+
+class TestMultipartWriter(FakeS3TestCase):
+
+    def writer(self, **kwargs):
+        return MultipartWriter(self.bucket, 'key', part_size=PART_SIZE,
+                               num_threads=3, **kwargs)
+
+    def write_all(self, writer, chunk_size=1000):
+        for i in xrange(0, len(self.data), chunk_size):
+            writer.write(self.data[i:i + chunk_size])
+
+    def test_write_in_chunks(self):
+        progress = []
+        writer = self.writer(cb=lambda *args: progress.append(args))
+        self.write_all(writer)
+        writer.close()
+        self.assertEqual(self.stored('key').data, self.data)
+        self.assertEqual(writer.size, len(self.data))
+        self.assertEqual(writer.etag, self.stored('key').etag)
+        self.assertTrue(writer.etag.endswith('-4"'))
+        self.assertTrue(writer._num_buffers <= 4)
+        self.assertEqual(progress[-1], (len(self.data), len(self.data)))
+        self.assertEqual(self.fake.store.uploads, {})
+
+    def test_buffers_are_reused(self):
+        self.data = os.urandom(PART_SIZE * 20)
+        writer = self.writer()
+        self.write_all(writer, PART_SIZE / 3)
+        writer.close()
+        self.assertEqual(self.stored('key').data, self.data)
+        self.assertTrue(writer._num_buffers <= 4)
+
+    def test_without_memoryview(self):
+        with patch('boto.s3.concurrent.memoryview', None):
+            with patch('boto.s3.key.memoryview', None):
+                for data in (self.data, 'x' * 100):
+                    with self.writer() as writer:
+                        writer.write(data[:PART_SIZE / 2])
+                        writer.write(buffer(data, PART_SIZE / 2))
+                    self.assertEqual(self.stored('key').data, data)
+                    self.assertEqual(writer.size, len(data))
+
+    def test_small_streams_use_one_put(self):
+        parts = []
+        self.fake.hooks.append(record_parts(parts))
+        for data in ('', 'x' * 100, 'y' * (PART_SIZE - 1)):
+            with self.writer(metadata={'color': 'red'}) as writer:
+                writer.write(data)
+            self.assertEqual(self.stored('key').data, data)
+            self.assertFalse('-' in writer.etag)
+            self.assertEqual(self.stored('key').metadata,
+                             {'x-amz-meta-color': 'red'})
+        self.assertEqual(parts, [])
+
+    def test_failed_part_cancels_upload(self):
+        self.fake.hooks.append(fail_part(2, 403, 1))
+        writer = self.writer()
+
+        def write_and_close():
+            self.write_all(writer)
+            writer.close()
+        self.assertRaises(S3ResponseError, write_and_close)
+        self.assertTrue(writer.closed)
+        self.assertRaises(ValueError, writer.write, 'more')
+        self.assertFalse('key' in self.fake.store.buckets['bucket'])
+        self.assertEqual(self.fake.store.uploads, {})
+
+    def test_error_in_block_aborts(self):
+        def write_and_fail():
+            with self.writer() as writer:
+                self.write_all(writer)
+                raise IOError('the pipe broke')
+        self.assertRaises(IOError, write_and_fail)
+        self.assertFalse('key' in self.fake.store.buckets['bucket'])
+        self.assertEqual(self.fake.store.uploads, {})
+
+    def test_gs_keys_cannot_be_opened_for_writing(self):
+        key = GSKey(self.bucket, 'key')
+        self.assertRaises(BotoClientError, key.open, 'w')
+        self.assertRaises(BotoClientError, key.write, 'data')
+
+    def test_key_open_write(self):
+        key = self.bucket.new_key('key')
+        key.set_metadata('color', 'blue')
+        with patch('boto.s3.concurrent.DEFAULT_PART_SIZE', PART_SIZE):
+            key.open('w')
+            for i in xrange(0, len(self.data), 4096):
+                key.write(self.data[i:i + 4096])
+            key.close()
+        self.assertEqual(self.stored('key').data, self.data)
+        self.assertEqual(key.size, len(self.data))
+        self.assertEqual(key.etag, self.stored('key').etag)
+        self.assertEqual(self.stored('key').metadata,
+                         {'x-amz-meta-color': 'blue'})
+        self.assertRaises(BotoClientError, key.write, 'more')
+
+    def test_set_contents_from_stream(self):
+        key = self.bucket.new_key('key')
+        progress = []
+        with patch('boto.s3.concurrent.DEFAULT_PART_SIZE', PART_SIZE):
+            key.set_contents_from_stream(
+                StringIO(self.data), cb=lambda *args: progress.append(args),
+                size=PART_SIZE * 2)
+        self.assertEqual(self.stored('key').data, self.data[:PART_SIZE * 2])
+        self.assertEqual(key.size, PART_SIZE * 2)
+        self.assertTrue(key.etag.endswith('-2"'))
+        self.assertEqual(progress[-1], (PART_SIZE * 2, PART_SIZE * 2))
+
+
+class TestResumableMultipartUpload(FakeS3TestCase):
+
+    def setUp(self):
+        super(TestResumableMultipartUpload, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.tracker = os.path.join(self.tmpdir, 'tracker')
+        self.parts = []
+        self.fake.hooks.append(record_parts(self.parts))
+
+    def handler(self):
+        return ResumableMultipartUploadHandler(self.tracker)
+
+    def fail_upload(self):
+        self.fake.hooks.insert(0, fail_part(3, 403, 1))
+        self.assertRaises(S3ResponseError, self.uploader().upload,
+                          self.file.name, 'key',
+                          res_upload_handler=self.handler())
+        self.assertEqual(len(self.fake.store.uploads), 1)
+        upload = self.fake.store.uploads.values()[0]
+        del self.parts[:]
+        return upload
+
+    def test_resume_uploads_missing_parts(self):
+        upload = self.fail_upload()
+        handler = self.handler()
+        self.assertEqual(handler.upload_id,
+                         self.fake.store.uploads.keys()[0])
+        self.assertEqual(handler.part_size, PART_SIZE)
+        self.assertFalse(3 in handler.completed_parts)
+        done = set(upload.parts)
+        self.uploader().upload(self.file.name, 'key',
+                               res_upload_handler=handler)
+        self.assertEqual(self.stored('key').data, self.data)
+        self.assertEqual(sorted(self.parts),
+                         sorted(set([1, 2, 3, 4]) - done))
+        self.assertFalse(os.path.exists(self.tracker))
+        self.assertEqual(self.fake.store.uploads, {})
+
+    def test_changed_parts_are_uploaded_again(self):
+        upload = self.fail_upload()
+        for number in (1, 2, 4):
+            upload.parts[number] = S3Object(self.data[:PART_SIZE])
+        upload.parts[3] = S3Object(
+            self.data[2 * PART_SIZE:3 * PART_SIZE])
+        self.uploader().upload(self.file.name, 'key',
+                               res_upload_handler=self.handler())
+        self.assertEqual(self.stored('key').data, self.data)
+        # Part 1 is unchanged, part 4 has the wrong size.
+        self.assertEqual(sorted(self.parts), [2, 4])
+
+    def test_missing_upload_starts_over(self):
+        self.fail_upload()
+        self.fake.store.uploads.clear()
+        handler = self.handler()
+        self.uploader().upload(self.file.name, 'key',
+                               res_upload_handler=handler)
+        self.assertEqual(self.stored('key').data, self.data)
+        self.assertEqual(sorted(self.parts), [1, 2, 3, 4])
+        self.assertEqual(handler.upload_id, None)
+
+    def test_tracker_file(self):
+        handler = self.handler()
+        handler._save_tracker_info('upload-id', PART_SIZE)
+        handler._save_completed_part(2, '"%s"' % ('a' * 32))
+        handler = self.handler()
+        self.assertEqual(handler.upload_id, 'upload-id')
+        self.assertEqual(handler.part_size, PART_SIZE)
+        self.assertEqual(handler.completed_parts, {2: '"%s"' % ('a' * 32)})
+        with open(self.tracker, 'w') as f:
+            f.write('garbage')
+        self.assertEqual(self.handler().upload_id, None)
+
+    def test_set_contents_from_filename(self):
+        self.fake.hooks.insert(0, fail_part(2, 403, 1))
+        key = self.bucket.new_key('key')
+        with patch('boto.s3.concurrent.DEFAULT_PART_SIZE', PART_SIZE):
+            self.assertRaises(S3ResponseError,
+                              key.set_contents_from_filename, self.file.name,
+                              res_upload_handler=self.handler())
+            key.set_contents_from_filename(self.file.name,
+                                           res_upload_handler=self.handler())
+        self.assertEqual(self.stored('key').data, self.data)
+        self.assertEqual(key.etag, self.stored('key').etag)
+
+    def test_streams_cannot_be_resumed(self):
+        self.assertRaises(ValueError, self.uploader().upload,
+                          StringIO(self.data), 'key',
+                          res_upload_handler=self.handler())
+
+
+class DownloadTestCase(FakeS3TestCase):
+
+    def setUp(self):
+        super(DownloadTestCase, self).setUp()
+        self.bucket.new_key('key').set_contents_from_string(self.data)
+        self.key = self.bucket.get_key('key')
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempdir)
+        self.target = os.path.join(self.tempdir, 'target')
+        self.tracker = os.path.join(self.tempdir, 'tracker')
+
+    def downloaded(self):
+        with open(self.target, 'rb') as f:
+            return f.read()
+
+
+class TestConcurrentDownloader(DownloadTestCase):
+
+    def downloader(self, num_threads=3, **kwargs):
+        return ConcurrentDownloader(self.bucket, part_size=PART_SIZE,
+                                    num_threads=num_threads, **kwargs)
+
+    def test_download(self):
+        progress = []
+        self.downloader().download(self.key, self.target,
+                                   cb=lambda *args: progress.append(args))
+        self.assertEqual(self.downloaded(), self.data)
+        self.assertEqual(progress[-1], (len(self.data), len(self.data)))
+        self.assertEqual(self.key.md5, self.stored('key').etag.strip('"'))
+
+    def test_failed_range_is_retried(self):
+        self.fake.hooks.append(fail_range(PART_SIZE, 500, 2))
+        self.downloader().download(self.key, self.target)
+        self.assertEqual(self.downloaded(), self.data)
+
+    def test_failed_download_is_removed(self):
+        self.fake.hooks.append(fail_range(PART_SIZE, 403, 1))
+        self.assertRaises(S3ResponseError, self.downloader().download,
+                          self.key, self.target)
+        self.assertFalse(os.path.exists(self.target))
+
+    def test_changed_object_fails(self):
+        self.stored('key').etag = '"changed"'
+        self.assertRaises(S3ResponseError, self.downloader().download,
+                          self.key, self.target)
+
+    def test_md5_mismatch(self):
+        self.stored('key').data = os.urandom(len(self.data))
+        self.assertRaises(S3DataError, self.downloader().download,
+                          self.key, self.target)
+        self.assertFalse(os.path.exists(self.target))
+
+    def test_other_providers_are_not_checked(self):
+        # Like a composite Google Storage object, whose ETag is not the
+        # MD5 of its data.
+        self.stored('key').data = os.urandom(len(self.data))
+        with patch.object(self.bucket.connection.provider, 'name',
+                          'google'):
+            self.downloader().download(self.key, self.target)
+        self.assertEqual(self.downloaded(), self.stored('key').data)
+
+    def test_failed_download_is_resumed(self):
+        self.fake.hooks.append(fail_range(PART_SIZE * 2, 403, 1))
+        handler = ResumableDownloadHandler(self.tracker)
+        downloader = self.downloader(num_threads=1)
+        self.assertRaises(S3ResponseError, downloader.download, self.key,
+                          self.target, res_download_handler=handler)
+        with open(self.tracker) as f:
+            self.assertEqual(f.read().split('\n')[:3], [
+                self.key.etag.strip('"'), '0-%d' % (PART_SIZE - 1),
+                '%d-%d' % (PART_SIZE, PART_SIZE * 2 - 1)])
+
+        ranges = []
+        self.fake.hooks.append(record_ranges(ranges))
+        handler = ResumableDownloadHandler(self.tracker)
+        self.downloader().download(self.key, self.target,
+                                   res_download_handler=handler)
+        self.assertEqual(self.downloaded(), self.data)
+        self.assertEqual(sorted(ranges), [
+            'bytes=%d-%d' % (PART_SIZE * 2, PART_SIZE * 3 - 1),
+            'bytes=%d-%d' % (PART_SIZE * 3, len(self.data) - 1)])
+        self.assertFalse(os.path.exists(self.tracker))
+
+    def test_sequential_resume_of_ranged_download(self):
+        self.fake.hooks.append(fail_range(PART_SIZE, 403, 1))
+        handler = ResumableDownloadHandler(self.tracker)
+        self.assertRaises(S3ResponseError,
+                          self.downloader(num_threads=1).download, self.key,
+                          self.target, res_download_handler=handler)
+        handler = ResumableDownloadHandler(self.tracker)
+        with open(self.target, 'r+b') as fp:
+            self.key.get_contents_to_file(fp, res_download_handler=handler)
+        self.assertEqual(self.downloaded(), self.data)
+        self.assertEqual(handler.download_start_point, PART_SIZE)
+
+
+class TestGetContentsToFilename(DownloadTestCase):
+
+    def get_contents(self, threshold):
+        ranges = []
+        self.fake.hooks.append(record_ranges(ranges))
+        with patch('boto.s3.key.multipart_threshold',
+                   return_value=threshold):
+            with patch('boto.s3.concurrent.DEFAULT_PART_SIZE', PART_SIZE):
+                self.key.get_contents_to_filename(self.target)
+        self.assertEqual(self.downloaded(), self.data)
+        return ranges
+
+    def test_large_objects_use_ranges(self):
+        self.assertEqual(len(self.get_contents(PART_SIZE)), 4)
+
+    def test_small_objects_use_one_get(self):
+        self.assertEqual(self.get_contents(len(self.data) + 1), [None])
+
+    def test_gs_keys_use_one_get(self):
+        key = GSKey(self.bucket, 'key')
+        key.size = len(self.data)
+        with patch('boto.s3.key.multipart_threshold', return_value=1):
+            self.assertFalse(key._use_ranged_download(None, False))
+
+
+def record_copy_ranges(ranges):
+    """A FakeAWS hook appending the copy source range of part copies."""
+    def hook(handler):
+        if 'x-amz-copy-source' in handler.headers:
+            ranges.append(handler.headers.get('x-amz-copy-source-range'))
+    return hook
+
+
+class TestMultipartCopy(FakeS3TestCase):
+
+    def setUp(self):
+        super(TestMultipartCopy, self).setUp()
+        self.objects = self.fake.store.buckets['bucket']
+        self.objects['src'] = S3Object(self.data, metadata={
+            'x-amz-meta-color': 'red'})
+        self.ranges = []
+        self.fake.hooks.append(record_copy_ranges(self.ranges))
+        for patcher in (patch('boto.s3.bucket.multipart_threshold',
+                              return_value=PART_SIZE),
+                        patch('boto.s3.concurrent.DEFAULT_PART_SIZE',
+                              PART_SIZE)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def copy(self, **kwargs):
+        return self.bucket.copy_key('dst', 'bucket', 'src', **kwargs)
+
+    def test_copy_with_size(self):
+        key = self.copy(src_size=len(self.data))
+        self.assertEqual(self.stored('dst').data, self.data)
+        self.assertEqual(self.stored('dst').metadata,
+                         {'x-amz-meta-color': 'red'})
+        self.assertEqual(key.etag, self.stored('dst').etag)
+        self.assertEqual(sorted(self.ranges), [
+            'bytes=0-65535', 'bytes=131072-196607',
+            'bytes=196608-196707', 'bytes=65536-131071'])
+        self.assertEqual(self.fake.store.uploads, {})
+
+    def test_small_sources_use_one_copy(self):
+        self.copy(src_size=PART_SIZE - 1)
+        self.assertEqual(self.ranges, [None])
+        self.assertEqual(self.stored('dst').data, self.data)
+
+    def test_too_large_sources_fall_back(self):
+        self.fake.store.max_copy_size = PART_SIZE
+        self.copy(metadata={'color': 'blue'})
+        self.assertEqual(self.ranges[0], None)
+        self.assertEqual(len(self.ranges), 5)
+        self.assertEqual(self.stored('dst').data, self.data)
+        self.assertEqual(self.stored('dst').metadata,
+                         {'x-amz-meta-color': 'blue'})
+
+    def test_key_copy_passes_its_size(self):
+        self.fake.store.max_copy_size = PART_SIZE
+        key = self.bucket.get_key('src')
+        key.copy('bucket', 'dst')
+        self.assertFalse(None in self.ranges)
+        self.assertEqual(len(self.ranges), 4)
+        self.assertEqual(self.stored('dst').data, self.data)
+
+    def test_preserve_acl(self):
+        self.objects['src'].acl = ('<AccessControlPolicy><Owner><ID>me</ID>'
+                                   '</Owner></AccessControlPolicy>')
+        self.copy(src_size=len(self.data), preserve_acl=True)
+        self.assertTrue('<ID>me</ID>' in self.stored('dst').acl)
+
+    def test_failed_parts_are_retried(self):
+        self.fake.hooks.insert(0, fail_part(2, 500, 2))
+        self.copy(src_size=len(self.data))
+        self.assertEqual(self.stored('dst').data, self.data)
+
+    def test_changed_source_cancels_upload(self):
+        objects = self.objects
+
+        def replace_source(handler):
+            if handler.headers.get('x-amz-copy-source-range'):
+                objects['src'] = S3Object('changed')
+        self.fake.hooks.append(replace_source)
+        self.assertRaises(S3ResponseError, self.copy,
+                          src_size=len(self.data))
+        self.assertFalse('dst' in objects)
+        self.assertEqual(self.fake.store.uploads, {})
+
+
+class TestBulkDeleter(FakeS3TestCase):
+
+    def setUp(self):
+        super(TestBulkDeleter, self).setUp()
+        self.objects = self.fake.store.buckets['bucket']
+        for i in range(2500):
+            self.objects['key-%04d' % i] = S3Object('')
+        self.names = sorted(self.objects)
+
+    def delete(self, keys, **kwargs):
+        deleter = BulkDeleter(self.bucket, num_threads=3, num_retries=2)
+        return deleter.delete(keys, **kwargs)
+
+    def test_delete_from_iterator(self):
+        progress = []
+        result = self.delete((name for name in self.names),
+                             cb=lambda *args: progress.append(args))
+        self.assertEqual(result.deleted_count, 2500)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(len(self.objects), 0)
+        self.assertEqual(len(progress), 3)
+        self.assertEqual(progress[-1], (2500, 0))
+
+    def test_delete_listing(self):
+        result = self.bucket.bulk_delete(self.bucket.list(compact=True),
+                                         quiet=False, num_threads=4)
+        self.assertEqual(result.deleted_count, 2500)
+        self.assertEqual(len(self.objects), 0)
+
+    def test_key_errors_are_retried(self):
+        self.fake.store.delete_errors.update({
+            'key-0005': ['SlowDown', 'InternalError'],
+            'key-0006': ['AccessDenied'],
+            'key-0007': ['SlowDown'] * 3})
+        result = self.delete(self.names + [Prefix(name='dir/')])
+        self.assertEqual(result.deleted_count, 2498)
+        self.assertEqual(sorted((e.key, e.code) for e in result.errors),
+                         [('dir/', 'PrefixSkipped'),
+                          ('key-0006', 'AccessDenied'),
+                          ('key-0007', 'SlowDown')])
+        self.assertEqual(sorted(self.objects), ['key-0006', 'key-0007'])
+
+    def test_request_errors_are_retried(self):
+        self.fake.hooks.append(fail_deletes(500, 2))
+        result = self.delete(self.names)
+        self.assertEqual(result.deleted_count, 2500)
+
+    def test_request_errors_are_raised(self):
+        self.fake.hooks.append(fail_deletes(403, 1))
+        self.assertRaises(S3ResponseError, self.delete, self.names)
+
+    def test_delete_keys(self):
+        self.fake.store.delete_errors['key-0005'] = ['SlowDown']
+        result = self.bucket.delete_keys(self.names + [Prefix(name='dir/')])
+        self.assertEqual(len(result.deleted), 2499)
+        self.assertEqual(sorted((e.key, e.code) for e in result.errors),
+                         [('dir/', 'PrefixSkipped'),
+                          ('key-0005', 'SlowDown')])
+
+if __name__ == '__main__':
+    unittest.main()
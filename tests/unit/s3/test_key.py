@@ -20,12 +20,20 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
 # IN THE SOFTWARE.
 #
+import hashlib
+import io
+import os
+import tempfile
+from StringIO import StringIO
 
 from tests.unit import unittest
 from tests.unit import AWSMockServiceTestCase
+from mock import Mock, patch
 
 from boto.s3.connection import S3Connection
 from boto.s3.bucket import Bucket
+from boto.s3.key import Key
+from tests.unit.fakeaws import FakeAWS
 
 
 class TestS3Key(AWSMockServiceTestCase):
@@ -71,5 +79,95 @@ class TestS3Key(AWSMockServiceTestCase):
         self.assertIsNotNone(key)
 
 
+class RecordingFile(io.BytesIO):
+    """A file recording the size of the buffers it is read into."""
+
+    def __init__(self, data):
+        io.BytesIO.__init__(self, data)
+        self.sizes = []
+
+    def readinto(self, b):
+        self.sizes.append(len(b))
+        return io.BytesIO.readinto(self, b)
+
+
+class TestSendFile(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeAWS().start()
+        self.addCleanup(self.fake.stop)
+        self.bucket = self.fake.s3_connection().create_bucket('bucket')
+        self.data = os.urandom(3100)
+        patcher = patch.object(Key, 'SendBufferSize', 1000)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self, fp, **kwargs):
+        progress = []
+        key = self.bucket.new_key('key')
+        key.set_contents_from_file(fp, cb=lambda *args: progress.append(args),
+                                   **kwargs)
+        self.assertEqual(key.etag,
+                         self.fake.store.buckets['bucket']['key'].etag)
+        return progress
+
+    def stored(self):
+        return self.fake.store.buckets['bucket']['key'].data
+
+    def test_file_is_read_into_a_buffer(self):
+        with tempfile.TemporaryFile() as fp:
+            fp.write(self.data)
+            fp.seek(0)
+            progress = self.upload(fp, num_cb=3)
+        self.assertEqual(self.stored(), self.data)
+        self.assertEqual(progress, [(0, 3100), (2000, 3100), (3100, 3100)])
+
+    def test_stream_without_readinto(self):
+        progress = self.upload(StringIO(self.data), size=2500, num_cb=-1)
+        self.assertEqual(self.stored(), self.data[:2500])
+        self.assertEqual(progress, [(0, 2500), (1000, 2500), (2000, 2500),
+                                    (2500, 2500)])
+
+    def test_buffer_is_capped_at_the_size(self):
+        fp = RecordingFile(self.data[:300])
+        self.upload(fp)
+        self.assertEqual(self.stored(), self.data[:300])
+        self.assertEqual(set(fp.sizes), set([300]))
+
+    def test_without_memoryview(self):
+        with patch('boto.s3.key.memoryview', None):
+            with tempfile.TemporaryFile() as fp:
+                fp.write(self.data)
+                fp.seek(0)
+                self.upload(fp)
+        self.assertEqual(self.stored(), self.data)
+
+    def test_unknown_size_starts_small(self):
+        fp = RecordingFile(self.data)
+        key = self.bucket.new_key('key')
+        etag = '"%s"' % hashlib.md5(self.data).hexdigest()
+        http_conn = Mock()
+        response = http_conn.getresponse.return_value
+        response.status = 200
+        response.getheader.side_effect = lambda name, default=None: (
+            etag if name == 'etag' else default)
+
+        def make_request(method, bucket, key, headers=None, data='',
+                         query_args=None, sender=None, **kwargs):
+            return sender(http_conn, method, '/', data, headers)
+        with patch.object(Key, 'BufferSize', 100):
+            with patch.object(self.bucket.connection, 'make_request',
+                              make_request):
+                key.send_file(fp, chunked_transfer=True)
+        self.assertEqual(key.size, len(self.data))
+        self.assertEqual(fp.sizes, [100, 200, 400, 800, 1000, 1000, 1000])
+
+    def test_buffer_size_is_configurable(self):
+        with patch('boto.config.getint', return_value=500):
+            key = self.bucket.new_key('key')
+            self.assertEqual(key._send_buffer_size(), 500)
+            self.assertEqual(key._send_buffer_size(100), 100)
+
+
 if __name__ == '__main__':
     unittest.main()
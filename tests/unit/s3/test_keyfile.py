@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+import io
+import tarfile
+import zipfile
+from StringIO import StringIO
+
+from tests.unit import unittest
+
+from boto.exception import S3ResponseError
+from boto.utils import LRUCache
+from tests.unit.fakeaws import FakeAWS, S3Object
+
+DATA = ''.join(chr(i % 251) for i in xrange(10000))
+
+
+def record_ranges(ranges):
+    """A FakeAWS hook appending the Range header of every GET."""
+    def hook(handler):
+        if handler.command == 'GET':
+            ranges.append(handler.headers.get('Range'))
+    return hook
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_get(self):
+        cache = LRUCache(2)
+        cache['a'] = 1
+        cache['b'] = 2
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c', 3), 3)
+        cache['c'] = 3
+        # The get made 'a' the most recently used, so 'b' was dropped.
+        self.assertEqual(list(cache), ['c', 'a'])
+
+
+class TestKeyFile(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeAWS().start()
+        self.addCleanup(self.fake.stop)
+        self.bucket = self.fake.s3_connection().create_bucket('bucket')
+        self.fake.store.buckets['bucket']['data'] = S3Object(DATA)
+        self.ranges = []
+        self.fake.hooks.append(record_ranges(self.ranges))
+
+    def open(self, name='data', **kwargs):
+        kwargs.setdefault('block_size', 1000)
+        kwargs.setdefault('cache_blocks', 4)
+        f = self.bucket.new_key(name).open_seekable(**kwargs)
+        self.addCleanup(f.close)
+        return f
+
+    def test_seek_and_read(self):
+        f = self.open()
+        self.assertEqual(f.size, len(DATA))
+        self.assertEqual(f.read(10), DATA[:10])
+        f.seek(995)
+        self.assertEqual(f.read(10), DATA[995:1005])
+        self.assertEqual(f.tell(), 1005)
+        f.seek(-5, io.SEEK_END)
+        self.assertEqual(f.read(), DATA[-5:])
+        self.assertEqual(f.read(), '')
+        f.seek(-10, io.SEEK_CUR)
+        self.assertEqual(f.read(3), DATA[-10:-7])
+        f.seek(20000)
+        self.assertEqual(f.read(10), '')
+        self.assertRaises(ValueError, f.seek, -1)
+        f.seek(0)
+        self.assertEqual(f.read(), DATA)
+
+    def test_missing_key(self):
+        self.assertRaises(S3ResponseError, self.open, 'missing')
+
+    def test_cached_blocks_are_not_fetched_again(self):
+        f = self.open()
+        f.seek(5500)
+        f.read(100)
+        f.seek(5000)
+        f.read(1000)
+        self.assertEqual(f.num_requests, 1)
+        # Blocks 1 and 2 are fetched in one GET.
+        f.seek(1500)
+        self.assertEqual(f.read(1000), DATA[1500:2500])
+        self.assertEqual(self.ranges[-1], 'bytes=1000-2999')
+        self.assertEqual(f.num_requests, 2)
+        # Blocks 3 and 4 are missing.
+        f.seek(2400)
+        self.assertEqual(f.read(2000), DATA[2400:4400])
+        self.assertEqual(self.ranges[-1], 'bytes=3000-4999')
+        self.assertEqual(f.num_requests, 3)
+
+    def test_sequential_reads_read_ahead(self):
+        f = self.open()
+        chunks = []
+        while True:
+            chunk = f.read(500)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        self.assertEqual(''.join(chunks), DATA)
+        # Blocks are read ahead, up to half of the 4 cached, in the GETs
+        # of the blocks that are needed.
+        self.assertEqual(self.ranges, ['bytes=0-1999', 'bytes=2000-4999',
+                                       'bytes=5000-7999', 'bytes=8000-9999'])
+
+    def test_prefetch_threads(self):
+        f = self.open(cache_blocks=8, prefetch_threads=2)
+        reader = io.BufferedReader(f, 300)
+        chunks = []
+        while True:
+            chunk = reader.read(300)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        self.assertEqual(''.join(chunks), DATA)
+        self.assertTrue(f.num_requests >= 10)
+
+    def test_replaced_key_fails(self):
+        f = self.open()
+        f.read(10)
+        self.fake.store.buckets['bucket']['data'] = S3Object('new data')
+        f.seek(5000)
+        self.assertRaises(S3ResponseError, f.read, 10)
+
+    def test_zipfile(self):
+        buf = StringIO()
+        archive = zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED)
+        for i in xrange(20):
+            archive.writestr('member%d' % i, DATA[i * 500:])
+        archive.close()
+        self.fake.store.buckets['bucket']['archive.zip'] = S3Object(
+            buf.getvalue())
+        archive = zipfile.ZipFile(self.open('archive.zip'))
+        self.assertEqual(len(archive.namelist()), 20)
+        self.assertEqual(archive.read('member7'), DATA[3500:])
+
+    def test_tarfile(self):
+        buf = StringIO()
+        archive = tarfile.open(fileobj=buf, mode='w')
+        for i in xrange(3):
+            info = tarfile.TarInfo('member%d' % i)
+            info.size = len(DATA)
+            archive.addfile(info, StringIO(DATA))
+        archive.close()
+        self.fake.store.buckets['bucket']['archive.tar'] = S3Object(
+            buf.getvalue())
+        archive = tarfile.open(fileobj=self.open('archive.tar',
+                                                 block_size=4096))
+        self.assertEqual(archive.getnames(), ['member0', 'member1',
+                                              'member2'])
+        self.assertEqual(archive.extractfile('member2').read(), DATA)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+from tests.unit import unittest
+
+from boto.s3.keyrecord import KeyColumns, KeyRecord
+from boto.s3.prefix import Prefix
+from tests.unit.fakeaws import FakeAWS, S3Object
+
+
+class TestCompactListing(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeAWS().start()
+        self.addCleanup(self.fake.stop)
+        self.bucket = self.fake.s3_connection().create_bucket('bucket')
+        objects = self.fake.store.buckets['bucket']
+        for i in range(1500):
+            objects['key-%04d' % i] = S3Object('x' * (i % 7))
+        objects['dir/a'] = S3Object('')
+        self.names = sorted(objects)
+
+    def test_records_match_keys(self):
+        keys = list(self.bucket.list())
+        records = list(self.bucket.list(compact=True))
+        self.assertEqual(len(records), len(keys))
+        for key, record in zip(keys, records):
+            self.assertTrue(isinstance(record, KeyRecord))
+            self.assertEqual(record.name, key.name)
+            self.assertEqual(record.size, key.size)
+            self.assertEqual(record.etag, key.etag)
+            self.assertEqual(record.last_modified, key.last_modified)
+            self.assertEqual(record.storage_class, key.storage_class)
+            self.assertEqual(record.owner_id, key.owner.id)
+        self.assertTrue(records[0].storage_class is
+                        records[1].storage_class)
+        self.assertFalse(hasattr(records[0], '__dict__'))
+
+    def test_to_key(self):
+        record = list(self.bucket.list(prefix='key-0003', compact=True))[0]
+        key = record.to_key()
+        self.assertEqual(key.name, 'key-0003')
+        self.assertEqual(key.size, 3)
+        self.assertEqual(key.etag, record.etag)
+        self.assertEqual(key.owner.id, 'id')
+        self.assertTrue(key.bucket is self.bucket)
+        self.assertEqual(key.get_contents_as_string(), 'xxx')
+
+    def test_delimiter(self):
+        listed = list(self.bucket.list(delimiter='/', compact=True))
+        prefixes = [p.name for p in listed if isinstance(p, Prefix)]
+        self.assertEqual(prefixes, ['dir/'])
+        self.assertEqual(len(listed), 1501)
+
+    def test_columns(self):
+        columns = KeyColumns(self.bucket)
+        pages = list(self.bucket.list_columns(delimiter='/'))
+        self.assertEqual(len(pages), 2)
+        for page in pages:
+            columns.extend(page)
+        self.assertEqual(columns.prefixes, ['dir/'])
+        self.assertEqual(columns.names, self.names[1:])
+        self.assertEqual(list(columns.sizes),
+                         [i % 7 for i in range(1500)])
+        self.assertEqual(set(columns.storage_classes), set(['STANDARD']))
+        records = list(self.bucket.list(prefix='key-', compact=True))
+        self.assertEqual(list(columns), records)
+        self.assertEqual(columns[3].to_key().get_contents_as_string(),
+                         'xxx')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+from tests.unit import unittest
+from mock import patch
+
+from boto.s3.metadatacache import MetadataCache
+from boto.utils import LRUCache
+from tests.unit.fakeaws import FakeAWS, S3Object
+
+
+def count_heads(heads):
+    """A FakeAWS hook appending the path of every HEAD request."""
+    def hook(handler):
+        if handler.command == 'HEAD':
+            heads.append(handler.url_path)
+    return hook
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_delitem(self):
+        cache = LRUCache(3)
+        for key in 'abc':
+            cache[key] = key
+        del cache['b']
+        self.assertEqual(list(cache), ['c', 'a'])
+        del cache['c']
+        del cache['a']
+        self.assertEqual(list(cache), [])
+        cache['d'] = 'd'
+        self.assertEqual(list(cache), ['d'])
+        self.assertRaises(KeyError, cache.__delitem__, 'a')
+
+
+class TestMetadataCache(unittest.TestCase):
+
+    def test_expiry(self):
+        cache = MetadataCache(10, ttl=30, negative_ttl=5)
+        with patch('time.time', return_value=1000):
+            cache.put('bucket', 'a', {'size': 1})
+            cache.put('bucket', 'b', None)
+        with patch('time.time', return_value=1004):
+            self.assertEqual(cache.get('bucket', 'a'), (True, {'size': 1}))
+            self.assertEqual(cache.get('bucket', 'b'), (True, None))
+        with patch('time.time', return_value=1006):
+            self.assertEqual(cache.get('bucket', 'a'), (True, {'size': 1}))
+            self.assertEqual(cache.get('bucket', 'b'), (False, None))
+        self.assertEqual((cache.hits, cache.negative_hits, cache.misses),
+                         (3, 1, 1))
+        self.assertEqual(cache.hit_rate, 0.75)
+        self.assertEqual(len(cache), 1)
+
+    def test_stale_puts_are_dropped(self):
+        cache = MetadataCache(10)
+        generation = cache.generation
+        cache.invalidate('bucket', 'a')
+        cache.put('bucket', 'a', {'size': 1}, generation)
+        self.assertEqual(cache.get('bucket', 'a'), (False, None))
+
+    def test_unicode_names(self):
+        cache = MetadataCache(10)
+        cache.put('bucket', u'caf\xe9', None)
+        self.assertEqual(cache.get('bucket', 'caf\xc3\xa9'), (True, None))
+        cache.invalidate('bucket', 'caf\xc3\xa9')
+        self.assertEqual(len(cache), 0)
+
+    def test_from_config(self):
+        with patch('boto.config.getint', return_value=0):
+            self.assertEqual(MetadataCache.from_config(), None)
+        with patch('boto.config.getint', return_value=100):
+            with patch('boto.config.getfloat', side_effect=[10.0, 2.0]):
+                cache = MetadataCache.from_config()
+        self.assertEqual((cache.ttl, cache.negative_ttl), (10.0, 2.0))
+
+
+class TestCachedGetKey(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeAWS().start()
+        self.addCleanup(self.fake.stop)
+        self.conn = self.fake.s3_connection()
+        self.conn.metadata_cache = MetadataCache(100)
+        self.bucket = self.conn.create_bucket('bucket')
+        self.objects = self.fake.store.buckets['bucket']
+        self.objects['hot'] = S3Object('data', metadata={
+            'x-amz-meta-color': 'red'})
+        self.heads = []
+        self.fake.hooks.append(count_heads(self.heads))
+
+    def test_hits(self):
+        for _ in xrange(3):
+            key = self.bucket.lookup('hot')
+            self.assertEqual(key.size, 4)
+            self.assertEqual(key.etag, self.objects['hot'].etag)
+            self.assertEqual(key.get_metadata('color'), 'red')
+            self.assertTrue(key.bucket is self.bucket)
+        key.metadata['color'] = 'blue'
+        self.assertEqual(self.bucket.get_key('hot').get_metadata('color'),
+                         'red')
+        # Another Bucket of the same connection shares the cache.
+        self.assertTrue('hot' in self.conn.get_bucket('bucket',
+                                                      validate=False))
+        self.assertEqual(len(self.heads), 1)
+        self.assertEqual(self.conn.metadata_cache.hits, 4)
+
+    def test_edits_of_a_missed_key_are_not_cached(self):
+        key = self.bucket.get_key('hot')
+        key.metadata['evil'] = 'yes'
+        key.set_metadata('shape', 'round')
+        key.resp = 'response'
+        cached = self.bucket.get_key('hot')
+        self.assertEqual(cached.metadata, {'color': 'red'})
+        self.assertEqual(cached.resp, None)
+        self.assertEqual(len(self.heads), 1)
+
+    def test_negative_hits(self):
+        self.assertEqual(self.bucket.get_key('missing'), None)
+        self.assertEqual(self.bucket.get_key('missing'), None)
+        self.assertEqual(len(self.heads), 1)
+        self.assertEqual(self.conn.metadata_cache.negative_hits, 1)
+
+    def test_requests_with_options_are_not_cached(self):
+        self.bucket.get_key('hot', headers={'x-amz-foo': 'bar'})
+        self.bucket.get_key('hot', version_id='null')
+        self.bucket.get_key('hot')
+        self.bucket.get_key('hot', response_headers={
+            'response-content-type': 'text/html'})
+        self.assertEqual(len(self.heads), 4)
+
+    def test_writes_invalidate(self):
+        key = self.bucket.new_key('new')
+        self.assertEqual(self.bucket.get_key('new'), None)
+        key.set_contents_from_string('new data')
+        self.assertEqual(self.bucket.get_key('new').size, 8)
+        key = self.bucket.get_key('hot')
+        key.set_remote_metadata({'x-amz-meta-color': 'green'}, {}, False)
+        self.assertEqual(self.bucket.get_key('hot').get_metadata('color'),
+                         'green')
+        self.bucket.copy_key('new', 'bucket', 'hot')
+        self.assertEqual(self.bucket.get_key('new').size, 4)
+        self.bucket.delete_key('new')
+        self.assertEqual(self.bucket.get_key('new'), None)
+        self.bucket.delete_keys(['hot'])
+        self.assertEqual(self.bucket.get_key('hot'), None)
+        self.assertEqual(self.conn.metadata_cache.hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+import os
+import shutil
+import tempfile
+
+from tests.unit import unittest
+from mock import patch
+
+from boto.s3.sync import LocalFile, Sync, SyncManifest
+from boto.s3.sync import merge_listings, walk_directory
+from tests.unit.fakeaws import FakeAWS, S3Object
+
+
+def record_requests(requests):
+    """A FakeAWS hook appending the method and path of every request."""
+    def hook(handler):
+        requests.append((handler.command, handler.url_path))
+    return hook
+
+
+class SyncTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeAWS().start()
+        self.addCleanup(self.fake.stop)
+        self.bucket = self.fake.s3_connection().create_bucket('bucket')
+        self.objects = self.fake.store.buckets['bucket']
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.requests = []
+        self.fake.hooks.append(record_requests(self.requests))
+        self.manifest = SyncManifest(os.path.join(self.root, '.manifest'))
+        self.tree = os.path.join(self.root, 'tree')
+        os.mkdir(self.tree)
+
+    def write(self, relpath, data):
+        path = os.path.join(self.tree, *relpath.split('/'))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def read(self, relpath):
+        with open(os.path.join(self.tree, *relpath.split('/')), 'rb') as f:
+            return f.read()
+
+    def sync(self, **kwargs):
+        return Sync(self.bucket, num_threads=3, **kwargs)
+
+    def transfers(self, method):
+        return sorted(path for command, path in self.requests
+                      if command == method)
+
+
+class TestListings(unittest.TestCase):
+
+    def test_merge_listings(self):
+        local = [LocalFile(name, None, 0, 0) for name in ('a', 'c', 'd')]
+        remote = [LocalFile(name, None, 0, 0) for name in
+                  (u'b', u'c', u'\xe9')]
+        pairs = [(l and l.name, r and r.name) for l, r in
+                 merge_listings(local, remote)]
+        self.assertEqual(pairs, [('a', None), (None, 'b'), ('c', 'c'),
+                                 ('d', None), (None, u'\xe9')])
+
+    def test_walk_directory(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        os.makedirs(os.path.join(root, 'a', 'b'))
+        for relpath in ('a/b/c', 'a-b', 'z'):
+            open(os.path.join(root, *relpath.split('/')), 'w').close()
+        self.assertEqual([f.name for f in walk_directory(root, 'p/')],
+                         ['p/a-b', 'p/a/b/c', 'p/z'])
+
+
+class TestUpload(SyncTestCase):
+
+    def test_upload_tree(self):
+        self.write('a', 'aaa')
+        self.write('dir/b', 'bb')
+        result = self.sync().upload(self.tree, 'prefix/')
+        self.assertEqual((result.transferred, result.unchanged), (2, 0))
+        self.assertEqual(self.objects['prefix/a'].data, 'aaa')
+        self.assertEqual(self.objects['prefix/dir/b'].data, 'bb')
+
+    def test_only_changes_are_uploaded(self):
+        self.write('a', 'aaa')
+        self.write('b', 'bb')
+        self.write('c', 'c')
+        self.sync().upload(self.tree)
+        self.write('a', 'AAA')
+        self.write('b', 'bbb')
+        del self.requests[:]
+        result = self.sync().upload(self.tree)
+        self.assertEqual((result.transferred, result.unchanged), (2, 1))
+        self.assertEqual(self.transfers('PUT'), ['/bucket/a', '/bucket/b'])
+        self.assertEqual(self.objects['a'].data, 'AAA')
+
+    def test_manifest_skips_hashing(self):
+        self.write('a', 'aaa')
+        self.sync(manifest=self.manifest).upload(self.tree)
+        with patch('boto.s3.sync.hash_file') as hash_file:
+            result = self.sync(manifest=self.manifest).upload(self.tree)
+            self.assertFalse(hash_file.called)
+        self.assertEqual(result.unchanged, 1)
+        # A key changed behind the manifest's back is uploaded again.
+        self.objects['a'] = S3Object('xyz')
+        result = self.sync(manifest=self.manifest).upload(self.tree)
+        self.assertEqual(result.transferred, 1)
+        self.assertEqual(self.objects['a'].data, 'aaa')
+
+    def test_multipart_etags_are_compared(self):
+        data = os.urandom(3 * 1024 * 1024)
+        self.write('big', data)
+        with patch('boto.s3.key.multipart_threshold',
+                   return_value=1024 * 1024):
+            with patch('boto.s3.concurrent.MIN_PART_SIZE', 1024 * 1024):
+                with patch('boto.s3.concurrent.DEFAULT_PART_SIZE',
+                           1024 * 1024):
+                    self.sync().upload(self.tree)
+                    self.assertTrue(self.objects['big'].etag.endswith('-3"'))
+                    result = self.sync().upload(self.tree)
+                    self.assertEqual(result.unchanged, 1)
+                    self.write('big', data[:-1] + 'x')
+                    result = self.sync().upload(self.tree)
+                    self.assertEqual(result.transferred, 1)
+
+    def test_delete_extraneous_keys(self):
+        self.write('a', 'aaa')
+        self.objects['b'] = S3Object('b')
+        self.objects['dir/'] = S3Object('')
+        self.objects['other/c'] = S3Object('c')
+        result = self.sync(manifest=self.manifest).upload(self.tree,
+                                                          delete=True)
+        self.assertEqual(result.deleted, 2)
+        self.assertEqual(sorted(self.objects), ['a', 'dir/'])
+
+    def test_errors_are_collected(self):
+        self.write('a', 'aaa')
+        self.write('b', 'bbb')
+
+        def fail_b(handler):
+            if handler.command == 'PUT' and handler.url_path.endswith('/b'):
+                handler.error(403, 'AccessDenied')
+                return True
+        self.fake.hooks.append(fail_b)
+        result = self.sync().upload(self.tree)
+        self.assertEqual(result.transferred, 1)
+        self.assertEqual([name for name, e in result.errors], ['b'])
+
+
+class TestDownload(SyncTestCase):
+
+    def test_download_prefix(self):
+        self.objects['p/a'] = S3Object('aaa')
+        self.objects['p/dir/b'] = S3Object('bb')
+        self.objects['q'] = S3Object('q')
+        result = self.sync().download(self.tree, 'p/')
+        self.assertEqual(result.transferred, 2)
+        self.assertEqual(self.read('a'), 'aaa')
+        self.assertEqual(self.read('dir/b'), 'bb')
+        self.assertEqual(sorted(os.listdir(self.tree)), ['a', 'dir'])
+
+    def test_only_changes_are_downloaded(self):
+        self.objects['a'] = S3Object('aaa')
+        self.objects['b'] = S3Object('bbb')
+        self.sync(manifest=self.manifest).download(self.tree)
+        self.objects['b'] = S3Object('BBB')
+        del self.requests[:]
+        result = self.sync(manifest=self.manifest).download(self.tree)
+        self.assertEqual((result.transferred, result.unchanged), (1, 1))
+        self.assertEqual(self.transfers('GET'), ['/bucket/', '/bucket/b'])
+        self.assertEqual(self.read('b'), 'BBB')
+
+    def test_delete_extraneous_files(self):
+        self.objects['a'] = S3Object('aaa')
+        self.write('a', 'old')
+        self.write('dir/b', 'bb')
+        result = self.sync().download(self.tree, delete=True)
+        self.assertEqual((result.transferred, result.deleted), (1, 1))
+        self.assertEqual(self.read('a'), 'aaa')
+        self.assertFalse(os.path.exists(os.path.join(self.tree, 'dir', 'b')))
+
+    def test_unsafe_names_are_errors(self):
+        self.objects['../escape'] = S3Object('x')
+        self.objects['ok'] = S3Object('ok')
+        result = self.sync().download(self.tree)
+        self.assertEqual(result.transferred, 1)
+        self.assertEqual([name for name, e in result.errors], ['../escape'])
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'escape')))
+
+
+if __name__ == '__main__':
+    unittest.main()
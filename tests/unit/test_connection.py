@@ -19,8 +19,17 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
 # IN THE SOFTWARE.
 #
+import time
+from StringIO import StringIO
+
 from tests.unit import unittest
+from mock import Mock
+
+import boto.handler
 from boto.connection import AWSQueryConnection
+from boto.exception import BotoServerError
+from boto.resultset import ResultSet
+from boto.connection import ConnectionPool, HostConnectionPool
 
 
 class TestListParamsSerialization(unittest.TestCase):
@@ -56,5 +65,159 @@ class TestListParamsSerialization(unittest.TestCase):
         }, params)
 
 
+class Item(object):
+    def __init__(self, connection):
+        self.name = None
+
+    def startElement(self, name, attrs, connection):
+        return None
+
+    def endElement(self, name, value, connection):
+        if name == 'Name':
+            self.name = value
+
+
+class StreamingResponse(StringIO):
+    def __init__(self, status, body):
+        StringIO.__init__(self, body)
+        self.status = status
+        self.reason = 'reason'
+
+
+LIST_BODY = ('<ListResponse><Items><member><Name>first</Name></member>'
+             '<member><Name>second</Name></member></Items></ListResponse>')
+
+
+class TestStreamingParse(unittest.TestCase):
+    def setUp(self):
+        self.connection = AWSQueryConnection('access_key', 'secret_key')
+        self.connection.streaming_parse = True
+
+    def test_parse_stream_in_small_chunks(self):
+        rs = ResultSet([('member', Item)])
+        h = boto.handler.XmlHandler(rs, None)
+        self.assertEqual(boto.handler.parse_stream(StringIO(LIST_BODY), h, 3),
+                         len(LIST_BODY))
+        self.assertEqual([item.name for item in rs], ['first', 'second'])
+
+    def test_list_response_is_parsed_from_the_stream(self):
+        response = StreamingResponse(200, LIST_BODY)
+        rs = self.connection._process_list_response(response,
+                                                    [('member', Item)])
+        self.assertEqual([item.name for item in rs], ['first', 'second'])
+
+    def test_empty_body_raises(self):
+        response = StreamingResponse(200, '')
+        self.assertRaises(BotoServerError,
+                          self.connection._process_status_response, response)
+
+    def test_error_response_is_read_fully(self):
+        response = StreamingResponse(400, '<Error/>')
+        try:
+            self.connection._process_status_response(response)
+        except BotoServerError, e:
+            self.assertEqual(e.body, '<Error/>')
+        else:
+            self.fail('BotoServerError not raised')
+
+
+class FakeConnection(object):
+    """A connection whose response is always fully read."""
+    pass
+
+
+class TestHostConnectionPool(unittest.TestCase):
+    def test_get_is_lifo(self):
+        pool = HostConnectionPool(max_size=10)
+        first, second = FakeConnection(), FakeConnection()
+        pool.put(first)
+        pool.put(second)
+        self.assertIs(pool.get(), second)
+        self.assertIs(pool.get(), first)
+        self.assertIsNone(pool.get())
+
+    def test_busy_connection_is_skipped(self):
+        pool = HostConnectionPool(max_size=10)
+        idle, busy = FakeConnection(), FakeConnection()
+        busy._HTTPConnection__response = Mock()
+        busy._HTTPConnection__response.isclosed.return_value = False
+        pool.put(idle)
+        pool.put(busy)
+        self.assertIs(pool.get(), idle)
+        # The busy connection stays in the pool until it is ready.
+        self.assertEqual(pool.size(), 1)
+        self.assertIsNone(pool.get())
+        busy._HTTPConnection__response.isclosed.return_value = True
+        self.assertIs(pool.get(), busy)
+
+    def test_max_size_evicts_oldest(self):
+        pool = HostConnectionPool(max_size=2)
+        conns = [FakeConnection() for _ in range(3)]
+        for conn in conns:
+            pool.put(conn)
+        self.assertEqual(pool.size(), 2)
+        self.assertIs(pool.get(), conns[2])
+        self.assertIs(pool.get(), conns[1])
+        self.assertIsNone(pool.get())
+        self.assertEqual(pool.get_stats()['evictions'], 1)
+
+    def test_size_zero_keeps_no_connections(self):
+        pool = HostConnectionPool(max_size=0)
+        conn = FakeConnection()
+        pool.mark_in_use(conn)
+        pool.put(conn)
+        self.assertEqual(pool.size(), 0)
+        self.assertIsNone(pool.get())
+        self.assertEqual(pool.get_stats(),
+                         {'hits': 0, 'misses': 1, 'evictions': 1,
+                          'idle': 0, 'in_use': 0})
+
+    def test_clean_removes_stale_connections(self):
+        pool = HostConnectionPool(max_size=10)
+        pool.put(FakeConnection())
+        pool.queue[0] = (pool.queue[0][0],
+                         time.time() - ConnectionPool.STALE_DURATION - 1)
+        pool.put(FakeConnection())
+        pool.clean()
+        self.assertEqual(pool.size(), 1)
+        self.assertEqual(pool.get_stats()['evictions'], 1)
+
+    def test_stats(self):
+        pool = HostConnectionPool(max_size=10)
+        self.assertIsNone(pool.get())
+        conn = FakeConnection()
+        pool.mark_in_use(conn)
+        self.assertEqual(pool.get_stats()['in_use'], 1)
+        pool.put(conn)
+        self.assertIs(pool.get(), conn)
+        self.assertEqual(pool.get_stats(),
+                         {'hits': 1, 'misses': 1, 'evictions': 0,
+                          'idle': 0, 'in_use': 1})
+
+
+class TestConnectionPool(unittest.TestCase):
+    def test_pools_are_per_host(self):
+        pool = ConnectionPool()
+        conn = FakeConnection()
+        pool.put_http_connection('a.example.com', True, conn)
+        self.assertIsNone(pool.get_http_connection('b.example.com', True))
+        self.assertIsNone(pool.get_http_connection('a.example.com', False))
+        self.assertIs(pool.get_http_connection('a.example.com', True), conn)
+        stats = pool.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(
+            pool.get_host_stats()[('a.example.com', True)]['hits'], 1)
+
+    def test_clean_keeps_counters_of_removed_pools(self):
+        pool = ConnectionPool()
+        pool.put_http_connection('a.example.com', True, FakeConnection())
+        pool.get_http_connection('a.example.com', True)
+        pool.last_clean_time = 0.0
+        pool.clean()
+        self.assertEqual(pool.host_to_pool, {})
+        self.assertEqual(pool.get_stats()['hits'], 1)
+
+
 if __name__ == '__main__':
     unittest.main()
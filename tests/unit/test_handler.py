@@ -0,0 +1,192 @@
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+import inspect
+import os
+import xml.sax
+from StringIO import StringIO
+
+from tests.unit import unittest
+from mock import Mock
+
+import boto.handler
+from boto.connection import AWSQueryConnection
+from boto.ec2.instance import Reservation
+from boto.handler import XmlHandler
+from boto.resultset import ResultSet
+from boto.s3.bucket import Bucket
+from boto.s3.key import Key
+from tests.unit.ec2.test_instance import DESCRIBE_INSTANCE_VPC
+
+LIST_BUCKET_RESULT = """<?xml version="1.0" encoding="UTF-8"?>
+<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">
+  <Name>bucket</Name><Prefix/><Marker/><MaxKeys>1000</MaxKeys>
+  <IsTruncated>false</IsTruncated>
+  <Contents>
+    <Key>my &amp; image.jpg</Key>
+    <LastModified>2009-10-12T17:50:30.000Z</LastModified>
+    <ETag>&quot;fba9dede5f27731c9771645a39863328&quot;</ETag>
+    <Size>434234</Size>
+    <StorageClass>STANDARD</StorageClass>
+    <Owner><ID>8a6925ce4a7f21c32aa379004fef</ID>
+      <DisplayName>mtd@amazon.com</DisplayName></Owner>
+  </Contents>
+</ListBucketResult>"""
+
+
+class Recorder(object):
+    """Records the events an object model receives from XmlHandler."""
+
+    def __init__(self, events):
+        self.events = events
+
+    def startElement(self, name, attrs, connection):
+        self.events.append(('start', name, sorted(attrs.items())))
+        return Recorder(self.events)
+
+    def endElement(self, name, value, connection):
+        self.events.append(('end', name, value))
+
+
+def record_events(body, parser):
+    events = []
+    boto.handler.parse_string(body, XmlHandler(Recorder(events), None),
+                              parser)
+    return events
+
+
+def state(obj, seen=None):
+    """A comparable snapshot of the attributes reachable from obj."""
+    if seen is None:
+        seen = set()
+    if isinstance(obj, (basestring, int, long, float, bool, type(None))):
+        return obj
+    if inspect.isclass(obj):
+        return obj.__name__
+    if id(obj) in seen:
+        return '<cycle>'
+    seen.add(id(obj))
+    if isinstance(obj, (list, tuple)):
+        result = [state(item, seen) for item in obj]
+        if hasattr(obj, '__dict__'):
+            result.append(state(vars(obj), seen))
+        return result
+    if isinstance(obj, dict):
+        return dict((key, state(value, seen)) for key, value in obj.items())
+    if hasattr(obj, '__dict__'):
+        return (obj.__class__.__name__, state(vars(obj), seen))
+    return repr(obj)
+
+
+def fixture_bodies():
+    """The XML bodies of the AWSMockServiceTestCase fixtures."""
+    bodies = []
+    root = os.path.dirname(os.path.abspath(__file__))
+    for dirpath, dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            if not (filename.startswith('test_') and
+                    filename.endswith('.py')):
+                continue
+            path = os.path.join(dirpath, filename)[len(root) + 1:-3]
+            name = 'tests.unit.' + path.replace(os.sep, '.')
+            try:
+                module = __import__(name, fromlist=['*'])
+            except ImportError:
+                # Not in a package; nose loads these by path.
+                continue
+            for value in vars(module).values():
+                if inspect.isclass(value) and 'default_body' in vars(value):
+                    try:
+                        body = value.__dict__['default_body'](None)
+                    except Exception:
+                        continue
+                    if isinstance(body, str) and body.strip().startswith('<'):
+                        bodies.append((value.__name__, body.strip()))
+    return bodies
+
+
+class TestParserBackends(unittest.TestCase):
+
+    def test_fixtures_produce_identical_events(self):
+        bodies = fixture_bodies()
+        self.assertTrue(len(bodies) > 10)
+        for name, body in bodies:
+            self.assertEqual(record_events(body, 'sax'),
+                             record_events(body, 'expat'), name)
+
+    def test_reservations_are_identical(self):
+        results = []
+        for parser in boto.handler.PARSERS:
+            rs = ResultSet([('item', Reservation)])
+            boto.handler.parse_string(DESCRIBE_INSTANCE_VPC,
+                                      XmlHandler(rs, None), parser)
+            results.append(state(rs))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[1][0][1]['instances'][0][1]['id'],
+                         'i-instance')
+
+    def test_bucket_listing_is_identical(self):
+        results = []
+        for parser in boto.handler.PARSERS:
+            bucket = Bucket(Mock(), 'bucket')
+            rs = ResultSet([('Contents', Key)])
+            boto.handler.parse_stream(StringIO(LIST_BUCKET_RESULT),
+                                      XmlHandler(rs, bucket), chunk_size=17,
+                                      parser=parser)
+            self.assertEqual(rs[0].name, u'my & image.jpg')
+            results.append(state([vars(key) for key in rs]))
+        self.assertEqual(results[0], results[1])
+
+    def test_malformed_xml_raises_sax_error(self):
+        for parser in boto.handler.PARSERS:
+            self.assertRaises(xml.sax.SAXParseException,
+                              boto.handler.parse_string, '<a><b></a>',
+                              XmlHandler(ResultSet(), None), parser)
+            self.assertRaises(xml.sax.SAXParseException,
+                              boto.handler.parse_string, '',
+                              XmlHandler(ResultSet(), None), parser)
+
+    def test_other_content_handlers(self):
+        handler = Mock(spec=xml.sax.ContentHandler)
+        boto.handler.parse_string('<a x="1">t</a>', handler, 'expat')
+        attrs = handler.startElement.call_args[0][1]
+        self.assertEqual(attrs.getValue('x'), '1')
+        handler.characters.assert_called_with('t')
+        handler.endElement.assert_called_with('a')
+
+    def test_connection_uses_its_parser(self):
+        connection = AWSQueryConnection('access_key', 'secret_key')
+        connection.xml_parser = 'expat'
+        response = Mock(status=200)
+        response.read.return_value = (
+            '<Response><return>true</return></Response>')
+        connection.make_request = Mock(return_value=response)
+        original = boto.handler._ExpatDriver
+        boto.handler._ExpatDriver = Mock(side_effect=original)
+        try:
+            self.assertTrue(connection.get_status('Ping', {}))
+            self.assertTrue(boto.handler._ExpatDriver.called)
+        finally:
+            boto.handler._ExpatDriver = original
+
+
+if __name__ == '__main__':
+    unittest.main()
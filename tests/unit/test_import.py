@@ -0,0 +1,66 @@
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+import os
+import subprocess
+import sys
+
+from tests.unit import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+
+def modules_loaded_by(statement):
+    source = ('import sys\n%s\n'
+              'print "\\n".join(name for name, module in sys.modules.items()'
+              ' if module is not None)' % statement)
+    output = subprocess.Popen([sys.executable, '-S', '-c', source], cwd=ROOT,
+                              stdout=subprocess.PIPE).communicate()[0]
+    return set(output.split())
+
+
+class TestImportTime(unittest.TestCase):
+    """Keeps modules that are only needed on demand out of ``import boto``."""
+
+    def test_import_boto_is_lean(self):
+        loaded = modules_loaded_by('import boto')
+        self.assertTrue('boto.pyami.config' in loaded)
+        for module in ('logging.config', 'urlparse', 'platform', 'glob',
+                       'boto.utils', 'boto.connection'):
+            self.assertFalse(module in loaded, module)
+
+    def test_import_connection_is_lean(self):
+        loaded = modules_loaded_by('import boto.connection')
+        self.assertTrue('httplib' in loaded)
+        for module in ('smtplib', 'email.mime.multipart', 'subprocess',
+                       'urllib2', 'gzip', 'boto.cacerts'):
+            self.assertFalse(module in loaded, module)
+
+    def test_storage_uri_is_still_a_function(self):
+        import boto
+        self.assertTrue(callable(boto.storage_uri))
+        self.assertEqual(boto.storage_uri('s3://bucket/key').object_name,
+                         'key')
+
+
+if __name__ == '__main__':
+    unittest.main()
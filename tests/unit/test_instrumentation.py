@@ -0,0 +1,165 @@
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+import threading
+import BaseHTTPServer
+import SocketServer
+
+from tests.unit import unittest
+from mock import patch
+
+import boto.instrumentation
+from boto.connection import AWSQueryConnection
+from boto.exception import BotoServerError
+from boto.instrumentation import LatencyHistogram
+
+STATUS_BODY = '<Response><return>true</return></Response>'
+
+
+class FakeHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    responses = []
+
+    def do_GET(self):
+        status, body = self.responses.pop(0)
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadedServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Pooled keep-alive connections are dropped when the test ends.
+        pass
+
+
+class TestRequestRecords(unittest.TestCase):
+    def setUp(self):
+        FakeHandler.responses = []
+        self.server = ThreadedServer(('127.0.0.1', 0), FakeHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.connection = AWSQueryConnection(
+            'access_key', 'secret_key', is_secure=False, host='127.0.0.1',
+            port=self.server.server_address[1])
+        self.records = []
+        self.connection.add_request_listener(self.records.append)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_no_records_without_listeners(self):
+        self.connection.remove_request_listener(self.records.append)
+        FakeHandler.responses = [(200, STATUS_BODY)]
+        response = self.connection.make_request('Ping')
+        self.assertFalse(hasattr(response, 'request_record'))
+
+    def test_get_status_records_every_phase(self):
+        FakeHandler.responses = [(200, STATUS_BODY), (200, STATUS_BODY)]
+        self.assertTrue(self.connection.get_status('Ping', {}))
+        self.assertTrue(self.connection.get_status('Ping', {}))
+        self.assertEqual(len(self.records), 2)
+        first, second = self.records
+        self.assertEqual(first.operation, 'Ping')
+        self.assertEqual(first.host, self.connection.server_name())
+        self.assertEqual(first.status, 200)
+        self.assertEqual(first.attempts, 1)
+        self.assertEqual(first.bytes_in, len(STATUS_BODY))
+        self.assertFalse(first.pool_hit)
+        self.assertTrue(second.pool_hit)
+        self.assertEqual(second.connect, None)
+        for phase in ('checkout', 'connect', 'send', 'ttfb', 'body',
+                      'parse', 'total'):
+            self.assertTrue(getattr(first, phase) >= 0, phase)
+        self.assertTrue(first.total >= first.ttfb + first.parse)
+
+    @patch('boto.retry.random.random', return_value=0)
+    def test_retries_are_recorded(self, mock_random):
+        FakeHandler.responses = [(503, 'busy'), (200, STATUS_BODY)]
+        self.connection.get_status('Ping', {})
+        record = self.records[0]
+        self.assertEqual(record.attempts, 2)
+        self.assertEqual(record.retries, [(0, 'HTTP 503', 0)])
+
+    def test_errors_are_recorded(self):
+        FakeHandler.responses = [(400, '<Error/>')]
+        self.assertRaises(BotoServerError, self.connection.get_status,
+                          'Ping', {})
+        self.assertEqual(len(self.records), 1)
+        self.assertEqual(self.records[0].status, 400)
+        self.assertEqual(self.records[0].error, 'BotoServerError')
+
+    def test_global_listener(self):
+        self.connection.remove_request_listener(self.records.append)
+        records = []
+        boto.instrumentation.add_listener(records.append)
+        try:
+            FakeHandler.responses = [(200, STATUS_BODY)]
+            self.connection.make_request('Ping')
+        finally:
+            boto.instrumentation.remove_listener(records.append)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].body, None)
+
+
+class FakeRecord(object):
+    def __init__(self, total, retries=()):
+        self.service = 'sqs'
+        self.operation = 'Ping'
+        self.retries = retries
+        for phase in boto.instrumentation.PHASES:
+            setattr(self, phase, None)
+        self.total = total
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for i in range(1, 101):
+            histogram(FakeRecord(i / 1000.0))
+        p50 = histogram.percentile('sqs', 'Ping', 'total', 50)
+        p99 = histogram.percentile('sqs', 'Ping', 'total', 99)
+        self.assertTrue(abs(p50 - 0.050) < 0.050 * 0.05, p50)
+        self.assertTrue(abs(p99 - 0.099) < 0.099 * 0.05, p99)
+        summary = histogram.summary()[('sqs', 'Ping', 'total')]
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['max'], 0.1)
+        self.assertEqual(histogram.percentile('sqs', 'Ping', 'parse', 50),
+                         None)
+
+    def test_retry_reasons(self):
+        histogram = LatencyHistogram()
+        histogram(FakeRecord(1, [(0, 'HTTP 503', 0.1)]))
+        histogram(FakeRecord(1, [(0, 'HTTP 503', 0.1)]))
+        self.assertEqual(histogram.retry_reasons[('sqs', 'Ping', 'HTTP 503')],
+                         2)
+
+
+if __name__ == '__main__':
+    unittest.main()
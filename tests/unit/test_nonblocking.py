@@ -0,0 +1,158 @@
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+import socket
+import threading
+import BaseHTTPServer
+import SocketServer
+
+from tests.unit import unittest
+from mock import patch
+
+from boto.connection import AWSQueryConnection
+from boto.exception import BotoServerError
+from boto.nonblocking import EventLoop
+
+STATUS_BODY = '<Response><return>true</return></Response>'
+
+
+class FakeHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Responses queued by the test, keyed by Action.
+    responses = {}
+
+    def do_GET(self):
+        action = self.path.split('Action=')[1].split('&')[0]
+        status, body, chunked = self.responses[action].pop(0)
+        self.send_response(status)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for i in range(0, len(body), 7):
+                piece = body[i:i + 7]
+                self.wfile.write('%x\r\n%s\r\n' % (len(piece), piece))
+            self.wfile.write('0\r\n\r\n')
+        else:
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadedServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class TestNonBlockingTransport(unittest.TestCase):
+    def setUp(self):
+        FakeHandler.responses = {}
+        self.server = ThreadedServer(('127.0.0.1', 0), FakeHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.connection = AWSQueryConnection(
+            'access_key', 'secret_key', is_secure=False, host='127.0.0.1',
+            port=self.server.server_address[1])
+        self.loop = EventLoop()
+
+    def tearDown(self):
+        self.loop.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get_status_async(self):
+        FakeHandler.responses['Ping'] = [(200, STATUS_BODY, False)]
+        future = self.connection.get_status_async('Ping', {}, loop=self.loop)
+        self.assertTrue(future.result())
+
+    def test_chunked_response(self):
+        FakeHandler.responses['Ping'] = [(200, STATUS_BODY, True)]
+        future = self.connection.make_request_async('Ping', loop=self.loop)
+        self.assertEqual(future.result().read(), STATUS_BODY)
+
+    def test_many_requests_in_flight_share_connections(self):
+        self.loop.max_connections_per_host = 4
+        FakeHandler.responses['Ping'] = [(200, STATUS_BODY, False)] * 20
+        futures = [self.connection.get_status_async('Ping', {},
+                                                    loop=self.loop)
+                   for _ in range(20)]
+        self.loop.run()
+        self.assertEqual([f.result() for f in futures], [True] * 20)
+        self.assertTrue(len(self.loop.map) <= 4)
+
+    def test_addresses_are_looked_up_once(self):
+        self.loop.max_connections_per_host = 4
+        FakeHandler.responses['Ping'] = [(200, STATUS_BODY, False)] * 8
+        lookups = []
+        getaddrinfo = socket.getaddrinfo
+
+        def record(*args):
+            lookups.append(threading.current_thread())
+            return getaddrinfo(*args)
+        with patch('socket.getaddrinfo', record):
+            futures = [self.connection.get_status_async('Ping', {},
+                                                        loop=self.loop)
+                       for _ in range(8)]
+            self.loop.run()
+        self.assertEqual([f.result() for f in futures], [True] * 8)
+        self.assertEqual(len(lookups), 1)
+        self.assertNotEqual(lookups[0], threading.current_thread())
+
+    def test_failed_lookup_fails_the_request(self):
+        self.connection.num_retries = 0
+        error = socket.gaierror(-2, 'Name or service not known')
+        with patch('socket.getaddrinfo', side_effect=error):
+            future = self.connection.make_request_async('Ping',
+                                                        loop=self.loop)
+            self.loop.run()
+        self.assertRaises(socket.gaierror, future.result)
+
+    def test_timers_fire_in_time_order(self):
+        fired = []
+        for delay in (0.03, 0.01, 0.02, 0.01):
+            self.loop.call_later(delay, fired.append, delay)
+        self.loop.run()
+        self.assertEqual(fired, [0.01, 0.01, 0.02, 0.03])
+
+    @patch('boto.retry.random.random', return_value=0)
+    def test_retries_server_errors(self, mock_random):
+        FakeHandler.responses['Ping'] = [(503, 'busy', False),
+                                         (200, STATUS_BODY, False)]
+        future = self.connection.get_status_async('Ping', {}, loop=self.loop)
+        self.assertTrue(future.result())
+
+    @patch('boto.retry.random.random', return_value=0)
+    def test_gives_up_after_retries(self, mock_random):
+        self.connection.num_retries = 1
+        FakeHandler.responses['Ping'] = [(500, 'oops', False)] * 2
+        future = self.connection.make_request_async('Ping', loop=self.loop)
+        self.assertRaises(BotoServerError, future.result)
+
+    def test_error_status_raises_response_error(self):
+        FakeHandler.responses['Ping'] = [(400, '<Error/>', False)]
+        future = self.connection.get_status_async('Ping', {}, loop=self.loop)
+        self.assertRaises(BotoServerError, future.result)
+
+
+if __name__ == '__main__':
+    unittest.main()
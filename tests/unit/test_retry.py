@@ -0,0 +1,242 @@
+# Copyright (c) 2013 Amazon.com, Inc. or its affiliates.  All Rights Reserved
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish, dis-
+# tribute, sublicense, and/or sell copies of the Software, and to permit
+# persons to whom the Software is furnished to do so, subject to the fol-
+# lowing conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABIL-
+# ITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT
+# SHALL THE AUTHOR BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+#
+from tests.unit import unittest
+from mock import Mock, patch
+
+from boto.connection import AWSQueryConnection
+from boto.dynamodb.exceptions import DynamoDBThroughputExceededError
+from boto.dynamodb.layer1 import Layer1
+from boto.exception import BotoServerError, CircuitBreakerOpenError
+from boto.retry import RetryPolicy, RetryBudget, CircuitBreaker
+from boto.retry import throttling_error_code
+
+DYNAMODB_THROTTLED_BODY = (
+    '{"__type":"com.amazonaws.dynamodb.v20111205#'
+    'ProvisionedThroughputExceededException","message":"slow down"}')
+
+THROTTLED_BODY = ('<ErrorResponse><Error><Code>Throttling</Code>'
+                  '<Message>Rate exceeded</Message></Error></ErrorResponse>')
+
+
+def make_response(status, body=''):
+    response = Mock()
+    response.status = status
+    response.reason = 'reason'
+    response.read.return_value = body
+    response.getheader.return_value = None
+    return response
+
+
+class TestRetryPolicy(unittest.TestCase):
+    @patch('boto.retry.random.random', return_value=0.5)
+    def test_legacy_backoff(self, mock_random):
+        policy = RetryPolicy()
+        self.assertEqual(policy.backoff(3), 4)
+
+    def test_full_jitter_is_capped(self):
+        policy = RetryPolicy(jitter='full', base_backoff=1, max_backoff=5)
+        for attempt in range(10):
+            self.assertTrue(0 <= policy.backoff(attempt) <= 5)
+
+    def test_decorrelated_jitter_grows_from_last_sleep(self):
+        policy = RetryPolicy(jitter='decorrelated', base_backoff=1,
+                             max_backoff=100)
+        for _ in range(20):
+            self.assertTrue(1 <= policy.backoff(1, last_sleep=10) <= 30)
+
+    def test_unknown_jitter(self):
+        self.assertRaises(Exception, RetryPolicy, jitter='bogus')
+
+    def test_from_config(self):
+        config = Mock()
+        config.get.return_value = 'full'
+        config.getfloat.side_effect = lambda s, o, d: d
+        config.getbool.return_value = True
+        policy = RetryPolicy.from_config(config)
+        self.assertEqual(policy.jitter, 'full')
+        self.assertTrue(policy.retry_budget)
+        self.assertTrue(policy.circuit_breaker)
+        self.assertTrue(policy.retry_throttled)
+
+    def test_throttling_error_code_keeps_body_readable(self):
+        response = make_response(400, THROTTLED_BODY)
+        self.assertEqual(throttling_error_code(response), 'Throttling')
+        self.assertEqual(response.read(10), THROTTLED_BODY[:10])
+        self.assertEqual(response.read(), THROTTLED_BODY[10:])
+
+    def test_throttling_error_code_json(self):
+        body = ('{"__type": "com.amazonaws.dynamodb.v20111205#'
+                'ProvisionedThroughputExceededException"}')
+        self.assertEqual(throttling_error_code(make_response(400, body)),
+                         'ProvisionedThroughputExceededException')
+
+    def test_throttling_error_code_ignores_other_errors(self):
+        response = make_response(400, '<Code>InvalidParameter</Code>')
+        self.assertEqual(throttling_error_code(response), None)
+        self.assertEqual(response.read(), '<Code>InvalidParameter</Code>')
+        self.assertEqual(throttling_error_code(make_response(200)), None)
+
+
+class TestRetryBudget(unittest.TestCase):
+    def test_exhausts_and_refunds(self):
+        budget = RetryBudget(capacity=10, retry_cost=5, error_cost=10,
+                             success_refund=5, refill_rate=0)
+        self.assertTrue(budget.acquire())
+        self.assertFalse(budget.acquire(error=True))
+        self.assertTrue(budget.acquire())
+        self.assertFalse(budget.acquire())
+        budget.release()
+        self.assertTrue(budget.acquire())
+
+    def test_shared_per_endpoint(self):
+        self.assertTrue(RetryBudget.for_endpoint('a.example.com') is
+                        RetryBudget.for_endpoint('a.example.com'))
+        self.assertFalse(RetryBudget.for_endpoint('a.example.com') is
+                         RetryBudget.for_endpoint('b.example.com'))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.before_request('host')
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertRaises(CircuitBreakerOpenError,
+                          breaker.before_request, 'host')
+
+    def test_half_open_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.before_request('host')
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record_failure()
+        breaker.before_request('host')
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+
+class TestMexeRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.connection = AWSQueryConnection('access_key', 'secret_key',
+                                             host='retry.example.com')
+        self.connection.num_retries = 3
+        self.sleep = patch('boto.connection.time.sleep').start()
+        self.responses = []
+
+    def tearDown(self):
+        patch.stopall()
+        RetryBudget._registry.instances.clear()
+        CircuitBreaker._registry.instances.clear()
+
+    def sender(self, *args):
+        return self.responses.pop(0)
+
+    def mexe(self):
+        request = self.connection.build_base_http_request('GET', '/', None)
+        return self.connection._mexe(request, sender=self.sender,
+                                     override_num_retries=3)
+
+    def test_default_policy_does_not_retry_throttling(self):
+        self.responses = [make_response(400, THROTTLED_BODY)]
+        self.assertEqual(self.mexe().status, 400)
+
+    def test_retries_throttling(self):
+        self.connection.retry_policy = RetryPolicy(retry_throttled=True)
+        self.responses = [make_response(400, THROTTLED_BODY),
+                          make_response(200, 'ok')]
+        self.assertEqual(self.mexe().status, 200)
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_throttling_gives_up(self):
+        self.connection.retry_policy = RetryPolicy(retry_throttled=True)
+        self.responses = [make_response(400, THROTTLED_BODY)] * 4
+        self.assertRaises(BotoServerError, self.mexe)
+
+    def test_budget_stops_server_error_retries(self):
+        self.connection.retry_policy = RetryPolicy(retry_budget=True)
+        budget = RetryBudget.for_endpoint('retry.example.com')
+        budget.tokens = budget.retry_cost
+        budget.refill_rate = 0
+        self.responses = [make_response(503)] * 4
+        self.assertRaises(BotoServerError, self.mexe)
+        self.assertEqual(len(self.responses), 2)
+
+    def test_circuit_breaker_fails_fast(self):
+        self.connection.retry_policy = RetryPolicy(circuit_breaker=True)
+        breaker = CircuitBreaker.for_endpoint('retry.example.com')
+        breaker.failure_threshold = 2
+        breaker.reset_timeout = 60
+        self.responses = [make_response(500)] * 4
+        self.assertRaises(CircuitBreakerOpenError, self.mexe)
+        self.assertEqual(len(self.responses), 2)
+        # The connection went back to the pool.
+        stats = self.connection._pool.get_stats()
+        self.assertEqual(stats['in_use'], 0)
+        self.assertEqual(stats['idle'], 1)
+
+
+
+class TestDynamoDBThrottling(unittest.TestCase):
+    def setUp(self):
+        self.layer1 = Layer1('access_key', 'secret_key')
+
+    def tearDown(self):
+        CircuitBreaker._registry.instances.clear()
+
+    def handle(self, attempt, next_sleep=7):
+        return self.layer1._retry_handler(
+            make_response(400, DYNAMODB_THROTTLED_BODY), attempt, next_sleep)
+
+    def test_legacy_schedule(self):
+        self.assertEqual(self.handle(0)[1:], (1, 0))
+        self.assertEqual(self.handle(2)[1:], (3, 0.2))
+        self.assertEqual(self.layer1.throughput_exceeded_events, 2)
+
+    def test_policy_jitter(self):
+        self.layer1.retry_policy = RetryPolicy(jitter='full')
+        self.assertEqual(self.handle(2)[1:], (3, 7))
+
+    def test_gives_up(self):
+        self.assertRaises(DynamoDBThroughputExceededError, self.handle,
+                          self.layer1.NumberRetries - 1)
+
+    def test_records_failures(self):
+        self.layer1.retry_policy = RetryPolicy(circuit_breaker=True)
+        breaker = CircuitBreaker.for_endpoint(self.layer1.server_name())
+        self.handle(0)
+        self.assertEqual(breaker.failures, 1)
+
+    def test_failures_are_keyed_like_requests(self):
+        self.layer1 = Layer1('access_key', 'secret_key', port=8000,
+                             is_secure=False)
+        self.layer1.retry_policy = RetryPolicy(circuit_breaker=True)
+        breaker = CircuitBreaker.for_endpoint(self.layer1.server_name())
+        self.assertTrue(self.layer1.server_name().endswith(':8000'))
+        self.handle(0)
+        self.assertEqual(breaker.failures, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()